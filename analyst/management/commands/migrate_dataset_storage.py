@@ -0,0 +1,106 @@
+# analyst/management/commands/migrate_dataset_storage.py
+"""
+Migra StoredDatasets del formato legado (pickle+base64 en data_blob) al
+backend columnar configurado (Parquet por defecto).
+
+Idempotente — los datasets ya migrados se omiten.
+
+Uso:
+    python manage.py migrate_dataset_storage
+    python manage.py migrate_dataset_storage --dry-run
+    python manage.py migrate_dataset_storage --ids <uuid> <uuid>
+    python manage.py migrate_dataset_storage --backend blob     # revertir
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analyst.models import StoredDataset
+from analyst.services.dataset_store import (
+    BACKEND_BLOB, BACKEND_PARQUET, default_backend, get_backend, write_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = 'Migra los datos de StoredDataset al backend de almacenamiento columnar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            choices=[BACKEND_BLOB, BACKEND_PARQUET],
+            default=None,
+            help='Backend destino (default: ANALYST_DATASET_STORAGE)',
+        )
+        parser.add_argument(
+            '--ids',
+            nargs='+',
+            default=None,
+            help='Limitar la migración a estos StoredDataset',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sólo listar los datasets que se migrarían',
+        )
+
+    def handle(self, *args, **options):
+        target = options['backend'] or default_backend()
+        try:
+            get_backend(target)
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        qs = StoredDataset.objects.exclude(storage_backend=target)
+        if options['ids']:
+            qs = qs.filter(id__in=options['ids'])
+
+        # Sólo ids: el blob de cada dataset se carga de a uno
+        pending = list(qs.order_by('created_at').values_list('id', flat=True))
+        self.stdout.write(f'{len(pending)} dataset(s) pendientes → {target}')
+
+        migrated = failed = skipped = 0
+        bytes_before = bytes_after = 0
+
+        for ds_id in pending:
+            ds = StoredDataset.objects.get(id=ds_id)
+            source = get_backend(ds.storage_backend or BACKEND_BLOB)
+            label  = f'{ds.name} ({ds.id})'
+
+            if options['dry_run']:
+                self.stdout.write(f'  · {label} [{ds.storage_backend}] {ds.rows} filas')
+                continue
+
+            try:
+                df = source.read(ds)
+            except Exception as e:
+                df = None
+                self.stderr.write(self.style.ERROR(f'  ✗ {label}: {e}'))
+
+            if df is None:
+                skipped += 1
+                self.stdout.write(self.style.WARNING(f'  - {label}: sin datos, omitido'))
+                continue
+
+            before = len(ds.data_blob) if ds.data_blob else ds.storage_stats.get('bytes', 0)
+            try:
+                write_dataset(ds, df, backend=target)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f'  ✗ {label}: {e}'))
+                continue
+
+            after = ds.storage_stats.get('bytes', 0)
+            bytes_before += before
+            bytes_after  += after
+            migrated += 1
+            self.stdout.write(
+                f'  ✓ {label}: {ds.rows} filas, {before / 1024:.0f} KB → '
+                f'{after / 1024:.0f} KB [{ds.storage_backend}]'
+            )
+
+        if options['dry_run']:
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Migrados: {migrated} · omitidos: {skipped} · errores: {failed} · '
+            f'{bytes_before / 1048576:.1f} MB → {bytes_after / 1048576:.1f} MB'
+        ))
@@ -0,0 +1,164 @@
+# analyst/management/commands/run_jobs.py
+"""
+Worker de la cola de trabajos en BD (analyst/services/job_queue.py).
+
+Ejecuta ETLJob, PipelineRun y la generación histórica del simulador fuera
+del request, y programa las ETLSource según su `frequency`.
+
+Uso:
+    python manage.py run_jobs                       # hilos, ANALYST_JOB_WORKERS
+    python manage.py run_jobs --concurrency 4
+    python manage.py run_jobs --processes           # pool de procesos
+    python manage.py run_jobs --kinds etl_job sim_generate
+    python manage.py run_jobs --once                # vacía la cola y sale
+    python manage.py run_jobs --no-schedule         # sin programador de fuentes
+                                                    # (los huérfanos se recuperan igual)
+
+Varios workers pueden correr a la vez (en uno o varios hosts): el reclamo
+usa SELECT … FOR UPDATE SKIP LOCKED y la programación es idempotente.
+"""
+
+import multiprocessing
+import signal
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from analyst.services import job_queue
+from analyst.services.etl_runner import enqueue_scheduled_sources
+
+
+def _process_init():
+    # Procesos 'spawn': inicializar Django en el hijo
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de trabajos de analyst (ETL, pipelines, simulador)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=getattr(settings, 'ANALYST_JOB_WORKERS', 2),
+            help='Trabajos simultáneos (default: ANALYST_JOB_WORKERS)',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Usar un pool de procesos en lugar de hilos',
+        )
+        parser.add_argument(
+            '--kinds', nargs='+', default=None,
+            help='Tipos de trabajo a consumir (default: todos)',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=2.0,
+            help='Segundos entre consultas a la cola cuando está vacía',
+        )
+        parser.add_argument(
+            '--schedule-every', type=int, default=60,
+            help='Segundos entre pasadas del programador de fuentes',
+        )
+        parser.add_argument(
+            '--requeue-every', type=int, default=60,
+            help='Segundos entre recuperaciones de trabajos huérfanos (siempre activas)',
+        )
+        parser.add_argument(
+            '--no-schedule', action='store_true',
+            help='No programar ETLSource según frequency',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Procesar lo pendiente y salir',
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGINT,  self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        concurrency = max(1, options['concurrency'])
+        worker      = job_queue.worker_name()
+
+        if options['processes']:
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_process_init,
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency,
+                                      thread_name_prefix='analyst-job')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker}: {concurrency} {'procesos' if options['processes'] else 'hilos'}"
+            f"{' · tipos ' + ', '.join(options['kinds']) if options['kinds'] else ''}"
+        ))
+
+        running     = {}          # future → job_id
+        last_sched  = 0.0
+        last_stale  = 0.0
+        done_count  = 0
+
+        try:
+            while self.running:
+                close_old_connections()
+
+                if not options['no_schedule'] and time.monotonic() - last_sched >= options['schedule_every']:
+                    last_sched = time.monotonic()
+                    scheduled  = enqueue_scheduled_sources()
+                    if scheduled:
+                        self.stdout.write(f"  programados: {len(scheduled)}")
+
+                # Independiente de --no-schedule: un worker que sólo consume
+                # también rescata lo que dejó colgado otro worker caído
+                if time.monotonic() - last_stale >= options['requeue_every']:
+                    last_stale = time.monotonic()
+                    stale      = job_queue.requeue_stale()
+                    if stale:
+                        self.stdout.write(f"  recuperados: {stale}")
+
+                job_queue.heartbeat(running.values(), worker)
+
+                # Llenar los huecos libres del pool
+                while len(running) < concurrency:
+                    job = job_queue.claim_next(worker, kinds=options['kinds'])
+                    if job is None:
+                        break
+                    self.stdout.write(f"  → {job.kind} {job.id} (intento {job.attempts})")
+                    running[pool.submit(job_queue.execute, str(job.id))] = job.id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                finished, _ = wait(list(running), timeout=options['poll'],
+                                   return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    job_id = running.pop(fut)
+                    try:
+                        status = fut.result()
+                    except Exception as exc:     # fallo del propio pool (proceso muerto…)
+                        status = f'error del worker: {exc}'
+                    done_count += 1
+                    style = self.style.SUCCESS if status == 'done' else self.style.WARNING
+                    self.stdout.write(style(f"  ✓ {job_id}: {status}"))
+        finally:
+            # Parada ordenada: esperar lo que está en curso
+            if running:
+                self.stdout.write(f"Esperando {len(running)} trabajo(s) en curso…")
+            pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Worker detenido · {done_count} trabajo(s) procesados"))
+
+    def _stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING('\nSeñal de parada recibida. Finalizando…'))
+        self.running = False
@@ -0,0 +1,28 @@
+# analyst/migrations/0015_storeddataset_storage_backend.py
+# Almacenamiento columnar de StoredDataset: los registros existentes quedan
+# en 'blob' y se migran con `manage.py migrate_dataset_storage`.
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0014_etlsource_events_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeddataset',
+            name='storage_backend',
+            field=models.CharField(
+                choices=[('blob', 'Pickle en BD (legado)'), ('parquet', 'Parquet columnar')],
+                default='blob',
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name='storeddataset',
+            name='storage_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
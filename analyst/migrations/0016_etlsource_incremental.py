@@ -0,0 +1,59 @@
+# analyst/migrations/0016_etlsource_incremental.py
+# Extracción incremental por watermark: las fuentes existentes quedan en modo
+# completo (incremental=False) y los jobs previos como 'full'.
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0015_storeddataset_storage_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etlsource',
+            name='incremental',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='etlsource',
+            name='watermark_field',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='etlsource',
+            name='watermark_value',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='etlsource',
+            name='target_dataset',
+            field=models.ForeignKey(
+                blank=True, null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='incremental_sources',
+                to='analyst.storeddataset',
+            ),
+        ),
+        migrations.AddField(
+            model_name='etljob',
+            name='mode',
+            field=models.CharField(
+                choices=[('full', 'Completa'), ('incremental', 'Incremental')],
+                default='full',
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name='etljob',
+            name='watermark_from',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='etljob',
+            name='watermark_to',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
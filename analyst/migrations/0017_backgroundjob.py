@@ -0,0 +1,76 @@
+# analyst/migrations/0017_backgroundjob.py
+# Cola de trabajos en BD + estado 'queued' para ETLJob y PipelineRun.
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0016_etlsource_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='etljob',
+            name='status',
+            field=models.CharField(
+                choices=[('idle', 'Inactivo'), ('queued', 'En cola'), ('running', 'Ejecutando'),
+                         ('done', 'Completado'), ('error', 'Error')],
+                default='idle',
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='pipelinerun',
+            name='status',
+            field=models.CharField(
+                choices=[('idle', 'Inactivo'), ('queued', 'En cola'), ('running', 'Ejecutando'),
+                         ('done', 'Completado'), ('error', 'Error')],
+                default='idle',
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('ref_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('dedupe_key', models.CharField(blank=True, max_length=200, null=True, unique=True)),
+                ('status', models.CharField(
+                    choices=[('queued', 'En cola'), ('running', 'Ejecutando'), ('done', 'Completado'),
+                             ('error', 'Error'), ('cancelled', 'Cancelado')],
+                    default='queued', max_length=20)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('error_msg', models.TextField(blank=True)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(
+                    blank=True, null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='background_jobs',
+                    to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo en segundo plano',
+                'verbose_name_plural': 'Trabajos en segundo plano',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='analyst_bgjob_claim_idx')],
+            },
+        ),
+    ]
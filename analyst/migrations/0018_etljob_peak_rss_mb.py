@@ -0,0 +1,18 @@
+# analyst/migrations/0018_etljob_peak_rss_mb.py
+# Pico de memoria (RSS) registrado por cada ETLJob.
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0017_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etljob',
+            name='peak_rss_mb',
+            field=models.FloatField(default=0.0, help_text='Pico de RSS del proceso durante el job (MB)'),
+        ),
+    ]
@@ -5,9 +5,16 @@ Persistent models for the Dataset Manager + Report Builder.
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+# Backends de almacenamiento — ver analyst/services/dataset_store.py
+STORAGE_BACKENDS = [
+    ("blob",    "Pickle en BD (legado)"),
+    ("parquet", "Parquet columnar"),
+]
+
 
 class StoredDataset(models.Model):
     id          = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -22,6 +29,11 @@ class StoredDataset(models.Model):
     # Serialized DataFrame (pickle+base64) stored in DB so data survives
     # Redis outages and Django restarts.  Populated on save, read on cache miss.
     data_blob   = models.TextField(blank=True, default="")
+    # Where the data actually lives. "blob" = data_blob above; "parquet" =
+    # columnar files under ANALYST_DATASET_ROOT (data_blob stays empty).
+    # storage_stats holds per-part / per-row-group column statistics.
+    storage_backend = models.CharField(max_length=20, choices=STORAGE_BACKENDS, default="blob")
+    storage_stats   = models.JSONField(default=dict, blank=True)
     created_by  = models.ForeignKey(User, on_delete=models.CASCADE, related_name="stored_datasets")
     created_at  = models.DateTimeField(auto_now_add=True)
     updated_at  = models.DateTimeField(auto_now=True)
@@ -88,6 +100,7 @@ class Report(models.Model):
 
 ETL_STATUS = [
     ("idle",    "Inactivo"),
+    ("queued",  "En cola"),
     ("running", "Ejecutando"),
     ("done",    "Completado"),
     ("error",   "Error"),
@@ -100,6 +113,11 @@ ETL_FREQUENCY = [
     ("monthly", "Mensual"),
 ]
 
+ETL_RUN_MODES = [
+    ("full",        "Completa"),
+    ("incremental", "Incremental"),
+]
+
 
 class ETLSource(models.Model):
     """
@@ -171,6 +189,19 @@ class ETLSource(models.Model):
     max_rows     = models.PositiveIntegerField(default=0, help_text="0 = sin límite")
     frequency    = models.CharField(max_length=20, choices=ETL_FREQUENCY, default="manual")
 
+    # ── Extracción incremental ───────────────────────────────────────────────
+    # Con incremental=True cada ejecución extrae sólo las filas posteriores a
+    # watermark_value ("valor|pk" de la última fila, la PK desempata) y las
+    # agrega a target_dataset.
+    # watermark_field vacío = date_field o, en su defecto, la PK.
+    incremental     = models.BooleanField(default=False)
+    watermark_field = models.CharField(max_length=100, blank=True)
+    watermark_value = models.CharField(max_length=100, blank=True)
+    target_dataset  = models.ForeignKey(
+        StoredDataset, null=True, blank=True,
+        on_delete=models.SET_NULL, related_name="incremental_sources",
+    )
+
     created_by   = models.ForeignKey(User, on_delete=models.CASCADE, related_name="etl_sources")
     created_at   = models.DateTimeField(auto_now_add=True)
     updated_at   = models.DateTimeField(auto_now=True)
@@ -199,6 +230,12 @@ class ETLJob(models.Model):
     error_msg      = models.TextField(blank=True)
     rows_extracted = models.PositiveIntegerField(default=0)
     duration_s     = models.FloatField(default=0.0, help_text="Segundos de ejecución")
+    peak_rss_mb    = models.FloatField(default=0.0, help_text="Pico de RSS del proceso durante el job (MB)")
+
+    # Incremental: rows_extracted es el delta; watermark antes/después del run
+    mode           = models.CharField(max_length=20, choices=ETL_RUN_MODES, default="full")
+    watermark_from = models.CharField(max_length=100, blank=True)
+    watermark_to   = models.CharField(max_length=100, blank=True)
 
     # Resulting dataset (null until job completes successfully)
     result_dataset = models.ForeignKey(
@@ -519,6 +556,7 @@ PIPELINE_STEP_TYPES = [
 
 PIPELINE_STATUS = [
     ('idle',    'Inactivo'),
+    ('queued',  'En cola'),
     ('running', 'Ejecutando'),
     ('done',    'Completado'),
     ('error',   'Error'),
@@ -639,3 +677,66 @@ class PipelineRun(models.Model):
 
     def __str__(self):
         return f"{self.pipeline.name} [{self.status}] {self.created_at:%Y-%m-%d %H:%M}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cola de trabajos en segundo plano (analyst/services/job_queue.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+JOB_STATUS = [
+    ('queued',    'En cola'),
+    ('running',   'Ejecutando'),
+    ('done',      'Completado'),
+    ('error',     'Error'),
+    ('cancelled', 'Cancelado'),
+]
+
+
+class BackgroundJob(models.Model):
+    """
+    Trabajo pendiente de la cola en BD. Lo consumen los workers de
+    `manage.py run_jobs`; el handler se resuelve por `kind`
+    (ver job_queue.JOB_HANDLERS).
+
+    ref_id apunta al registro de dominio que el usuario consulta
+    (ETLJob, PipelineRun, SimRun) — el job sólo transporta la ejecución.
+    """
+    id               = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind             = models.CharField(max_length=50)
+    payload          = models.JSONField(default=dict, blank=True)
+    ref_id           = models.CharField(max_length=64, blank=True, db_index=True)
+
+    # Evita encolar dos veces lo mismo (p.ej. una fuente programada por periodo)
+    dedupe_key       = models.CharField(max_length=200, null=True, blank=True, unique=True)
+
+    status           = models.CharField(max_length=20, choices=JOB_STATUS, default='queued')
+    priority         = models.SmallIntegerField(default=0)
+    attempts         = models.PositiveSmallIntegerField(default=0)
+    max_attempts     = models.PositiveSmallIntegerField(default=3)
+    run_after        = models.DateTimeField(default=timezone.now)
+    cancel_requested = models.BooleanField(default=False)
+
+    locked_by        = models.CharField(max_length=100, blank=True)
+    locked_at        = models.DateTimeField(null=True, blank=True)   # heartbeat del worker
+
+    error_msg        = models.TextField(blank=True)
+    result           = models.JSONField(default=dict, blank=True)
+
+    created_by       = models.ForeignKey(
+        User, null=True, blank=True,
+        on_delete=models.SET_NULL, related_name='background_jobs'
+    )
+    created_at       = models.DateTimeField(auto_now_add=True)
+    started_at       = models.DateTimeField(null=True, blank=True)
+    finished_at      = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name        = 'Trabajo en segundo plano'
+        verbose_name_plural = 'Trabajos en segundo plano'
+        ordering            = ['-created_at']
+        indexes             = [
+            models.Index(fields=['status', 'run_after'], name='analyst_bgjob_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} [{self.status}] {self.created_at:%Y-%m-%d %H:%M}"
@@ -5,16 +5,10 @@ para leer/escribir el DataFrame asociado (StoredDataset).
 """
 
 import re
-import uuid
-import pickle
-import base64
 import logging
 import pandas as pd
 from typing import Any, Dict, List, Optional, Tuple
 
-from django.core.cache import cache
-from django.utils import timezone
-
 logger = logging.getLogger(__name__)
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -37,18 +31,6 @@ PANDAS_DTYPE = {
 }
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Helpers internos
-# ─────────────────────────────────────────────────────────────────────────────
-
-def _serialize(df: pd.DataFrame) -> str:
-    return base64.b64encode(pickle.dumps(df)).decode()
-
-
-def _deserialize(blob: str) -> pd.DataFrame:
-    return pickle.loads(base64.b64decode(blob.encode()))
-
-
 # ─────────────────────────────────────────────────────────────────────────────
 # BaseValidator
 # ─────────────────────────────────────────────────────────────────────────────
@@ -233,85 +215,47 @@ class BaseValidator:
     # ── Leer DataFrame de un AnalystBase ─────────────────────────────────────
 
     @classmethod
-    def load_dataframe(cls, analyst_base) -> Optional[pd.DataFrame]:
+    def load_dataframe(cls, analyst_base, columns=None) -> Optional[pd.DataFrame]:
         """
-        Carga el DataFrame asociado al AnalystBase.
-        Intenta Redis primero; si no, deserializa data_blob de la BD.
+        Carga el DataFrame asociado al AnalystBase desde el dataset store
+        (Parquet, o Redis → data_blob para datasets legados).
+        `columns` limita la lectura a ese subconjunto.
         """
-        from analyst.models import StoredDataset
+        from analyst.services.dataset_store import read_dataset
 
         if analyst_base.dataset is None:
             cols = [c['name'] for c in analyst_base.schema]
             return pd.DataFrame(columns=cols)
 
-        ds = analyst_base.dataset
-        # Intento Redis
-        cached = cache.get(ds.cache_key)
-        if cached:
-            try:
-                return _deserialize(cached['data'])
-            except Exception as e:
-                logger.warning("Error leyendo caché de AnalystBase %s: %s", analyst_base.id, e)
-
-        # Fallback: data_blob en BD
-        try:
-            return _deserialize(ds.data_blob)
-        except Exception as e:
-            logger.error("Error deserializando data_blob de AnalystBase %s: %s", analyst_base.id, e)
+        df = read_dataset(analyst_base.dataset, columns=columns)
+        if df is None:
+            logger.error("AnalystBase %s: dataset sin datos disponibles.", analyst_base.id)
             return pd.DataFrame(columns=[c['name'] for c in analyst_base.schema])
+        return df
 
     # ── Guardar DataFrame en un AnalystBase ──────────────────────────────────
 
     @classmethod
     def save_dataframe(cls, analyst_base, df: pd.DataFrame, user) -> None:
         """
-        Persiste el DataFrame actualizado en Redis + StoredDataset.
+        Persiste el DataFrame actualizado en el StoredDataset asociado.
         Crea el StoredDataset si no existe todavía.
         """
-        from analyst.models import StoredDataset
-
-        blob      = _serialize(df)
-        col_names = [str(c) for c in df.columns]
-        dtype_map = {str(c): str(df.dtypes[c]) for c in df.columns}
+        from analyst.services.dataset_store import create_dataset, write_dataset
 
+        meta = {'analyst_base_id': str(analyst_base.id)}
         if analyst_base.dataset is None:
             # Primera vez: crear StoredDataset
-            ds_id    = uuid.uuid4()
-            perm_key = StoredDataset.make_cache_key(str(ds_id))
-            ds = StoredDataset.objects.create(
-                id          = ds_id,
+            analyst_base.dataset = create_dataset(
+                df,
                 name        = f'[BASE] {analyst_base.name}',
                 description = analyst_base.description,
-                cache_key   = perm_key,
-                rows        = len(df),
-                col_count   = len(df.columns),
-                columns     = col_names,
-                dtype_map   = dtype_map,
                 source_file = f'analyst_base:{analyst_base.id}',
-                data_blob   = blob,
-                created_by  = user,
+                meta        = meta,
+                user        = user,
             )
-            analyst_base.dataset = ds
         else:
-            ds = analyst_base.dataset
-            ds.rows      = len(df)
-            ds.col_count = len(df.columns)
-            ds.columns   = col_names
-            ds.dtype_map = dtype_map
-            ds.data_blob = blob
-            ds.updated_at = timezone.now()
-            ds.save(update_fields=['rows', 'col_count', 'columns', 'dtype_map',
-                                   'data_blob', 'updated_at'])
-
-        # Actualizar Redis sin TTL (persistente)
-        cache.set(ds.cache_key, {
-            'data': blob,
-            'meta': {
-                'stored_dataset_id': str(ds.id),
-                'analyst_base_id':   str(analyst_base.id),
-                'filename':          f'analyst_base:{analyst_base.id}',
-            }
-        }, timeout=None)
+            write_dataset(analyst_base.dataset, df, meta=meta)
 
         analyst_base.row_count = len(df)
         analyst_base.save(update_fields=['dataset', 'row_count', 'updated_at'])
@@ -7,11 +7,8 @@ Fuentes: StoredDataset, AnalystBase, ETLSource, DataFrameClipboard.
 
 import logging
 import re
-import pickle
-import base64
 
 import pandas as pd
-from django.core.cache import cache
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -19,23 +16,11 @@ logger = logging.getLogger(__name__)
 # Límite de filas para el resultado del cruce (no-superuser)
 DEFAULT_MAX_ROWS = 200_000
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Helpers de serialización
-# ─────────────────────────────────────────────────────────────────────────────
-
-def _serialize(df: pd.DataFrame) -> str:
-    return base64.b64encode(pickle.dumps(df)).decode()
-
-
-def _deserialize(blob: str) -> pd.DataFrame:
-    return pickle.loads(base64.b64decode(blob.encode()))
-
-
 # ─────────────────────────────────────────────────────────────────────────────
 # Carga de fuentes
 # ─────────────────────────────────────────────────────────────────────────────
 
-def load_source(source_desc: dict, request=None, user=None) -> pd.DataFrame:
+def load_source(source_desc: dict, request=None, user=None, filters=None) -> pd.DataFrame:
     """
     Carga un DataFrame desde cualquier tipo de fuente soportada.
 
@@ -48,15 +33,24 @@ def load_source(source_desc: dict, request=None, user=None) -> pd.DataFrame:
     Parámetros:
         request  — necesario para fuentes tipo 'clip' (usa la sesión)
         user     — necesario para verificar pertenencia de los objetos
+        filters  — filtros [{field, lookup, value, negate}] a aplicar en la
+                   carga (ver plan_cross). Las columnas y los filtros se
+                   empujan al loader: lectura por columnas en datasets
+                   Parquet, .values()/.filter() en fuentes ETL.
     """
     src_type = source_desc.get('type', '').strip()
     src_id   = source_desc.get('id',   '').strip()
     columns  = source_desc.get('columns', [])
+    filters  = filters or []
 
     if not src_type or not src_id:
         raise ValueError("source_desc requiere 'type' e 'id'.")
 
-    df = _load_raw(src_type, src_id, request, user)
+    # Los campos filtrados deben leerse aunque no estén en la proyección
+    read_cols = list(dict.fromkeys(list(columns) + [f.get('field') for f in filters])) \
+        if columns else []
+
+    df = _load_raw(src_type, src_id, request, user, columns=read_cols, filters=filters)
 
     # Selección de columnas
     if columns:
@@ -70,51 +64,39 @@ def load_source(source_desc: dict, request=None, user=None) -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 
-def _load_raw(src_type: str, src_id: str, request, user) -> pd.DataFrame:
+def _load_raw(src_type: str, src_id: str, request, user,
+              columns=None, filters=None) -> pd.DataFrame:
     if src_type == 'stored_dataset':
-        return _load_stored_dataset(src_id, user)
+        df = _load_stored_dataset(src_id, user, columns=columns)
     elif src_type == 'analyst_base':
-        return _load_analyst_base(src_id, user)
+        df = _load_analyst_base(src_id, user, columns=columns)
     elif src_type == 'etl_source':
-        return _load_etl_source(src_id, user)
+        # Filtros y proyección se resuelven dentro de la extracción
+        return _load_etl_source(src_id, user, columns=columns, filters=filters)
     elif src_type == 'clip':
-        return _load_clip(src_id, request)
+        df = _load_clip(src_id, request)
     else:
         raise ValueError(f"Tipo de fuente desconocido: '{src_type}'. "
                          "Válidos: stored_dataset, analyst_base, etl_source, clip")
+    return apply_filters(df, filters) if filters else df
 
 
-def _load_stored_dataset(ds_id: str, user) -> pd.DataFrame:
+def _load_stored_dataset(ds_id: str, user, columns=None) -> pd.DataFrame:
     from analyst.models import StoredDataset
+    from analyst.services.dataset_store import read_dataset
 
     try:
         ds = StoredDataset.objects.get(id=ds_id, created_by=user)
     except StoredDataset.DoesNotExist:
         raise ValueError(f"StoredDataset '{ds_id}' no encontrado o sin acceso.")
 
-    # Redis primero
-    cached = cache.get(ds.cache_key)
-    if cached:
-        try:
-            return _deserialize(cached['data'])
-        except Exception as e:
-            logger.warning("CrossEngine: error leyendo caché de dataset %s: %s", ds_id, e)
-
-    # Fallback a data_blob
-    if ds.data_blob:
-        try:
-            df = _deserialize(ds.data_blob)
-            # Re-calentar Redis
-            cache.set(ds.cache_key, {'data': ds.data_blob,
-                                      'meta': {'stored_dataset_id': str(ds.id)}}, timeout=None)
-            return df
-        except Exception as e:
-            raise ValueError(f"Error deserializando dataset '{ds.name}': {e}")
-
-    raise ValueError(f"Dataset '{ds.name}' no tiene datos disponibles (sin caché ni data_blob).")
+    df = read_dataset(ds, columns=columns or None)
+    if df is None:
+        raise ValueError(f"Dataset '{ds.name}' no tiene datos disponibles.")
+    return df
 
 
-def _load_analyst_base(base_id: str, user) -> pd.DataFrame:
+def _load_analyst_base(base_id: str, user, columns=None) -> pd.DataFrame:
     from analyst.models import AnalystBase
     from analyst.services.base_validator import BaseValidator
 
@@ -123,13 +105,13 @@ def _load_analyst_base(base_id: str, user) -> pd.DataFrame:
     except AnalystBase.DoesNotExist:
         raise ValueError(f"AnalystBase '{base_id}' no encontrada o sin acceso.")
 
-    df = BaseValidator.load_dataframe(base)
+    df = BaseValidator.load_dataframe(base, columns=columns or None)
     if df is None:
         return pd.DataFrame(columns=[c['name'] for c in base.schema])
     return df
 
 
-def _load_etl_source(source_id: str, user) -> pd.DataFrame:
+def _load_etl_source(source_id: str, user, columns=None, filters=None) -> pd.DataFrame:
     from analyst.models import ETLSource
     from analyst.views.etl_manager import _run_extraction
 
@@ -138,7 +120,13 @@ def _load_etl_source(source_id: str, user) -> pd.DataFrame:
     except ETLSource.DoesNotExist:
         raise ValueError(f"ETLSource '{source_id}' no encontrado o sin acceso.")
 
-    df, err = _run_extraction(src, {}, user)
+    runtime_params = {}
+    if columns:
+        runtime_params['fields'] = list(columns)
+    if filters:
+        runtime_params['filters'] = list(filters)
+
+    df, err = _run_extraction(src, runtime_params, user)
     if err:
         raise ValueError(f"Error extrayendo ETLSource '{src.name}': {err}")
     if df is None:
@@ -156,6 +144,204 @@ def _load_clip(clip_key: str, request) -> pd.DataFrame:
     return df
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Planificación: pushdown de proyección y filtros
+# ─────────────────────────────────────────────────────────────────────────────
+
+def source_column_names(source_desc: dict, user=None):
+    """
+    Columnas de una fuente resueltas sólo con metadatos (sin cargar datos).
+    Devuelve None cuando no se pueden conocer de antemano (clip, SQL raw).
+    """
+    src_type = source_desc.get('type', '')
+    src_id   = source_desc.get('id',   '')
+
+    try:
+        if src_type == 'stored_dataset':
+            from analyst.models import StoredDataset
+            return list(StoredDataset.objects.filter(id=src_id, created_by=user)
+                        .values_list('columns', flat=True).get())
+
+        if src_type == 'analyst_base':
+            from analyst.models import AnalystBase
+            schema = (AnalystBase.objects.filter(id=src_id, created_by=user)
+                      .values_list('schema', flat=True).get())
+            return [c['name'] for c in schema]
+
+        if src_type == 'etl_source':
+            from analyst.models import ETLSource
+            return _etl_source_columns(ETLSource.objects.get(id=src_id, created_by=user))
+    except Exception:
+        return None
+
+    return None
+
+
+def _etl_source_columns(src):
+    from analyst.views import etl_manager as etl
+
+    if src.sim_account_id:
+        real = [f['name'] for f in etl._sim_interaction_fields()]
+    elif src.analyst_base_id:
+        real = [c['name'] for c in (src.analyst_base.schema if src.analyst_base else [])]
+    elif src.events_model:
+        real = [f['name'] for f in etl._events_item_fields(src.events_model)]
+    elif src.sql_override.strip():
+        return None
+    else:
+        agg_cfg  = src.aggregations or {}
+        real     = etl._model_field_names(src.model_path)
+        group_by = [g for g in (agg_cfg.get('group_by') or []) if g in real]
+        if group_by:
+            # Igual que _run_extraction: claves de grupo + aliases
+            return None
+        real = sorted(real)
+
+    selected = [f for f in (src.fields or []) if f in real]
+    return selected or real
+
+
+def _visible_columns(desc: dict, known):
+    declared = list(desc.get('columns') or [])
+    if known is None:
+        return None
+    if declared:
+        return [c for c in declared if c in known]
+    return list(known)
+
+
+def _result_names(operation: str, on_pairs: list, suffixes: list,
+                  left_cols: list, right_cols: list):
+    """
+    Replica el nombrado de columnas de _do_merge/_do_concat.
+    Devuelve ({col_izq: nombre_resultado}, {col_der: nombre_resultado}).
+    """
+    if operation == 'concat':
+        return {c: c for c in left_cols}, {c: c for c in right_cols}
+
+    lkeys   = [p['left']  for p in on_pairs]
+    rename  = {p['right']: p['left'] for p in on_pairs}
+    r_after = {c: rename.get(c, c) for c in right_cols}
+    overlap = ({c for c in left_cols if c not in lkeys}
+               & {n for c, n in r_after.items() if c not in rename})
+    sfx_l, sfx_r = (list(suffixes) + ['_x', '_y'])[:2]
+
+    lmap = {c: (f'{c}{sfx_l}' if c in overlap else c) for c in left_cols}
+    rmap = {c: (f'{n}{sfx_r}' if n in overlap and c not in rename else n)
+            for c, n in r_after.items()}
+    return lmap, rmap
+
+
+def _pushdown_filter(f: dict) -> dict:
+    # En post_filters 'isnull' ignora el valor; en el ORM hay que ser explícito.
+    return {**f, 'value': True} if f.get('lookup') == 'isnull' else dict(f)
+
+
+def plan_cross(config: dict, left_cols=None, right_cols=None) -> dict:
+    """
+    Decide qué columnas leer de cada lado y qué post_filters pueden
+    evaluarse antes del join sin alterar el resultado.
+
+    left_cols / right_cols: columnas conocidas de cada fuente (None = desconocidas;
+    en ese caso sólo se respeta la proyección declarada y no se empujan filtros).
+
+    Reglas de filtros (un filtro sobre una columna de un único lado):
+      inner_join → se empuja a ese lado (sobre claves de join, a ambos)
+      left_join  → sólo columnas del lado izquierdo
+      outer_join → nunca (ambos lados pueden aportar nulos)
+      concat     → a ambos lados si la columna existe en los dos
+
+    Devuelve {
+      "left":  {"columns": [...], "filters": [...]},
+      "right": {"columns": [...], "filters": [...]},
+      "post_filters": [...]      # los que quedan tras el join
+    }
+    """
+    operation    = config.get('operation', 'left_join')
+    left_desc    = config.get('left',  {})
+    right_desc   = config.get('right', {})
+    on_pairs     = config.get('on', [])
+    suffixes     = config.get('suffixes', ['_izq', '_der'])
+    post_filters = list(config.get('post_filters') or [])
+    output_cols  = list(config.get('output_columns') or [])
+
+    plan = {
+        'left':  {'columns': list(left_desc.get('columns') or []),  'filters': []},
+        'right': {'columns': list(right_desc.get('columns') or []), 'filters': []},
+        'post_filters': post_filters,
+    }
+
+    vis_l = _visible_columns(left_desc,  left_cols)
+    vis_r = _visible_columns(right_desc, right_cols)
+    if vis_l is None or vis_r is None:
+        return plan
+
+    lkeys = [p.get('left')  for p in on_pairs]
+    rkeys = [p.get('right') for p in on_pairs]
+    if operation != 'concat' and (not all(k in vis_l for k in lkeys)
+                                  or not all(k in vis_r for k in rkeys)):
+        # El join fallará con un error claro en _do_merge; no planificar
+        return plan
+
+    lmap, rmap = _result_names(operation, on_pairs, suffixes, vis_l, vis_r)
+    l_by_name = {n: c for c, n in lmap.items()}
+    r_by_name = {n: c for c, n in rmap.items()}
+
+    # ── Filtros ───────────────────────────────────────────────────────────────
+    remaining = []
+    for f in post_filters:
+        name   = f.get('field', '')
+        in_l   = name in l_by_name
+        in_r   = name in r_by_name
+        is_key = operation != 'concat' and name in lkeys
+
+        push_l = push_r = False
+        if operation == 'inner_join':
+            push_l = in_l and (not in_r or is_key)
+            push_r = in_r and (not in_l or is_key)
+        elif operation == 'left_join':
+            push_l = in_l and (not in_r or is_key)
+        elif operation == 'concat':
+            push_l = push_r = in_l and in_r
+
+        if not (push_l or push_r):
+            remaining.append(f)
+            continue
+        if push_l:
+            plan['left']['filters'].append({**_pushdown_filter(f), 'field': l_by_name[name]})
+        if push_r:
+            plan['right']['filters'].append({**_pushdown_filter(f), 'field': r_by_name[name]})
+    plan['post_filters'] = remaining
+
+    # ── Proyección (sólo si output_columns acota el resultado) ───────────────
+    result_names = set(lmap.values()) | set(rmap.values())
+    if operation == 'concat':
+        result_names.add('_source')
+    if output_cols and set(output_cols) <= result_names:
+        needed = set(output_cols) | {f.get('field') for f in remaining}
+        need_l = {c for c, n in lmap.items() if n in needed} | set(
+            lkeys if operation != 'concat' else [])
+        need_r = {c for c, n in rmap.items() if n in needed} | set(
+            rkeys if operation != 'concat' else [])
+        need_l |= {f['field'] for f in plan['left']['filters']}
+        need_r |= {f['field'] for f in plan['right']['filters']}
+
+        if operation != 'concat':
+            # Conservar ambos lados de una columna solapada para no alterar sufijos
+            rename = {p['right']: p['left'] for p in on_pairs}
+            for c in list(need_l):
+                if c in vis_r and c not in lkeys and c not in rename:
+                    need_r.add(c)
+            for c in list(need_r):
+                if c in vis_l and c not in rename and c not in lkeys:
+                    need_l.add(c)
+
+        plan['left']['columns']  = [c for c in vis_l if c in need_l]
+        plan['right']['columns'] = [c for c in vis_r if c in need_r]
+
+    return plan
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Motor de cruce
 # ─────────────────────────────────────────────────────────────────────────────
@@ -179,17 +365,31 @@ def execute_cross(config: dict, request=None, user=None) -> pd.DataFrame:
     right_desc = config.get('right', {})
     on_pairs   = config.get('on', [])
     suffixes   = config.get('suffixes', ['_izq', '_der'])
-    post_filters  = config.get('post_filters', [])
     output_cols   = config.get('output_columns', [])
 
+    # ── Planificar pushdown ───────────────────────────────────────────────────
+    plan = plan_cross(config,
+                      source_column_names(left_desc,  user=user),
+                      source_column_names(right_desc, user=user))
+    post_filters = plan['post_filters']
+    logger.info("CrossEngine: plan izq=%d cols/%d filtros, der=%d cols/%d filtros, "
+                "post=%d filtros",
+                len(plan['left']['columns']),  len(plan['left']['filters']),
+                len(plan['right']['columns']), len(plan['right']['filters']),
+                len(post_filters))
+
     # ── Cargar fuentes ────────────────────────────────────────────────────────
     logger.info("CrossEngine: cargando fuente izquierda %s/%s",
                 left_desc.get('type'), left_desc.get('id'))
-    df_left  = load_source(left_desc,  request=request, user=user)
+    df_left  = load_source({**left_desc, 'columns': plan['left']['columns']},
+                           request=request, user=user,
+                           filters=plan['left']['filters'])
 
     logger.info("CrossEngine: cargando fuente derecha %s/%s",
                 right_desc.get('type'), right_desc.get('id'))
-    df_right = load_source(right_desc, request=request, user=user)
+    df_right = load_source({**right_desc, 'columns': plan['right']['columns']},
+                           request=request, user=user,
+                           filters=plan['right']['filters'])
 
     # ── Ejecutar operación ────────────────────────────────────────────────────
     if operation == 'concat':
@@ -200,7 +400,7 @@ def execute_cross(config: dict, request=None, user=None) -> pd.DataFrame:
 
     # ── Post-filtros ──────────────────────────────────────────────────────────
     if post_filters:
-        result = _apply_filters(result, post_filters)
+        result = apply_filters(result, post_filters)
 
     # ── Selección de columnas de salida ───────────────────────────────────────
     if output_cols:
@@ -279,10 +479,12 @@ def _do_concat(df_left: pd.DataFrame, df_right: pd.DataFrame,
     return result
 
 
-def _apply_filters(df: pd.DataFrame, filters: list) -> pd.DataFrame:
+def apply_filters(df: pd.DataFrame, filters: list, log_label: str = "CrossEngine") -> pd.DataFrame:
     """
-    Aplica filtros post-merge al DataFrame resultado.
-    Misma interfaz que los filtros de ETLSource.
+    Aplica filtros {field, lookup, value, negate} a un DataFrame.
+    Misma interfaz que los filtros de ETLSource; etl_manager la usa para lo
+    que no se empuja al WHERE, así que define la semántica que el pushdown
+    tiene que respetar.
     """
     _SAFE_LOOKUPS = {
         'exact', 'iexact', 'contains', 'icontains',
@@ -297,7 +499,7 @@ def _apply_filters(df: pd.DataFrame, filters: list) -> pd.DataFrame:
         negate = bool(f.get('negate', False))
 
         if field not in df.columns or lookup not in _SAFE_LOOKUPS:
-            logger.warning("CrossEngine filter ignorado: %s %s", field, lookup)
+            logger.warning("%s filter ignorado: %s %s", log_label, field, lookup)
             continue
 
         try:
@@ -321,7 +523,7 @@ def _apply_filters(df: pd.DataFrame, filters: list) -> pd.DataFrame:
             df = df[~mask] if negate else df[mask]
 
         except Exception as e:
-            logger.warning("CrossEngine filter error (%s %s): %s", field, lookup, e)
+            logger.warning("%s filter error (%s %s): %s", log_label, field, lookup, e)
             continue
 
     return df
@@ -336,44 +538,22 @@ def save_cross_result(cross_source, df: pd.DataFrame, user) -> 'StoredDataset':
     Guarda el DataFrame resultado como StoredDataset y actualiza el CrossSource.
     Elimina el resultado anterior si existe.
     """
-    from analyst.models import StoredDataset
-    import uuid as _uuid
-
-    blob = _serialize(df)
-    ds_id    = _uuid.uuid4()
-    perm_key = StoredDataset.make_cache_key(str(ds_id))
-    col_names = [str(c) for c in df.columns]
-    dtype_map = {str(c): str(df.dtypes[c]) for c in df.columns}
-
-    # Guardar en Redis sin TTL
-    cache.set(perm_key, {
-        'data': blob,
-        'meta': {
-            'stored_dataset_id': str(ds_id),
-            'cross_source_id':   str(cross_source.id),
-            'filename':          f'cross:{cross_source.name}',
-        }
-    }, timeout=None)
-
-    ds = StoredDataset.objects.create(
-        id          = ds_id,
+    from analyst.services.dataset_store import create_dataset
+
+    ds = create_dataset(
+        df,
         name        = f'[Cruce] {cross_source.name}',
         description = f'Resultado del cruce "{cross_source.name}"',
-        cache_key   = perm_key,
-        rows        = len(df),
-        col_count   = len(df.columns),
-        columns     = col_names,
-        dtype_map   = dtype_map,
         source_file = f'cross:{cross_source.id}',
-        data_blob   = blob,
-        created_by  = user,
+        meta        = {'cross_source_id': str(cross_source.id),
+                       'filename':        f'cross:{cross_source.name}'},
+        user        = user,
     )
 
     # Eliminar resultado anterior
     if cross_source.last_result_id:
         try:
             old = cross_source.last_result
-            cache.delete(old.cache_key)
             old.delete()
         except Exception as e:
             logger.warning("CrossEngine: no se pudo eliminar resultado anterior: %s", e)
@@ -394,8 +574,9 @@ def save_cross_result(cross_source, df: pd.DataFrame, user) -> 'StoredDataset':
 def get_source_columns(source_desc: dict, request=None, user=None) -> list:
     """
     Devuelve la lista de columnas de una fuente sin cargar todos los datos.
-    Para StoredDataset y AnalystBase usa metadatos. Para ETLSource y clip
-    carga el DataFrame completo.
+    Para StoredDataset y AnalystBase usa metadatos. Para ETLSource intenta
+    resolverlas desde la configuración; si no es posible (SQL, agregaciones)
+    o es un clip, carga el DataFrame completo.
     """
     src_type = source_desc.get('type', '')
     src_id   = source_desc.get('id',   '')
@@ -417,6 +598,10 @@ def get_source_columns(source_desc: dict, request=None, user=None) -> list:
             return []
 
     elif src_type in ('etl_source', 'clip'):
+        if src_type == 'etl_source':
+            names = source_column_names(source_desc, user=user)
+            if names:
+                return [{'name': c, 'dtype': 'object'} for c in names]
         # Para estas fuentes necesitamos cargar el DataFrame
         try:
             df = _load_raw(src_type, src_id, request, user)
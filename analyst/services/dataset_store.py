@@ -0,0 +1,482 @@
+# analyst/services/dataset_store.py
+"""
+Almacenamiento de los datos de StoredDataset.
+
+Hasta ahora cada dataset vivía como un pickle+base64 dentro de
+StoredDataset.data_blob: ~33% de overhead, la fila completa viajaba desde
+la BD en cada lectura y había que deserializar todo el DataFrame aunque
+el widget sólo necesitara dos columnas.
+
+Este módulo separa *dónde* viven los datos de los modelos/vistas:
+
+  blob     → pickle+base64 en data_blob + copia en Redis (formato legado;
+             defecto si no hay ANALYST_DATASET_ROOT)
+  parquet  → directorio por dataset con uno o más ficheros Parquet
+             (pyarrow). Row groups comprimidos (zstd por defecto) con
+             estadísticas min/max/nulls por columna; las lecturas
+             cargan sólo las columnas pedidas.
+
+El backend de cada dataset queda registrado en StoredDataset.storage_backend,
+de modo que ambos formatos conviven y los datasets antiguos se migran con:
+
+    python manage.py migrate_dataset_storage
+
+API pública:
+    create_dataset(df, name=..., user=..., ...) → StoredDataset
+    write_dataset(ds, df)                       → sobrescribe los datos
+    append_dataset(ds, df)                      → añade filas
+    DatasetWriter(ds | create=...)              → escritura por tramos (ETL)
+    read_dataset(ds, columns=None)              → DataFrame | None
+    delete_dataset_data(ds)                     → borra ficheros / caché
+
+Settings:
+    ANALYST_DATASET_STORAGE         'parquet' | 'blob' | '' (defecto: 'parquet' sólo si
+                                    hay ANALYST_DATASET_ROOT; si no 'blob', que
+                                    sobrevive a reinicios en discos efímeros)
+    ANALYST_DATASET_ROOT            directorio raíz persistente (sin él, con
+                                    'parquet' explícito: BASE_DIR/data/datasets)
+    ANALYST_DATASET_ROW_GROUP_SIZE  filas por row group (defecto 50_000)
+    ANALYST_DATASET_COMPRESSION     códec Parquet (defecto 'zstd')
+    ANALYST_ETL_SPILL_ROWS          filas por volcado de DatasetWriter (defecto 200_000)
+"""
+
+import base64
+import logging
+import pickle
+import shutil
+import uuid
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él se usa el backend blob
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_BLOB    = 'blob'
+BACKEND_PARQUET = 'parquet'
+
+DEFAULT_ROW_GROUP_SIZE = 50_000
+DEFAULT_COMPRESSION    = 'zstd'
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _serialize(df: pd.DataFrame) -> str:
+    return base64.b64encode(pickle.dumps(df)).decode()
+
+
+def _deserialize(s: str) -> pd.DataFrame:
+    return pickle.loads(base64.b64decode(s.encode()))
+
+
+def dataset_root() -> Path:
+    root = getattr(settings, 'ANALYST_DATASET_ROOT', None)
+    return Path(root) if root else Path(settings.BASE_DIR) / 'data' / 'datasets'
+
+
+def default_backend() -> str:
+    configured = getattr(settings, 'ANALYST_DATASET_STORAGE', '')
+    if not configured:
+        # Parquet sólo con una raíz persistente configurada: en el disco
+        # efímero del deploy los ficheros se perderían en cada reinicio.
+        has_root = bool(getattr(settings, 'ANALYST_DATASET_ROOT', None))
+        configured = BACKEND_PARQUET if has_root else BACKEND_BLOB
+    if configured == BACKEND_PARQUET and pq is None:
+        return BACKEND_BLOB
+    return configured
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas como str e índice plano (requisito de Parquet)."""
+    if any(not isinstance(c, str) for c in df.columns):
+        df = df.copy()
+        df.columns = [str(c) for c in df.columns]
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index(drop=True)
+    return df
+
+
+def _select(df: pd.DataFrame, columns) -> pd.DataFrame:
+    if not columns:
+        return df
+    available = [c for c in columns if c in df.columns]
+    return df[available] if available else df
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backends
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BlobBackend:
+    """Formato legado: pickle+base64 en data_blob, con Redis como primer nivel."""
+
+    name = BACKEND_BLOB
+
+    def write(self, ds, df: pd.DataFrame, meta: dict | None = None) -> dict:
+        blob = _serialize(df)
+        ds.data_blob = blob
+        cache.set(ds.cache_key, {
+            'data': blob,
+            'meta': {**(meta or {}), 'stored_dataset_id': str(ds.id)},
+        }, timeout=None)
+        return {'bytes': len(blob)}
+
+    def append(self, ds, df: pd.DataFrame) -> dict:
+        current = self.read(ds)
+        if current is not None and len(current):
+            df = pd.concat([current, df], ignore_index=True)
+        return self.write(ds, df)
+
+    def read(self, ds, columns=None) -> pd.DataFrame | None:
+        raw = cache.get(ds.cache_key)
+        if raw:
+            try:
+                return _select(_deserialize(raw['data']), columns)
+            except Exception as exc:
+                logger.warning("DatasetStore: caché corrupta para %s: %s", ds.id, exc)
+
+        if not ds.data_blob:
+            return None
+        df = _deserialize(ds.data_blob)
+        # Re-calentar Redis para las siguientes lecturas
+        cache.set(ds.cache_key, {
+            'data': ds.data_blob,
+            'meta': {'stored_dataset_id': str(ds.id), 'filename': ds.source_file},
+        }, timeout=None)
+        return _select(df, columns)
+
+    def delete(self, ds) -> None:
+        cache.delete(ds.cache_key)
+
+
+class ParquetBackend:
+    """
+    Un directorio por dataset: <root>/<dataset_id>/part-00000.parquet, ...
+    Cada append escribe un part nuevo; write() reemplaza todos los parts.
+    """
+
+    name = BACKEND_PARQUET
+
+    def __init__(self, root: Path | None = None):
+        self.root = Path(root) if root else dataset_root()
+        self.row_group_size = getattr(settings, 'ANALYST_DATASET_ROW_GROUP_SIZE',
+                                      DEFAULT_ROW_GROUP_SIZE)
+        self.compression = getattr(settings, 'ANALYST_DATASET_COMPRESSION',
+                                   DEFAULT_COMPRESSION)
+
+    def path_for(self, ds) -> Path:
+        return self.root / str(ds.id)
+
+    def parts(self, ds) -> list:
+        path = self.path_for(ds)
+        if not path.is_dir():
+            return []
+        return sorted(path.glob('part-*.parquet'))
+
+    def _write_part(self, path: Path, index: int, df: pd.DataFrame) -> Path:
+        path.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        target = path / f'part-{index:05d}.parquet'
+        tmp    = target.with_suffix('.tmp')
+        pq.write_table(
+            table, tmp,
+            row_group_size=self.row_group_size,
+            compression=self.compression,
+            write_statistics=True,
+        )
+        tmp.replace(target)
+        return target
+
+    def write(self, ds, df: pd.DataFrame, meta: dict | None = None) -> dict:
+        path = self.path_for(ds)
+        staging = path.with_name(f'{path.name}.{uuid.uuid4().hex[:8]}.new')
+        try:
+            self._write_part(staging, 0, df)
+            if path.exists():
+                shutil.rmtree(path)
+            staging.replace(path)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        return self.stats(ds)
+
+    def append(self, ds, df: pd.DataFrame) -> dict:
+        existing = self.parts(ds)
+        next_idx = int(existing[-1].stem.split('-')[1]) + 1 if existing else 0
+        self._write_part(self.path_for(ds), next_idx, df)
+        return self.stats(ds)
+
+    def read(self, ds, columns=None) -> pd.DataFrame | None:
+        files = self.parts(ds)
+        if not files:
+            return None
+        frames = []
+        for f in files:
+            names = pq.read_schema(f).names
+            cols  = [c for c in columns if c in names] if columns else None
+            table = pq.read_table(f, columns=cols or None)
+            frames.append(table.to_pandas())
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        return _select(df, columns)
+
+    def delete(self, ds) -> None:
+        shutil.rmtree(self.path_for(ds), ignore_errors=True)
+
+    def stats(self, ds) -> dict:
+        """Metadatos de row groups leídos del footer de cada part."""
+        out = {'bytes': 0, 'parts': []}
+        for f in self.parts(ds):
+            md = pq.ParquetFile(f).metadata
+            part = {'file': f.name, 'rows': md.num_rows, 'row_groups': []}
+            for rg_idx in range(md.num_row_groups):
+                rg = md.row_group(rg_idx)
+                cols = {}
+                for ci in range(rg.num_columns):
+                    col = rg.column(ci)
+                    st  = col.statistics
+                    entry = {'compressed_bytes': col.total_compressed_size}
+                    if st is not None:
+                        entry['nulls'] = st.null_count if st.has_null_count else None
+                        if st.has_min_max:
+                            entry['min'] = _jsonable(st.min)
+                            entry['max'] = _jsonable(st.max)
+                    cols[col.path_in_schema] = entry
+                part['row_groups'].append({'rows': rg.num_rows, 'columns': cols})
+            out['bytes'] += f.stat().st_size
+            out['parts'].append(part)
+        return out
+
+
+def get_backend(name: str | None = None):
+    name = name or default_backend()
+    if name == BACKEND_PARQUET:
+        if pq is None:
+            raise RuntimeError("El backend 'parquet' requiere pyarrow instalado.")
+        return ParquetBackend()
+    if name == BACKEND_BLOB:
+        return BlobBackend()
+    raise ValueError(f"Backend de almacenamiento desconocido: '{name}'")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API
+# ─────────────────────────────────────────────────────────────────────────────
+
+_META_FIELDS = ['rows', 'col_count', 'columns', 'dtype_map',
+                'storage_backend', 'storage_stats', 'data_blob', 'updated_at']
+
+
+def _refresh_meta(ds, df: pd.DataFrame) -> None:
+    ds.rows      = len(df)
+    ds.col_count = len(df.columns)
+    ds.columns   = [str(c) for c in df.columns]
+    ds.dtype_map = {str(c): str(df.dtypes.iloc[i]) for i, c in enumerate(df.columns)}
+
+
+def _save(ds, save: bool) -> None:
+    if not save:
+        return
+    if ds._state.adding:
+        ds.save()
+    else:
+        ds.save(update_fields=_META_FIELDS)
+
+
+def write_dataset(ds, df: pd.DataFrame, meta: dict | None = None,
+                  backend: str | None = None, save: bool = True) -> None:
+    """
+    Persiste df como contenido completo de ds (reemplaza lo anterior).
+    Si Parquet no puede representar el DataFrame (p.ej. columnas object con
+    tipos mezclados) se cae al backend blob para no perder el guardado.
+    """
+    df = _normalize(df)
+    previous = ds.storage_backend if not ds._state.adding else None
+    target   = get_backend(backend)
+
+    try:
+        stats = target.write(ds, df, meta)
+    except Exception as exc:
+        if target.name == BACKEND_BLOB or pa is None or not isinstance(
+                exc, (pa.ArrowException, TypeError, ValueError)):
+            raise
+        logger.warning("DatasetStore: %s no representable en Parquet (%s) — usando blob.",
+                       ds.id, exc)
+        target = BlobBackend()
+        stats  = target.write(ds, df, meta)
+
+    if previous and previous != target.name:
+        get_backend(previous).delete(ds)
+    if target.name != BACKEND_BLOB:
+        ds.data_blob = ''
+
+    ds.storage_backend = target.name
+    ds.storage_stats   = stats
+    _refresh_meta(ds, df)
+    _save(ds, save)
+
+
+def append_dataset(ds, df: pd.DataFrame, save: bool = True) -> None:
+    """Añade filas al final del dataset sin reescribir lo ya almacenado."""
+    df = _normalize(df)
+    if ds.storage_backend == BACKEND_PARQUET and ds.columns:
+        # Mantener el orden de columnas del dataset original
+        df = df.reindex(columns=list(dict.fromkeys(ds.columns + list(df.columns))))
+    backend = get_backend(ds.storage_backend or BACKEND_BLOB)
+    ds.storage_stats = backend.append(ds, df)
+
+    new_cols = [str(c) for c in df.columns if str(c) not in ds.columns]
+    ds.rows += len(df)
+    if new_cols or not ds.columns:
+        ds.columns   = list(ds.columns) + new_cols
+        ds.col_count = len(ds.columns)
+        ds.dtype_map = {**ds.dtype_map,
+                        **{c: str(df[c].dtype) for c in new_cols}}
+    _save(ds, save)
+
+
+def read_dataset(ds, columns=None) -> pd.DataFrame | None:
+    """
+    Devuelve el DataFrame del dataset (o sólo `columns` si se indica).
+    None si el dataset no tiene datos disponibles.
+    """
+    backend = get_backend(ds.storage_backend or BACKEND_BLOB)
+    try:
+        return backend.read(ds, columns=columns)
+    except Exception as exc:
+        logger.error("DatasetStore: error leyendo %s (%s): %s", ds.id, backend.name, exc)
+        return None
+
+
+def delete_dataset_data(ds) -> None:
+    try:
+        get_backend(ds.storage_backend or BACKEND_BLOB).delete(ds)
+    except Exception as exc:
+        logger.warning("DatasetStore: no se pudo borrar el almacenamiento de %s: %s", ds.id, exc)
+
+
+def create_dataset(df: pd.DataFrame, *, name: str, user, description: str = '',
+                   source_file: str = '', meta: dict | None = None,
+                   ds_id=None, backend: str | None = None):
+    """Crea un StoredDataset nuevo y persiste df en el backend por defecto."""
+    from analyst.models import StoredDataset
+
+    ds_id = ds_id or uuid.uuid4()
+    ds = StoredDataset(
+        id          = ds_id,
+        name        = name,
+        description = description,
+        cache_key   = StoredDataset.make_cache_key(str(ds_id)),
+        source_file = source_file,
+        created_by  = user,
+    )
+    write_dataset(ds, df, meta={'filename': source_file, **(meta or {})},
+                  backend=backend, save=True)
+    return ds
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Escritura por tramos
+# ─────────────────────────────────────────────────────────────────────────────
+
+class DatasetWriter:
+    """
+    Persiste un DataFrame que llega por tramos sin juntarlo entero en memoria.
+
+    Los tramos se acumulan hasta `flush_rows` filas y se escriben: el primer
+    volcado crea el dataset (create=dict(name=..., user=..., ...)) o, si se
+    pasa `ds`, se agrega a él. En Parquet cada volcado es un part nuevo.
+
+        writer = DatasetWriter(create={'name': 'x', 'user': u})
+        for chunk in ...:
+            writer.write(chunk)
+        ds = writer.close(schema=df_vacio)   # schema: por si no llegó ninguna fila
+
+    Si la extracción falla a medias, abort() deshace lo escrito: borra el
+    dataset creado o, al agregar a uno existente, los parts nuevos.
+    """
+
+    def __init__(self, ds=None, *, create: dict | None = None, flush_rows: int | None = None):
+        if ds is None and create is None:
+            raise ValueError("DatasetWriter necesita un dataset o los datos para crearlo.")
+        self.ds         = ds
+        self.create     = create
+        self.flush_rows = flush_rows or getattr(
+            settings, 'ANALYST_ETL_SPILL_ROWS', DEFAULT_ROW_GROUP_SIZE * 4)
+        self.rows       = 0
+        self._buf       = []
+        self._buffered  = 0
+        self._snapshot  = None
+        if ds is not None:
+            parts = (ParquetBackend().parts(ds)
+                     if ds.storage_backend == BACKEND_PARQUET and pq is not None else None)
+            self._snapshot = {
+                'parts': parts,
+                **{f: getattr(ds, f) for f in ('rows', 'col_count', 'columns',
+                                               'dtype_map', 'storage_stats')},
+            }
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df is None or not len(df):
+            return
+        self._buf.append(df)
+        self._buffered += len(df)
+        if self._buffered >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        df = self._buf[0] if len(self._buf) == 1 else pd.concat(self._buf, ignore_index=True)
+        self._buf, self._buffered = [], 0
+        self._persist(df)
+        self.rows += len(df)
+
+    def close(self, schema: pd.DataFrame | None = None):
+        """Vuelca lo pendiente y devuelve el StoredDataset (None si no hubo nada que crear)."""
+        self.flush()
+        if self.ds is None and schema is not None:
+            self._persist(schema.iloc[:0])
+        return self.ds
+
+    def abort(self) -> None:
+        """Descarta lo volcado hasta ahora (best effort)."""
+        self._buf, self._buffered = [], 0
+        if self.ds is None or not self.rows:
+            return
+        if self._snapshot is None:
+            self.ds.delete()          # la señal post_delete borra los ficheros
+            self.ds = None
+        elif self._snapshot['parts'] is not None:
+            keep = set(self._snapshot['parts'])
+            for part in ParquetBackend().parts(self.ds):
+                if part not in keep:
+                    part.unlink(missing_ok=True)
+            for field in ('rows', 'col_count', 'columns', 'dtype_map', 'storage_stats'):
+                setattr(self.ds, field, self._snapshot[field])
+            _save(self.ds, True)
+        else:
+            logger.warning("DatasetWriter: no se puede deshacer el append blob en %s", self.ds.id)
+        self.rows = 0
+
+    def _persist(self, df: pd.DataFrame) -> None:
+        if self.ds is None:
+            self.ds = create_dataset(df, **self.create)
+        else:
+            append_dataset(self.ds, df)
@@ -0,0 +1,351 @@
+# analyst/services/etl_runner.py
+"""
+Ejecución de un ETLJob: extracción + guardado del resultado.
+
+Modo completo     → cada ejecución crea un StoredDataset nuevo.
+Modo incremental  → (ETLSource.incremental) sólo se extraen las filas
+                    posteriores a watermark_value; se agregan al dataset
+                    destino de la fuente y el job registra el delta
+                    (rows_extracted, watermark_from / watermark_to).
+                    watermark_value es "valor|pk" de la última fila: el
+                    campo watermark no es único y la PK desempata (ver
+                    etl_manager._apply_watermark).
+
+La primera ejecución incremental — o una con runtime_params["full_refresh"],
+o tras borrar el dataset destino — extrae todo y crea un dataset nuevo que
+pasa a ser el destino.
+
+Streaming — con ANALYST_ETL_STREAM_TO_STORE (o runtime_params
+["stream_to_store"]) y destino Parquet, los tramos de la extracción van
+directos a un DatasetWriter: el DataFrame completo nunca existe en memoria.
+Cada job registra el pico de RSS observado en ETLJob.peak_rss_mb.
+
+Cola — etl_job_task es el handler de 'etl_job' en services/job_queue.py y
+enqueue_scheduled_sources() programa las fuentes según ETLSource.frequency.
+"""
+
+import logging
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from analyst.services.dataset_store import (
+    BACKEND_PARQUET, DatasetWriter, append_dataset, create_dataset, default_backend,
+)
+from analyst.services.etl_stream import RssMonitor
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_SEP = "|"
+
+
+def source_label(src) -> str:
+    """Etiqueta source_file del dataset según el tipo de fuente."""
+    if src.sim_account_id:
+        return f"Sim:{src.sim_account_id}"
+    if src.analyst_base_id:
+        return f"AnalystBase:{src.analyst_base_id}"
+    if getattr(src, 'events_model', None):
+        return f"Events:{src.events_model}"
+    return f"ETL:{src.model_path or 'SQL'}"
+
+
+def watermark_str(value) -> str:
+    """Serializa el máximo de la columna watermark para guardarlo en CharField."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):          # escalares numpy
+        value = value.item()
+    return str(value)
+
+
+def last_watermark(df, wm_field, wm_pk=None) -> str:
+    """
+    "valor|pk" de la última fila con watermark: la extracción incremental
+    llega ordenada por (watermark, pk), así que es también el máximo.
+    """
+    if wm_field not in df.columns:
+        return ''
+    rows = df[df[wm_field].notna()]
+    if not len(rows):
+        return ''
+    last  = rows.iloc[-1]
+    value = watermark_str(last[wm_field])
+    if wm_pk and wm_pk in rows.columns:
+        value = f"{value}{WATERMARK_SEP}{watermark_str(last[wm_pk])}"
+    return value
+
+
+def stream_to_store(params: dict, target=None) -> bool:
+    """
+    ¿Volcar los tramos directamente al dataset? Sólo si el destino es Parquet:
+    en blob cada append reescribe el pickle entero.
+    """
+    wanted  = params.get("stream_to_store",
+                         getattr(settings, "ANALYST_ETL_STREAM_TO_STORE", True))
+    backend = target.storage_backend if target is not None else default_backend()
+    return bool(wanted) and backend == BACKEND_PARQUET
+
+
+def run_etl_job(job, dataset_name: str | None = None, description: str | None = None):
+    """
+    Ejecuta `job` y lo deja en estado done/error.
+    Devuelve el StoredDataset resultante, o None si falló (motivo en job.error_msg).
+    """
+    from analyst.views.etl_manager import _run_extraction, _watermark_field, _watermark_pk
+
+    src     = job.source
+    user    = job.triggered_by
+    params  = dict(job.runtime_params or {})
+    t0      = time.perf_counter()
+    monitor = RssMonitor()
+    writer  = None
+
+    job.status     = "running"
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    try:
+        wm_field = wm_pk = target = None
+        if src.incremental:
+            wm_field, err = _watermark_field(src)
+            if err:
+                return _fail(job, t0, err)
+            wm_pk  = _watermark_pk(src, wm_field)
+            target = None if params.get("full_refresh") else src.target_dataset
+            after  = src.watermark_value if target is not None else ''
+            # El watermark define el rango: un date_from/date_to haría saltar filas
+            params.pop("date_from", None)
+            params.pop("date_to", None)
+            params.update(watermark_field=wm_field, watermark_pk=wm_pk, watermark_after=after)
+            job.mode           = "incremental"
+            job.watermark_from = after
+
+        name = (dataset_name or src.name).strip()
+        desc = src.description if description is None else description
+        sink = wm_state = None
+        if stream_to_store(params, target):
+            writer = DatasetWriter(target) if target is not None else DatasetWriter(create=dict(
+                name=name, description=desc, source_file=source_label(src), user=user))
+            wm_state = {"last": ''}
+            sink = _chunk_sink(writer, wm_field if src.incremental else None, wm_pk,
+                               _watermark_columns(src, wm_field, wm_pk), wm_state)
+
+        df, err = _run_extraction(src, params, user, sink=sink, monitor=monitor)
+        if err or df is None:
+            if writer is not None:
+                writer.abort()
+            return _fail(job, t0, err or "Sin datos.", monitor)
+
+        if writer is not None:
+            if len(df):
+                sink(df)    # rutas sin streaming (SQL, AnalystBase, agregaciones)
+            df   = df.drop(columns=_watermark_columns(src, wm_field, wm_pk), errors="ignore")
+            ds   = writer.close(schema=df)
+            rows = writer.rows
+            if src.incremental:
+                _advance_watermark(src, job, ds, wm_state["last"], target)
+        else:
+            rows = len(df)
+            if src.incremental:
+                ds = _store_increment(src, job, df, wm_field, wm_pk, target, name, desc)
+            else:
+                ds = create_dataset(df, name=name, description=desc,
+                                    source_file=source_label(src), user=user)
+        del df
+        monitor.sample()
+
+        job.status         = "done"
+        job.rows_extracted = rows
+        job.duration_s     = round(time.perf_counter() - t0, 2)
+        job.peak_rss_mb    = round(monitor.peak_mb, 1)
+        job.result_dataset = ds
+        job.finished_at    = timezone.now()
+        job.save()
+
+        logger.info("ETL job %s [%s%s]: %d rows %.1fs peak %.0fMB → %s by %s",
+                    job.id, job.mode, ", stream" if writer is not None else "",
+                    rows, job.duration_s, job.peak_rss_mb, ds.id, user)
+        return ds
+
+    except Exception as exc:
+        logger.error("ETL job %s failed: %s", job.id, exc, exc_info=True)
+        if writer is not None:
+            try:
+                writer.abort()
+            except Exception as abort_exc:
+                logger.error("ETL job %s: no se pudo deshacer la escritura: %s", job.id, abort_exc)
+        return _fail(job, t0, str(exc), monitor)
+
+
+def _watermark_columns(src, wm_field, wm_pk) -> list:
+    """Watermark y pk pedidos sólo para avanzar el watermark (no están en src.fields)."""
+    if not (src.incremental and src.fields):
+        return []
+    return [f for f in (wm_field, wm_pk) if f and f not in src.fields]
+
+
+def _chunk_sink(writer, wm_field, wm_pk, drop_cols, wm_state):
+    """Callable para _run_extraction: recuerda el watermark de la última fila y escribe el tramo."""
+    def sink(chunk):
+        if wm_field and len(chunk):
+            wm_state["last"] = last_watermark(chunk, wm_field, wm_pk) or wm_state["last"]
+            chunk = chunk.drop(columns=drop_cols, errors="ignore")
+        writer.write(chunk)
+    return sink
+
+
+def _advance_watermark(src, job, ds, new_wm, target):
+    """Versión streaming de _store_increment: los datos ya están en ds."""
+    if target is None:
+        src.target_dataset  = ds
+        src.watermark_value = new_wm
+    else:
+        src.watermark_value = new_wm or src.watermark_value
+    src.save(update_fields=["target_dataset", "watermark_value", "updated_at"])
+    job.watermark_to = src.watermark_value
+
+
+def _store_increment(src, job, df, wm_field, wm_pk, target, name, description):
+    """Agrega el delta al dataset destino y avanza el watermark de la fuente."""
+    new_wm = last_watermark(df, wm_field, wm_pk)
+    df     = df.drop(columns=_watermark_columns(src, wm_field, wm_pk), errors="ignore")
+
+    if target is None:
+        ds = create_dataset(df, name=name, description=description,
+                            source_file=source_label(src), user=job.triggered_by)
+        src.target_dataset  = ds
+        src.watermark_value = new_wm
+    else:
+        if len(df):
+            append_dataset(target, df)
+        ds = target
+        src.watermark_value = new_wm or src.watermark_value
+
+    src.save(update_fields=["target_dataset", "watermark_value", "updated_at"])
+    job.watermark_to = src.watermark_value
+    return ds
+
+
+def _fail(job, t0, msg, monitor=None):
+    job.status      = "error"
+    job.error_msg   = msg
+    job.duration_s  = round(time.perf_counter() - t0, 2)
+    if monitor is not None:
+        job.peak_rss_mb = round(monitor.peak_mb, 1)
+    job.finished_at = timezone.now()
+    job.save()
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cola de trabajos
+# ─────────────────────────────────────────────────────────────────────────────
+
+def etl_job_task(payload: dict, job=None) -> dict:
+    """Handler 'etl_job' — payload {etl_job_id, dataset_name?, description?}."""
+    from analyst.models import ETLJob
+    from analyst.services.job_queue import JobFailed, job_should_stop
+
+    try:
+        etl = (ETLJob.objects.select_related("source", "source__target_dataset", "triggered_by")
+               .get(id=payload["etl_job_id"]))
+    except ETLJob.DoesNotExist:
+        raise JobFailed(f"ETLJob {payload.get('etl_job_id')} no existe.")
+
+    # Reintento de un job que ya terminó: no repetir (duplicaría el delta)
+    if etl.status == "done":
+        return {"dataset_id": str(etl.result_dataset_id), "rows": etl.rows_extracted}
+    if job_should_stop(job):
+        raise JobFailed("Cancelado por el usuario.")
+
+    ds = run_etl_job(etl, payload.get("dataset_name"), payload.get("description"))
+    if ds is None:
+        raise JobFailed(etl.error_msg)
+    return {"dataset_id": str(ds.id), "rows": etl.rows_extracted}
+
+
+def _fail_etl_job(payload: dict, msg: str) -> None:
+    from analyst.models import ETLJob
+    ETLJob.objects.filter(id=payload.get("etl_job_id"), status__in=["queued", "running"]).update(
+        status="error", error_msg=msg, finished_at=timezone.now())
+
+
+etl_job_task.on_failure = _fail_etl_job
+
+
+_FREQUENCY_PERIOD = {
+    "daily":   lambda d: d.strftime("%Y-%m-%d"),
+    "weekly":  lambda d: "%d-W%02d" % tuple(d.isocalendar()[:2]),
+    "monthly": lambda d: d.strftime("%Y-%m"),
+}
+
+
+def schedule_period(frequency: str, now) -> str | None:
+    """Clave del periodo actual para una frecuencia (None = manual)."""
+    fn = _FREQUENCY_PERIOD.get(frequency)
+    return fn(now) if fn else None
+
+
+def create_queued_job(src, user, runtime_params, exclusive=None):
+    """
+    Crea un ETLJob 'queued' de `src` con la fila de la fuente bloqueada
+    (select_for_update): dos peticiones simultáneas no pueden ver ambas la
+    fuente libre y crear dos ejecuciones. Con exclusive (por defecto
+    src.incremental) devuelve None si ya hay una queued/running — dos
+    ejecuciones incrementales agregarían el mismo delta.
+    Llamar dentro de transaction.atomic().
+    """
+    from analyst.models import ETLJob, ETLSource
+
+    list(ETLSource.objects.select_for_update().filter(pk=src.pk).values_list("pk", flat=True))
+    if exclusive is None:
+        exclusive = src.incremental
+    if exclusive and src.jobs.filter(status__in=["queued", "running"]).exists():
+        return None
+    return ETLJob.objects.create(source=src, runtime_params=runtime_params,
+                                 status="queued", triggered_by=user)
+
+
+def enqueue_scheduled_sources(now=None) -> list:
+    """
+    Encola un ETLJob por cada fuente programada cuyo periodo actual
+    (día / semana ISO / mes) todavía no tiene ejecución. Seguro con varios
+    workers: la dedupe_key del BackgroundJob es única por fuente y periodo.
+    Devuelve los ETLJob creados.
+    """
+    from analyst.models import BackgroundJob, ETLSource
+    from analyst.services.job_queue import enqueue
+
+    now = timezone.localtime(now or timezone.now())
+    if now.hour < getattr(settings, "ANALYST_ETL_SCHEDULE_HOUR", 0):
+        return []
+
+    created = []
+    for src in ETLSource.objects.exclude(frequency="manual").select_related("created_by"):
+        period = schedule_period(src.frequency, now)
+        if period is None:
+            continue
+        key = f"etl_schedule:{src.id}:{period}"
+        if BackgroundJob.objects.filter(dedupe_key=key).exists():
+            continue
+
+        try:
+            with transaction.atomic():
+                etl = create_queued_job(src, src.created_by, {"scheduled": period}, exclusive=True)
+                if etl is None:
+                    continue    # se programará cuando termine la ejecución en curso
+                enqueue("etl_job", {"etl_job_id": str(etl.id)},
+                        user=src.created_by, ref_id=etl.id, dedupe_key=key)
+        except IntegrityError:
+            continue    # otro worker la programó primero
+        created.append(etl)
+        logger.info("ETL schedule: %s (%s %s) → job %s", src.name, src.frequency, period, etl.id)
+    return created
@@ -0,0 +1,179 @@
+# analyst/services/etl_stream.py
+"""
+Extracción ORM por tramos para el ETL.
+
+Antes cada ruta hacía list(qs.values(...)) → pd.DataFrame(records): una
+lista de dicts con la tabla entera (un dict por fila, claves repetidas)
+convivía con el DataFrame final, y el pico de memoria era varias veces
+el tamaño del resultado.
+
+stream_queryset() recorre qs.values_list(...) con iterator(chunk_size) y
+construye un DataFrame por tramo a partir de tuplas, con dtypes fijados
+desde los campos del modelo (los tramos concatenan sin re-inferir tipos).
+Con `sink` cada tramo se entrega al llamador en cuanto se construye —
+etl_runner lo usa para volcarlo directamente al DatasetWriter — y la
+función devuelve sólo el esquema (DataFrame vacío).
+
+Nota: en MySQL el driver no usa cursores de servidor, así que las tuplas
+crudas del tramo SQL siguen llegando de golpe; lo que se evita es la
+lista de dicts y la copia intermedia. Por eso las rutas aplican max_rows
+como LIMIT en SQL antes de llamar aquí.
+
+RssMonitor muestrea la RSS del proceso para registrar el pico de memoria
+del job (ETLJob.peak_rss_mb).
+"""
+
+import os
+import sys
+
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import (
+    BigAutoField, AutoField, BooleanField, DateTimeField,
+    DecimalField, FloatField, IntegerField, SmallAutoField,
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Memoria
+# ─────────────────────────────────────────────────────────────────────────────
+
+def current_rss_mb() -> float:
+    """RSS actual del proceso en MB (0.0 si la plataforma no la expone)."""
+    try:
+        with open('/proc/self/statm') as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1048576
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # Sin /proc: el máximo histórico del proceso (KB en Linux, bytes en macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1048576 if sys.platform == 'darwin' else peak / 1024
+
+
+class RssMonitor:
+    """Pico de RSS observado entre muestras (la RSS es del proceso entero)."""
+
+    def __init__(self):
+        self.start_mb = current_rss_mb()
+        self.peak_mb  = self.start_mb
+
+    def sample(self) -> float:
+        mb = current_rss_mb()
+        if mb > self.peak_mb:
+            self.peak_mb = mb
+        return mb
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tipos por columna
+# ─────────────────────────────────────────────────────────────────────────────
+
+_INT_FIELDS = (IntegerField, AutoField, BigAutoField, SmallAutoField)
+
+
+def column_dtypes(model, fields) -> dict:
+    """
+    dtype pandas por columna según el campo del modelo, para que todos los
+    tramos salgan con el mismo tipo aunque uno traiga sólo nulos.
+    Lo que no tiene un tipo numérico/fecha estable queda fuera (object).
+    """
+    use_tz = getattr(settings, 'USE_TZ', False)
+    dtypes = {}
+    for name in fields:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        target = getattr(field, 'target_field', None) if field.is_relation else field
+        if target is None:
+            continue
+        nullable = field.null
+        if isinstance(target, BooleanField):
+            dtypes[name] = 'object' if nullable else 'bool'
+        elif isinstance(target, _INT_FIELDS):
+            dtypes[name] = 'float64' if nullable else 'int64'
+        elif isinstance(target, (FloatField, DecimalField)):
+            dtypes[name] = 'float64'
+        elif isinstance(target, DateTimeField):
+            dtypes[name] = 'datetime64[ns, UTC]' if use_tz else 'datetime64[ns]'
+    return dtypes
+
+
+def coerce_chunk(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Aplica `dtypes` al tramo; una columna que no convierte queda como está."""
+    for col, dtype in dtypes.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        try:
+            if dtype.startswith('datetime64'):
+                if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = pd.to_datetime(df[col], utc='UTC' in dtype)
+            elif dtype == 'object':
+                df[col] = df[col].astype(object)
+            else:
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming
+# ─────────────────────────────────────────────────────────────────────────────
+
+def frame_from_rows(rows, columns, dtypes) -> pd.DataFrame:
+    return coerce_chunk(pd.DataFrame.from_records(rows, columns=columns), dtypes)
+
+
+def stream_queryset(qs, fields=None, *, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    sink=None, monitor: RssMonitor | None = None) -> pd.DataFrame:
+    """
+    Materializa `qs` (ya filtrado, ordenado y con LIMIT) como DataFrame
+    tramo a tramo vía values_list.
+
+    fields  → columnas a extraer; vacío = todos los campos concretos
+              (attname, igual que qs.values()).
+    sink    → callable(df_tramo): recibe cada tramo y la función devuelve
+              sólo el esquema (0 filas). Sin sink se devuelve el DataFrame
+              completo, concatenado una única vez al final.
+    monitor → RssMonitor a muestrear tras cada tramo.
+    """
+    model   = qs.model
+    columns = list(fields) if fields else [f.attname for f in model._meta.concrete_fields]
+    dtypes  = column_dtypes(model, columns)
+    size    = max(100, int(chunk_size or DEFAULT_CHUNK_SIZE))
+
+    chunks, buf = [], []
+
+    def emit():
+        frame = frame_from_rows(buf, columns, dtypes)
+        buf.clear()
+        if sink is not None:
+            sink(frame)
+        else:
+            chunks.append(frame)
+        if monitor is not None:
+            monitor.sample()
+
+    for row in qs.values_list(*columns).iterator(chunk_size=size):
+        buf.append(row)
+        if len(buf) >= size:
+            emit()
+    if buf:
+        emit()
+
+    if sink is not None or not chunks:
+        return frame_from_rows([], columns, dtypes)
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    chunks.clear()
+    if monitor is not None:
+        monitor.sample()
+    return df
@@ -0,0 +1,293 @@
+# analyst/services/job_queue.py
+"""
+Cola de trabajos en BD (modelo BackgroundJob).
+
+Las vistas encolan con dispatch(); los workers de `manage.py run_jobs`
+reclaman con claim_next() y ejecutan con execute(). Sin broker externo:
+la propia tabla hace de cola (SELECT … FOR UPDATE SKIP LOCKED donde el
+motor lo soporta).
+
+Handlers — JOB_HANDLERS (+ settings.ANALYST_JOB_HANDLERS) mapean `kind`
+a una función `handler(payload, job) -> dict`. El dict devuelto se guarda
+en job.result. Opcionalmente la función define `on_failure(payload, msg)`
+para cerrar el registro de dominio cuando el job falla o se cancela.
+
+Reintentos — cualquier excepción reencola el job con backoff exponencial
+hasta max_attempts; JobFailed marca error definitivo sin reintentar.
+
+Cancelación — cancel() cancela en el acto un job en cola; uno en curso
+recibe cancel_requested y el handler lo consulta con job_should_stop().
+
+Propiedad — locked_by identifica al worker dueño del job en curso y
+locked_at es su heartbeat. requeue_stale() sólo recupera un job si su
+heartbeat no se movió desde que lo leyó (compara locked_by y locked_at en
+el UPDATE) y los cierres (done / error / reintento) exigen que locked_by
+siga siendo el del worker: si un job se recuperó mientras su worker seguía
+vivo, ese worker ya no puede sobrescribir el resultado y job_should_stop()
+le devuelve True para que pare.
+"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from analyst.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+
+JOB_HANDLERS = {
+    'etl_job':      'analyst.services.etl_runner.etl_job_task',
+    'pipeline_run': 'analyst.services.pipeline_engine.pipeline_run_task',
+    'sim_generate': 'sim.engine.generate_task',
+}
+
+MAX_BACKOFF_S = 3600
+
+
+class JobFailed(Exception):
+    """Error definitivo: el job pasa a 'error' sin reintentos."""
+
+
+def queue_enabled() -> bool:
+    return getattr(settings, 'ANALYST_JOB_QUEUE_ENABLED', True)
+
+
+def get_handler(kind: str):
+    handlers = {**JOB_HANDLERS, **getattr(settings, 'ANALYST_JOB_HANDLERS', {})}
+    if kind not in handlers:
+        raise JobFailed(f"Tipo de trabajo desconocido: '{kind}'")
+    return import_string(handlers[kind])
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Encolar
+# ─────────────────────────────────────────────────────────────────────────────
+
+def enqueue(kind: str, payload: dict | None = None, *, user=None, ref_id='',
+            priority: int = 0, dedupe_key: str | None = None,
+            run_after=None, max_attempts: int | None = None) -> BackgroundJob:
+    """
+    Crea el BackgroundJob. Con dedupe_key repetida lanza IntegrityError
+    (el llamador decide si eso significa "ya estaba encolado").
+    """
+    get_handler(kind)   # falla pronto si el kind no existe
+    return BackgroundJob.objects.create(
+        kind         = kind,
+        payload      = payload or {},
+        ref_id       = str(ref_id or ''),
+        priority     = priority,
+        dedupe_key   = dedupe_key,
+        run_after    = run_after or timezone.now(),
+        max_attempts = max_attempts or getattr(settings, 'ANALYST_JOB_MAX_ATTEMPTS', 3),
+        created_by   = user,
+    )
+
+
+def dispatch(kind: str, payload: dict | None = None, **kwargs) -> BackgroundJob:
+    """
+    Encola el trabajo; si la cola está desactivada (ANALYST_JOB_QUEUE_ENABLED
+    = False) lo ejecuta en línea. En ambos casos devuelve el BackgroundJob
+    — status 'queued' significa que lo tomará un worker.
+    """
+    job = enqueue(kind, payload, **kwargs)
+    if not queue_enabled():
+        BackgroundJob.objects.filter(id=job.id).update(
+            status='running', attempts=1, locked_by='inline',
+            locked_at=timezone.now(), started_at=timezone.now())
+        job.refresh_from_db()
+        _run(job, retry=False)
+        job.refresh_from_db()
+    return job
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Worker
+# ─────────────────────────────────────────────────────────────────────────────
+
+def claim_next(worker: str, kinds=None) -> BackgroundJob | None:
+    """Reclama el siguiente job disponible y lo marca 'running' para `worker`."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = BackgroundJob.objects.filter(status='queued', run_after__lte=now)
+        if kinds:
+            qs = qs.filter(kind__in=kinds)
+        qs = qs.order_by('-priority', 'run_after', 'created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        job_id = qs.values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+
+        # El filtro por status hace el reclamo atómico también sin SKIP LOCKED
+        claimed = BackgroundJob.objects.filter(id=job_id, status='queued').update(
+            status='running', locked_by=worker, locked_at=now, started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            return None
+    return BackgroundJob.objects.get(id=job_id)
+
+
+def execute(job_id) -> str:
+    """
+    Ejecuta un job ya reclamado (desde el worker). Devuelve el status final.
+    Se usa tanto en hilos como en procesos (recibe sólo el id).
+    """
+    close_old_connections()
+    try:
+        return _run(BackgroundJob.objects.get(id=job_id))
+    finally:
+        close_old_connections()
+
+
+def _owned(job):
+    """Jobs en curso que siguen siendo de quien reclamó `job`."""
+    return BackgroundJob.objects.filter(id=job.id, status='running', locked_by=job.locked_by)
+
+
+def _lost(job) -> str:
+    logger.warning("JobQueue: %s %s ya no es de %s (recuperado por otro worker); "
+                   "se descarta el resultado", job.kind, job.id, job.locked_by)
+    return 'lost'
+
+
+def _run(job, retry: bool = True) -> str:
+    try:
+        handler = get_handler(job.kind)
+        result  = handler(job.payload, job) or {}
+    except Exception as exc:
+        return _handle_failure(job, exc, retry=retry)
+
+    if not _owned(job).update(
+        status='done', result=result, error_msg='',
+        finished_at=timezone.now(), locked_by='', locked_at=None,
+    ):
+        return _lost(job)
+    logger.info("JobQueue: %s %s done", job.kind, job.id)
+    return 'done'
+
+
+def _handle_failure(job, exc, retry: bool = True) -> str:
+    job.refresh_from_db(fields=['cancel_requested', 'attempts', 'max_attempts'])
+    msg = str(exc) or exc.__class__.__name__
+    now = timezone.now()
+
+    if job.cancel_requested:
+        status = 'cancelled'
+    elif retry and not isinstance(exc, JobFailed) and job.attempts < job.max_attempts:
+        base  = getattr(settings, 'ANALYST_JOB_RETRY_BACKOFF_S', 30)
+        delay = min(base * 2 ** max(job.attempts - 1, 0), MAX_BACKOFF_S)
+        if not _owned(job).update(
+            status='queued', error_msg=msg, locked_by='', locked_at=None,
+            run_after=now + timedelta(seconds=delay),
+        ):
+            return _lost(job)
+        logger.warning("JobQueue: %s %s intento %d/%d falló (%s) — reintento en %ds",
+                       job.kind, job.id, job.attempts, job.max_attempts, msg, delay)
+        return 'queued'
+    else:
+        status = 'error'
+
+    if not _owned(job).update(
+        status=status, error_msg=msg, finished_at=now, locked_by='', locked_at=None,
+    ):
+        return _lost(job)
+    _notify_failure(job, 'Cancelado por el usuario.' if status == 'cancelled' else msg)
+    if status == 'error':
+        logger.error("JobQueue: %s %s falló: %s", job.kind, job.id, msg,
+                     exc_info=not isinstance(exc, JobFailed))
+    return status
+
+
+def _notify_failure(job, msg: str) -> None:
+    try:
+        hook = getattr(get_handler(job.kind), 'on_failure', None)
+        if hook:
+            hook(job.payload, msg)
+    except Exception as exc:
+        logger.error("JobQueue: on_failure de %s %s: %s", job.kind, job.id, exc)
+
+
+def heartbeat(job_ids, worker: str) -> None:
+    """El worker refresca locked_at de los jobs en curso que siguen siendo suyos."""
+    if job_ids:
+        BackgroundJob.objects.filter(
+            id__in=list(job_ids), status='running', locked_by=worker,
+        ).update(locked_at=timezone.now())
+
+
+def requeue_stale() -> int:
+    """
+    Jobs 'running' sin heartbeat (worker caído): se reencolan si les quedan
+    intentos; si no, pasan a error. Antes de tocarlos se les cambia el dueño
+    con un UPDATE condicionado al heartbeat leído: si el worker latió entre
+    la consulta y el UPDATE, el job sigue siendo suyo. Los jobs en línea
+    (cola desactivada) no tienen heartbeat y nunca se recuperan.
+    """
+    now   = timezone.now()
+    limit = now - timedelta(seconds=getattr(settings, 'ANALYST_JOB_STALE_AFTER_S', 600))
+    count = 0
+    stale = BackgroundJob.objects.filter(status='running', locked_at__lt=limit).exclude(locked_by='inline')
+    for job in stale:
+        reaper = f"requeue:{worker_name()}"
+        if not _owned(job).filter(locked_at=job.locked_at).update(locked_by=reaper, locked_at=now):
+            continue
+        dead, job.locked_by = job.locked_by, reaper
+        _handle_failure(job, RuntimeError(f"Worker {dead} sin respuesta."))
+        count += 1
+    return count
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cancelación
+# ─────────────────────────────────────────────────────────────────────────────
+
+def cancel(job: BackgroundJob) -> str:
+    """Cancela un job. Devuelve el status resultante."""
+    if BackgroundJob.objects.filter(id=job.id, status='queued').update(
+            status='cancelled', cancel_requested=True, finished_at=timezone.now()):
+        _notify_failure(job, 'Cancelado por el usuario.')
+        return 'cancelled'
+    BackgroundJob.objects.filter(id=job.id, status='running').update(cancel_requested=True)
+    job.refresh_from_db(fields=['status'])
+    return job.status
+
+
+def job_should_stop(job) -> bool:
+    """
+    Para handlers: True si se pidió cancelar el job en curso o si ya no es
+    de este worker (requeue_stale lo recuperó).
+    """
+    if job is None:
+        return False
+    return BackgroundJob.objects.filter(
+        Q(cancel_requested=True) | ~Q(locked_by=job.locked_by), id=job.id,
+    ).exists()
+
+
+def latest_for(kind: str, ref_id) -> BackgroundJob | None:
+    return (BackgroundJob.objects.filter(kind=kind, ref_id=str(ref_id))
+            .order_by('-created_at').first())
+
+
+def job_row(job: BackgroundJob | None) -> dict | None:
+    if job is None:
+        return None
+    return {
+        "id": str(job.id), "kind": job.kind, "status": job.status,
+        "attempts": job.attempts, "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested, "error_msg": job.error_msg,
+        "run_after": job.run_after.isoformat() if job.run_after else None,
+    }
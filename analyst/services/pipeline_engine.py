@@ -12,62 +12,31 @@ Uso:
 
 import time
 import logging
-import pickle
-import base64
 from datetime import datetime, timezone
 
 import numpy as np
 import pandas as pd
-from django.core.cache import cache
 from django.utils import timezone as dj_tz
 
 from analyst.models import Pipeline, PipelineRun, StoredDataset
+from analyst.services.dataset_store import create_dataset, read_dataset
 from analyst.utils.clipboard import DataFrameClipboard
 
 logger = logging.getLogger(__name__)
 
-# ─── Serialization (same as _core.py) ────────────────────────────────────────
-
-def _serialize(df: pd.DataFrame) -> str:
-    return base64.b64encode(pickle.dumps(df)).decode()
-
-def _deserialize(s: str) -> pd.DataFrame:
-    return pickle.loads(base64.b64decode(s.encode()))
+# ─── Dataset I/O (analyst.services.dataset_store) ────────────────────────────
 
 def _load_dataset(ds: StoredDataset) -> pd.DataFrame | None:
-    raw = cache.get(ds.cache_key)
-    if raw:
-        try:
-            return _deserialize(raw['data'])
-        except Exception:
-            pass
-    if ds.data_blob:
-        try:
-            return _deserialize(ds.data_blob)
-        except Exception:
-            pass
-    return None
+    return read_dataset(ds)
 
 def _save_dataset(df: pd.DataFrame, name: str, user, source_ds: StoredDataset) -> StoredDataset:
     """Persist transformed DataFrame as a new StoredDataset."""
-    import uuid as _uuid
-    cache_key = StoredDataset.make_cache_key(str(_uuid.uuid4()))
-    blob      = _serialize(df)
-    dtype_map = {str(c): str(df.dtypes[c]) for c in df.columns}
-
-    ds = StoredDataset.objects.create(
+    return create_dataset(
+        df,
         name        = name,
-        cache_key   = cache_key,
-        rows        = len(df),
-        col_count   = len(df.columns),
-        columns     = list(df.columns.astype(str)),
-        dtype_map   = dtype_map,
         source_file = f"pipeline:{source_ds.id}",
-        data_blob   = blob,
-        created_by  = user,
+        user        = user,
     )
-    cache.set(cache_key, {'data': blob, 'meta': {}}, timeout=None)
-    return ds
 
 
 # ─── Step executors ───────────────────────────────────────────────────────────
@@ -281,22 +250,31 @@ class PipelineEngine:
         self.input_dataset  = input_dataset
         self.user           = user
 
-    def run(self, output_name: str = None, runtime_params: dict = None) -> tuple:
+    def run(self, output_name: str = None, runtime_params: dict = None,
+            run=None, should_stop=None) -> tuple:
         """
         Execute all steps in order.
 
+        run         — PipelineRun ya creado (p.ej. encolado); None = crear uno.
+        should_stop — callable consultado entre pasos; True cancela la ejecución.
+
         Returns: (result_StoredDataset, error_string | None)
         """
         from analyst.models import PipelineRun
 
-        run = PipelineRun.objects.create(
-            pipeline       = self.pipeline,
-            input_dataset  = self.input_dataset,
-            status         = 'running',
-            triggered_by   = self.user,
-            started_at     = dj_tz.now(),
-            runtime_params = runtime_params or {},
-        )
+        if run is None:
+            run = PipelineRun.objects.create(
+                pipeline       = self.pipeline,
+                input_dataset  = self.input_dataset,
+                status         = 'running',
+                triggered_by   = self.user,
+                started_at     = dj_tz.now(),
+                runtime_params = runtime_params or {},
+            )
+        else:
+            run.status     = 'running'
+            run.started_at = dj_tz.now()
+            run.save(update_fields=['status', 'started_at'])
 
         t0 = time.time()
         df = _load_dataset(self.input_dataset)
@@ -310,6 +288,15 @@ class PipelineEngine:
         steps = sorted(self.pipeline.steps, key=lambda s: s.get('order', 0))
 
         for i, step in enumerate(steps):
+            if should_stop and should_stop():
+                run.status    = 'error'
+                run.error_msg = 'Ejecución cancelada.'
+                run.steps_completed = i
+                run.finished_at     = dj_tz.now()
+                run.duration_s      = time.time() - t0
+                run.save()
+                return None, run.error_msg
+
             step_type = step.get('type', '')
             params    = {**step.get('params', {}), **(runtime_params or {}).get(step_type, {})}
             executor  = _STEP_EXECUTORS.get(step_type)
@@ -357,3 +344,39 @@ class PipelineEngine:
         logger.info("Pipeline '%s' completado: %d pasos, %d rows, %.2fs",
                     self.pipeline.name, len(steps), len(df), run.duration_s)
         return result_ds, None
+
+
+# ─── Cola de trabajos ─────────────────────────────────────────────────────────
+
+def pipeline_run_task(payload: dict, job=None) -> dict:
+    """Handler 'pipeline_run' de services/job_queue.py — payload {run_id, output_name?}."""
+    from analyst.models import PipelineRun
+    from analyst.services.job_queue import JobFailed, job_should_stop
+
+    try:
+        run = (PipelineRun.objects.select_related('pipeline', 'input_dataset', 'triggered_by')
+               .get(id=payload['run_id']))
+    except PipelineRun.DoesNotExist:
+        raise JobFailed(f"PipelineRun {payload.get('run_id')} no existe.")
+    if run.status == 'done':
+        return {'dataset_id': str(run.result_dataset_id)}
+
+    engine = PipelineEngine(run.pipeline, run.input_dataset, run.triggered_by)
+    result_ds, error = engine.run(
+        output_name    = payload.get('output_name'),
+        runtime_params = run.runtime_params,
+        run            = run,
+        should_stop    = lambda: job_should_stop(job),
+    )
+    if error:
+        raise JobFailed(error)
+    return {'dataset_id': str(result_ds.id), 'rows': result_ds.rows}
+
+
+def _fail_pipeline_run(payload: dict, msg: str) -> None:
+    from analyst.models import PipelineRun
+    PipelineRun.objects.filter(id=payload.get('run_id'), status__in=['queued', 'running']).update(
+        status='error', error_msg=msg, finished_at=dj_tz.now())
+
+
+pipeline_run_task.on_failure = _fail_pipeline_run
@@ -3,8 +3,11 @@ import logging
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_out
 from django.contrib.sessions.models import Session
+from django.db.models.signals import post_delete
 from django.utils import timezone
 
+from analyst.models import StoredDataset
+
 logger = logging.getLogger(__name__)
 
 @receiver(user_logged_out)
@@ -40,4 +43,14 @@ def cleanup_expired_sessions():
         return expired[0]
     except Exception as e:
         logger.error(f"Error limpiando sesiones expiradas: {str(e)}")
-        return 0
\ No newline at end of file
+        return 0
+
+
+@receiver(post_delete, sender=StoredDataset)
+def delete_stored_dataset_data(sender, instance, **kwargs):
+    """
+    Borra los ficheros Parquet / la entrada de caché de un StoredDataset
+    eliminado (incluye borrados en cascada desde User, CrossSource, etc.).
+    """
+    from analyst.services.dataset_store import delete_dataset_data
+    delete_dataset_data(instance)
@@ -0,0 +1,210 @@
+# analyst/tests/test_cross_planner.py
+"""
+Tests unitarios para el planificador de pushdown de analyst/services/cross_engine.py.
+No requieren base de datos — plan_cross es una función pura y la equivalencia
+se comprueba con _do_merge/_do_concat/apply_filters sobre DataFrames en memoria.
+
+Cobertura:
+  plan_cross → inner_join: filtros de un solo lado y sobre claves
+               left_join: sólo filtros del lado izquierdo
+               outer_join: ningún filtro empujado
+               concat: sólo columnas presentes en ambos lados
+               columnas desconocidas: sin pushdown
+               proyección acotada por output_columns, con sufijos preservados
+  equivalencia → el resultado con pushdown es idéntico al cálculo sin él
+  _split_pushdown → al WHERE sólo isnull y comparaciones numéricas válidas
+"""
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from analyst.services.cross_engine import (
+    _do_concat, _do_merge, apply_filters, plan_cross,
+)
+
+
+LEFT = pd.DataFrame({
+    'id':     [1, 2, 3, 4],
+    'nombre': ['ana', 'beto', 'carla', 'dani'],
+    'zona':   ['N', 'S', 'N', 'S'],
+    'monto':  [10, 20, 30, 40],
+})
+RIGHT = pd.DataFrame({
+    'cliente_id': [1, 2, 3, 5],
+    'zona':       ['N', 'N', 'S', 'S'],
+    'score':      [0.5, 0.9, 0.1, 0.7],
+})
+
+
+def _config(operation, **extra):
+    cfg = {
+        'operation': operation,
+        'left':  {'type': 'stored_dataset', 'id': 'l', 'columns': []},
+        'right': {'type': 'stored_dataset', 'id': 'r', 'columns': []},
+        'on':    [{'left': 'id', 'right': 'cliente_id'}],
+        'suffixes': ['_izq', '_der'],
+        'post_filters': [],
+        'output_columns': [],
+    }
+    cfg.update(extra)
+    return cfg
+
+
+def _run(cfg, plan=None):
+    """Ejecuta el cruce en memoria, con o sin plan."""
+    left, right = LEFT, RIGHT
+    post = cfg['post_filters']
+    if plan is not None:
+        left  = apply_filters(left,  plan['left']['filters'])
+        right = apply_filters(right, plan['right']['filters'])
+        if plan['left']['columns']:
+            left = left[plan['left']['columns']]
+        if plan['right']['columns']:
+            right = right[plan['right']['columns']]
+        post = plan['post_filters']
+
+    if cfg['operation'] == 'concat':
+        result = _do_concat(left, right, cfg['left'], cfg['right'])
+    else:
+        result = _do_merge(left, right, cfg['operation'], cfg['on'],
+                           cfg['suffixes'], cfg['left'], cfg['right'])
+    result = apply_filters(result, post)
+    if cfg['output_columns']:
+        result = result[[c for c in cfg['output_columns'] if c in result.columns]]
+    return result.reset_index(drop=True)
+
+
+def _plan(cfg):
+    return plan_cross(cfg, list(LEFT.columns), list(RIGHT.columns))
+
+
+class PlanCrossFiltersTest(SimpleTestCase):
+
+    def assertEquivalent(self, cfg):
+        plan = _plan(cfg)
+        pd.testing.assert_frame_equal(_run(cfg, plan), _run(cfg), check_dtype=False)
+        return plan
+
+    def test_inner_join_pushes_single_side_filters(self):
+        cfg = _config('inner_join', post_filters=[
+            {'field': 'monto', 'lookup': 'gte', 'value': 20},
+            {'field': 'score', 'lookup': 'gt',  'value': 0.2},
+        ])
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual([f['field'] for f in plan['left']['filters']],  ['monto'])
+        self.assertEqual([f['field'] for f in plan['right']['filters']], ['score'])
+        self.assertEqual(plan['post_filters'], [])
+
+    def test_inner_join_key_filter_goes_to_both_sides(self):
+        cfg = _config('inner_join', post_filters=[
+            {'field': 'id', 'lookup': 'lte', 'value': 2},
+        ])
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual(plan['left']['filters'][0]['field'],  'id')
+        self.assertEqual(plan['right']['filters'][0]['field'], 'cliente_id')
+
+    def test_suffixed_column_maps_back_to_its_side(self):
+        cfg = _config('inner_join', post_filters=[
+            {'field': 'zona_der', 'lookup': 'exact', 'value': 'S'},
+        ])
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual(plan['left']['filters'], [])
+        self.assertEqual(plan['right']['filters'][0]['field'], 'zona')
+
+    def test_left_join_keeps_right_side_filters(self):
+        cfg = _config('left_join', post_filters=[
+            {'field': 'nombre', 'lookup': 'icontains', 'value': 'a'},
+            {'field': 'score',  'lookup': 'isnull',    'value': ''},
+        ])
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual([f['field'] for f in plan['left']['filters']], ['nombre'])
+        self.assertEqual(plan['right']['filters'], [])
+        self.assertEqual([f['field'] for f in plan['post_filters']], ['score'])
+
+    def test_outer_join_never_pushes(self):
+        cfg = _config('outer_join', post_filters=[
+            {'field': 'monto', 'lookup': 'gt', 'value': 5},
+        ])
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual(plan['left']['filters'], [])
+        self.assertEqual(len(plan['post_filters']), 1)
+
+    def test_concat_only_pushes_shared_columns(self):
+        cfg = _config('concat', post_filters=[
+            {'field': 'zona',  'lookup': 'exact', 'value': 'N'},
+            {'field': 'monto', 'lookup': 'gt',    'value': 15},
+        ])
+        cfg['left']['alias'], cfg['right']['alias'] = 'a', 'b'
+        plan = self.assertEquivalent(cfg)
+        self.assertEqual([f['field'] for f in plan['left']['filters']],  ['zona'])
+        self.assertEqual([f['field'] for f in plan['right']['filters']], ['zona'])
+        self.assertEqual([f['field'] for f in plan['post_filters']], ['monto'])
+
+    def test_unknown_columns_disable_pushdown(self):
+        cfg = _config('inner_join', post_filters=[
+            {'field': 'monto', 'lookup': 'gt', 'value': 5},
+        ])
+        plan = plan_cross(cfg, list(LEFT.columns), None)
+        self.assertEqual(plan['left']['filters'], [])
+        self.assertEqual(len(plan['post_filters']), 1)
+
+    def test_isnull_value_made_explicit(self):
+        cfg = _config('inner_join', post_filters=[
+            {'field': 'nombre', 'lookup': 'isnull', 'value': '', 'negate': True},
+        ])
+        plan = _plan(cfg)
+        self.assertIs(plan['left']['filters'][0]['value'], True)
+
+
+class PlanCrossProjectionTest(SimpleTestCase):
+
+    def test_projection_reads_only_needed_columns(self):
+        cfg = _config('left_join', output_columns=['nombre', 'score'])
+        plan = _plan(cfg)
+        self.assertEqual(plan['left']['columns'],  ['id', 'nombre'])
+        self.assertEqual(plan['right']['columns'], ['cliente_id', 'score'])
+        pd.testing.assert_frame_equal(_run(cfg, plan), _run(cfg), check_dtype=False)
+
+    def test_overlapping_column_read_on_both_sides(self):
+        cfg = _config('inner_join', output_columns=['zona_izq'])
+        plan = _plan(cfg)
+        self.assertIn('zona', plan['left']['columns'])
+        self.assertIn('zona', plan['right']['columns'])
+        pd.testing.assert_frame_equal(_run(cfg, plan), _run(cfg), check_dtype=False)
+
+    def test_unknown_output_column_keeps_declared_projection(self):
+        cfg = _config('inner_join', output_columns=['no_existe'])
+        plan = _plan(cfg)
+        self.assertEqual(plan['left']['columns'],  [])
+        self.assertEqual(plan['right']['columns'], [])
+
+
+class SplitPushdownTest(SimpleTestCase):
+    """Sólo llegan al ORM los filtros cuyo resultado coincide con el de pandas."""
+
+    def _split(self, *filters):
+        from analyst.models import StoredDataset
+        from analyst.views.etl_manager import _split_pushdown
+        return _split_pushdown(StoredDataset, list(filters))
+
+    def test_numeric_comparison_on_numeric_field(self):
+        where, rest = self._split({'field': 'rows', 'lookup': 'gt', 'value': '10'})
+        self.assertEqual(where, [{'field': 'rows', 'lookup': 'gt', 'value': 10.0}])
+        self.assertEqual(rest, [])
+
+    def test_invalid_numeric_value_left_to_pandas(self):
+        f = {'field': 'rows', 'lookup': 'gte', 'value': 'abc'}
+        self.assertEqual(self._split(f), ([], [f]))
+
+    def test_text_lookups_and_text_comparisons_left_to_pandas(self):
+        filters = [
+            {'field': 'name', 'lookup': 'contains', 'value': 'a.c'},
+            {'field': 'name', 'lookup': 'exact', 'value': 'A'},
+            {'field': 'name', 'lookup': 'lt', 'value': '5'},
+            {'field': 'desconocido', 'lookup': 'gt', 'value': '1'},
+        ]
+        self.assertEqual(self._split(*filters), ([], filters))
+
+    def test_isnull_pushed(self):
+        f = {'field': 'name', 'lookup': 'isnull', 'value': True}
+        self.assertEqual(self._split(f), ([f], []))
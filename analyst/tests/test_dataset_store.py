@@ -0,0 +1,158 @@
+# analyst/tests/test_dataset_store.py
+"""
+Tests unitarios para analyst/services/dataset_store.py.
+No requieren base de datos — operan sobre StoredDataset sin guardar
+(save=False) y un directorio temporal como ANALYST_DATASET_ROOT.
+
+Cobertura:
+  write_dataset   → parquet: ficheros, stats de row groups, data_blob vacío
+                    blob: data_blob poblado
+                    fallback a blob con columnas no representables
+  read_dataset    → roundtrip, lectura de subconjunto de columnas
+  append_dataset  → parts adicionales, filas acumuladas, columnas nuevas
+  delete_dataset_data → borra el directorio del dataset
+"""
+
+import shutil
+import tempfile
+import uuid
+
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from analyst.models import StoredDataset
+from analyst.services import dataset_store as store
+
+
+def make_ds() -> StoredDataset:
+    ds_id = uuid.uuid4()
+    return StoredDataset(id=ds_id, name='test',
+                         cache_key=StoredDataset.make_cache_key(str(ds_id)))
+
+
+def make_df(n=10) -> pd.DataFrame:
+    return pd.DataFrame({
+        'agente':  [f'AGT-{i:03d}' for i in range(n)],
+        'llamadas': list(range(n)),
+        'aht':     [300.0 + i for i in range(n)],
+    })
+
+
+_LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class DatasetStoreTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.override = override_settings(
+            ANALYST_DATASET_ROOT=self.root,
+            ANALYST_DATASET_STORAGE='parquet',
+            ANALYST_DATASET_ROW_GROUP_SIZE=4,
+            CACHES=_LOCMEM,
+        )
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class TestParquetBackend(DatasetStoreTestCase):
+
+    def test_write_sets_metadata_and_clears_blob(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(), save=False)
+        self.assertEqual(ds.storage_backend, 'parquet')
+        self.assertEqual(ds.data_blob, '')
+        self.assertEqual(ds.rows, 10)
+        self.assertEqual(ds.columns, ['agente', 'llamadas', 'aht'])
+        self.assertEqual(ds.dtype_map['llamadas'], 'int64')
+
+    def test_row_group_stats(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(), save=False)
+        groups = ds.storage_stats['parts'][0]['row_groups']
+        self.assertEqual([g['rows'] for g in groups], [4, 4, 2])
+        self.assertEqual(groups[0]['columns']['llamadas']['min'], 0)
+        self.assertEqual(groups[-1]['columns']['llamadas']['max'], 9)
+        self.assertGreater(ds.storage_stats['bytes'], 0)
+
+    def test_roundtrip(self):
+        ds, df = make_ds(), make_df()
+        store.write_dataset(ds, df, save=False)
+        pd.testing.assert_frame_equal(store.read_dataset(ds), df)
+
+    def test_column_subset(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(), save=False)
+        out = store.read_dataset(ds, columns=['aht', 'agente', 'inexistente'])
+        self.assertEqual(list(out.columns), ['aht', 'agente'])
+
+    def test_overwrite_replaces_parts(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(10), save=False)
+        store.write_dataset(ds, make_df(3), save=False)
+        self.assertEqual(len(store.read_dataset(ds)), 3)
+        self.assertEqual(len(store.ParquetBackend().parts(ds)), 1)
+
+    def test_append_adds_part(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(5), save=False)
+        extra = make_df(3).assign(canal='inbound')
+        store.append_dataset(ds, extra, save=False)
+        out = store.read_dataset(ds)
+        self.assertEqual(len(out), 8)
+        self.assertEqual(ds.rows, 8)
+        self.assertIn('canal', ds.columns)
+        self.assertEqual(len(store.ParquetBackend().parts(ds)), 2)
+        self.assertTrue(out['canal'].iloc[:5].isna().all())
+
+    def test_mixed_object_column_falls_back_to_blob(self):
+        ds = make_ds()
+        df = pd.DataFrame({'x': [1, 'a', 2.5]}, dtype=object)
+        store.write_dataset(ds, df, save=False)
+        self.assertEqual(ds.storage_backend, 'blob')
+        self.assertTrue(ds.data_blob)
+        self.assertEqual(len(store.read_dataset(ds)), 3)
+
+    def test_delete_removes_directory(self):
+        ds = make_ds()
+        store.write_dataset(ds, make_df(), save=False)
+        path = store.ParquetBackend().path_for(ds)
+        self.assertTrue(path.is_dir())
+        store.delete_dataset_data(ds)
+        self.assertFalse(path.exists())
+
+
+class TestBlobBackend(DatasetStoreTestCase):
+
+    def test_blob_roundtrip(self):
+        ds, df = make_ds(), make_df()
+        store.write_dataset(ds, df, backend='blob', save=False)
+        self.assertEqual(ds.storage_backend, 'blob')
+        self.assertTrue(ds.data_blob)
+        pd.testing.assert_frame_equal(store.read_dataset(ds, columns=['aht']), df[['aht']])
+
+    def test_blob_to_parquet_clears_blob(self):
+        ds, df = make_ds(), make_df()
+        store.write_dataset(ds, df, backend='blob', save=False)
+        ds._state.adding = False
+        store.write_dataset(ds, df, backend='parquet', save=False)
+        self.assertEqual(ds.data_blob, '')
+        pd.testing.assert_frame_equal(store.read_dataset(ds), df)
+
+
+class TestDefaultBackend(SimpleTestCase):
+
+    @override_settings(ANALYST_DATASET_STORAGE='', ANALYST_DATASET_ROOT='')
+    def test_blob_without_persistent_root(self):
+        self.assertEqual(store.default_backend(), 'blob')
+
+    @override_settings(ANALYST_DATASET_STORAGE='', ANALYST_DATASET_ROOT='/srv/datasets')
+    def test_parquet_with_persistent_root(self):
+        self.assertEqual(store.default_backend(), 'parquet' if store.pq is not None else 'blob')
+
+    @override_settings(ANALYST_DATASET_STORAGE='blob', ANALYST_DATASET_ROOT='/srv/datasets')
+    def test_explicit_setting_wins(self):
+        self.assertEqual(store.default_backend(), 'blob')
@@ -0,0 +1,122 @@
+# analyst/tests/test_etl_incremental.py
+"""
+Tests unitarios para la extracción incremental de ETLSource.
+Salvo KeysetWatermarkTest, no requieren base de datos — usan ETLSource sin guardar.
+
+Cobertura:
+  _watermark_field  → defaults por tipo de fuente (sim, events, ORM)
+                      watermark explícito, tipo inválido, SQL/AnalystBase
+  watermark_str     → datetime, Timestamp, escalares numpy, nulos
+  last_watermark    → "valor|pk" de la última fila
+  _apply_watermark  → empates con el máximo cortados por max_rows no se pierden
+  create_queued_job → una sola ejecución incremental en curso por fuente
+"""
+
+import datetime
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from analyst.models import ETLSource
+from analyst.services.etl_runner import create_queued_job, last_watermark, watermark_str
+from analyst.views.etl_manager import _apply_watermark, _watermark_field, _watermark_pk
+
+User = get_user_model()
+
+
+class WatermarkFieldTest(SimpleTestCase):
+
+    def test_sim_defaults_to_generated_at(self):
+        src = ETLSource(name='s', sim_account_id=uuid.uuid4(), incremental=True)
+        self.assertEqual(_watermark_field(src), ('generated_at', None))
+
+    def test_events_defaults_to_created_at(self):
+        src = ETLSource(name='e', events_model='tasks', incremental=True)
+        self.assertEqual(_watermark_field(src), ('created_at', None))
+
+    def test_orm_prefers_date_field_then_pk(self):
+        src = ETLSource(name='o', model_path='auth.User', incremental=True)
+        self.assertEqual(_watermark_field(src), ('id', None))
+        src.date_field = 'date_joined'
+        self.assertEqual(_watermark_field(src), ('date_joined', None))
+
+    def test_uuid_pk_needs_explicit_field(self):
+        src = ETLSource(name='o', model_path='analyst.ETLJob', incremental=True)
+        self.assertIsNone(_watermark_field(src)[0])
+
+    def test_explicit_field_must_be_numeric_or_date(self):
+        src = ETLSource(name='o', model_path='analyst.ETLJob', incremental=True,
+                        watermark_field='rows_extracted')
+        self.assertEqual(_watermark_field(src), ('rows_extracted', None))
+        src.watermark_field = 'status'
+        field, err = _watermark_field(src)
+        self.assertIsNone(field)
+        self.assertIn('numérico o de fecha', err)
+
+    def test_unknown_field(self):
+        src = ETLSource(name='o', model_path='analyst.ETLJob', watermark_field='nope')
+        field, err = _watermark_field(src)
+        self.assertIsNone(field)
+        self.assertIn('no existe', err)
+
+    def test_sql_and_aggregated_sources_rejected(self):
+        src = ETLSource(name='q', sql_override='SELECT 1')
+        self.assertIsNone(_watermark_field(src)[0])
+        src = ETLSource(name='a', model_path='analyst.ETLJob',
+                        aggregations={'group_by': ['status']})
+        self.assertIsNone(_watermark_field(src)[0])
+
+
+class WatermarkStrTest(SimpleTestCase):
+
+    def test_datetime_values_are_isoformat(self):
+        dt = datetime.datetime(2026, 3, 1, 8, 30, tzinfo=datetime.timezone.utc)
+        self.assertEqual(watermark_str(dt), '2026-03-01T08:30:00+00:00')
+        self.assertEqual(watermark_str(pd.Timestamp(dt)), '2026-03-01T08:30:00+00:00')
+        self.assertEqual(watermark_str(datetime.date(2026, 3, 1)), '2026-03-01')
+
+    def test_numpy_scalars(self):
+        self.assertEqual(watermark_str(np.int64(42)), '42')
+        self.assertEqual(watermark_str(pd.Series([3, 9, 5]).max()), '9')
+
+    def test_nulls_are_empty(self):
+        self.assertEqual(watermark_str(None), '')
+        self.assertEqual(watermark_str(pd.NaT), '')
+        self.assertEqual(watermark_str(float('nan')), '')
+
+
+class KeysetWatermarkTest(TestCase):
+
+    def setUp(self):
+        joined = datetime.datetime(2026, 3, 1, tzinfo=datetime.timezone.utc)
+        self.users = [User.objects.create(username=f'u{i}', date_joined=joined) for i in range(3)]
+        self.params = {'watermark_field': 'date_joined', 'watermark_pk': 'id'}
+
+    def _run(self, after, limit):
+        qs = _apply_watermark(User.objects.all(), dict(self.params, watermark_after=after))
+        return pd.DataFrame(list(qs.values('id', 'date_joined')[:limit]))
+
+    def test_ties_cut_by_max_rows_are_picked_up_next_run(self):
+        first = self._run('', 2)
+        after = last_watermark(first, 'date_joined', 'id')
+        self.assertEqual(after, f'2026-03-01T00:00:00+00:00|{self.users[1].id}')
+
+        second = self._run(after, 2)
+        self.assertEqual(list(second['id']), [self.users[2].id])
+        self.assertTrue(self._run(last_watermark(second, 'date_joined', 'id'), 2).empty)
+
+    def test_pk_watermark_needs_no_tiebreak(self):
+        src = ETLSource(name='o', model_path='auth.User', incremental=True)
+        self.assertIsNone(_watermark_pk(src, 'id'))
+        self.assertEqual(_watermark_pk(src, 'date_joined'), 'id')
+
+    def test_single_incremental_run_per_source(self):
+        user = self.users[0]
+        src = ETLSource.objects.create(name='o', model_path='auth.User', incremental=True,
+                                       created_by=user)
+        self.assertIsNotNone(create_queued_job(src, user, {}))
+        self.assertIsNone(create_queued_job(src, user, {}))
+        self.assertIsNotNone(create_queued_job(src, user, {}, exclusive=False))
@@ -0,0 +1,163 @@
+# analyst/tests/test_etl_stream.py
+"""
+Tests unitarios para la extracción por tramos (analyst/services/etl_stream.py)
+y la escritura por tramos (dataset_store.DatasetWriter).
+No requieren base de datos — el queryset se simula con un objeto que
+expone `model` y values_list().iterator().
+
+Cobertura:
+  column_dtypes    → int / FK entera / FK UUID / datetime / texto
+  stream_queryset  → tramos tipados, concatenación, sink (sólo esquema),
+                     resultado vacío con columnas, todos los campos por defecto
+  DatasetWriter    → volcado por umbral, close con esquema, requiere destino
+  stream_to_store  → sólo con destino Parquet, override por runtime_params
+  RssMonitor       → el pico nunca baja
+"""
+
+import datetime
+from unittest import mock
+
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from analyst.models import ETLJob, StoredDataset
+from analyst.services import dataset_store
+from analyst.services.etl_runner import stream_to_store
+from analyst.services.etl_stream import RssMonitor, column_dtypes, stream_queryset
+
+
+class _FakeQS:
+    """Lo mínimo que usa stream_queryset de un QuerySet."""
+
+    def __init__(self, model, rows):
+        self.model = model
+        self.rows  = rows
+        self.asked = None
+
+    def values_list(self, *fields):
+        self.asked = fields
+        return self
+
+    def iterator(self, chunk_size=None):
+        return iter(self.rows)
+
+
+def _rows(n):
+    ts = datetime.datetime(2026, 3, 1, tzinfo=datetime.timezone.utc)
+    return [(i, 'done' if i % 2 else 'error', None if i % 3 else i * 1.5, ts) for i in range(n)]
+
+
+FIELDS = ['rows_extracted', 'status', 'duration_s', 'created_at']
+
+
+class ColumnDtypesTest(SimpleTestCase):
+
+    def test_dtypes_from_model_fields(self):
+        dtypes = column_dtypes(ETLJob, FIELDS + ['triggered_by_id', 'nope'])
+        self.assertEqual(dtypes['rows_extracted'], 'int64')
+        self.assertEqual(dtypes['duration_s'], 'float64')
+        self.assertEqual(dtypes['triggered_by_id'], 'int64')
+        self.assertTrue(dtypes['created_at'].startswith('datetime64'))
+        self.assertNotIn('status', dtypes)
+        self.assertNotIn('nope', dtypes)
+
+    def test_uuid_fk_and_nullable_datetime(self):
+        self.assertEqual(column_dtypes(ETLJob, ['result_dataset_id']), {})   # FK a UUID
+        dtypes = column_dtypes(ETLJob, ['started_at'])
+        self.assertTrue(dtypes['started_at'].startswith('datetime64'))
+
+
+class StreamQuerysetTest(SimpleTestCase):
+
+    def test_concatenates_typed_chunks(self):
+        qs = _FakeQS(ETLJob, _rows(250))
+        df = stream_queryset(qs, FIELDS, chunk_size=100)
+        self.assertEqual(len(df), 250)
+        self.assertEqual(list(df.columns), FIELDS)
+        self.assertEqual(str(df['rows_extracted'].dtype), 'int64')
+        self.assertEqual(str(df['duration_s'].dtype), 'float64')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['created_at']))
+        self.assertEqual(qs.asked, tuple(FIELDS))
+
+    def test_sink_receives_chunks_and_gets_schema_back(self):
+        chunks = []
+        monitor = RssMonitor()
+        df = stream_queryset(_FakeQS(ETLJob, _rows(250)), FIELDS, chunk_size=100,
+                             sink=chunks.append, monitor=monitor)
+        self.assertEqual([len(c) for c in chunks], [100, 100, 50])
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), FIELDS)
+        # Un tramo sólo con nulos conserva el tipo numérico
+        self.assertEqual(str(chunks[1]['duration_s'].dtype), 'float64')
+        self.assertGreater(monitor.peak_mb, 0)
+
+    def test_empty_result_keeps_columns(self):
+        df = stream_queryset(_FakeQS(ETLJob, []), FIELDS)
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), FIELDS)
+
+    def test_all_concrete_fields_by_default(self):
+        qs = _FakeQS(ETLJob, [])
+        df = stream_queryset(qs)
+        self.assertIn('source_id', df.columns)
+        self.assertIn('triggered_by_id', df.columns)
+        self.assertEqual(list(df.columns), list(qs.asked))
+
+
+class DatasetWriterTest(SimpleTestCase):
+
+    def test_requires_target(self):
+        with self.assertRaises(ValueError):
+            dataset_store.DatasetWriter()
+
+    def test_flushes_by_threshold(self):
+        created, appended = [], []
+        ds = mock.Mock()
+
+        def fake_create(df, **kw):
+            created.append(len(df))
+            return ds
+
+        with mock.patch.object(dataset_store, 'create_dataset', fake_create), \
+             mock.patch.object(dataset_store, 'append_dataset',
+                               lambda d, df: appended.append(len(df))):
+            writer = dataset_store.DatasetWriter(create={'name': 'x', 'user': None},
+                                                 flush_rows=100)
+            for _ in range(5):
+                writer.write(pd.DataFrame({'a': range(60)}))
+            self.assertIs(writer.close(), ds)
+
+        self.assertEqual(created, [120])
+        self.assertEqual(appended, [120, 60])
+        self.assertEqual(writer.rows, 300)
+
+    def test_close_without_rows_creates_from_schema(self):
+        with mock.patch.object(dataset_store, 'create_dataset',
+                               lambda df, **kw: ('ds', list(df.columns), len(df))):
+            writer = dataset_store.DatasetWriter(create={'name': 'x', 'user': None})
+            self.assertEqual(writer.close(schema=pd.DataFrame({'a': [1]})), ('ds', ['a'], 0))
+
+
+class StreamToStoreTest(SimpleTestCase):
+
+    @override_settings(ANALYST_ETL_STREAM_TO_STORE=True)
+    def test_only_for_parquet_targets(self):
+        self.assertTrue(stream_to_store({}, StoredDataset(storage_backend='parquet')))
+        self.assertFalse(stream_to_store({}, StoredDataset(storage_backend='blob')))
+        self.assertFalse(stream_to_store({'stream_to_store': False},
+                                         StoredDataset(storage_backend='parquet')))
+
+    @override_settings(ANALYST_ETL_STREAM_TO_STORE=False)
+    def test_runtime_param_overrides_setting(self):
+        target = StoredDataset(storage_backend='parquet')
+        self.assertFalse(stream_to_store({}, target))
+        self.assertTrue(stream_to_store({'stream_to_store': True}, target))
+
+
+class RssMonitorTest(SimpleTestCase):
+
+    def test_peak_is_monotonic(self):
+        monitor = RssMonitor()
+        first = monitor.peak_mb
+        monitor.sample()
+        self.assertGreaterEqual(monitor.peak_mb, first)
@@ -0,0 +1,118 @@
+# analyst/tests/test_job_queue.py
+"""
+Tests unitarios para la cola de trabajos (analyst/services/job_queue.py)
+y el programador de fuentes ETL (etl_runner.schedule_period).
+Salvo JobOwnershipTest, no requieren base de datos.
+
+Cobertura:
+  get_handler      → resuelve los handlers registrados, kind desconocido
+                     handlers extra vía settings.ANALYST_JOB_HANDLERS
+                     on_failure definido en los handlers de dominio
+  schedule_period  → claves diaria / semanal ISO / mensual, manual = None
+  enqueue_scheduled_sources → antes de ANALYST_ETL_SCHEDULE_HOUR no programa
+  requeue_stale    → sólo recupera jobs cuyo heartbeat no se movió; el worker
+                     anterior no sobrescribe el resultado y debe parar;
+                     run_jobs la ejecuta también con --no-schedule
+"""
+
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from analyst.models import BackgroundJob
+from analyst.services import job_queue
+from analyst.services.etl_runner import enqueue_scheduled_sources, schedule_period
+
+
+def _noop_handler(payload, job=None):
+    return {'ok': True}
+
+
+class GetHandlerTest(SimpleTestCase):
+
+    def test_builtin_handlers_resolve(self):
+        for kind in job_queue.JOB_HANDLERS:
+            handler = job_queue.get_handler(kind)
+            self.assertTrue(callable(handler))
+            self.assertTrue(callable(getattr(handler, 'on_failure', None)), kind)
+
+    def test_unknown_kind_is_permanent_failure(self):
+        with self.assertRaises(job_queue.JobFailed):
+            job_queue.get_handler('no_existe')
+
+    @override_settings(ANALYST_JOB_HANDLERS={
+        'noop': 'analyst.tests.test_job_queue._noop_handler'})
+    def test_settings_handlers(self):
+        self.assertIs(job_queue.get_handler('noop'), _noop_handler)
+
+    def test_should_stop_without_job(self):
+        self.assertFalse(job_queue.job_should_stop(None))
+
+
+class SchedulePeriodTest(SimpleTestCase):
+
+    def test_period_keys(self):
+        d = datetime(2026, 3, 5, 10, 0)     # jueves, semana ISO 10
+        self.assertEqual(schedule_period('daily', d),   '2026-03-05')
+        self.assertEqual(schedule_period('weekly', d),  '2026-W10')
+        self.assertEqual(schedule_period('monthly', d), '2026-03')
+        self.assertIsNone(schedule_period('manual', d))
+
+    def test_weekly_key_stable_across_week(self):
+        monday = datetime(2026, 3, 2, 3, 0)
+        sunday = datetime(2026, 3, 8, 23, 0)
+        self.assertEqual(schedule_period('weekly', monday), schedule_period('weekly', sunday))
+
+    @override_settings(ANALYST_ETL_SCHEDULE_HOUR=2)
+    def test_nothing_scheduled_before_hour(self):
+        early = timezone.make_aware(datetime(2026, 3, 5, 1, 30))
+        self.assertEqual(enqueue_scheduled_sources(now=early), [])
+
+
+@override_settings(ANALYST_JOB_HANDLERS={'noop': 'analyst.tests.test_job_queue._noop_handler'},
+                   ANALYST_JOB_STALE_AFTER_S=600)
+class JobOwnershipTest(TestCase):
+
+    def setUp(self):
+        job_queue.enqueue('noop')
+        self.job = job_queue.claim_next('w1')
+
+    def _age(self, seconds):
+        BackgroundJob.objects.filter(id=self.job.id).update(
+            locked_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_heartbeat_keeps_job(self):
+        self._age(900)
+        job_queue.heartbeat([self.job.id], 'w1')
+        self.assertEqual(job_queue.requeue_stale(), 0)
+        self.assertFalse(job_queue.job_should_stop(self.job))
+
+    def test_requeued_job_not_finished_by_previous_worker(self):
+        self._age(900)
+        self.assertEqual(job_queue.requeue_stale(), 1)
+        self.assertTrue(job_queue.job_should_stop(self.job))
+
+        # El worker anterior termina tarde: ni su heartbeat ni su resultado cuentan
+        job_queue.heartbeat([self.job.id], 'w1')
+        self.assertEqual(job_queue._run(self.job), 'lost')
+        stale = BackgroundJob.objects.get(id=self.job.id)
+        self.assertEqual((stale.status, stale.locked_by), ('queued', ''))
+
+        BackgroundJob.objects.filter(id=self.job.id).update(run_after=timezone.now())   # sin backoff
+        reclaimed = job_queue.claim_next('w2')
+        self.assertEqual(job_queue._run(reclaimed), 'done')
+
+    def test_inline_jobs_are_never_requeued(self):
+        BackgroundJob.objects.filter(id=self.job.id).update(locked_by='inline')
+        self._age(900)
+        self.assertEqual(job_queue.requeue_stale(), 0)
+
+    def test_worker_without_scheduler_still_requeues(self):
+        self._age(900)
+        out = StringIO()
+        call_command('run_jobs', '--no-schedule', '--once', '--kinds', 'otro', stdout=out)
+        self.assertEqual(BackgroundJob.objects.get(id=self.job.id).status, 'queued')
+        self.assertIn('recuperados: 1', out.getvalue())
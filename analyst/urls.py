@@ -88,6 +88,7 @@ urlpatterns = [
     path('etl/sources/<uuid:source_id>/delete/', etl_manager.etl_source_delete, name='etl_source_delete'),
     path('etl/sources/<uuid:source_id>/run/', etl_manager.etl_source_run,      name='etl_source_run'),
     path('etl/jobs/<uuid:job_id>/status/',   etl_manager.etl_job_status,       name='etl_job_status'),
+    path('etl/jobs/<uuid:job_id>/cancel/',   etl_manager.etl_job_cancel,       name='etl_job_cancel'),
     path('etl/api/models/',                  etl_manager.etl_models_api,       name='etl_models_api'),
     path('etl/api/model-fields/',            etl_manager.etl_model_fields_api, name='etl_model_fields_api'),
 
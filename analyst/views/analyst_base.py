@@ -611,14 +611,9 @@ def base_bulk_import_raw(request, base_id):
             except StoredDataset.DoesNotExist:
                 return JsonResponse({'success': False, 'error': 'Dataset no encontrado o sin acceso.'}, status=403)
 
-            # Deserializar
-            import pickle as _pickle, base64 as _b64
-            cached = __import__('django.core.cache', fromlist=['cache']).cache.get(ds.cache_key)
-            if cached:
-                df_raw = _pickle.loads(_b64.b64decode(cached['data'].encode()))
-            elif ds.data_blob:
-                df_raw = _pickle.loads(_b64.b64decode(ds.data_blob.encode()))
-            else:
+            from analyst.services.dataset_store import read_dataset
+            df_raw = read_dataset(ds)
+            if df_raw is None:
                 return JsonResponse({'success': False, 'error': 'Dataset sin datos disponibles.'}, status=400)
             df_raw.columns = [str(c).strip().lower().replace(' ', '_') for c in df_raw.columns]
 
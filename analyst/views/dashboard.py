@@ -18,13 +18,10 @@ GET   /analyst/dashboards/api/sources/         → fuentes disponibles para widg
 import json
 import logging
 import math
-import pickle
-import base64
 import uuid as _uuid_mod
 
 import pandas as pd
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_GET, require_POST
@@ -33,6 +30,7 @@ from analyst.models import (
     Dashboard, DashboardWidget,
     StoredDataset, Report, CrossSource, AnalystBase,
 )
+from analyst.services.dataset_store import read_dataset
 
 logger = logging.getLogger(__name__)
 
@@ -137,12 +135,12 @@ def _events_item_columns(model_key: str = 'inbox') -> list:
         return []
 
 
-def _deserialize(blob: str) -> pd.DataFrame:
-    return pickle.loads(base64.b64decode(blob.encode()))
-
-
-def _load_df(source: dict, user) -> pd.DataFrame | None:
-    """Load a DataFrame from a widget source descriptor."""
+def _load_df(source: dict, user, columns=None) -> pd.DataFrame | None:
+    """
+    Load a DataFrame from a widget source descriptor.
+    `columns` restricts stored datasets to the columns the widget uses, so
+    Parquet-backed datasets only read those column chunks.
+    """
     src_type = source.get('type')
     src_id   = source.get('id', '')
     if not src_type or not src_id:
@@ -157,30 +155,13 @@ def _load_df(source: dict, user) -> pd.DataFrame | None:
 
         if src_type == 'dataset':
             ds = StoredDataset.objects.get(id=src_id, created_by=user)
-            raw = cache.get(ds.cache_key)
-            if raw:
-                try:
-                    return _deserialize(raw['data'])
-                except Exception:
-                    pass
-            if ds.data_blob:
-                return _deserialize(ds.data_blob)
-            return None
+            return read_dataset(ds, columns=columns)
 
         if src_type == 'cross_source':
             cs = CrossSource.objects.get(id=src_id, created_by=user)
             if not cs.last_result:
                 return None
-            ds = cs.last_result
-            raw = cache.get(ds.cache_key)
-            if raw:
-                try:
-                    return _deserialize(raw['data'])
-                except Exception:
-                    pass
-            if ds.data_blob:
-                return _deserialize(ds.data_blob)
-            return None
+            return read_dataset(cs.last_result, columns=columns)
 
         if src_type == 'analyst_base':
             from analyst.services.base_validator import BaseValidator
@@ -234,6 +215,28 @@ def _load_df(source: dict, user) -> pd.DataFrame | None:
 
 # ─── Widget data computation ───────────────────────────────────────────────────
 
+def _widget_columns(wtype: str, config: dict) -> list | None:
+    """
+    Columns a widget needs, or None when it relies on auto-detection
+    (e.g. "first numeric column") and therefore needs the full frame.
+    """
+    if wtype == 'kpi_card':
+        cols = [config.get('value_col')]
+    elif wtype == 'table':
+        cols = list(config.get('columns') or [])
+    elif wtype in ('bar_chart', 'line_chart'):
+        cols = [config.get('x_col')] + list(config.get('y_cols') or [])
+        if not config.get('y_cols'):
+            return None
+    elif wtype == 'pie_chart':
+        cols = [config.get('label_col'), config.get('value_col')]
+    else:
+        return None
+    if not cols or not all(cols):
+        return None
+    return list(dict.fromkeys(cols))
+
+
 def _compute_widget_data(widget: DashboardWidget, user) -> dict:
     """Compute the data payload for a single widget."""
     wtype  = widget.widget_type
@@ -242,7 +245,7 @@ def _compute_widget_data(widget: DashboardWidget, user) -> dict:
     if wtype == 'text':
         return {'type': 'text', 'content': config.get('content', '')}
 
-    df = _load_df(widget.source, user)
+    df = _load_df(widget.source, user, columns=_widget_columns(wtype, config))
     if df is None or df.empty:
         return {'type': wtype, 'error': 'Sin datos disponibles.'}
 
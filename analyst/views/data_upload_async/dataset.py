@@ -5,15 +5,13 @@ Promotes a preview DataFrame to a permanent StoredDataset.
 
 import json
 import logging
-import uuid as _uuid
 
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache as _cache
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
-from analyst.models import StoredDataset
-from ._core import _cache_load, _serialize
+from analyst.services.dataset_store import create_dataset
+from ._core import _cache_load
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +20,7 @@ logger = logging.getLogger(__name__)
 @require_POST
 def save_as_dataset(request):
     """
-    Persist the current preview DataFrame as a StoredDataset (permanent Redis key
+    Persist the current preview DataFrame as a StoredDataset (dataset store
     + DB row). Called from the upload panel's "Guardar como Dataset" button.
 
     POST JSON: { "cache_key": "df_preview_...", "name": "...", "description": "..." }
@@ -47,31 +45,13 @@ def save_as_dataset(request):
                 status=404,
             )
 
-        ds_id    = _uuid.uuid4()
-        perm_key = StoredDataset.make_cache_key(str(ds_id))
-        blob     = _serialize(df)
-
-        # Write to cache with no TTL (permanent until dataset is deleted)
-        _cache.set(perm_key, {
-            "data": blob,
-            "meta": {**(meta or {}), "stored_dataset_id": str(ds_id)},
-        }, timeout=None)
-
-        col_dtypes = df.dtypes
-        dtype_map  = {str(col): str(col_dtypes.iloc[i]) for i, col in enumerate(df.columns)}
-
-        ds = StoredDataset.objects.create(
-            id          = ds_id,
+        ds = create_dataset(
+            df,
             name        = name,
             description = description,
-            cache_key   = perm_key,
-            rows        = len(df),
-            col_count   = len(df.columns),
-            columns     = [str(c) for c in df.columns],
-            dtype_map   = dtype_map,
             source_file = (meta or {}).get("filename", ""),
-            data_blob   = blob,
-            created_by  = request.user,
+            meta        = meta,
+            user        = request.user,
         )
 
         logger.info("StoredDataset created from preview: %s (%dx%d) by %s",
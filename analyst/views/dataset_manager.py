@@ -25,6 +25,7 @@ from django.views.decorators.http import require_GET, require_POST
 from django.utils import timezone
 
 from analyst.models import StoredDataset
+from analyst.services.dataset_store import create_dataset, read_dataset
 from analyst.utils.clipboard import DataFrameClipboard
 
 logger = logging.getLogger(__name__)
@@ -60,48 +61,15 @@ def _store_df(cache_key: str, df: pd.DataFrame, meta: dict) -> None:
 
 def _load_df_persistent(ds: StoredDataset):
     """
-    Load DataFrame for a StoredDataset with two-tier fallback:
-      1. Cache (Redis / LocMemCache) — fast path
-      2. data_blob DB field  — survives Django restarts and Redis outages
-
-    Also re-warms the cache from DB if it was cold.
+    Load DataFrame for a StoredDataset from its storage backend
+    (Parquet files, or cache → data_blob for legacy datasets).
     Returns (df, meta) or (None, None).
     """
-    cache_key = ds.cache_key
-
-    # ── Tier 1: cache hit ──────────────────────────────────────────────────
-    raw = cache.get(cache_key)
-    if raw:
-        try:
-            return _deserialize(raw["data"]), raw.get("meta", {})
-        except Exception as exc:
-            logger.warning("Cache deserialize failed for %s: %s — trying DB blob", cache_key, exc)
-
-    # ── Tier 2: DB blob fallback ───────────────────────────────────────────
-    if not ds.data_blob:
-        logger.warning("Dataset %s: cache miss and no data_blob in DB.", ds.id)
-        return None, None
-
-    try:
-        df   = _deserialize(ds.data_blob)
-        meta = {"stored_dataset_id": str(ds.id), "filename": ds.source_file}
-        # Re-warm cache so subsequent requests are fast
-        _store_df(cache_key, df, meta)
-        logger.info("Dataset %s re-warmed cache from DB blob (%d rows).", ds.id, len(df))
-        return df, meta
-    except Exception as exc:
-        logger.error("DB blob deserialize failed for %s: %s", ds.id, exc)
+    df = read_dataset(ds)
+    if df is None:
+        logger.warning("Dataset %s: no data available (%s backend).", ds.id, ds.storage_backend)
         return None, None
-
-
-def _persist_blob(ds: StoredDataset, df: pd.DataFrame) -> None:
-    """Write serialized DataFrame to data_blob and save only that field."""
-    try:
-        StoredDataset.objects.filter(pk=ds.pk).update(data_blob=_serialize(df))
-        logger.debug("data_blob written for dataset %s (%d rows)", ds.id, len(df))
-    except Exception as exc:
-        # Non-fatal — cache is the primary store
-        logger.warning("Could not write data_blob for %s: %s", ds.id, exc)
+    return df, {"stored_dataset_id": str(ds.id), "filename": ds.source_file}
 
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
@@ -129,7 +97,8 @@ def _dataset_row(ds: StoredDataset) -> dict:
 @login_required
 def dataset_list(request):
     """Main dataset manager page."""
-    datasets = StoredDataset.objects.filter(created_by=request.user).order_by("-created_at")
+    datasets = (StoredDataset.objects.filter(created_by=request.user)
+                .defer("data_blob").order_by("-created_at"))
     return render(request, "analyst/dataset_manager.html", {"datasets": datasets})
 
 
@@ -172,29 +141,14 @@ def dataset_save(request):
             if df is None:
                 return JsonResponse({"success": False, "error": "Preview no encontrado o expirado."}, status=404)
 
-        # ── Build a permanent cache key and store ─────────────────────────────
-        import uuid
-        ds_id     = uuid.uuid4()
-        perm_key  = StoredDataset.make_cache_key(str(ds_id))
-        source_file = (meta or {}).get("filename", "")
-
-        _store_df(perm_key, df, {**(meta or {}), "stored_dataset_id": str(ds_id)})
-
-        col_dtypes = df.dtypes
-        dtype_map  = {str(col): str(col_dtypes.iloc[i]) for i, col in enumerate(df.columns)}
-
-        ds = StoredDataset.objects.create(
-            id          = ds_id,
+        # ── Persist through the dataset store (Parquet / blob) ────────────────
+        ds = create_dataset(
+            df,
             name        = name,
             description = description,
-            cache_key   = perm_key,
-            rows        = len(df),
-            col_count   = len(df.columns),
-            columns     = [str(c) for c in df.columns],
-            dtype_map   = dtype_map,
-            source_file = source_file,
-            data_blob   = _serialize(df),   # persist to DB for restart survival
-            created_by  = request.user,
+            source_file = (meta or {}).get("filename", ""),
+            meta        = meta,
+            user        = request.user,
         )
 
         logger.info("StoredDataset created: %s (%dx%d) by %s", ds.name, ds.rows, ds.col_count, request.user)
@@ -238,7 +192,7 @@ def dataset_preview(request, dataset_id):
         )
 
         ds = get_object_or_404(StoredDataset, id=dataset_id, created_by=request.user)
-        df, meta = _load_df_persistent(ds)   # cache → DB blob fallback
+        df, meta = _load_df_persistent(ds)   # dataset store (Parquet / blob)
 
         if df is None:
             return JsonResponse(
@@ -16,30 +16,30 @@ Capas de seguridad implementadas:
 
 import re
 import json
-import time
 import logging
-import pickle
-import base64
-import uuid as _uuid
 
 import pandas as pd
 from django.apps    import apps as django_apps
 from django.conf    import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.db      import connection
+from django.db      import connection, transaction
 from django.db.models import (
     Count, Sum, Avg, Min, Max,
     IntegerField, FloatField, DecimalField,
-    DateField, DateTimeField, BooleanField,
+    DateField, DateTimeField, BooleanField, Q,
 )
 from django.http    import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.utils   import timezone
 from django.views.decorators.http import require_GET, require_POST
 
 # ← CAMBIO: se agrega AnalystBase al import
 from analyst.models import ETLSource, ETLJob, StoredDataset, AnalystBase
+from analyst.services.cross_engine import apply_filters
+from analyst.services.etl_runner import WATERMARK_SEP, create_queued_job
+from analyst.services.etl_stream import stream_queryset
+from analyst.services.job_queue import cancel, dispatch, job_row, latest_for
 
 # EVENTS-AI-3: campo en ETLSource para filtrar por host/created_by de events
 # No hay FK nueva en el modelo — se filtra por el propio request.user.
@@ -134,24 +134,167 @@ def _model_field_names(model_path: str) -> set:
 AGG_FUNCS = {'count': Count, 'sum': Sum, 'avg': Avg, 'min': Min, 'max': Max}
 
 
-def _serialize(df: pd.DataFrame) -> str:
-    return base64.b64encode(pickle.dumps(df)).decode()
+def _apply_orm_filters(qs, filters, real_fields):
+    """
+    Aplica filtros [{field, lookup, value, negate}] al queryset, uno a uno.
+    Ignora campos que no existen en el modelo o lookups fuera de _SAFE_LOOKUPS.
+    """
+    for f in (filters or []):
+        field  = str(f.get("field", "")).strip()
+        lookup = str(f.get("lookup", "exact")).strip()
+        if (not _validate_field_name(field) or field not in real_fields
+                or lookup not in _SAFE_LOOKUPS):
+            continue
+        key = f"{field}__{lookup}" if lookup != "exact" else field
+        kw  = {key: f.get("value", "")}
+        qs  = qs.exclude(**kw) if f.get("negate") else qs.filter(**kw)
+    return qs
 
 
-def _save_as_stored_dataset(df, name, description, source_label, user):
-    from django.core.cache import cache as _cache
-    ds_id    = _uuid.uuid4()
-    perm_key = StoredDataset.make_cache_key(str(ds_id))
-    dtype_map = {str(c): str(df.dtypes.iloc[i]) for i, c in enumerate(df.columns)}
-    blob = _serialize(df)
-    _cache.set(perm_key, {"data": blob,
-        "meta": {"stored_dataset_id": str(ds_id), "filename": source_label}}, timeout=None)
-    return StoredDataset.objects.create(
-        id=ds_id, name=name, description=description,
-        cache_key=perm_key, rows=len(df), col_count=len(df.columns),
-        columns=[str(c) for c in df.columns], dtype_map=dtype_map,
-        source_file=source_label, data_blob=blob, created_by=user,
-    )
+# Lookups empujables al WHERE sin cambiar el resultado del filtro pandas
+# (cross_engine.apply_filters, que compara como texto o
+# con pd.to_numeric y salta los valores inválidos): isnull siempre; las
+# comparaciones sólo sobre campos numéricos y con un valor numérico válido.
+# exact/contains/startswith... se quedan en pandas: `contains` es regex y la
+# comparación textual depende de la collation del motor.
+_ORM_NUMERIC_LOOKUPS = {"gt", "gte", "lt", "lte"}
+
+
+def _split_pushdown(model, filters):
+    """
+    Reparte los filtros empujados por el CrossEngine en
+    (filtros para el WHERE, filtros que se evalúan con pandas tras leer).
+    """
+    where, rest = [], []
+    for f in (filters or []):
+        lookup = str(f.get("lookup", "exact")).strip()
+        try:
+            model_field = model._meta.get_field(str(f.get("field", "")).strip())
+        except FieldDoesNotExist:
+            model_field = None
+
+        if lookup == "isnull":
+            where.append(f)
+            continue
+        if (lookup in _ORM_NUMERIC_LOOKUPS
+                and isinstance(model_field, (IntegerField, FloatField, DecimalField))):
+            try:
+                where.append({**f, "value": float(f.get("value", ""))})
+                continue
+            except (TypeError, ValueError):
+                pass
+        rest.append(f)
+    return where, rest
+
+
+def _filtered_sink(sink, filters, log_label="ETL"):
+    """Sink que aplica `filters` (pandas) a cada tramo antes de entregarlo."""
+    if sink is None or not filters:
+        return sink
+    return lambda frame: sink(apply_filters(frame, filters, log_label=log_label))
+
+
+def _select_fields(source_fields, runtime_params, real_fields) -> list:
+    """
+    Campos a pedir al ORM: source.fields acotados por runtime_params["fields"]
+    (proyección empujada por el CrossEngine). [] = todos los campos.
+    """
+    selected = [f for f in (source_fields or [])
+                if _validate_field_name(f) and f in real_fields]
+    rt = [f for f in (runtime_params.get("fields") or [])
+          if _validate_field_name(f) and f in real_fields]
+    if rt:
+        narrowed = [f for f in rt if not selected or f in selected]
+        selected = narrowed or selected
+    return selected
+
+
+def _source_model(source):
+    """Modelo Django que consulta la fuente (None para SQL y AnalystBase)."""
+    try:
+        if source.sim_account_id:
+            return django_apps.get_model('sim', 'Interaction')
+        if source.analyst_base_id or source.sql_override.strip():
+            return None
+        if source.events_model:
+            return django_apps.get_model(*_EVENTS_MODELS[source.events_model])
+        if source.model_path:
+            return django_apps.get_model(*source.model_path.rsplit('.', 1))
+    except (LookupError, KeyError, ValueError):
+        pass
+    return None
+
+
+def _watermark_field(source):
+    """
+    Campo watermark de una fuente incremental → (attname, error).
+    Debe ser numérico o fecha/fecha-hora y crecer con cada fila nueva.
+    Por defecto: generated_at (sim), created_at (events), date_field o PK (ORM).
+    """
+    Model = _source_model(source)
+    if Model is None:
+        return None, "El modo incremental solo aplica a fuentes de modelo, simulador o events."
+    if source.model_path and (source.aggregations or {}).get("group_by"):
+        return None, "El modo incremental no admite agregaciones."
+
+    names = {f.name for f in Model._meta.concrete_fields}
+    name  = (source.watermark_field or "").strip()
+    if not name:
+        if source.sim_account_id:
+            name = "generated_at"
+        elif source.events_model:
+            name = "created_at" if "created_at" in names else Model._meta.pk.attname
+        else:
+            name = (source.date_field or "").strip() or Model._meta.pk.attname
+
+    try:
+        field = Model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None, f"Campo watermark '{name}' no existe en {Model.__name__}."
+    if not getattr(field, 'concrete', False) or not isinstance(field, (IntegerField, DateField)):
+        return None, f"Campo watermark '{name}' debe ser numérico o de fecha."
+    return field.attname, None
+
+
+def _watermark_pk(source, field):
+    """
+    PK de desempate del watermark: el campo no es único (varias filas con la
+    misma fecha) y max_rows puede cortar entre ellas. None si el watermark ya
+    es la PK.
+    """
+    Model = _source_model(source)
+    pk    = Model._meta.pk.attname if Model is not None else None
+    return pk if pk != field else None
+
+
+def _apply_watermark(qs, runtime_params):
+    """
+    Modo incremental: filas posteriores al watermark, en orden (campo, pk).
+    watermark_after es "valor|pk" de la última fila extraída: se continúa con
+    campo > valor, o campo = valor y pk > pk — las filas empatadas con el
+    máximo que no entraron en la ejecución anterior no se pierden ni se
+    repiten. Un watermark sin pk (anterior al desempate) usa campo > valor.
+    """
+    field = runtime_params.get("watermark_field")
+    if not field:
+        return qs
+    pk    = runtime_params.get("watermark_pk")
+    after = runtime_params.get("watermark_after")
+    if after not in (None, ""):
+        value, _, after_pk = str(after).partition(WATERMARK_SEP)
+        if pk and after_pk:
+            qs = qs.filter(Q(**{f"{field}__gt": value}) | Q(**{field: value, f"{pk}__gt": after_pk}))
+        else:
+            qs = qs.filter(**{f"{field}__gt": value})
+    return qs.order_by(field, pk) if pk else qs.order_by(field)
+
+
+def _with_watermark(selected, runtime_params) -> list:
+    """Asegura que el campo watermark (y su pk de desempate) viajen en la proyección."""
+    extra = [runtime_params.get("watermark_field"), runtime_params.get("watermark_pk")]
+    if selected and extra[0]:
+        return list(selected) + [f for f in extra if f and f not in selected]
+    return selected
 
 
 def _dtype_for_field(field) -> str:
@@ -221,6 +364,10 @@ def _source_row(src) -> dict:
         "analyst_base_id": str(src.analyst_base_id) if src.analyst_base_id else None,
         # SIM-4
         "sim_account_id":  str(src.sim_account_id)  if src.sim_account_id  else None,
+        "incremental":       src.incremental,
+        "watermark_field":   src.watermark_field,
+        "watermark_value":   src.watermark_value,
+        "target_dataset_id": str(src.target_dataset_id) if src.target_dataset_id else None,
         "created_at": src.created_at.isoformat(),
         "last_run": last.created_at.isoformat() if last else None,
         "last_status": last.status if last else None,
@@ -233,9 +380,12 @@ def _job_row(job) -> dict:
         "id": str(job.id), "source_id": str(job.source_id),
         "source_name": job.source.name, "status": job.status,
         "error_msg": job.error_msg, "rows_extracted": job.rows_extracted,
-        "duration_s": job.duration_s,
+        "duration_s": job.duration_s, "peak_rss_mb": job.peak_rss_mb, "mode": job.mode,
+        "watermark_from": job.watermark_from, "watermark_to": job.watermark_to,
         "dataset_id": str(job.result_dataset_id) if job.result_dataset_id else None,
         "dataset_name": job.result_dataset.name if job.result_dataset else None,
+        "dataset_rows": job.result_dataset.rows if job.result_dataset else None,
+        "dataset_col_count": job.result_dataset.col_count if job.result_dataset else None,
         "started_at": job.started_at.isoformat() if job.started_at else None,
         "finished_at": job.finished_at.isoformat() if job.finished_at else None,
         "created_at": job.created_at.isoformat(),
@@ -266,37 +416,11 @@ def _extract_analyst_base(source, runtime_params, user):
     real_cols = set(df.columns)
 
     # ── Filtros de columnas (misma lógica que ORM, sobre el DataFrame) ───────
-    for f in (source.filters or []):
-        field  = str(f.get("field", "")).strip()
-        lookup = str(f.get("lookup", "exact")).strip()
-        value  = f.get("value", "")
-        negate = bool(f.get("negate", False))
-
-        if field not in real_cols or lookup not in _SAFE_LOOKUPS:
-            continue
-
-        try:
-            col = df[field].astype(str)
-            if   lookup == "exact":        mask = col == str(value)
-            elif lookup == "iexact":       mask = col.str.lower() == str(value).lower()
-            elif lookup == "contains":     mask = col.str.contains(str(value), na=False)
-            elif lookup == "icontains":    mask = col.str.contains(str(value), case=False, na=False)
-            elif lookup == "startswith":   mask = col.str.startswith(str(value))
-            elif lookup == "istartswith":  mask = col.str.lower().str.startswith(str(value).lower())
-            elif lookup == "endswith":     mask = col.str.endswith(str(value))
-            elif lookup == "iendswith":    mask = col.str.lower().str.endswith(str(value).lower())
-            elif lookup == "isnull":       mask = df[field].isna()
-            elif lookup == "gt":           mask = pd.to_numeric(df[field], errors='coerce') > float(value)
-            elif lookup == "gte":          mask = pd.to_numeric(df[field], errors='coerce') >= float(value)
-            elif lookup == "lt":           mask = pd.to_numeric(df[field], errors='coerce') < float(value)
-            elif lookup == "lte":          mask = pd.to_numeric(df[field], errors='coerce') <= float(value)
-            else:
-                continue
-
-            df = df[~mask] if negate else df[mask]
-        except Exception as e:
-            logger.warning("Filtro AnalystBase ignorado (%s %s): %s", field, lookup, e)
-            continue
+    # runtime_params["filters"]: filtros empujados por el CrossEngine
+    df = apply_filters(
+        df, list(source.filters or []) + list(runtime_params.get("filters") or []),
+        log_label="AnalystBase",
+    )
 
     # ── Filtro de fecha ───────────────────────────────────────────────────────
     df_field = (runtime_params.get("date_field") or source.date_field or "").strip()
@@ -311,7 +435,7 @@ def _extract_analyst_base(source, runtime_params, user):
             logger.warning("Filtro de fecha en AnalystBase ignorado: %s", e)
 
     # ── Selección de columnas ─────────────────────────────────────────────────
-    selected = [f for f in (source.fields or []) if f in real_cols]
+    selected = _select_fields(source.fields, runtime_params, real_cols)
     if selected:
         df = df[selected]
 
@@ -358,7 +482,7 @@ def _sim_interaction_fields() -> list:
         return []
 
 
-def _extract_sim_account(source, runtime_params, user):
+def _extract_sim_account(source, runtime_params, user, sink=None, monitor=None):
     """
     SIM-4: Extrae Interactions de una SimAccount del usuario.
     Campos reales del modelo: fecha (DateField), hora_inicio / hora_fin (TimeField).
@@ -389,28 +513,28 @@ def _extract_sim_account(source, runtime_params, user):
     if run_id:
         qs = qs.filter(run_id=run_id)
 
+    # ── Filtros / proyección empujados por el CrossEngine ─────────────────────
+    real_fields = {f["name"] for f in _sim_interaction_fields()}
+    rt_where, rt_pandas = _split_pushdown(Interaction, runtime_params.get("filters"))
+    qs = _apply_orm_filters(qs, rt_where, real_fields)
+    selected = _with_watermark(
+        _select_fields(source.fields, runtime_params, real_fields), runtime_params)
+
     # ── Límite de filas ───────────────────────────────────────────────────────
     limit = source.max_rows or 0
     if not user.is_superuser and (not limit or limit > MAX_ROWS_NON_SUPERUSER):
         limit = MAX_ROWS_NON_SUPERUSER
 
-    qs = qs.order_by('fecha', 'hora_inicio')
+    if runtime_params.get("watermark_field"):
+        qs = _apply_watermark(qs, runtime_params)
+    else:
+        qs = qs.order_by('fecha', 'hora_inicio')
     if limit:
         qs = qs[:limit]
 
-    records = list(qs.values())
-    if not records:
-        return pd.DataFrame(), None
-
-    df = pd.DataFrame(records)
-
-    # ── Selección de campos específicos ───────────────────────────────────────
-    if source.fields:
-        selected = [f for f in source.fields if f in df.columns]
-        if selected:
-            df = df[selected]
-
-    return df.reset_index(drop=True), None
+    df = stream_queryset(qs, selected, chunk_size=source.chunk_size,
+                         sink=_filtered_sink(sink, rt_pandas, "Sim"), monitor=monitor)
+    return apply_filters(df, rt_pandas, log_label="Sim"), None
 
 
 # ── EVENTS-AI-3 ──────────────────────────────────────────────────────────────
@@ -478,7 +602,7 @@ def _events_item_fields(model_key: str = 'inbox') -> list:
         return []
 
 
-def _extract_events_items(source, runtime_params, user):
+def _extract_events_items(source, runtime_params, user, sink=None, monitor=None):
     """
     EVENTS-AI-3: Extrae ítems de un modelo events para el usuario autenticado.
 
@@ -538,9 +662,19 @@ def _extract_events_items(source, runtime_params, user):
         if status_field:
             qs = qs.filter(**{status_field: status_filter})
 
-    # ── Orden por fecha canónica ──────────────────────────────────────────────
-    order_field = date_field if date_field else 'id'
-    qs = qs.order_by(f"-{order_field}")
+    # ── Filtros / proyección empujados por el CrossEngine ─────────────────────
+    queryable = real_fields | {getattr(f, 'attname', f.name) for f in Model._meta.concrete_fields}
+    rt_where, rt_pandas = _split_pushdown(Model, runtime_params.get("filters"))
+    qs = _apply_orm_filters(qs, rt_where, queryable)
+    selected = _with_watermark(
+        _select_fields(source.fields, runtime_params, queryable), runtime_params)
+
+    # ── Orden por fecha canónica (incremental: por watermark ascendente) ─────
+    if runtime_params.get("watermark_field"):
+        qs = _apply_watermark(qs, runtime_params)
+    else:
+        order_field = date_field if date_field else 'id'
+        qs = qs.order_by(f"-{order_field}")
 
     # ── Límite de filas ───────────────────────────────────────────────────────
     limit = source.max_rows or 0
@@ -549,25 +683,22 @@ def _extract_events_items(source, runtime_params, user):
     if limit:
         qs = qs[:limit]
 
-    records = list(qs.values())
-    if not records:
-        return pd.DataFrame(), None
-
-    df = pd.DataFrame(records)
+    df = stream_queryset(qs, selected, chunk_size=source.chunk_size,
+                         sink=_filtered_sink(sink, rt_pandas, "Events"), monitor=monitor)
+    return apply_filters(df, rt_pandas, log_label="Events"), None
 
-    # ── Selección de campos específicos ───────────────────────────────────────
-    if source.fields:
-        selected = [f for f in source.fields if f in df.columns]
-        if selected:
-            df = df[selected]
 
-    return df.reset_index(drop=True), None
-
-
-def _run_extraction(source, runtime_params, user):
+def _run_extraction(source, runtime_params, user, sink=None, monitor=None):
+    """
+    Devuelve (df, error). Las rutas ORM (sim, events, modelo sin agregación)
+    leen por tramos con stream_queryset: con `sink` cada tramo se le entrega
+    al llamador y df es sólo el esquema; SQL, AnalystBase y agregaciones
+    devuelven siempre el DataFrame completo. `monitor` (RssMonitor) se
+    muestrea en cada tramo.
+    """
     # ── Sim path (SIM-4) ──────────────────────────────────────────────────────
     if getattr(source, 'sim_account_id', None):
-        return _extract_sim_account(source, runtime_params, user)
+        return _extract_sim_account(source, runtime_params, user, sink, monitor)
 
     # ── AnalystBase path ──────────────────────────────────────────────────────
     if getattr(source, 'analyst_base_id', None):
@@ -575,7 +706,7 @@ def _run_extraction(source, runtime_params, user):
 
     # ── Events path (EVENTS-AI-3) ─────────────────────────────────────────────
     if getattr(source, 'events_model', None):
-        return _extract_events_items(source, runtime_params, user)
+        return _extract_events_items(source, runtime_params, user, sink, monitor)
 
     # ── SQL path (superusers only) ────────────────────────────────────────────
     if source.sql_override.strip():
@@ -591,6 +722,7 @@ def _run_extraction(source, runtime_params, user):
                 cols = [d[0] for d in cur.description]
                 rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=cols)
+            df = apply_filters(df, runtime_params.get("filters"), log_label="SQL")
             if source.max_rows:
                 df = df.head(source.max_rows)
             return df, None
@@ -611,19 +743,18 @@ def _run_extraction(source, runtime_params, user):
         real_fields = _model_field_names(source.model_path)
         qs = Model.objects.all()
 
-        # Filtros validados
-        fk = {}
-        ek = {}
-        for f in (source.filters or []):
-            field  = str(f.get("field", "")).strip()
-            lookup = str(f.get("lookup", "exact")).strip()
-            if (not _validate_field_name(field) or field not in real_fields
-                    or lookup not in _SAFE_LOOKUPS):
-                continue
-            key = f"{field}__{lookup}" if lookup != "exact" else field
-            (ek if f.get("negate") else fk)[key] = f.get("value", "")
-        if fk: qs = qs.filter(**fk)
-        if ek: qs = qs.exclude(**ek)
+        agg_cfg  = source.aggregations or {}
+        group_by = [g for g in (agg_cfg.get("group_by") or [])
+                    if _validate_field_name(g) and g in real_fields]
+
+        # Filtros validados. Los runtime (empujados por el CrossEngine) van al
+        # WHERE salvo que haya agregación y no filtren por una clave de grupo,
+        # y sólo si SQL y pandas dan el mismo resultado (_split_pushdown).
+        rt_filters = list(runtime_params.get("filters") or [])
+        rt_keys    = [f for f in rt_filters if not group_by or f.get("field") in group_by]
+        rt_where, rt_pandas = _split_pushdown(Model, rt_keys)
+        rt_after   = [f for f in rt_filters if f not in rt_keys] + rt_pandas
+        qs = _apply_orm_filters(qs, list(source.filters or []) + rt_where, real_fields)
 
         # Filtro de fecha por rango
         df_field = (runtime_params.get("date_field") or source.date_field or "").strip()
@@ -633,11 +764,10 @@ def _run_extraction(source, runtime_params, user):
             if runtime_params.get("date_to"):
                 qs = qs.filter(**{f"{df_field}__date__lte": runtime_params["date_to"]})
 
-        # Agregaciones
-        agg_cfg  = source.aggregations or {}
-        group_by = [g for g in (agg_cfg.get("group_by") or [])
-                    if _validate_field_name(g) and g in real_fields]
+        # Incremental: sólo filas posteriores al watermark
+        qs = _apply_watermark(qs, runtime_params)
 
+        # Agregaciones
         if group_by:
             qs = qs.values(*group_by)
             agg_kw = {}
@@ -651,27 +781,29 @@ def _run_extraction(source, runtime_params, user):
                 qs = qs.annotate(**agg_kw)
             cols = group_by + list(agg_kw.keys())
             df   = pd.DataFrame(list(qs.values(*cols)), columns=cols)
+            # Filtros runtime sobre aliases de agregación: se evalúan tras agregar
+            df   = apply_filters(df, rt_after, log_label="ETL")
         else:
-            selected = [f for f in (source.fields or [])
-                        if _validate_field_name(f) and f in real_fields]
-            qs = qs.values(*selected) if selected else qs.values()
+            selected = _with_watermark(
+                _select_fields(source.fields, runtime_params, real_fields), runtime_params)
 
             limit = source.max_rows or None
             if not user.is_superuser and (not limit or limit > MAX_ROWS_NON_SUPERUSER):
                 limit = MAX_ROWS_NON_SUPERUSER
+            if limit:
+                qs = qs[:limit]
 
-            records, count = [], 0
-            for obj in qs.iterator(chunk_size=max(100, source.chunk_size or 5000)):
-                records.append(obj)
-                count += 1
-                if limit and count >= limit:
-                    break
-            df = pd.DataFrame(records) if records else pd.DataFrame()
+            # Tuplas por tramos con tipos del modelo (sin lista de dicts)
+            df = stream_queryset(qs, selected, chunk_size=source.chunk_size,
+                                 sink=_filtered_sink(sink, rt_after), monitor=monitor)
+            df = apply_filters(df, rt_after, log_label="ETL")
 
-        # Override de columnas en runtime
-        rt = [f for f in (runtime_params.get("fields") or []) if _validate_field_name(f)]
-        if rt and not df.empty:
-            df = df[[c for c in rt if c in df.columns]] or df
+        # Override de columnas en runtime (las agregaciones no pasan por _select_fields)
+        rt = _with_watermark(
+            [f for f in (runtime_params.get("fields") or []) if _validate_field_name(f)],
+            runtime_params)
+        if rt and not df.empty and any(c in df.columns for c in rt):
+            df = df[[c for c in rt if c in df.columns]]
 
         return df, None
 
@@ -910,19 +1042,37 @@ def etl_source_save(request):
             "sim_account_id":   sim_account_id,
             # EVENTS-AI-3
             "events_model":     events_model or '',
+            # Incremental
+            "incremental":      bool(body.get("incremental", False)),
+            "watermark_field":  (body.get("watermark_field") or "").strip(),
         }
 
+        # Cambios que invalidan el watermark: la próxima ejecución será completa
+        _WATERMARK_KEYS = ("model_path", "fields", "filters", "date_field",
+                           "analyst_base_id", "sim_account_id", "events_model",
+                           "incremental", "watermark_field")
+
         if source_id:
             src = get_object_or_404(ETLSource, id=source_id, created_by=request.user)
+            reset = any(str(getattr(src, k) or "") != str(defaults[k] or "")
+                        for k in _WATERMARK_KEYS)
             for k, v in defaults.items():
                 if k != "created_by":
                     setattr(src, k, v)
-            src.save()
+            if reset:
+                src.watermark_value = ""
+                src.target_dataset  = None
             created = False
         else:
-            src = ETLSource.objects.create(**defaults)
+            src = ETLSource(**defaults)
             created = True
 
+        if src.incremental:
+            _, err = _watermark_field(src)
+            if err:
+                return JsonResponse({"success": False, "error": err}, status=400)
+        src.save()
+
         logger.info("ETLSource %s by %s: %s", "created" if created else "updated",
                     request.user, src.name)
         return JsonResponse({"success": True, "created": created, "source": _source_row(src)})
@@ -990,65 +1140,58 @@ def etl_source_run(request, source_id):
             # EVENTS-AI-3: parámetros específicos de events
             "include_processed":  body.get("include_processed", True),
             "status":             body.get("status", ""),
+            # Incremental: re-extraer todo y reiniciar el dataset destino
+            "full_refresh":       bool(body.get("full_refresh", False)),
         }
     except json.JSONDecodeError:
         return JsonResponse({"success": False, "error": "JSON invalido."}, status=400)
 
-    job = ETLJob.objects.create(
-        source=src, runtime_params=runtime_params,
-        status="running", triggered_by=request.user, started_at=timezone.now(),
-    )
-
-    # source_label refleja el tipo de fuente
-    if src.sim_account_id:
-        source_label = f"Sim:{src.sim_account_id}"
-    elif src.analyst_base_id:
-        source_label = f"AnalystBase:{src.analyst_base_id}"
-    elif getattr(src, 'events_model', None):
-        source_label = f"Events:{src.events_model}"
-    else:
-        source_label = f"ETL:{src.model_path or 'SQL'}"
-
-    t0 = time.perf_counter()
-    try:
-        df, err = _run_extraction(src, runtime_params, request.user)
-        if err or df is None:
-            job.status = "error"
-            job.error_msg = err or "Sin datos."
-            job.duration_s = round(time.perf_counter() - t0, 2)
-            job.finished_at = timezone.now()
-            job.save()
-            return JsonResponse({"success": False, "error": job.error_msg}, status=500)
-
-        ds = _save_as_stored_dataset(df, dataset_name, description, source_label, request.user)
-        duration = round(time.perf_counter() - t0, 2)
-        job.status = "done"
-        job.rows_extracted = len(df)
-        job.duration_s = duration
-        job.result_dataset = ds
-        job.finished_at = timezone.now()
-        job.save()
-
-        logger.info("ETL job %s: %d rows %.1fs → %s by %s",
-                    job.id, len(df), duration, ds.id, request.user)
-        return JsonResponse({
-            "success": True,
-            "job": _job_row(job),
-            "dataset": {"id": str(ds.id), "name": ds.name,
-                        "rows": ds.rows, "col_count": ds.col_count, "columns": ds.columns},
-        })
-    except Exception as exc:
-        job.status = "error"
-        job.error_msg = str(exc)
-        job.duration_s = round(time.perf_counter() - t0, 2)
-        job.finished_at = timezone.now()
-        job.save()
-        logger.error("ETL job %s failed: %s", job.id, exc, exc_info=True)
-        return JsonResponse({"success": False, "error": str(exc)}, status=500)
+    # Incremental: dos ejecuciones simultáneas agregarían el mismo delta
+    with transaction.atomic():
+        job = create_queued_job(src, request.user, runtime_params)
+    if job is None:
+        return JsonResponse(
+            {"success": False, "error": "Ya hay una ejecución en curso para esta fuente."},
+            status=409)
+
+    # La extracción corre en la cola de trabajos (manage.py run_jobs);
+    # el cliente sigue el progreso con etl_job_status.
+    bg = dispatch("etl_job", {"etl_job_id": str(job.id),
+                              "dataset_name": dataset_name, "description": description},
+                  user=request.user, ref_id=job.id)
+    job.refresh_from_db()
+
+    if bg.status == "queued":
+        return JsonResponse({"success": True, "queued": True, "job": _job_row(job)}, status=202)
+
+    ds = job.result_dataset
+    if job.status != "done" or ds is None:
+        return JsonResponse({"success": False, "error": job.error_msg or bg.error_msg}, status=500)
+
+    return JsonResponse({
+        "success": True,
+        "job": _job_row(job),
+        "dataset": {"id": str(ds.id), "name": ds.name,
+                    "rows": ds.rows, "col_count": ds.col_count, "columns": ds.columns},
+    })
 
 
 @login_required
 @require_GET
 def etl_job_status(request, job_id):
     job = get_object_or_404(ETLJob, id=job_id, triggered_by=request.user)
-    return JsonResponse({"success": True, "job": _job_row(job)})
+    return JsonResponse({"success": True, "job": _job_row(job),
+                         "queue": job_row(latest_for("etl_job", job.id))})
+
+
+@login_required
+@require_POST
+def etl_job_cancel(request, job_id):
+    """Cancela un ETLJob en cola; si ya está corriendo, solicita la cancelación."""
+    job = get_object_or_404(ETLJob, id=job_id, triggered_by=request.user)
+    bg  = latest_for("etl_job", job.id)
+    if bg is None or bg.status not in ("queued", "running"):
+        return JsonResponse({"success": False, "error": "El trabajo ya no está en curso."}, status=400)
+    status = cancel(bg)
+    job.refresh_from_db()
+    return JsonResponse({"success": True, "queue_status": status, "job": _job_row(job)})
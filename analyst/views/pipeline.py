@@ -9,7 +9,7 @@ POST  /analyst/pipelines/<id>/delete/            → eliminar
 POST  /analyst/pipelines/<id>/steps/add/         → agregar paso
 POST  /analyst/pipelines/<id>/steps/reorder/     → reordenar pasos
 POST  /analyst/pipelines/<id>/steps/<idx>/delete/ → eliminar paso
-POST  /analyst/pipelines/<id>/run/               → ejecutar pipeline
+POST  /analyst/pipelines/<id>/run/               → encolar ejecución (202 + run)
 GET   /analyst/pipelines/<id>/runs/              → historial de ejecuciones
 GET   /analyst/pipelines/api/                    → lista JSON
 """
@@ -30,7 +30,7 @@ from analyst.models import (
     Pipeline, PipelineRun, StoredDataset,
     AnalystBase, CrossSource, PIPELINE_STEP_TYPES,
 )
-from analyst.services.pipeline_engine import PipelineEngine
+from analyst.services.job_queue import dispatch
 
 logger = logging.getLogger(__name__)
 
@@ -267,13 +267,31 @@ def pipeline_run(request, pipeline_id):
         if not p.steps:
             return JsonResponse({'success': False, 'error': 'El pipeline no tiene pasos.'}, status=400)
 
-        engine = PipelineEngine(p, ds, request.user)
-        result_ds, error = engine.run(output_name=output_name, runtime_params=runtime_params)
-
-        if error:
-            return JsonResponse({'success': False, 'error': error}, status=422)
+        # Se ejecuta en la cola de trabajos (manage.py run_jobs)
+        run = PipelineRun.objects.create(
+            pipeline       = p,
+            input_dataset  = ds,
+            status         = 'queued',
+            triggered_by   = request.user,
+            runtime_params = runtime_params or {},
+        )
+        bg = dispatch('pipeline_run', {'run_id': str(run.id), 'output_name': output_name},
+                      user=request.user, ref_id=run.id)
+        run.refresh_from_db()
+
+        if bg.status == 'queued':
+            return JsonResponse({
+                'success':  True,
+                'queued':   True,
+                'pipeline': _pipeline_row(p),
+                'run':      _run_row(run),
+            }, status=202)
+
+        result_ds = run.result_dataset
+        if run.status != 'done' or result_ds is None:
+            return JsonResponse({'success': False, 'error': run.error_msg or bg.error_msg},
+                                status=422)
 
-        run = p.runs.order_by('-created_at').first()
         return JsonResponse({
             'success':        True,
             'pipeline':       _pipeline_row(p),
@@ -14,14 +14,11 @@ GET  /analyst/reports/api/functions/ → registry (for builder UI)
 import json
 import logging
 import math
-import pickle
-import base64
 import uuid as _uuid_mod
 from io import StringIO
 
 import pandas as pd
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_GET, require_POST
@@ -32,6 +29,7 @@ from analyst.models import StoredDataset, Report, AnalystBase, CrossSource
 from analyst.report_functions import get_registry, get_function, get_meta
 from analyst.utils.clipboard import DataFrameClipboard
 from analyst.services.base_validator import BaseValidator
+from analyst.services.dataset_store import read_dataset
 
 logger = logging.getLogger(__name__)
 # ─── JSON serialization ───────────────────────────────────────────────────────
@@ -71,21 +69,6 @@ def _safe_json_str(obj) -> str:
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
-def _deserialize(s: str) -> pd.DataFrame:
-    return pickle.loads(base64.b64decode(s.encode()))
-
-
-def _load_cache(key: str):
-    raw = cache.get(key)
-    if not raw:
-        return None, None
-    try:
-        return _deserialize(raw["data"]), raw.get("meta", {})
-    except Exception as exc:
-        logger.error("Report builder deserialize error %s: %s", key, exc)
-        return None, None
-
-
 def _load_source(src: dict, request) -> pd.DataFrame:
     """
     Load a DataFrame from a source descriptor.
@@ -97,12 +80,7 @@ def _load_source(src: dict, request) -> pd.DataFrame:
 
     if src_type == "dataset":
         ds = StoredDataset.objects.get(id=ref, created_by=request.user)
-        df, _ = _load_cache(ds.cache_key)
-        if df is None and ds.data_blob:
-            try:
-                df = _deserialize(ds.data_blob)
-            except Exception:
-                df = None
+        df = read_dataset(ds)
         if df is None:
             raise ValueError(f"Dataset '{ds.name}' no disponible.")
         return df
@@ -112,13 +90,7 @@ def _load_source(src: dict, request) -> pd.DataFrame:
         cs = CrossSource.objects.get(id=ref, created_by=request.user)
         if not cs.last_result:
             raise ValueError(f"El cruce '{cs.name}' no tiene resultado. Ejecútalo primero.")
-        ds = cs.last_result
-        df, _ = _load_cache(ds.cache_key)
-        if df is None and ds.data_blob:
-            try:
-                df = _deserialize(ds.data_blob)
-            except Exception:
-                df = None
+        df = read_dataset(cs.last_result)
         if df is None:
             raise ValueError(f"Resultado del cruce '{cs.name}' no disponible.")
         return df
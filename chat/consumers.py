@@ -8,6 +8,8 @@ from channels.exceptions import StopConsumer
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
 
+from . import notification_fanout
+
 logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -38,6 +40,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'user_id': event['user_id'],
             'display_name': event['display_name']
         }))
+    async def player_position(self, event):
+        # Posición 3D de un miembro (rooms/presence.py broadcast_position)
+        await self.send(text_data=json.dumps({
+            'type': 'player_position',
+            'user_id': event['user_id'],
+            'x': event['x'],
+            'y': event['y'],
+            'z': event['z']
+        }))
+
     # Diccionario de usuarios conectados por sala (en memoria, por proceso)
     connected_users = {}
 
@@ -208,9 +220,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     # Guardar mensaje en la base de datos
                     message_obj = await self.save_message(self.room_name, self.user, processed_message)
 
-                    # Create notifications for other room members using hardcoded system
-                    logger.info(f"Creating notifications for message in room {self.room_name} from user {self.user.username}")
-                    await self.create_room_notifications_hardcoded(processed_message, self.user, self.room_name)
+                    # Notificaciones para los demás miembros: fan-out en segundo plano
+                    # (chat/notification_fanout.py) — no bloquea el socket del emisor
+                    if message_obj:
+                        notification_fanout.enqueue(self.room_name, message_obj.id, self.user.id, processed_message)
 
                     # Note: We don't automatically mark messages as read for the sender
                     # Read receipts should only happen when the user actually views the message
@@ -280,83 +293,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
             # Create notifications for other room members
             # await self.create_room_notifications(event)  # This method doesn't exist
-            # Notifications are already created in the receive method via create_room_notifications_hardcoded
+            # Notifications are enqueued in the receive method (notification_fanout.enqueue)
 
         except Exception as e:
             logger.error(f"Error sending message: {str(e)}")
 
-    @database_sync_to_async
-    def create_room_notifications_hardcoded(self, message, sender, room_id):
-        """Create notifications for room members using hybrid system (cache + database fallback)"""
-        from .models import HardcodedNotificationManager
-        from rooms.models import Room, RoomMember
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-
-        try:
-            # Get room object
-            room = Room.objects.get(id=room_id)
-            logger.info(f"Creating notifications for room {room.name} (ID: {room_id})")
-
-            # Get all room members except the sender
-            room_members = RoomMember.objects.filter(
-                room=room,
-                is_active=True
-            ).exclude(user=sender).select_related('user')
-
-            logger.info(f"Found {room_members.count()} active room members (excluding sender)")
-
-            # If no members found, try to add all users to the room automatically
-            if room_members.count() == 0:
-                logger.warning(f"No members found for room {room.name}, adding all users automatically")
-                from django.contrib.auth import get_user_model
-
-                User = get_user_model()
-                users = User.objects.all()
-                for user in users:
-                    if user != sender:
-                        RoomMember.objects.get_or_create(
-                            room=room,
-                            user=user,
-                            defaults={'is_active': True}
-                        )
-                # Re-query members
-                room_members = RoomMember.objects.filter(
-                    room=room,
-                    is_active=True
-                ).exclude(user=sender).select_related('user')
-                logger.info(f"After auto-adding: {room_members.count()} members found")
-
-            # Create notifications for all room members
-            notification_count = 0
-            for member in room_members:
-                recipient = member.user
-                logger.info(f"Creating notification for user {recipient.username} (ID: {recipient.id})")
-
-                # Try to create notification using cache system
-                notification = HardcodedNotificationManager.create_chat_notification(
-                    user=recipient,
-                    room=room,
-                    message=message,
-                    sender=sender
-                )
-                if notification:
-                    notification_count += 1
-                    logger.info(f"✅ Created notification for user {recipient.username}")
-                else:
-                    logger.error(f"❌ Failed to create notification for user {recipient.username}")
-
-            if notification_count > 0:
-                logger.info(f"✅ Created {notification_count} notifications for room {room.name}")
-            else:
-                logger.warning(f"⚠️ No notifications created for room {room.name}")
-
-        except Exception as e:
-            logger.error(f"❌ Error creating room notifications: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
-
     @database_sync_to_async
     def verify_room_access(self):
         """Verifica si el usuario tiene acceso a la sala (es miembro o administrador)"""
@@ -0,0 +1,91 @@
+# Conversation.messages (JSONField con todo el historial) → tabla
+# ConversationMessage, una fila por mensaje con índice único (conversation, seq).
+# Copia los mensajes existentes antes de borrar el campo; el reverse los
+# vuelve a armar como lista JSON.
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+BATCH_SIZE = 1000
+
+
+def json_to_rows(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationMessage = apps.get_model('chat', 'ConversationMessage')
+
+    for conv in Conversation.objects.only('id', 'messages', 'updated_at').iterator(chunk_size=200):
+        rows = []
+        for seq, msg in enumerate(conv.messages or [], start=1):
+            content = str(msg.get('content') or '')
+            rows.append(ConversationMessage(
+                conversation_id=conv.id,
+                seq=seq,
+                sender=msg.get('sender') or 'ai',
+                content=content,
+                sender_name=msg.get('sender_name'),
+                message_type=msg.get('type') or 'text',
+                tokens=len(content) // 4 + 1,
+                timestamp=parse_datetime(msg.get('timestamp') or '') or conv.updated_at,
+            ))
+        ConversationMessage.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        Conversation.objects.filter(id=conv.id).update(message_count=len(rows))
+
+
+def rows_to_json(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationMessage = apps.get_model('chat', 'ConversationMessage')
+
+    for conv in Conversation.objects.only('id').iterator(chunk_size=200):
+        messages = [
+            {
+                'sender': m.sender,
+                'content': m.content,
+                'timestamp': m.timestamp.isoformat(),
+                'sender_name': m.sender_name,
+                'type': m.message_type,
+            }
+            for m in ConversationMessage.objects.filter(conversation_id=conv.id).order_by('seq')
+        ]
+        Conversation.objects.filter(id=conv.id).update(messages=messages)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, help_text='Mensajes guardados (= seq del último ConversationMessage)'),
+        ),
+        migrations.CreateModel(
+            name='ConversationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField(help_text='Posición en la conversación (1, 2, 3…)')),
+                ('sender', models.CharField(help_text="'user' o 'ai'", max_length=20)),
+                ('content', models.TextField()),
+                ('sender_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('message_type', models.CharField(default='text', help_text="'text', 'command', 'command_response', 'error'", max_length=30)),
+                ('tokens', models.PositiveIntegerField(default=0, help_text='Tokens estimados del contenido')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='turns', to='chat.conversation')),
+            ],
+            options={
+                'verbose_name': 'Mensaje de conversación',
+                'verbose_name_plural': 'Mensajes de conversación',
+                'ordering': ['conversation', 'seq'],
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'seq'), name='chat_convmsg_conversation_seq')],
+            },
+        ),
+        migrations.RunPython(json_to_rows, rows_to_json),
+        migrations.RemoveField(
+            model_name='conversation',
+            name='messages',
+        ),
+    ]
@@ -14,7 +14,7 @@ class Conversation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     conversation_id = models.CharField(max_length=100, unique=True, help_text="ID único de la conversación")
     title = models.CharField(max_length=200, blank=True, help_text="Título auto-generado de la conversación")
-    messages = models.JSONField(default=list, help_text="Lista completa de mensajes de la conversación")
+    message_count = models.PositiveIntegerField(default=0, help_text="Mensajes guardados (= seq del último ConversationMessage)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True, help_text="Si la conversación está activa")
@@ -28,39 +28,66 @@ class Conversation(models.Model):
         return f"{self.user.username}: {self.title or 'Sin título'}"
 
     def add_message(self, sender, content, sender_name=None, message_type='text'):
-        """Agrega un mensaje a la conversación"""
-        message = {
-            'sender': sender,  # 'user' o 'ai'
-            'content': content,
-            'timestamp': timezone.now().isoformat(),
-            'sender_name': sender_name,
-            'type': message_type  # 'text', 'command', 'error', etc.
-        }
-        self.messages.append(message)
-        self.updated_at = timezone.now()
-        self.save(update_fields=['messages', 'updated_at'])
-
-    def get_messages_for_ai(self):
-        """Obtiene mensajes en formato para enviar a la IA"""
+        """Agrega un mensaje a la conversación (un INSERT, sin reescribir el historial)"""
+        from django.db import transaction
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Bloquea la fila de la conversación: seq consecutivo aunque haya
+            # dos requests del mismo usuario en paralelo
+            seq = Conversation.objects.select_for_update().filter(
+                pk=self.pk
+            ).values_list('message_count', flat=True).get() + 1
+            message = ConversationMessage.objects.create(
+                conversation=self,
+                seq=seq,
+                sender=sender,  # 'user' o 'ai'
+                content=content,
+                sender_name=sender_name,
+                message_type=message_type,  # 'text', 'command', 'error', etc.
+                tokens=ConversationMessage.estimate_tokens(content),
+                timestamp=now,
+            )
+            Conversation.objects.filter(pk=self.pk).update(message_count=seq, updated_at=now)
+        self.message_count = seq
+        self.updated_at = now
+        return message
+
+    def context_window(self, max_turns=None, max_tokens=None):
+        """
+        Últimos mensajes para la IA, en orden cronológico: como mucho
+        `max_turns` mensajes y `max_tokens` tokens estimados (el último
+        mensaje entra siempre). Sólo lee la cola del índice (conversation, seq).
+        """
+        from django.conf import settings
+
+        max_turns = max_turns or getattr(settings, 'CHAT_AI_CONTEXT_TURNS', 50)
+        max_tokens = max_tokens or getattr(settings, 'CHAT_AI_CONTEXT_TOKENS', 6000)
+        rows = (self.turns.exclude(message_type='error')  # Excluir mensajes de error
+                .order_by('-seq')
+                .values_list('sender', 'content', 'sender_name', 'tokens')[:max_turns])
         return [
             {
-                'role': 'user' if msg['sender'] == 'user' else 'assistant',
-                'content': msg['content']
+                'role': 'user' if sender == 'user' else 'assistant',
+                'content': content,
+                'sender_name': sender_name,
             }
-            for msg in self.messages
-            if msg.get('type') != 'error'  # Excluir mensajes de error
+            for sender, content, sender_name, _ in fit_to_budget(rows.iterator(chunk_size=max_turns), max_tokens)
+        ]
+
+    def get_messages_for_ai(self, max_turns=None, max_tokens=None):
+        """Obtiene mensajes en formato para enviar a la IA"""
+        return [
+            {'role': msg['role'], 'content': msg['content']}
+            for msg in self.context_window(max_turns, max_tokens)
         ]
 
     def generate_title(self):
         """Genera un título automático basado en el primer mensaje del usuario"""
-        if not self.title and self.messages:
-            first_user_message = next(
-                (msg for msg in self.messages if msg['sender'] == 'user'),
-                None
-            )
-            if first_user_message:
-                content = first_user_message['content'][:50]
-                self.title = f"{content}{'...' if len(first_user_message['content']) > 50 else ''}"
+        if not self.title:
+            content = self.turns.filter(sender='user').order_by('seq').values_list('content', flat=True).first()
+            if content:
+                self.title = f"{content[:50]}{'...' if len(content) > 50 else ''}"
                 self.save(update_fields=['title'])
 
     @classmethod
@@ -85,8 +112,91 @@ class Conversation(models.Model):
         return conversation
 
     def get_recent_messages(self, limit=50):
-        """Obtiene los mensajes más recientes"""
-        return self.messages[-limit:] if self.messages else []
+        """Obtiene los mensajes más recientes (dicts, en orden cronológico)"""
+        rows = list(self.turns.order_by('-seq')[:limit])
+        return [m.as_dict() for m in reversed(rows)]
+
+    def get_last_message(self):
+        if hasattr(self, '_last_message'):     # resuelto por with_last_messages()
+            return self._last_message
+        message = self.turns.order_by('-seq').first()
+        return message.as_dict() if message else None
+
+    @classmethod
+    def with_last_messages(cls, queryset):
+        """
+        Evalúa `queryset` con el último mensaje de cada conversación ya
+        resuelto para get_last_message(): una subconsulta por el índice
+        (conversation, seq) y un in_bulk, no una consulta por conversación.
+        """
+        from django.db.models import OuterRef, Subquery
+
+        conversations = list(queryset.annotate(last_message_id=Subquery(
+            ConversationMessage.objects.filter(conversation=OuterRef('pk')).order_by('-seq').values('id')[:1]
+        )))
+        messages = ConversationMessage.objects.in_bulk(
+            [c.last_message_id for c in conversations if c.last_message_id])
+        for conv in conversations:
+            message = messages.get(conv.last_message_id)
+            conv._last_message = message.as_dict() if message else None
+        return conversations
+
+
+def fit_to_budget(rows, max_tokens):
+    """
+    rows: (…, tokens) del más nuevo al más viejo → los que caben en
+    `max_tokens`, en orden cronológico. El primero entra siempre.
+    """
+    kept, used = [], 0
+    for row in rows:
+        used += row[-1]
+        if kept and used > max_tokens:
+            break
+        kept.append(row)
+    kept.reverse()
+    return kept
+
+
+class ConversationMessage(models.Model):
+    """Un mensaje de una Conversation — append-only, ordenado por seq"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='turns')
+    seq = models.PositiveIntegerField(help_text="Posición en la conversación (1, 2, 3…)")
+    sender = models.CharField(max_length=20, help_text="'user' o 'ai'")
+    content = models.TextField()
+    sender_name = models.CharField(max_length=200, null=True, blank=True)
+    message_type = models.CharField(max_length=30, default='text', help_text="'text', 'command', 'command_response', 'error'")
+    tokens = models.PositiveIntegerField(default=0, help_text="Tokens estimados del contenido")
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['conversation', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'seq'], name='chat_convmsg_conversation_seq'),
+        ]
+        verbose_name = "Mensaje de conversación"
+        verbose_name_plural = "Mensajes de conversación"
+
+    def __str__(self):
+        return f"{self.conversation_id}#{self.seq} {self.sender}"
+
+    @property
+    def type(self):
+        return self.message_type
+
+    @staticmethod
+    def estimate_tokens(content):
+        """~4 caracteres por token: suficiente para recortar la ventana de contexto"""
+        return len(content or '') // 4 + 1
+
+    def as_dict(self):
+        """Mismo formato que los elementos del antiguo Conversation.messages (JSON)"""
+        return {
+            'sender': self.sender,
+            'content': self.content,
+            'timestamp': self.timestamp.isoformat(),
+            'sender_name': self.sender_name,
+            'type': self.message_type,
+        }
 
 
 class CommandLog(models.Model):
@@ -0,0 +1,241 @@
+# chat/notification_fanout.py
+"""
+Fan-out de notificaciones de mensajes de sala (rooms.Notification).
+
+ChatConsumer.receive sólo llama enqueue(): agregar el evento a una lista en
+memoria, sin tocar la BD. Un hilo escritor por proceso espera
+CHAT_FANOUT_WINDOW_S, toma todo lo acumulado y:
+
+  1. coalesce()  → agrupa por sala: una ráfaga de N mensajes en la misma sala
+                   genera UNA notificación por miembro ("N mensajes nuevos")
+  2. flush()     → miembros activos de todas las salas en una consulta,
+                   Notification.objects.bulk_create, y los contadores de no
+                   leídas por usuario en Redis (chat:unread:<user_id>)
+
+Los contadores se leen con unread_count(); si la clave no existe (o venció,
+UNREAD_TTL) se recalcula desde la BD. Sólo se incrementan claves existentes:
+una clave ausente no puede quedar con un valor parcial.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CHARS = 200
+BATCH_SIZE    = 1000
+UNREAD_TTL    = 60 * 10     # acota la deriva por Notification creadas fuera del fan-out
+
+
+def _unread_key(user_id) -> str:
+    return f"chat:unread:{user_id}"
+
+
+# ── Contadores de no leídas ───────────────────────────────────────────────────
+
+class _RedisCounters:
+    """INCRBY en un solo round-trip (Lua), sólo sobre claves existentes."""
+
+    _INCR_EXISTING = """
+        for i, key in ipairs(KEYS) do
+            if redis.call('EXISTS', key) == 1 then
+                redis.call('INCRBY', key, ARGV[i])
+            end
+        end
+        return 0
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._incr  = client.register_script(self._INCR_EXISTING)
+
+    def incr_many(self, counts: dict) -> None:
+        keys = [_unread_key(uid) for uid in counts]
+        self._incr(keys=keys, args=list(counts.values()))
+
+    def get(self, user_id):
+        value = self.client.get(_unread_key(user_id))
+        return int(value) if value is not None else None
+
+    def set(self, user_id, value: int) -> None:
+        self.client.set(_unread_key(user_id), value, ex=UNREAD_TTL)
+
+
+class _CacheCounters:
+    """Fallback sobre la cache de Django (FileBasedCache / locmem)."""
+
+    def incr_many(self, counts: dict) -> None:
+        from django.core.cache import cache
+        for uid, n in counts.items():
+            try:
+                cache.incr(_unread_key(uid), n)
+            except ValueError:
+                pass    # sin clave: se recalcula al leer
+
+    def get(self, user_id):
+        from django.core.cache import cache
+        return cache.get(_unread_key(user_id))
+
+    def set(self, user_id, value: int) -> None:
+        from django.core.cache import cache
+        cache.set(_unread_key(user_id), value, UNREAD_TTL)
+
+
+_counters = None
+
+
+def counters():
+    """Redis si la cache default es django_redis; si no, la cache de Django."""
+    global _counters
+    if _counters is None:
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        if backend.startswith('django_redis'):
+            from django_redis import get_redis_connection
+            _counters = _RedisCounters(get_redis_connection('default'))
+        else:
+            _counters = _CacheCounters()
+    return _counters
+
+
+def unread_count(user) -> int:
+    value = counters().get(user.id)
+    if value is None:
+        from rooms.models import Notification
+        value = Notification.objects.filter(user=user, is_read=False).count()
+        counters().set(user.id, value)
+    return value
+
+
+def mark_read(user, notification_ids: list) -> int:
+    """Marca como leídas (sólo del usuario) y recalcula su contador."""
+    from django.utils import timezone
+    from rooms.models import Notification
+
+    updated = Notification.objects.filter(
+        user=user, id__in=notification_ids, is_read=False,
+    ).update(is_read=True, read_at=timezone.now())
+    counters().set(user.id, Notification.objects.filter(user=user, is_read=False).count())
+    return updated
+
+
+# ── Coalescencia + escritura ──────────────────────────────────────────────────
+
+def coalesce(events: list) -> dict:
+    """
+    events: [(room_id, message_id, sender_id, content), ...] en orden de llegada
+    → {room_id: [(message_id, sender_id, content), ...]}
+    """
+    bursts = {}
+    for room_id, message_id, sender_id, content in events:
+        bursts.setdefault(int(room_id), []).append((message_id, sender_id, content))
+    return bursts
+
+
+def build_notifications(room_id, room_name: str, burst: list, member_ids, Notification) -> list:
+    """Una notificación por miembro con mensajes ajenos en la ráfaga."""
+    out = []
+    for uid in member_ids:
+        others = [m for m in burst if m[1] != uid]
+        if not others:
+            continue
+        message_id, _, content = others[-1]
+        preview = content[:PREVIEW_CHARS]
+        out.append(Notification(
+            user_id            = uid,
+            title              = f"Mensaje en {room_name}"[:255],
+            message            = preview if len(others) == 1 else f"{len(others)} mensajes nuevos — {preview}",
+            notification_type  = 'chat',
+            related_room_id    = room_id,
+            related_message_id = message_id,
+            action_url         = f'/chat/room/{room_id}/',
+        ))
+    return out
+
+
+def flush(events: list) -> int:
+    """Escribe las notificaciones de `events`. Devuelve cuántas se crearon."""
+    from rooms.models import Notification, Room, RoomMember
+
+    bursts = coalesce(events)
+    if not bursts:
+        return 0
+    names   = dict(Room.objects.filter(id__in=bursts).values_list('id', 'name'))
+    members = {}
+    for room_id, user_id in (RoomMember.objects.filter(room_id__in=bursts, is_active=True)
+                                               .values_list('room_id', 'user_id')):
+        members.setdefault(room_id, []).append(user_id)
+
+    notifications = []
+    for room_id, burst in bursts.items():
+        if room_id in names:
+            notifications += build_notifications(room_id, names[room_id], burst,
+                                                 members.get(room_id, []), Notification)
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+
+    per_user = {}
+    for n in notifications:
+        per_user[n.user_id] = per_user.get(n.user_id, 0) + 1
+    if per_user:
+        counters().incr_many(per_user)
+    return len(notifications)
+
+
+class _FanoutWriter:
+    """Hilo daemon por proceso: junta eventos durante `window_s` y llama flush()."""
+
+    def __init__(self, window_s: float):
+        self.window_s = window_s
+        self._events  = []
+        self._lock    = threading.Lock()
+        self._wake    = threading.Event()
+        self._thread  = None
+
+    def put(self, event: tuple) -> None:
+        with self._lock:
+            self._events.append(event)
+            self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='chat-fanout', daemon=True)
+                self._thread.start()
+
+    def drain(self) -> int:
+        with self._lock:
+            events, self._events = self._events, []
+            self._wake.clear()
+        if not events:
+            return 0
+        try:
+            return flush(events)
+        except Exception as e:
+            logger.error("chat fan-out: %s eventos descartados: %s", len(events), e, exc_info=True)
+            return 0
+        finally:
+            close_old_connections()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.window_s)     # ventana de coalescencia
+            self.drain()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer() -> _FanoutWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _FanoutWriter(getattr(settings, 'CHAT_FANOUT_WINDOW_S', 0.5))
+            atexit.register(_writer.drain)
+    return _writer
+
+
+def enqueue(room_id, message_id, sender_id, content: str) -> None:
+    """Encola el fan-out de un mensaje. No bloquea ni consulta la BD."""
+    writer().put((room_id, message_id, sender_id, content))
@@ -13,12 +13,18 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             return
 
         self.notification_group_name = "notifications"
+        # Canal personal de Centrifugo 'personal:<id>' (relay_outbox --transport channels)
+        self.personal_group_name = f"personal_{self.user.id}"
 
         # Join general notifications group
         await self.channel_layer.group_add(
             self.notification_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_add(
+            self.personal_group_name,
+            self.channel_name
+        )
 
         await self.accept()
 
@@ -28,6 +34,19 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             self.notification_group_name,
             self.channel_name
         )
+        if getattr(self, 'personal_group_name', None):
+            await self.channel_layer.group_discard(
+                self.personal_group_name,
+                self.channel_name
+            )
+
+    async def outbox_message(self, event):
+        # Payload de rooms.Outbox publicado por rooms/outbox_relay.py
+        await self.send(text_data=json.dumps({
+            "type": "outbox",
+            "channel": event["channel"],
+            "data": event["data"]
+        }))
 
     async def chat_message(self, event):
         # Only send notification if the recipient is not the sender
@@ -0,0 +1,137 @@
+# chat/tests/test_conversation_messages.py
+"""
+Tests unitarios para el historial normalizado de Conversation
+(chat/models.py ConversationMessage + migración 0002_conversation_messages).
+Salvo TestLastMessages, no requieren base de datos — querysets y apps de
+migración falsos.
+
+Cobertura:
+  fit_to_budget   → recorta por tokens desde el más nuevo, el último entra siempre
+  context_window  → sólo la cola (slice max_turns), roles, orden cronológico
+  as_dict         → mismo formato que el antiguo JSONField
+  with_last_messages → último mensaje de N conversaciones en 2 consultas
+  migración       → JSON → filas con seq consecutivo y message_count
+"""
+
+import importlib
+from datetime import datetime, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from chat.models import Conversation, ConversationMessage, fit_to_budget
+
+migration = importlib.import_module('chat.migrations.0002_conversation_messages')
+
+
+class TestFitToBudget(SimpleTestCase):
+
+    def test_cuts_oldest(self):
+        rows = [('c', 40), ('b', 30), ('a', 50)]      # del más nuevo al más viejo
+        self.assertEqual(fit_to_budget(rows, 80), [('b', 30), ('c', 40)])
+
+    def test_latest_always_kept(self):
+        self.assertEqual(fit_to_budget(iter([('big', 500), ('x', 1)]), 100), [('big', 500)])
+
+    def test_estimate_tokens(self):
+        self.assertEqual(ConversationMessage.estimate_tokens('a' * 40), 11)
+        self.assertEqual(ConversationMessage.estimate_tokens(None), 1)
+
+
+class TestContextWindow(SimpleTestCase):
+
+    def _window(self, rows, **kw):
+        turns = MagicMock()
+        tail = turns.exclude.return_value.order_by.return_value.values_list.return_value
+        tail.__getitem__.return_value.iterator.return_value = iter(rows)
+        with patch.object(Conversation, 'turns', turns):
+            window = Conversation().context_window(**kw)
+        return turns, tail, window
+
+    def test_tail_in_chronological_order(self):
+        rows = [('ai', 'hola', 'Asistente', 2), ('user', 'hi', 'Ana', 1)]
+        turns, tail, window = self._window(rows, max_turns=10, max_tokens=100)
+        turns.exclude.assert_called_once_with(message_type='error')
+        turns.exclude.return_value.order_by.assert_called_once_with('-seq')
+        tail.__getitem__.assert_called_once_with(slice(None, 10))
+        self.assertEqual(window, [
+            {'role': 'user', 'content': 'hi', 'sender_name': 'Ana'},
+            {'role': 'assistant', 'content': 'hola', 'sender_name': 'Asistente'},
+        ])
+
+    def test_token_budget(self):
+        rows = [('ai', 'c', None, 60), ('user', 'b', None, 30), ('ai', 'a', None, 30)]
+        _, _, window = self._window(rows, max_turns=10, max_tokens=100)
+        self.assertEqual([m['content'] for m in window], ['b', 'c'])
+
+
+class TestAsDict(SimpleTestCase):
+
+    def test_legacy_shape(self):
+        ts = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        m = ConversationMessage(seq=1, sender='user', content='hola', sender_name='Ana',
+                                message_type='command', timestamp=ts)
+        self.assertEqual(m.as_dict(), {'sender': 'user', 'content': 'hola', 'timestamp': ts.isoformat(),
+                                       'sender_name': 'Ana', 'type': 'command'})
+        self.assertEqual(m.type, 'command')
+
+
+class TestLastMessages(TestCase):
+
+    def test_two_queries_for_any_number_of_conversations(self):
+        user = get_user_model().objects.create_user(username='hist', password='pass123')
+        for n in range(3):
+            conv = Conversation.objects.create(user=user, conversation_id=f'c{n}')
+            for i in range(n):
+                conv.add_message('user', f'{n}-{i}')
+
+        with self.assertNumQueries(2):
+            conversations = Conversation.with_last_messages(Conversation.objects.filter(user=user))
+            last = {c.conversation_id: c.get_last_message() for c in conversations}
+
+        self.assertIsNone(last['c0'])
+        self.assertEqual((last['c1']['content'], last['c2']['content']), ('1-0', '2-1'))
+
+
+class _FakeManager:
+    def __init__(self, items=()):
+        self.items, self.created, self.updates = list(items), [], []
+
+    def only(self, *fields):
+        return self
+
+    def iterator(self, chunk_size=None):
+        return iter(self.items)
+
+    def bulk_create(self, rows, batch_size=None):
+        self.created += rows
+
+    def filter(self, **kw):
+        manager = self
+        return SimpleNamespace(update=lambda **values: manager.updates.append((kw, values)))
+
+
+class TestMigration(SimpleTestCase):
+
+    def test_json_to_rows(self):
+        updated = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        conv = SimpleNamespace(id=5, updated_at=updated, messages=[
+            {'sender': 'user', 'content': 'hola', 'timestamp': '2026-02-28T10:00:00+00:00',
+             'sender_name': 'Ana', 'type': 'text'},
+            {'sender': 'ai', 'content': 'x' * 8},
+        ])
+        convs, msgs = _FakeManager([conv]), _FakeManager()
+        models = {'Conversation': SimpleNamespace(objects=convs),
+                  'ConversationMessage': lambda **kw: SimpleNamespace(**kw)}
+        models['ConversationMessage'].objects = msgs
+        apps = SimpleNamespace(get_model=lambda app, name: models[name])
+
+        migration.json_to_rows(apps, None)
+
+        self.assertEqual([(r.seq, r.sender, r.message_type, r.tokens) for r in msgs.created],
+                         [(1, 'user', 'text', 2), (2, 'ai', 'text', 3)])
+        self.assertEqual(msgs.created[0].timestamp.day, 28)
+        self.assertEqual(msgs.created[1].timestamp, updated)
+        self.assertEqual(convs.updates, [({'id': 5}, {'message_count': 2})])
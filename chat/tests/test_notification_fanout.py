@@ -0,0 +1,94 @@
+# chat/tests/test_notification_fanout.py
+"""
+Tests unitarios para el fan-out de notificaciones (chat/notification_fanout.py).
+No requieren base de datos — Notification falso y cache locmem.
+
+Cobertura:
+  coalesce             → agrupa por sala en orden de llegada
+  build_notifications  → una por miembro, sin los propios mensajes, ráfaga → "N mensajes"
+  _CacheCounters       → sólo incrementa claves existentes
+  _FanoutWriter        → eventos de la ventana en un solo flush, errores no matan el hilo
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from chat import notification_fanout as fanout
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'chat-fanout-tests'}}
+
+
+def _notification(**kw):
+    return SimpleNamespace(**kw)
+
+
+class TestCoalesce(SimpleTestCase):
+
+    def test_groups_by_room(self):
+        events = [('7', 1, 10, 'a'), (8, 2, 11, 'b'), (7, 3, 11, 'c')]
+        self.assertEqual(fanout.coalesce(events), {
+            7: [(1, 10, 'a'), (3, 11, 'c')],
+            8: [(2, 11, 'b')],
+        })
+
+
+class TestBuildNotifications(SimpleTestCase):
+
+    def test_one_per_member_excluding_own(self):
+        burst = [(1, 10, 'hola'), (2, 11, 'qué tal'), (3, 10, 'todo bien')]
+        out = fanout.build_notifications(7, 'Sala', burst, [10, 11, 12], _notification)
+        by_user = {n.user_id: n for n in out}
+
+        self.assertEqual(set(by_user), {10, 11, 12})
+        self.assertEqual((by_user[10].message, by_user[10].related_message_id), ('qué tal', 2))
+        self.assertEqual(by_user[11].message, '2 mensajes nuevos — todo bien')
+        self.assertEqual(by_user[12].message, '3 mensajes nuevos — todo bien')
+        self.assertEqual(by_user[12].action_url, '/chat/room/7/')
+
+    def test_sender_alone_gets_nothing(self):
+        self.assertEqual(fanout.build_notifications(7, 'Sala', [(1, 10, 'x')], [10], _notification), [])
+
+
+@override_settings(CACHES=LOCMEM)
+class TestCacheCounters(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_existing_keys(self):
+        counters = fanout._CacheCounters()
+        counters.set(1, 4)
+        counters.incr_many({1: 2, 2: 5})
+        self.assertEqual((counters.get(1), counters.get(2)), (6, None))
+
+
+class TestWriter(SimpleTestCase):
+
+    def test_window_flushes_once(self):
+        flushed, done = [], threading.Event()
+
+        def fake_flush(events):
+            flushed.append(list(events))
+            done.set()
+            return len(events)
+
+        writer = fanout._FanoutWriter(window_s=0.05)
+        with patch.object(fanout, 'flush', fake_flush):
+            for i in range(5):
+                writer.put((1, i, 10, 'm'))
+            self.assertTrue(done.wait(2))
+        self.assertEqual(flushed, [[(1, i, 10, 'm') for i in range(5)]])
+
+    def test_flush_error_is_logged(self):
+        writer = fanout._FanoutWriter(window_s=0)
+        writer._events = [(1, 1, 10, 'm')]
+        with patch.object(fanout, 'flush', side_effect=RuntimeError('db')), \
+             patch.object(fanout.logger, 'error') as log:
+            self.assertEqual(writer.drain(), 0)
+        log.assert_called_once()
+        self.assertEqual(writer._events, [])
@@ -146,23 +146,21 @@ def mark_notifications_read_api(request):
 @login_required
 @csrf_exempt
 def room_history_api(request, room_id):
-    """Devuelve el historial de mensajes de una sala en formato JSON."""
-    try:
-        room = Room.objects.get(id=room_id)
-        chat_history = Message.objects.filter(room=room).select_related('user').order_by('created_at')[:50]
-        history = []
-        for msg in chat_history:
-            user_id = msg.user.id if msg.user else 0
-            display_name = f"{msg.user.first_name} {msg.user.last_name}".strip() if msg.user else f"User #{user_id}" if user_id else "Usuario"
-            history.append({
-                'user_id': user_id,
-                'display_name': display_name,
-                'content': msg.content,
-                'timestamp': msg.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            })
-        return JsonResponse({'history': history})
-    except Room.DoesNotExist:
+    """
+    Historial de una sala en JSON, paginado por cursor (rooms/history.py).
+    ?before=<next_cursor> pide los mensajes anteriores; ?limit= (máx. 100).
+    """
+    from rooms import history as room_history
+
+    if not Room.objects.filter(id=room_id).exists():
         return JsonResponse({'error': 'Room not found'}, status=404)
+    try:
+        data = room_history.history(room_id, before=request.GET.get('before') or None,
+                                    limit=request.GET.get('limit') or room_history.PAGE_SIZE,
+                                    user=request.user)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'history': data['messages'], 'next_cursor': data['next_cursor']})
 
 @login_required
 @csrf_exempt
@@ -360,14 +358,10 @@ def chat_view(request):
 
             # If no chat_history provided, load from active conversation
             if not chat_history:
-                conversation_messages = conversation.get_recent_messages(limit=50)
+                # Sólo la cola de la conversación (CHAT_AI_CONTEXT_TURNS / _TOKENS)
                 chat_history = [
-                    {
-                        'role': 'user' if msg['sender'] == 'user' else 'assistant',
-                        'content': msg['content'],
-                        'sender_name': msg.get('sender_name', request.user.get_full_name() if msg['sender'] == 'user' else 'Asistente')
-                    }
-                    for msg in conversation_messages
+                    dict(msg, sender_name=msg['sender_name'] or (request.user.get_full_name() if msg['role'] == 'user' else 'Asistente'))
+                    for msg in conversation.context_window()
                 ]
 
             # Store chat history in cache (para compatibilidad)
@@ -598,6 +592,19 @@ def chatroom(request, room_name):
     return render(request, "chat/room.html", context)
 
 
+def _search_since(date_filter):
+    """'today' | 'week' | 'month' → fecha mínima para la búsqueda de mensajes."""
+    from datetime import timedelta
+    now = timezone.now()
+    if date_filter == 'today':
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if date_filter == 'week':
+        return now - timedelta(days=7)
+    if date_filter == 'month':
+        return now - timedelta(days=30)
+    return None
+
+
 @login_required
 @csrf_exempt
 def search_history(request):
@@ -609,43 +616,20 @@ def search_history(request):
     if not query:
         return JsonResponse({"results": [], "total": 0})
 
-    # Build queryset
-    from rooms.models import Message
-    messages = Message.objects.select_related('user').order_by('-created_at')
-
-    if room_id:
-        messages = messages.filter(room_id=room_id)
-
-    # Apply user filter
-    if user_filter:
-        messages = messages.filter(user__username__icontains=user_filter)
-
-    # Apply date filter
-    if date_filter:
-        from datetime import datetime, timedelta
-        now = datetime.now()
-
-        if date_filter == 'today':
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif date_filter == 'week':
-            start_date = now - timedelta(days=7)
-        elif date_filter == 'month':
-            start_date = now - timedelta(days=30)
-        else:
-            start_date = None
-
-        if start_date:
-            messages = messages.filter(created_at__gte=start_date)
-
-    # Apply content search
-    messages = messages.filter(content__icontains=query)[:50]  # Limit results
+    # Índice full-text del motor (rooms/search.py): filtros dentro de la misma consulta
+    from rooms.search import search_messages as fulltext_search
+    hits = fulltext_search(query, room_id=room_id, user=user_filter,
+                           since=_search_since(date_filter), limit=50)
 
     # Format results
     results = []
-    for msg in messages:
+    for hit in hits:
+        msg = hit['message']
         results.append({
             'id': msg.id,
             'content': msg.content,
+            'snippet': hit['snippet'],
+            'rank': hit['rank'],
             'user': msg.user.username if msg.user else 'Unknown',
             'display_name': f"{msg.user.first_name} {msg.user.last_name}".strip() if msg.user else 'Unknown',
             'timestamp': msg.created_at.strftime('%Y-%m-%d %H:%M:%S'),
@@ -792,29 +776,18 @@ def room(request, room_name):
         messages.error(request, "Room not found")
         return redirect('chat:room_list')
 
-    # Obtener historial de mensajes (últimos 50)
     color_palette = [
         "#007bff", "#28a745", "#dc3545", "#fd7e14", "#6610f2",
         "#20c997", "#6f42c1", "#e83e8c", "#17a2b8", "#ffc107", "#343a40"
     ]
-    chat_history = Message.objects.filter(room=room_obj).select_related('user').order_by('created_at')[:50]
-    history = []
-    for msg in chat_history:
-        user_id = msg.user.id if msg.user else 0
-        color = color_palette[user_id % len(color_palette)]
-        if msg.user:
-            display_name = f"{msg.user.first_name} {msg.user.last_name}".strip()
-            if not display_name:
-                display_name = msg.user.username
-        else:
-            display_name = f"User #{user_id}" if user_id else "Usuario"
-        history.append({
-            'user_id': user_id,
-            'display_name': display_name,
-            'content': msg.content,
-            'timestamp': msg.created_at,
-            'color': color,
-        })
+    # Últimos mensajes del ring buffer de la sala (rooms/history.py)
+    from rooms import history as room_history
+    history = [
+        dict(msg,
+             timestamp=datetime.fromisoformat(msg['created_at']),
+             color=color_palette[msg['user_id'] % len(color_palette)])
+        for msg in room_history.recent(room_obj.id)[-room_history.PAGE_SIZE:]
+    ]
 
     from rooms.models import Room as RoomModel
     all_rooms = RoomModel.objects.all().order_by('name')
@@ -951,6 +924,7 @@ def command_history(request):
 def conversation_history(request):
     """Historial de conversaciones con el asistente IA"""
     from .models import Conversation
+    from django.db.models import Sum
 
     # Obtener conversaciones del usuario
     conversations = Conversation.objects.filter(user=request.user).order_by('-updated_at')
@@ -958,11 +932,11 @@ def conversation_history(request):
     # Estadísticas
     total_conversations = conversations.count()
     active_conversations = conversations.filter(is_active=True).count()
-    total_messages = sum(len(conv.messages) for conv in conversations)
+    total_messages = conversations.aggregate(total=Sum('message_count'))['total'] or 0
 
     # Conversaciones recientes
     recent_conversations = []
-    for conv in conversations[:20]:  # Últimas 20 conversaciones
+    for conv in Conversation.with_last_messages(conversations[:20]):  # Últimas 20 conversaciones
         recent_conversations.append({
             'id': conv.id,
             'conversation_id': conv.conversation_id,
@@ -970,8 +944,8 @@ def conversation_history(request):
             'created_at': conv.created_at,
             'updated_at': conv.updated_at,
             'is_active': conv.is_active,
-            'message_count': len(conv.messages),
-            'last_message': conv.messages[-1] if conv.messages else None
+            'message_count': conv.message_count,
+            'last_message': conv.get_last_message()
         })
 
     context = {
@@ -1050,7 +1024,7 @@ def conversation_detail(request, conversation_id):
             'pagetitle': f'Conversación: {conversation.title}',
             'user_full_name': f"{request.user.first_name} {request.user.last_name}",
             'conversation': conversation,
-            'messages': conversation.messages
+            'messages': conversation.turns.order_by('seq')
         }
         return render(request, 'chat/conversation_detail.html', context)
 
@@ -1588,14 +1562,13 @@ def mark_notifications_read_api(request):
     """API endpoint to mark notifications as read"""
     if request.method == 'POST':
         try:
-            from .models import HardcodedNotificationManager
+            from . import notification_fanout
             import json
 
             data = json.loads(request.body)
             notification_ids = data.get('notification_ids', [])
 
-            notification_manager = HardcodedNotificationManager()
-            marked_count = notification_manager.mark_notifications_read(request.user, notification_ids)
+            marked_count = notification_fanout.mark_read(request.user, notification_ids)
 
             return JsonResponse({
                 'success': True,
@@ -1621,46 +1594,33 @@ def search_messages(request):
         date_filter = request.GET.get('date', '').strip()
         room_id = request.GET.get('room_id', '').strip()
 
-        from rooms.models import Message, Room
-        from django.db.models import Q
-
-        # Base queryset
-        messages = Message.objects.select_related('user', 'room').order_by('-created_at')
+        from rooms.models import Message
+        from rooms.search import search_messages as fulltext_search
 
-        # Apply filters
+        since = _search_since(date_filter)
         if query:
-            messages = messages.filter(
-                Q(content__icontains=query)
-            )
-
-        if user_filter:
-            messages = messages.filter(user__username__icontains=user_filter)
-
-        if date_filter:
-            from datetime import datetime, timedelta
-            now = timezone.now()
-            if date_filter == 'today':
-                start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                messages = messages.filter(created_at__gte=start_date)
-            elif date_filter == 'week':
-                start_date = now - timedelta(days=7)
-                messages = messages.filter(created_at__gte=start_date)
-            elif date_filter == 'month':
-                start_date = now - timedelta(days=30)
-                messages = messages.filter(created_at__gte=start_date)
-
-        if room_id:
-            messages = messages.filter(room_id=room_id)
-
-        # Limit results
-        messages = messages[:50]
+            # Índice full-text del motor: relevancia + filtros en la misma consulta
+            hits = fulltext_search(query, room_id=room_id, user=user_filter, since=since, limit=50)
+        else:
+            # Sin texto: sólo filtros, los más recientes
+            messages = Message.objects.select_related('user', 'room').order_by('-created_at')
+            if user_filter:
+                messages = messages.filter(user__username__icontains=user_filter)
+            if since:
+                messages = messages.filter(created_at__gte=since)
+            if room_id:
+                messages = messages.filter(room_id=room_id)
+            hits = [{'message': m, 'rank': 0.0, 'snippet': ''} for m in messages[:50]]
 
         # Format results
         results = []
-        for msg in messages:
+        for hit in hits:
+            msg = hit['message']
             results.append({
                 'id': msg.id,
                 'content': msg.content,
+                'snippet': hit['snippet'],
+                'rank': hit['rank'],
                 'user': msg.user.username,
                 'display_name': f"{msg.user.first_name} {msg.user.last_name}".strip() or msg.user.username,
                 'room_name': msg.room.name,
@@ -1683,26 +1643,15 @@ def update_presence(request):
     """Update user presence status"""
     if request.method == 'POST':
         try:
-            from .models import UserPresence
-            from rooms.models import Room
+            from rooms import presence
 
             data = json.loads(request.body)
             status = data.get('status', 'online')
             room_id = data.get('room_id')
 
-            presence, created = UserPresence.objects.get_or_create(
-                user=request.user,
-                defaults={'status': status}
-            )
-
-            room = None
-            if room_id:
-                try:
-                    room = Room.objects.get(id=room_id)
-                except Room.DoesNotExist:
-                    pass
-
-            presence.update_presence(status, room)
+            # Heartbeat al buffer; UserPresence se escribe en el flush periódico
+            # (una sala inexistente se ignora ahí)
+            presence.update_presence(request.user.id, status, room_id)
 
             return JsonResponse({
                 'success': True,
@@ -1724,28 +1673,28 @@ def get_presence(request):
     if not room_id:
         return JsonResponse({'error': 'room_id is required'}, status=400)
 
-    from .models import UserPresence
+    from rooms import presence
     from rooms.models import RoomMember
 
     try:
         # Get room members
         members = RoomMember.objects.filter(room_id=room_id).select_related('user')
 
+        # Buffer de presencia + UserPresence para el resto, en una consulta
+        # (sin registro → offline)
+        states = presence.presence_of([member.user_id for member in members])
+
         presence_data = []
         for member in members:
-            try:
-                presence = UserPresence.objects.get(user=member.user)
-                if presence.is_online:
-                    presence_data.append({
-                        'user_id': member.user.id,
-                        'username': member.user.username,
-                        'display_name': f"{member.user.first_name} {member.user.last_name}".strip() or member.user.username,
-                        'status': presence.status,
-                        'last_seen': presence.last_seen.isoformat()
-                    })
-            except UserPresence.DoesNotExist:
-                # User has no presence record, consider offline
-                pass
+            state = states.get(member.user_id)
+            if state and presence.is_online(state):
+                presence_data.append({
+                    'user_id': member.user.id,
+                    'username': member.user.username,
+                    'display_name': f"{member.user.first_name} {member.user.last_name}".strip() or member.user.username,
+                    'status': state['status'],
+                    'last_seen': state['last_seen'].isoformat()
+                })
 
         return JsonResponse({
             'presence': presence_data,
@@ -1833,10 +1782,24 @@ def room_members_api(request, room_id):
 def unread_notifications_api(request):
     """API to get all unread notifications for the current user with robust caching"""
     try:
-        from .models import HardcodedNotificationManager
-
-        # Use the robust hardcoded notification manager
-        result = HardcodedNotificationManager.get_notifications_data(request.user, limit=20)
+        from rooms.models import Notification
+        from . import notification_fanout
+
+        # Filas reales (fan-out de chat/notification_fanout.py) + contador en Redis
+        unread = (Notification.objects.filter(user=request.user, is_read=False)
+                  .select_related('related_room')[:20])
+        notifications = [{
+            'id':         n.id,
+            'title':      n.title,
+            'message':    n.message,
+            'type':       n.notification_type,
+            'created_at': n.created_at.isoformat(),
+            'is_read':    n.is_read,
+            'room_id':    n.related_room_id,
+            'action_url': n.action_url,
+        } for n in unread]
+        unread_count = notification_fanout.unread_count(request.user)
+        result = {'notifications': notifications, 'unread_count': unread_count, 'total': unread_count}
 
         # Add cache headers for better performance
         response = JsonResponse(result)
@@ -1978,8 +1941,10 @@ def conversations_api(request):
     """API para obtener la lista de conversaciones del usuario"""
     from .models import Conversation
 
-    conversations = Conversation.objects.filter(user=request.user).order_by('-updated_at')[:20]
-    logger.info(f"Conversations API called for user {request.user.username}, found {conversations.count()} conversations")
+    conversations = Conversation.with_last_messages(
+        Conversation.objects.filter(user=request.user).order_by('-updated_at')[:20]
+    )
+    logger.info(f"Conversations API called for user {request.user.username}, found {len(conversations)} conversations")
 
     conversations_data = []
     for conv in conversations:
@@ -1990,10 +1955,10 @@ def conversations_api(request):
             'created_at': conv.created_at.strftime('%d/%m/%Y %H:%M'),
             'updated_at': conv.updated_at.strftime('%d/%m/%Y %H:%M'),
             'is_active': conv.is_active,
-            'message_count': len(conv.messages),
-            'last_message': conv.messages[-1] if conv.messages else None
+            'message_count': conv.message_count,
+            'last_message': conv.get_last_message()
         })
-        logger.debug(f"Conversation {conv.id}: title='{conv.title}', active={conv.is_active}, messages={len(conv.messages)}")
+        logger.debug(f"Conversation {conv.id}: title='{conv.title}', active={conv.is_active}, messages={conv.message_count}")
 
     return JsonResponse({'conversations': conversations_data})
 
@@ -57,7 +57,10 @@ if not all_ds.exists():
     print("   (ninguno)")
 else:
     for ds in all_ds:
-        status = "✓" if ds.data_blob else "✗ SIN DATA_BLOB"
+        if ds.storage_backend == 'parquet':
+            status = "✓ parquet"
+        else:
+            status = "✓" if ds.data_blob else "✗ SIN DATA_BLOB"
         creator = ds.created_by.username if ds.created_by else "USUARIO ELIMINADO"
         print(f"   [{status}] {ds.name}")
         print(f"       ID: {ds.id}")
@@ -76,8 +79,8 @@ orphaned = StoredDataset.objects.filter(created_by__isnull=True)
 if orphaned.exists():
     errors.append(f"⚠️  {orphaned.count()} dataset(s) sin usuario (huérfanos)")
 
-# Verificar datasets sin data_blob
-no_blob = StoredDataset.objects.filter(data_blob='')
+# Verificar datasets sin data_blob (los Parquet no usan data_blob)
+no_blob = StoredDataset.objects.filter(storage_backend='blob', data_blob='')
 if no_blob.exists():
     errors.append(f"⚠️  {no_blob.count()} dataset(s) sin data_blob (no persisten)")
 
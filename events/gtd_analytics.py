@@ -5,8 +5,8 @@ Proporciona métricas detalladas, análisis de patrones y predicciones.
 
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Task, Project, InboxItem
 from .gtd_utils import gtd_engine
+from .services.gtd_aggregates import aggregates_for, format_duration, window
 import json
 from typing import Dict, List, Optional, Tuple
 from collections import Counter, defaultdict
@@ -33,8 +33,7 @@ class GTDProductivityAnalytics:
             if timezone.now().timestamp() - cache_entry['timestamp'] < self.cache_timeout:
                 return cache_entry['data']
 
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=days)
+        start_date, end_date = window(days)
 
         analytics = {
             'overview': self._get_overview_metrics(user_id, start_date, end_date),
@@ -58,72 +57,27 @@ class GTDProductivityAnalytics:
     def _get_overview_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Obtiene métricas generales de productividad."""
         try:
-            # Tareas básicas
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            pending_tasks = Task.objects.filter(
-                user_id=user_id,
-                status__in=['pending', 'in_progress']
-            ).count()
-
-            # Proyectos
-            total_projects = Project.objects.filter(
-                user_id=user_id,
-                created_at__lte=end_date
-            ).count()
-
-            active_projects = Project.objects.filter(
-                user_id=user_id,
-                status='active'
-            ).count()
-
-            completed_projects = Project.objects.filter(
-                user_id=user_id,
-                status='completed',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            # Inbox
-            inbox_items = InboxItem.objects.filter(
-                user_id=user_id,
-                captured_at__range=[start_date, end_date]
-            ).count()
-
-            processed_inbox = InboxItem.objects.filter(
-                user_id=user_id,
-                processed=True,
-                captured_at__range=[start_date, end_date]
-            ).count()
+            agg = aggregates_for(user_id, start_date, end_date)
+            tasks, projects, inbox = agg.tasks, agg.projects, agg.inbox
 
             # Cálculos de tasas
-            completion_rate = (completed_tasks / max(total_tasks, 1)) * 100
-            inbox_processing_rate = (processed_inbox / max(inbox_items, 1)) * 100
-            project_completion_rate = (completed_projects / max(total_projects, 1)) * 100
+            project_completion_rate = (projects['completed'] / max(projects['total'], 1)) * 100
 
             # Tasa de creación vs completación
-            creation_rate = total_tasks / max(days, 1)  # Tareas por día
-            completion_rate_per_day = completed_tasks / max(days, 1)
+            creation_rate = tasks['created'] / agg.total_days  # Tareas por día
+            completion_rate_per_day = tasks['completed'] / agg.total_days
 
             return {
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'total_projects': total_projects,
-                'active_projects': active_projects,
-                'completed_projects': completed_projects,
-                'inbox_items': inbox_items,
-                'processed_inbox': processed_inbox,
-                'completion_rate': round(completion_rate, 1),
-                'inbox_processing_rate': round(inbox_processing_rate, 1),
+                'total_tasks': tasks['created'],
+                'completed_tasks': tasks['completed'],
+                'pending_tasks': tasks['pending'],
+                'total_projects': projects['total'],
+                'active_projects': projects['active'],
+                'completed_projects': projects['completed'],
+                'inbox_items': inbox['captured'],
+                'processed_inbox': inbox['processed'],
+                'completion_rate': round(tasks['completion_rate'], 1),
+                'inbox_processing_rate': round(inbox['processing_rate'], 1),
                 'project_completion_rate': round(project_completion_rate, 1),
                 'creation_rate_per_day': round(creation_rate, 1),
                 'completion_rate_per_day': round(completion_rate_per_day, 1),
@@ -137,24 +91,8 @@ class GTDProductivityAnalytics:
     def _analyze_productivity_trends(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza tendencias de productividad a lo largo del tiempo."""
         try:
-            # Productividad diaria
-            daily_productivity = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(updated_at)'}).values('date').annotate(
-                completed=Count('id'),
-                created=Count('id', filter={'created_at__date': 'updated_at__date'})
-            ).order_by('date')
-
-            # Convertir a formato serializable
-            daily_data = []
-            for item in daily_productivity:
-                daily_data.append({
-                    'date': item['date'],
-                    'completed': item['completed'],
-                    'created': item['created']
-                })
+            # Productividad diaria (días con al menos una tarea completada)
+            daily_data = aggregates_for(user_id, start_date, end_date).daily
 
             # Calcular tendencia usando regresión lineal simple
             if len(daily_data) > 1:
@@ -193,24 +131,15 @@ class GTDProductivityAnalytics:
             return {}
 
     def _analyze_context_performance(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
-        """Analiza el rendimiento por contexto."""
+        """Analiza el rendimiento por contexto (contextos del inbox)."""
         try:
-            # Rendimiento por contexto
-            context_performance = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).values('context').annotate(
-                total=Count('id'),
-                completed=Count('id', filter={'status': 'done'}),
-                avg_completion_time=self._calculate_avg_completion_time_per_context(user_id, start_date, end_date)
-            )
+            contexts = aggregates_for(user_id, start_date, end_date).contexts
 
             # Calcular tasas de completación por contexto
             context_stats = {}
-            for context in context_performance:
-                ctx = context['context']
-                total = context['total']
-                completed = context['completed']
+            for ctx, counts in contexts.items():
+                total = counts['total']
+                completed = counts['processed']
                 completion_rate = (completed / max(total, 1)) * 100
 
                 context_stats[ctx] = {
@@ -250,47 +179,19 @@ class GTDProductivityAnalytics:
     def _analyze_time_patterns(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza patrones de tiempo y horarios."""
         try:
-            # Horarios de mayor productividad
-            hourly_productivity = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'hour': 'strftime("%H", updated_at)'}).values('hour').annotate(
-                count=Count('id')
-            )
-
-            hour_stats = {str(i): 0 for i in range(24)}
-            for item in hourly_productivity:
-                hour_stats[item['hour']] = item['count']
-
-            # Días de la semana más productivos
-            weekday_productivity = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'weekday': 'strftime("%w", updated_at)'}).values('weekday').annotate(
-                count=Count('id')
-            )
-
-            weekday_names = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-            weekday_stats = {weekday_names[i]: 0 for i in range(7)}
-            for item in weekday_productivity:
-                day_index = int(item['weekday'])
-                weekday_stats[weekday_names[day_index]] = item['count']
+            agg = aggregates_for(user_id, start_date, end_date)
 
-            # Tiempo promedio de completación
-            avg_completion_time = self._calculate_avg_completion_time(user_id, start_date, end_date)
-
-            # Patrones de energía
-            energy_patterns = self._analyze_energy_patterns(user_id, start_date, end_date)
+            # Horarios y días de la semana más productivos (una sola agrupación)
+            hour_stats = agg.hours
+            weekday_stats = agg.weekdays
 
             return {
                 'hourly_distribution': hour_stats,
                 'peak_hours': self._get_peak_hours(hour_stats),
                 'weekday_distribution': weekday_stats,
                 'most_productive_weekday': max(weekday_stats, key=weekday_stats.get) if weekday_stats else None,
-                'avg_completion_time': avg_completion_time,
-                'energy_patterns': energy_patterns,
+                'avg_completion_time': self._calculate_avg_completion_time(user_id, start_date, end_date),
+                'energy_patterns': self._analyze_energy_patterns(hour_stats),
                 'optimal_work_periods': self._identify_optimal_periods(hour_stats, weekday_stats)
             }
 
@@ -301,32 +202,22 @@ class GTDProductivityAnalytics:
     def _analyze_project_performance(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza el rendimiento de proyectos."""
         try:
-            # Proyectos con estadísticas
-            project_stats = Project.objects.filter(
-                user_id=user_id,
-                created_at__lte=end_date
-            ).annotate(
-                total_tasks=Count('tasks'),
-                completed_tasks=Count('tasks', filter={'status': 'done'}),
-                pending_tasks=Count('tasks', filter={'status__in': ['pending', 'in_progress']}),
-                avg_task_completion_time=self._calculate_project_avg_completion_time(user_id, start_date, end_date)
-            )
-
             # Análisis de proyectos
             projects_analysis = {}
-            for project in project_stats:
-                if project.total_tasks > 0:
-                    completion_rate = (project.completed_tasks / project.total_tasks) * 100
-                    velocity = project.completed_tasks / max((end_date - project.created_at).days, 1)
-
-                    projects_analysis[project.name] = {
-                        'total_tasks': project.total_tasks,
-                        'completed_tasks': project.completed_tasks,
-                        'pending_tasks': project.pending_tasks,
+            for project in aggregates_for(user_id, start_date, end_date).project_rows:
+                if project['total_tasks'] > 0:
+                    completion_rate = (project['completed_tasks'] / project['total_tasks']) * 100
+                    days_active = (end_date - project['created_at']).days
+                    velocity = project['completed_tasks'] / max(days_active, 1)
+
+                    projects_analysis[project['title']] = {
+                        'total_tasks': project['total_tasks'],
+                        'completed_tasks': project['completed_tasks'],
+                        'pending_tasks': project['pending_tasks'],
                         'completion_rate': round(completion_rate, 1),
                         'velocity': round(velocity, 2),
-                        'status': project.status,
-                        'days_active': (end_date - project.created_at).days
+                        'status': project['status'],
+                        'days_active': days_active
                     }
 
             # Proyectos más exitosos
@@ -362,31 +253,16 @@ class GTDProductivityAnalytics:
     def _calculate_efficiency_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Calcula métricas de eficiencia."""
         try:
+            tasks = aggregates_for(user_id, start_date, end_date).tasks
+
             # Tiempo promedio de respuesta (para inbox)
             inbox_response_time = self._calculate_inbox_response_time(user_id, start_date, end_date)
 
-            # Tasa de delegación
-            delegated_tasks = Task.objects.filter(
-                user_id=user_id,
-                delegated_to__isnull=False,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
+            # Tasa de delegación (asignadas a otra persona)
+            delegation_rate = (tasks['delegated'] / max(tasks['created'], 1)) * 100
 
-            delegation_rate = (delegated_tasks / max(total_tasks, 1)) * 100
-
-            # Tasa de tareas waiting for
-            waiting_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='waiting',
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            waiting_rate = (waiting_tasks / max(total_tasks, 1)) * 100
+            # Tasa de tareas waiting for (estado Blocked)
+            waiting_rate = (tasks['waiting'] / max(tasks['created'], 1)) * 100
 
             # Eficiencia de procesamiento
             processing_efficiency = self._calculate_processing_efficiency(user_id, start_date, end_date)
@@ -548,32 +424,33 @@ class GTDProductivityAnalytics:
     def _calculate_avg_completion_time(self, user_id: int, start_date: datetime, end_date: datetime) -> str:
         """Calcula tiempo promedio de completación."""
         try:
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).exclude(created_at__date=timezone.now().date())
-
-            if not completed_tasks:
-                return 'N/A'
+            return format_duration(aggregates_for(user_id, start_date, end_date).tasks['avg_completion'])
 
-            total_time = timedelta(0)
-            for task in completed_tasks:
-                time_diff = task.updated_at - task.created_at
-                total_time += time_diff
-
-            avg_time = total_time / len(completed_tasks)
+        except Exception:
+            return 'N/A'
 
-            hours = avg_time.days * 24 + avg_time.seconds // 3600
-            minutes = (avg_time.seconds % 3600) // 60
+    def _analyze_energy_patterns(self, hour_stats: Dict[str, int]) -> Dict:
+        """Reparte las completadas en mañana, tarde y noche."""
+        periods = {'morning': range(6, 12), 'afternoon': range(12, 18), 'evening': range(18, 24)}
+        energy = {name: sum(hour_stats.get(str(h), 0) for h in hours) for name, hours in periods.items()}
+        return {
+            'distribution': energy,
+            'high_energy_period': max(energy, key=energy.get) if any(energy.values()) else None
+        }
 
-            if hours > 0:
-                return f"{hours}h {minutes}m"
-            else:
-                return f"{minutes}m"
+    def _identify_project_bottlenecks(self, projects_analysis: Dict) -> List[str]:
+        """Proyectos con tareas pendientes y menos de 25% completado."""
+        return [
+            name for name, stats in projects_analysis.items()
+            if stats['pending_tasks'] > 0 and stats['completion_rate'] < 25
+        ]
 
-        except Exception:
-            return 'N/A'
+    def _calculate_avg_project_completion(self, projects_analysis: Dict) -> float:
+        """Promedio de la tasa de completación de los proyectos."""
+        if not projects_analysis:
+            return 0
+        rates = [stats['completion_rate'] for stats in projects_analysis.values()]
+        return round(sum(rates) / len(rates), 1)
 
     def _calculate_context_efficiency_score(self, completion_rate: float, total_tasks: int) -> float:
         """Calcula puntuación de eficiencia para un contexto."""
@@ -650,19 +527,8 @@ class GTDProductivityAnalytics:
     def _predict_weekly_completion(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Predice completación semanal basada en tendencias."""
         try:
-            # Obtener datos de las últimas 4 semanas
-            weekly_data = []
-            for i in range(4):
-                week_start = start_date - timedelta(days=7 * i)
-                week_end = week_start + timedelta(days=7)
-
-                completed = Task.objects.filter(
-                    user_id=user_id,
-                    status='done',
-                    updated_at__range=[week_start, week_end]
-                ).count()
-
-                weekly_data.append(completed)
+            # Últimas 4 semanas de la ventana, de la más reciente a la más antigua
+            weekly_data = aggregates_for(user_id, start_date, end_date).weekly_completed()[-4:][::-1]
 
             if not weekly_data:
                 return {'predicted': 0, 'confidence': 0}
@@ -696,20 +562,15 @@ class GTDProductivityAnalytics:
     def _predict_context_usage(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Predice uso de contextos para la próxima semana."""
         try:
-            # Obtener uso de contextos en las últimas semanas
-            context_trends = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).values('context').annotate(count=Count('id')).order_by('-count')
+            contexts = aggregates_for(user_id, start_date, end_date).contexts
 
-            if not context_trends:
+            if not contexts:
                 return {}
 
             # Calcular tendencias
             predictions = {}
-            for context_data in context_trends[:5]:  # Top 5 contextos
-                context = context_data['context']
-                current_usage = context_data['count']
+            for context, counts in list(contexts.items())[:5]:  # Top 5 contextos
+                current_usage = counts['total']
 
                 # Predicción simple basada en uso actual
                 predictions[context] = {
@@ -729,34 +590,22 @@ class GTDProductivityAnalytics:
         bottlenecks = []
 
         try:
-            # Análisis de tareas waiting for
-            waiting_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='waiting',
-                created_at__lte=end_date - timedelta(days=7)
-            ).count()
+            agg = aggregates_for(user_id, start_date, end_date)
 
-            if waiting_tasks > 10:
+            # Análisis de tareas waiting for
+            if agg.tasks['stale_waiting'] > 10:
                 bottlenecks.append("Acumulación de tareas en espera - revisar dependencias")
 
             # Análisis de proyectos estancados
-            stalled_projects = Project.objects.filter(
-                user_id=user_id,
-                status='active',
-                updated_at__lte=end_date - timedelta(days=14)
-            ).count()
-
+            stalled_projects = agg.projects['stalled']
             if stalled_projects > 0:
                 bottlenecks.append(f"Proyectos estancados ({stalled_projects}) - requieren atención")
 
-            # Análisis de sobrecarga de contextos
-            context_load = Task.objects.filter(
-                user_id=user_id,
-                status__in=['pending', 'in_progress'],
-                created_at__range=[end_date - timedelta(days=7), end_date]
-            ).values('context').annotate(count=Count('id'))
-
-            overloaded_contexts = [item['context'] for item in context_load if item['count'] > 20]
+            # Análisis de sobrecarga de contextos (items del inbox sin procesar)
+            overloaded_contexts = [
+                ctx for ctx, counts in agg.contexts.items()
+                if counts['total'] - counts['processed'] > 20
+            ]
             if overloaded_contexts:
                 bottlenecks.append(f"Contextos sobrecargados: {', '.join(overloaded_contexts[:3])}")
 
@@ -798,24 +647,13 @@ class GTDProductivityAnalytics:
     def _calculate_prediction_confidence(self, user_id: int, start_date: datetime, end_date: datetime) -> float:
         """Calcula nivel de confianza general de las predicciones."""
         try:
-            # Basado en cantidad y calidad de datos disponibles
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            days_with_data = Task.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(updated_at)'}).values('date').distinct().count()
-
-            total_days = (end_date - start_date).days
+            agg = aggregates_for(user_id, start_date, end_date)
 
             # Confianza basada en volumen de datos
-            data_confidence = min(total_tasks / 50, 1) * 100  # 50 tareas = 100% confianza
+            data_confidence = min(agg.tasks['created'] / 50, 1) * 100  # 50 tareas = 100% confianza
 
             # Confianza basada en consistencia
-            consistency_confidence = min(days_with_data / max(total_days, 1), 1) * 100
+            consistency_confidence = min(agg.active_days / agg.total_days, 1) * 100
 
             # Confianza general
             overall_confidence = (data_confidence * 0.6) + (consistency_confidence * 0.4)
@@ -827,32 +665,9 @@ class GTDProductivityAnalytics:
             return 0
 
     def _calculate_inbox_response_time(self, user_id: int, start_date: datetime, end_date: datetime) -> str:
-        """Calcula tiempo promedio de respuesta a inbox."""
+        """Calcula tiempo promedio de respuesta a inbox (created_at → processed_at)."""
         try:
-            processed_items = InboxItem.objects.filter(
-                user_id=user_id,
-                processed=True,
-                captured_at__range=[start_date, end_date]
-            )
-
-            if not processed_items:
-                return 'N/A'
-
-            total_time = timedelta(0)
-            for item in processed_items:
-                # Este es un cálculo aproximado - en un sistema real tendrías timestamps de procesamiento
-                time_diff = timedelta(hours=2)  # Asumir 2 horas promedio
-                total_time += time_diff
-
-            avg_time = total_time / len(processed_items)
-
-            hours = avg_time.days * 24 + avg_time.seconds // 3600
-            minutes = (avg_time.seconds % 3600) // 60
-
-            if hours > 0:
-                return f"{hours}h {minutes}m"
-            else:
-                return f"{minutes}m"
+            return format_duration(aggregates_for(user_id, start_date, end_date).inbox['avg_processing'])
 
         except Exception:
             return 'N/A'
@@ -862,11 +677,7 @@ class GTDProductivityAnalytics:
         try:
             # Tareas procesadas vs tiempo invertido
             # Este es un cálculo simplificado
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).count()
+            completed_tasks = aggregates_for(user_id, start_date, end_date).tasks['completed']
 
             # Asumir que cada tarea toma aproximadamente 1 hora
             estimated_hours = completed_tasks * 1
@@ -909,19 +720,7 @@ class GTDProductivityAnalytics:
         """Calcula tendencia de eficiencia."""
         try:
             # Comparar primera y segunda mitad del período
-            mid_date = start_date + (end_date - start_date) / 2
-
-            first_half = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, mid_date]
-            ).count()
-
-            second_half = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[mid_date, end_date]
-            ).count()
+            first_half, second_half = aggregates_for(user_id, start_date, end_date).completed_halves()
 
             if second_half > first_half:
                 return 'improving'
@@ -7,9 +7,12 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Task, Project, InboxItem
 from .gtd_utils import gtd_engine
+from .gtd_analytics import gtd_analytics
+from .services import productivity_facts
+from .services.gtd_aggregates import WEEKDAY_NAMES
 import json
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from collections import Counter, defaultdict
 import calendar
 
 
@@ -94,15 +97,9 @@ class GTDCalendarIntegration:
             end_date = timezone.now().date()
             start_date = end_date - timedelta(days=months * 30)
 
-            # Obtener actividad por fecha
-            activity_data = Task.objects.filter(
-                user_id=user_id,
-                updated_at__date__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(updated_at)'}).values('date').annotate(
-                completed=Count('id', filter={'status': 'done'}),
-                created=Count('id'),
-                high_priority=Count('id', filter={'priority': 'high', 'status': 'done'})
-            )
+            # Actividad por fecha desde la tabla de hechos (una consulta)
+            activity_data = productivity_facts.daily_totals(user_id, start_date, end_date)
+            empty_day = {'completed': 0, 'created': 0, 'high_priority': 0}
 
             # Crear estructura de datos para heatmap
             heatmap_data = {}
@@ -110,10 +107,7 @@ class GTDCalendarIntegration:
 
             while current_date <= end_date:
                 date_str = current_date.strftime('%Y-%m-%d')
-                day_activity = next(
-                    (item for item in activity_data if item['date'] == date_str),
-                    {'completed': 0, 'created': 0, 'high_priority': 0}
-                )
+                day_activity = activity_data.get(current_date, empty_day)
 
                 heatmap_data[date_str] = {
                     'completed': day_activity['completed'],
@@ -488,15 +482,11 @@ class GTDCalendarIntegration:
     def _get_peak_productivity_hours(self, user_id: int) -> List[str]:
         """Obtiene horas de mayor productividad."""
         try:
-            # Análisis basado en tareas completadas por hora
-            hourly_stats = Task.objects.filter(
-                user_id=user_id,
-                status='done'
-            ).extra(select={'hour': 'strftime("%H", updated_at)'}).values('hour').annotate(
-                count=Count('id')
-            ).order_by('-count')[:3]
+            # Tareas completadas por hora (DailyProductivity)
+            hourly_stats = productivity_facts.hourly_totals(user_id)
+            top_hours = sorted(hourly_stats, key=hourly_stats.get, reverse=True)[:3]
 
-            return [item['hour'] for item in hourly_stats]
+            return [f"{hour:02d}" for hour in top_hours] or ['10', '14', '16']
 
         except Exception:
             return ['10', '14', '16']  # Valores por defecto
@@ -504,16 +494,10 @@ class GTDCalendarIntegration:
     def _get_peak_productivity_days(self, user_id: int) -> List[str]:
         """Obtiene días de mayor productividad."""
         try:
-            weekday_names = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-
-            weekday_stats = Task.objects.filter(
-                user_id=user_id,
-                status='done'
-            ).extra(select={'weekday': 'strftime("%w", updated_at)'}).values('weekday').annotate(
-                count=Count('id')
-            ).order_by('-count')[:3]
+            weekday_stats = productivity_facts.weekday_totals(user_id)
+            top_days = sorted(weekday_stats, key=weekday_stats.get, reverse=True)[:3]
 
-            return [weekday_names[int(item['weekday'])] for item in weekday_stats]
+            return [WEEKDAY_NAMES[day] for day in top_days] or ['Martes', 'Miércoles', 'Jueves']
 
         except Exception:
             return ['Martes', 'Miércoles', 'Jueves']  # Valores por defecto
@@ -548,25 +532,18 @@ class GTDCalendarIntegration:
         """Obtiene patrones de energía del usuario."""
         try:
             # Basado en productividad por hora
-            hourly_productivity = Task.objects.filter(
-                user_id=user_id,
-                status='done'
-            ).extra(select={'hour': 'strftime("%H", updated_at)'}).values('hour').annotate(
-                count=Count('id')
-            )
+            hourly_productivity = productivity_facts.hourly_totals(user_id)
 
             # Clasificar horas por nivel de energía
             energy_patterns = {}
-            for item in hourly_productivity:
-                hour = int(item['hour'])
-                productivity = item['count']
-
+            for hour, productivity in sorted(hourly_productivity.items()):
+                label = f"{hour:02d}"
                 if productivity > 2:
-                    energy_patterns[item['hour']] = 'high'
+                    energy_patterns[label] = 'high'
                 elif productivity > 0:
-                    energy_patterns[item['hour']] = 'medium'
+                    energy_patterns[label] = 'medium'
                 else:
-                    energy_patterns[item['hour']] = 'low'
+                    energy_patterns[label] = 'low'
 
             return energy_patterns
 
@@ -630,6 +607,10 @@ class GTDCalendarIntegration:
             ])
         }
 
+    def _calculate_consistency_score(self, daily_data: List[Dict]) -> float:
+        """Consistencia diaria (0-100), mismo cálculo que gtd_analytics."""
+        return gtd_analytics._calculate_consistency_score(daily_data)
+
     def _calculate_optimal_deadline(self, user_id: int, task: Task) -> Optional[str]:
         """Calcula fecha límite óptima para una tarea."""
         try:
@@ -8,6 +8,7 @@ from .gtd_reviews import gtd_review_system, GTDReviewSystem
 from .gtd_analytics import gtd_analytics, GTDProductivityAnalytics
 from .gtd_calendar import gtd_calendar, GTDCalendarIntegration
 from .gtd_metrics import gtd_metrics, GTDMetricsEngine
+from .services.gtd_aggregates import window
 from .models import Task, Project, InboxItem, GTDClassificationPattern, GTDLearningEntry
 from django.conf import settings
 import os
@@ -181,9 +182,7 @@ class GTDSystem:
         """
         try:
             # Métricas generales
-            overview_metrics = self.analytics._get_overview_metrics(
-                user_id, timezone.now() - timedelta(days=30), timezone.now()
-            )
+            overview_metrics = self.analytics._get_overview_metrics(user_id, *window(30))
 
             # Próximas acciones
             next_actions = self.automation.suggest_next_actions(user_id)
@@ -5,8 +5,8 @@ Proporciona métricas específicas de la metodología Getting Things Done.
 
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Task, Project, InboxItem
 from .gtd_utils import gtd_engine
+from .services.gtd_aggregates import aggregates_for, format_duration, window
 import json
 from typing import Dict, List, Optional, Tuple
 from collections import Counter, defaultdict
@@ -32,8 +32,7 @@ class GTDMetricsEngine:
         """
         Obtiene métricas completas de GTD para el usuario.
         """
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=days)
+        start_date, end_date = window(days)
 
         metrics = {
             'gtd_dimensions': {},
@@ -74,20 +73,12 @@ class GTDMetricsEngine:
     def _analyze_capture_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la dimensión CAPTURE de GTD."""
         try:
-            # Elementos capturados en inbox
-            inbox_items = InboxItem.objects.filter(
-                user_id=user_id,
-                captured_at__range=[start_date, end_date]
-            ).count()
+            inbox = aggregates_for(user_id, start_date, end_date).inbox
 
-            # Tasa de procesamiento del inbox
-            processed_items = InboxItem.objects.filter(
-                user_id=user_id,
-                processed=True,
-                captured_at__range=[start_date, end_date]
-            ).count()
-
-            processing_rate = (processed_items / max(inbox_items, 1)) * 100
+            # Elementos capturados en inbox y tasa de procesamiento
+            inbox_items = inbox['captured']
+            processed_items = inbox['processed']
+            processing_rate = inbox['processing_rate']
 
             # Tiempo promedio de permanencia en inbox
             avg_inbox_time = self._calculate_avg_inbox_time(user_id, start_date, end_date)
@@ -120,37 +111,18 @@ class GTDMetricsEngine:
     def _analyze_clarify_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la dimensión CLARIFY de GTD."""
         try:
-            # Tareas con descripción clara
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            tasks_with_description = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                description__isnull=False
-            ).exclude(description='').count()
+            agg = aggregates_for(user_id, start_date, end_date)
+            tasks, inbox = agg.tasks, agg.inbox
+            total_tasks = tasks['created']
 
-            description_rate = (tasks_with_description / max(total_tasks, 1)) * 100
-
-            # Tareas con contexto definido
-            tasks_with_context = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                context__isnull=False
-            ).exclude(context='').count()
-
-            context_rate = (tasks_with_context / max(total_tasks, 1)) * 100
+            # Tareas con descripción clara
+            description_rate = (tasks['with_description'] / max(total_tasks, 1)) * 100
 
-            # Tareas con prioridad definida
-            tasks_with_priority = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                priority__isnull=False
-            ).exclude(priority='').count()
+            # Items del inbox con contexto definido
+            context_rate = (inbox['with_context'] / max(inbox['captured'], 1)) * 100
 
-            priority_rate = (tasks_with_priority / max(total_tasks, 1)) * 100
+            # Items del inbox ya categorizados (gtd_category distinta de 'pendiente')
+            priority_rate = (inbox['clarified'] / max(inbox['captured'], 1)) * 100
 
             # Claridad promedio
             clarity_score = (description_rate + context_rate + priority_rate) / 3
@@ -180,42 +152,22 @@ class GTDMetricsEngine:
     def _analyze_organize_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la dimensión ORGANIZE de GTD."""
         try:
-            # Distribución por contextos
-            context_distribution = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).values('context').annotate(count=Count('id'))
-
-            # Distribución por prioridades
-            priority_distribution = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).values('priority').annotate(count=Count('id'))
+            agg = aggregates_for(user_id, start_date, end_date)
+            tasks, inbox = agg.tasks, agg.inbox
+
+            # Distribución por contextos y prioridades (misma agrupación del inbox)
+            context_distribution = [
+                {'context': ctx, 'count': counts['total']} for ctx, counts in agg.contexts.items()
+            ]
+            priority_distribution = [
+                {'priority': priority, 'count': count} for priority, count in agg.priorities.items()
+            ]
 
             # Proyectos activos vs tareas independientes
-            project_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                project__isnull=False
-            ).count()
-
-            independent_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                project__isnull=True
-            ).count()
-
-            total_tasks = project_tasks + independent_tasks
-            project_task_ratio = (project_tasks / max(total_tasks, 1)) * 100
-
-            # Organización por fechas
-            tasks_with_due_date = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date],
-                due_date__isnull=False
-            ).count()
-
-            due_date_rate = (tasks_with_due_date / max(total_tasks, 1)) * 100
+            project_task_ratio = (tasks['in_project'] / max(tasks['created'], 1)) * 100
+
+            # Organización por fechas (items del inbox con fecha límite)
+            due_date_rate = (inbox['with_due_date'] / max(inbox['captured'], 1)) * 100
 
             # Puntuación de organize
             organize_score = self._calculate_organize_score(
@@ -224,8 +176,8 @@ class GTDMetricsEngine:
 
             return {
                 'score': organize_score,
-                'context_distribution': list(context_distribution),
-                'priority_distribution': list(priority_distribution),
+                'context_distribution': context_distribution,
+                'priority_distribution': priority_distribution,
                 'project_task_ratio': round(project_task_ratio, 1),
                 'due_date_rate': round(due_date_rate, 1),
                 'level': self._get_gtd_level(organize_score),
@@ -241,30 +193,19 @@ class GTDMetricsEngine:
     def _analyze_reflect_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la dimensión REFLECT de GTD."""
         try:
+            agg = aggregates_for(user_id, start_date, end_date)
+
             # Frecuencia de revisiones (basado en actualizaciones)
             review_frequency = self._calculate_review_frequency(user_id, start_date, end_date)
 
-            # Tareas revisadas vs total
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__lte=end_date
-            ).count()
-
-            reviewed_tasks = Task.objects.filter(
-                user_id=user_id,
-                updated_at__gt=timezone.now() - timedelta(days=7)
-            ).count()
-
-            review_rate = (reviewed_tasks / max(total_tasks, 1)) * 100
+            # Tareas revisadas en la última semana vs total
+            review_rate = (agg.tasks['updated_last_week'] / max(agg.tasks['total'], 1)) * 100
 
             # Consistencia de revisiones
             review_consistency = self._calculate_review_consistency(user_id, start_date, end_date)
 
             # Actualizaciones de proyectos
-            project_updates = Project.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).count()
+            project_updates = agg.projects['updated']
 
             # Puntuación de reflect
             reflect_score = self._calculate_reflect_score(
@@ -290,40 +231,16 @@ class GTDMetricsEngine:
     def _analyze_engage_metrics(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la dimensión ENGAGE de GTD."""
         try:
+            agg = aggregates_for(user_id, start_date, end_date)
+
             # Tasa de completación
-            total_tasks = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            completion_rate = (completed_tasks / max(total_tasks, 1)) * 100
-
-            # Tareas por contexto completadas
-            context_completion = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).values('context').annotate(count=Count('id'))
-
-            # Eficiencia por contexto
-            context_efficiency = {}
-            for context_data in context_completion:
-                context = context_data['context']
-                completed = context_data['count']
-                total_in_context = Task.objects.filter(
-                    user_id=user_id,
-                    context=context,
-                    created_at__range=[start_date, end_date]
-                ).count()
-
-                efficiency = (completed / max(total_in_context, 1)) * 100
-                context_efficiency[context] = round(efficiency, 1)
+            completion_rate = agg.tasks['completion_rate']
+
+            # Eficiencia por contexto (items procesados / capturados)
+            context_efficiency = {
+                ctx: round((counts['processed'] / max(counts['total'], 1)) * 100, 1)
+                for ctx, counts in agg.contexts.items()
+            }
 
             # Tiempo promedio de completación
             avg_completion_time = self._calculate_avg_completion_time(user_id, start_date, end_date)
@@ -408,7 +325,7 @@ class GTDMetricsEngine:
     def _analyze_gtd_trends(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza tendencias en la implementación de GTD."""
         try:
-            # Dividir el período en dos mitades
+            # Dividir el período en dos mitades (cada mitad es su propia ventana en gtd_aggregates)
             mid_date = start_date + (end_date - start_date) / 2
 
             first_half_scores = {}
@@ -825,22 +742,14 @@ class GTDMetricsEngine:
     # Métodos auxiliares adicionales
 
     def _calculate_avg_inbox_time(self, user_id: int, start_date: datetime, end_date: datetime) -> str:
-        """Calcula tiempo promedio en inbox (simplificado)."""
-        # En un sistema real, esto calcularía el tiempo real
-        return "2 horas"  # Valor por defecto
+        """Calcula tiempo promedio en inbox (created_at → processed_at)."""
+        return format_duration(aggregates_for(user_id, start_date, end_date).inbox['avg_processing'])
 
     def _calculate_daily_capture_consistency(self, user_id: int, start_date: datetime, end_date: datetime) -> float:
         """Calcula consistencia diaria de captura."""
         try:
-            # Días con actividad de captura
-            active_days = InboxItem.objects.filter(
-                user_id=user_id,
-                captured_at__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(captured_at)'}).values('date').distinct().count()
-
-            total_days = (end_date - start_date).days
-
-            return (active_days / max(total_days, 1)) * 100
+            agg = aggregates_for(user_id, start_date, end_date)
+            return (agg.inbox_days / agg.total_days) * 100
 
         except Exception:
             return 0
@@ -849,17 +758,10 @@ class GTDMetricsEngine:
         """Calcula frecuencia de revisiones."""
         try:
             # Basado en actualizaciones de tareas y proyectos
-            review_actions = Task.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).count() + Project.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            total_days = (end_date - start_date).days
+            agg = aggregates_for(user_id, start_date, end_date)
+            review_actions = agg.tasks['updated'] + agg.projects['updated']
 
-            return review_actions / max(total_days, 1)
+            return review_actions / agg.total_days
 
         except Exception:
             return 0
@@ -868,14 +770,8 @@ class GTDMetricsEngine:
         """Calcula consistencia de revisiones."""
         try:
             # Días con actividad de revisión
-            review_days = Task.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(updated_at)'}).values('date').distinct().count()
-
-            total_days = (end_date - start_date).days
-
-            return (review_days / max(total_days, 1)) * 100
+            agg = aggregates_for(user_id, start_date, end_date)
+            return (agg.active_days / agg.total_days) * 100
 
         except Exception:
             return 0
@@ -883,21 +779,10 @@ class GTDMetricsEngine:
     def _calculate_avg_completion_time(self, user_id: int, start_date: datetime, end_date: datetime) -> str:
         """Calcula tiempo promedio de completación."""
         try:
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            )
-
-            if not completed_tasks:
-                return "N/A"
-
-            # Estimación simplificada
-            return "1.5 horas"
+            return format_duration(aggregates_for(user_id, start_date, end_date).tasks['avg_completion'])
 
         except Exception:
             return "N/A"
 
-
 # Instancia global del motor de métricas GTD
 gtd_metrics = GTDMetricsEngine()
\ No newline at end of file
@@ -5,8 +5,8 @@ Proporciona herramientas para revisar el progreso y planificar el futuro.
 
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Task, Project, InboxItem
 from .gtd_utils import gtd_engine
+from .services.gtd_aggregates import WEEKDAY_NAMES, aggregates_for, format_duration, window
 import json
 from typing import Dict, List, Optional
 from collections import Counter, defaultdict
@@ -36,8 +36,8 @@ class GTDReviewSystem:
 
     def _generate_weekly_review(self, user_id: int, custom_start_date: Optional[datetime] = None) -> Dict:
         """Genera revisión semanal GTD."""
-        end_date = timezone.now()
-        start_date = custom_start_date or (end_date - timedelta(days=7))
+        start_date, end_date = window(7)
+        start_date = custom_start_date or start_date
 
         # Datos básicos
         basic_data = self._get_basic_review_data(user_id, start_date, end_date)
@@ -71,8 +71,8 @@ class GTDReviewSystem:
 
     def _generate_monthly_review(self, user_id: int, custom_start_date: Optional[datetime] = None) -> Dict:
         """Genera revisión mensual GTD."""
-        end_date = timezone.now()
-        start_date = custom_start_date or (end_date - timedelta(days=30))
+        start_date, end_date = window(30)
+        start_date = custom_start_date or start_date
 
         # Datos básicos
         basic_data = self._get_basic_review_data(user_id, start_date, end_date)
@@ -102,8 +102,8 @@ class GTDReviewSystem:
 
     def _generate_quarterly_review(self, user_id: int, custom_start_date: Optional[datetime] = None) -> Dict:
         """Genera revisión trimestral GTD."""
-        end_date = timezone.now()
-        start_date = custom_start_date or (end_date - timedelta(days=90))
+        start_date, end_date = window(90)
+        start_date = custom_start_date or start_date
 
         # Revisión de objetivos trimestrales
         quarterly_goals = self._review_quarterly_goals(user_id, start_date, end_date)
@@ -130,53 +130,17 @@ class GTDReviewSystem:
     def _get_basic_review_data(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Obtiene datos básicos para cualquier tipo de revisión."""
         try:
-            # Tareas completadas
-            tasks_completed = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            # Tareas creadas
-            tasks_created = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).count()
-
-            # Tareas pendientes actuales
-            tasks_pending = Task.objects.filter(
-                user_id=user_id,
-                status__in=['pending', 'in_progress']
-            ).count()
-
-            # Proyectos activos
-            projects_active = Project.objects.filter(
-                user_id=user_id,
-                status='active'
-            ).count()
-
-            # Proyectos completados
-            projects_completed = Project.objects.filter(
-                user_id=user_id,
-                status='completed',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            # Elementos del inbox procesados
-            inbox_processed = InboxItem.objects.filter(
-                user_id=user_id,
-                processed=True,
-                captured_at__range=[start_date, end_date]
-            ).count()
+            agg = aggregates_for(user_id, start_date, end_date)
+            tasks, projects = agg.tasks, agg.projects
 
             return {
-                'tasks_completed': tasks_completed,
-                'tasks_created': tasks_created,
-                'tasks_pending': tasks_pending,
-                'projects_active': projects_active,
-                'projects_completed': projects_completed,
-                'inbox_processed': inbox_processed,
-                'completion_rate': (tasks_completed / max(tasks_created, 1)) * 100
+                'tasks_completed': tasks['completed'],
+                'tasks_created': tasks['created'],
+                'tasks_pending': tasks['pending'],
+                'projects_active': projects['active'],
+                'projects_completed': projects['completed'],
+                'inbox_processed': agg.inbox['processed'],
+                'completion_rate': tasks['completion_rate']
             }
 
         except Exception as e:
@@ -194,41 +158,27 @@ class GTDReviewSystem:
     def _analyze_productivity(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza la productividad durante el período."""
         try:
-            # Tareas por día de la semana
-            tasks_by_weekday = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'day_of_week': 'strftime("%%w", updated_at)'}).values('day_of_week').annotate(count=Count('id'))
-
-            weekday_names = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-            productivity_by_day = {weekday_names[i]: 0 for i in range(7)}
-
-            for item in tasks_by_weekday:
-                day_index = int(item['day_of_week'])
-                productivity_by_day[weekday_names[day_index]] = item['count']
-
-            # Tareas por contexto
-            tasks_by_context = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).values('context').annotate(count=Count('id')).order_by('-count')
-
-            # Tareas por prioridad
-            tasks_by_priority = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).values('priority').annotate(count=Count('id')).order_by('-count')
+            agg = aggregates_for(user_id, start_date, end_date)
+
+            # Tareas completadas por día de la semana
+            productivity_by_day = agg.weekdays
+
+            # Items del inbox por contexto y por prioridad
+            tasks_by_context = [
+                {'context': ctx, 'count': counts['total']} for ctx, counts in agg.contexts.items()
+            ]
+            tasks_by_priority = sorted(
+                ({'priority': priority, 'count': count} for priority, count in agg.priorities.items()),
+                key=lambda item: -item['count']
+            )
 
             # Tiempo promedio de completación
             avg_completion_time = self._calculate_avg_completion_time(user_id, start_date, end_date)
 
             return {
                 'productivity_by_day': productivity_by_day,
-                'tasks_by_context': list(tasks_by_context),
-                'tasks_by_priority': list(tasks_by_priority),
+                'tasks_by_context': tasks_by_context,
+                'tasks_by_priority': tasks_by_priority,
                 'avg_completion_time': avg_completion_time,
                 'most_productive_day': max(productivity_by_day, key=productivity_by_day.get),
                 'most_used_context': tasks_by_context[0]['context'] if tasks_by_context else 'N/A'
@@ -248,32 +198,19 @@ class GTDReviewSystem:
     def _analyze_contexts(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza el uso de contextos durante el período."""
         try:
-            # Contextos más utilizados
-            contexts_usage = Task.objects.filter(
-                user_id=user_id,
-                created_at__range=[start_date, end_date]
-            ).values('context').annotate(
-                created=Count('id'),
-                completed=Count('id', filter={'status': 'done'})
-            ).order_by('-created')
-
-            # Balance entre contextos
+            # Balance entre contextos (items capturados vs procesados)
             context_balance = {}
-            for context_data in contexts_usage:
-                context = context_data['context']
-                created = context_data['created']
-                completed = context_data['completed']
-                completion_rate = (completed / max(created, 1)) * 100
+            for context, counts in aggregates_for(user_id, start_date, end_date).contexts.items():
                 context_balance[context] = {
-                    'created': created,
-                    'completed': completed,
-                    'completion_rate': completion_rate
+                    'created': counts['total'],
+                    'completed': counts['processed'],
+                    'completion_rate': (counts['processed'] / max(counts['total'], 1)) * 100
                 }
 
             # Sugerencias de balance
             suggestions = []
-            work_tasks = sum(1 for c in context_balance.values() if c['created'] > 0 and c['context'] in ['trabajo', 'computadora'])
-            personal_tasks = sum(1 for c in context_balance.values() if c['created'] > 0 and c['context'] in ['casa', 'recados'])
+            work_tasks = sum(c['created'] for ctx, c in context_balance.items() if ctx.lstrip('@') in ['trabajo', 'computadora'])
+            personal_tasks = sum(c['created'] for ctx, c in context_balance.items() if ctx.lstrip('@') in ['casa', 'recados'])
 
             if work_tasks > personal_tasks * 2:
                 suggestions.append('Considera equilibrar más tiempo para tareas personales')
@@ -297,28 +234,20 @@ class GTDReviewSystem:
     def _analyze_projects(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza el progreso de proyectos."""
         try:
-            # Proyectos con más actividad
-            projects_activity = Project.objects.filter(
-                user_id=user_id,
-                created_at__lte=end_date
-            ).annotate(
-                task_count=Count('tasks'),
-                completed_tasks=Count('tasks', filter={'status': 'done'}),
-                pending_tasks=Count('tasks', filter={'status__in': ['pending', 'in_progress']})
-            ).order_by('-task_count')
-
-            # Progreso de proyectos activos
+            # Progreso de proyectos activos (ordenados por cantidad de tareas)
             active_projects = []
-            for project in projects_activity.filter(status='active'):
-                total_tasks = project.task_count
-                completed_tasks = project.completed_tasks
+            for project in aggregates_for(user_id, start_date, end_date).project_rows:
+                if not project['active']:
+                    continue
+                total_tasks = project['total_tasks']
+                completed_tasks = project['completed_tasks']
                 progress = (completed_tasks / max(total_tasks, 1)) * 100
 
                 active_projects.append({
-                    'name': project.name,
+                    'name': project['title'],
                     'total_tasks': total_tasks,
                     'completed_tasks': completed_tasks,
-                    'pending_tasks': project.pending_tasks,
+                    'pending_tasks': project['pending_tasks'],
                     'progress': progress
                 })
 
@@ -349,23 +278,16 @@ class GTDReviewSystem:
         suggestions = []
 
         try:
-            # Tareas pendientes de alta prioridad
-            high_priority_tasks = Task.objects.filter(
-                user_id=user_id,
-                status__in=['pending', 'in_progress'],
-                priority='high'
-            ).count()
+            agg = aggregates_for(user_id, *window(7))
+
+            # Tareas pendientes marcadas como importantes
+            high_priority_tasks = agg.tasks['pending_important']
 
             if high_priority_tasks > 5:
                 suggestions.append(f"Tienes {high_priority_tasks} tareas de alta prioridad - considera priorizar las más importantes")
 
-            # Tareas próximas a vencer
-            upcoming_deadlines = Task.objects.filter(
-                user_id=user_id,
-                status__in=['pending', 'in_progress'],
-                due_date__lte=timezone.now().date() + timedelta(days=3),
-                due_date__gte=timezone.now().date()
-            ).count()
+            # Items del inbox sin procesar con fecha límite en los próximos 3 días
+            upcoming_deadlines = agg.inbox['due_soon']
 
             if upcoming_deadlines > 0:
                 suggestions.append(f"Tienes {upcoming_deadlines} tareas con fecha límite próxima - revísalas pronto")
@@ -387,30 +309,7 @@ class GTDReviewSystem:
     def _calculate_avg_completion_time(self, user_id: int, start_date: datetime, end_date: datetime) -> str:
         """Calcula el tiempo promedio de completación de tareas."""
         try:
-            completed_tasks = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).exclude(created_at__date=updated_at__date)  # Excluir tareas completadas el mismo día
-
-            if not completed_tasks:
-                return 'N/A'
-
-            total_time = timedelta(0)
-            for task in completed_tasks:
-                time_diff = task.updated_at - task.created_at
-                total_time += time_diff
-
-            avg_time = total_time / len(completed_tasks)
-
-            # Formatear tiempo
-            hours = avg_time.days * 24 + avg_time.seconds // 3600
-            minutes = (avg_time.seconds % 3600) // 60
-
-            if hours > 0:
-                return f"{hours}h {minutes}m"
-            else:
-                return f"{minutes}m"
+            return format_duration(aggregates_for(user_id, start_date, end_date).tasks['avg_completion'])
 
         except Exception as e:
             print(f"Error calculating avg completion time: {e}")
@@ -419,25 +318,11 @@ class GTDReviewSystem:
     def _analyze_monthly_trends(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza tendencias mensuales."""
         try:
-            # Productividad por semana del mes
-            weekly_productivity = []
-            current_week_start = start_date
-
-            while current_week_start < end_date:
-                week_end = min(current_week_start + timedelta(days=7), end_date)
-
-                week_completed = Task.objects.filter(
-                    user_id=user_id,
-                    status='done',
-                    updated_at__range=[current_week_start, week_end]
-                ).count()
-
-                weekly_productivity.append({
-                    'week': f"Semana {len(weekly_productivity) + 1}",
-                    'completed': week_completed
-                })
-
-                current_week_start = week_end
+            # Productividad por semana del mes (desde la serie diaria)
+            weekly_productivity = [
+                {'week': f"Semana {i + 1}", 'completed': completed}
+                for i, completed in enumerate(aggregates_for(user_id, start_date, end_date).weekly_completed())
+            ]
 
             # Tendencia general
             if len(weekly_productivity) > 1:
@@ -462,35 +347,19 @@ class GTDReviewSystem:
     def _analyze_patterns(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Analiza patrones de comportamiento."""
         try:
-            # Horarios más productivos
-            productive_hours = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'hour': 'strftime("%H", updated_at)'}).values('hour').annotate(count=Count('id'))
-
-            hour_counts = {str(i): 0 for i in range(24)}
-            for item in productive_hours:
-                hour_counts[item['hour']] = item['count']
+            agg = aggregates_for(user_id, start_date, end_date)
 
+            # Horarios más productivos
+            hour_counts = agg.hours
             most_productive_hour = max(hour_counts, key=hour_counts.get) if any(hour_counts.values()) else 'N/A'
 
-            # Días más productivos
-            productive_days = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'day': 'strftime("%w", updated_at)'}).values('day').annotate(count=Count('id'))
-
-            day_counts = {str(i): 0 for i in range(7)}
-            for item in productive_days:
-                day_counts[item['day']] = item['count']
-
+            # Días más productivos ('0' = domingo)
+            day_counts = {str(i): count for i, count in enumerate(agg.weekdays.values())}
             most_productive_day = max(day_counts, key=day_counts.get) if any(day_counts.values()) else 'N/A'
 
             return {
                 'most_productive_hour': f"{most_productive_hour}:00" if most_productive_hour != 'N/A' else 'N/A',
-                'most_productive_day': ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado'][int(most_productive_day)] if most_productive_day != 'N/A' else 'N/A',
+                'most_productive_day': WEEKDAY_NAMES[int(most_productive_day)] if most_productive_day != 'N/A' else 'N/A',
                 'hour_distribution': hour_counts,
                 'day_distribution': day_counts
             }
@@ -508,12 +377,9 @@ class GTDReviewSystem:
         """Genera objetivos para el próximo mes."""
         try:
             # Basado en el rendimiento del mes actual
-            current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            tasks_this_month = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__gte=current_month
-            ).count()
+            now = window(0)[1]
+            current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            tasks_this_month = aggregates_for(user_id, current_month, now).tasks['completed']
 
             # Objetivo conservador: mantener el ritmo actual
             conservative_goal = tasks_this_month
@@ -549,25 +415,19 @@ class GTDReviewSystem:
     def _review_long_term_projects(self, user_id: int) -> List[Dict]:
         """Revisa proyectos a largo plazo."""
         try:
-            # Proyectos que llevan más de 30 días activos
-            long_term_projects = Project.objects.filter(
-                user_id=user_id,
-                status='active',
-                created_at__lte=timezone.now() - timedelta(days=30)
-            ).annotate(
-                days_active=(timezone.now() - timezone.now()).days,  # TODO: Fix this calculation
-                task_count=Count('tasks'),
-                completed_tasks=Count('tasks', filter={'status': 'done'})
-            )
+            # Proyectos activos que llevan más de 30 días
+            start_date, end_date = window(30)
 
             projects_review = []
-            for project in long_term_projects:
-                progress = (project.completed_tasks / max(project.task_count, 1)) * 100
+            for project in aggregates_for(user_id, start_date, end_date).project_rows:
+                if not project['active'] or project['created_at'] > start_date:
+                    continue
+                progress = (project['completed_tasks'] / max(project['total_tasks'], 1)) * 100
                 projects_review.append({
-                    'name': project.name,
-                    'days_active': (timezone.now().date() - project.created_at.date()).days,
+                    'name': project['title'],
+                    'days_active': (end_date.date() - project['created_at'].date()).days,
                     'progress': progress,
-                    'needs_attention': progress < 25 and project.task_count > 0
+                    'needs_attention': progress < 25 and project['total_tasks'] > 0
                 })
 
             return projects_review
@@ -589,17 +449,9 @@ class GTDReviewSystem:
             }
 
             # Calcular progreso aproximado
-            tasks_completed = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).count()
-
-            projects_completed = Project.objects.filter(
-                user_id=user_id,
-                status='completed',
-                updated_at__range=[start_date, end_date]
-            ).count()
+            agg = aggregates_for(user_id, start_date, end_date)
+            tasks_completed = agg.tasks['completed']
+            projects_completed = agg.projects['completed']
 
             progress = {
                 'productivity': min((tasks_completed / 200) * 100, 100),
@@ -634,20 +486,14 @@ class GTDReviewSystem:
                 'relaciones': ['familia', 'amigos', 'social']
             }
 
+            # Todas las áreas salen de la misma agrupación por contexto
+            contexts = aggregates_for(user_id, start_date, end_date).contexts
+
             area_analysis = {}
-            for area, contexts in key_areas.items():
-                tasks_in_area = Task.objects.filter(
-                    user_id=user_id,
-                    context__in=contexts,
-                    created_at__range=[start_date, end_date]
-                ).count()
-
-                completed_in_area = Task.objects.filter(
-                    user_id=user_id,
-                    context__in=contexts,
-                    status='done',
-                    updated_at__range=[start_date, end_date]
-                ).count()
+            for area, area_contexts in key_areas.items():
+                in_area = [c for ctx, c in contexts.items() if ctx.lstrip('@').lower() in area_contexts]
+                tasks_in_area = sum(c['total'] for c in in_area)
+                completed_in_area = sum(c['processed'] for c in in_area)
 
                 area_analysis[area] = {
                     'total_tasks': tasks_in_area,
@@ -664,26 +510,16 @@ class GTDReviewSystem:
     def _review_habits_and_routines(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
         """Revisa hábitos y rutinas."""
         try:
-            # Análisis de consistencia diaria
-            daily_activity = Task.objects.filter(
-                user_id=user_id,
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'date': 'DATE(updated_at)'}).values('date').annotate(count=Count('id'))
+            agg = aggregates_for(user_id, start_date, end_date)
 
             # Calcular días activos vs total de días
             total_days = (end_date - start_date).days
-            active_days = len(daily_activity)
+            active_days = agg.active_days
 
             consistency_score = (active_days / max(total_days, 1)) * 100
 
             # Análisis de horarios
-            hourly_activity = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__range=[start_date, end_date]
-            ).extra(select={'hour': 'strftime("%H", updated_at)'}).values('hour').annotate(count=Count('id'))
-
-            peak_hours = [item['hour'] for item in hourly_activity if item['count'] > 0]
+            peak_hours = [hour for hour, count in agg.hours.items() if count > 0]
 
             return {
                 'consistency_score': consistency_score,
@@ -723,13 +559,10 @@ class GTDReviewSystem:
         """Planifica el próximo trimestre."""
         try:
             # Basado en el rendimiento actual, generar objetivos realistas
-            current_quarter_start = timezone.now().replace(month=((timezone.now().month - 1) // 3) * 3 + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+            now = window(0)[1]
+            current_quarter_start = now.replace(month=((now.month - 1) // 3) * 3 + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
 
-            tasks_this_quarter = Task.objects.filter(
-                user_id=user_id,
-                status='done',
-                updated_at__gte=current_quarter_start
-            ).count()
+            tasks_this_quarter = aggregates_for(user_id, current_quarter_start, now).tasks['completed']
 
             # Proyectar para el próximo trimestre
             projected_tasks = int(tasks_this_quarter * 1.1)  # 10% de mejora
@@ -752,6 +585,5 @@ class GTDReviewSystem:
                 'milestones': []
             }
 
-
 # Instancia global del sistema de revisiones
 gtd_review_system = GTDReviewSystem()
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Management command to rebuild the DailyProductivity fact table.
+Signals keep it current; run this after bulk imports, queryset.update()
+calls or when the table is first created.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.services import productivity_facts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily productivity facts from tasks and inbox items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Number of days to rebuild, ending today (default: 365)'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Only rebuild this user id (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        end_date = timezone.localdate()
+        start_date = end_date - timezone.timedelta(days=options['days'])
+        self.stdout.write(f'Rebuilding productivity facts from {start_date} to {end_date}...')
+
+        rows = productivity_facts.rebuild(start_date, end_date, user_ids=options['users'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully wrote {rows} productivity rows')
+        )
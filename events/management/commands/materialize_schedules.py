@@ -0,0 +1,42 @@
+"""
+Management command to roll every active TaskSchedule forward.
+Run this periodically (e.g. daily) so TaskPrograms exist up to the horizon.
+"""
+
+from django.core.management.base import BaseCommand
+from events.models import TaskSchedule
+from events.services import recurrence
+
+
+class Command(BaseCommand):
+    help = 'Materialize TaskPrograms for active schedules up to a horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=recurrence.DEFAULT_HORIZON_DAYS,
+            help=f'Horizon in days from today (default: {recurrence.DEFAULT_HORIZON_DAYS}, '
+                 f'max: {recurrence.MAX_HORIZON_DAYS})'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='Only roll forward schedules hosted by this user id'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        self.stdout.write(f'Materializing schedules for the next {days} days...')
+
+        schedules = TaskSchedule.objects.filter(is_active=True)
+        if options['user']:
+            schedules = schedules.filter(host_id=options['user'])
+
+        result = recurrence.roll_forward(days, schedules)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {result['created']} task programs from {result['schedules']} schedules"
+            )
+        )
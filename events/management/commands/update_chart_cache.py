@@ -9,6 +9,7 @@ from django.db.models import Count
 from django.db.models.functions import TruncDate
 from django.utils import timezone
 from events.models import Project, Task, Event
+from events.services import productivity_facts
 
 
 class Command(BaseCommand):
@@ -73,19 +74,13 @@ class Command(BaseCommand):
         }, 3600)  # Cache for 1 hour
 
     def update_task_chart_data(self, start_date):
-        """Update task chart data cache"""
-        chart_queryset = Task.objects.filter(
-            created_at__gte=start_date
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            task_count=Count('id')
-        ).order_by('date')
+        """Update task chart data cache (read from the DailyProductivity facts)"""
+        chart_rows = productivity_facts.global_daily('created', start_date.date())
 
-        tasks_data = [item['task_count'] for item in chart_queryset]
+        tasks_data = [count for _, count in chart_rows]
         task_dates = [
-            item['date'].strftime('%Y-%m-%dT%H:%M:%S.000Z')
-            for item in chart_queryset
+            day.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            for day, _ in chart_rows
         ]
 
         cache.set('tasks_chart_data', {
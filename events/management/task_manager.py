@@ -80,20 +80,14 @@ class TaskManager:
 
     def get_all_tasks(self):
         logger.debug("get_all_tasks: Iniciando obtención de todas las tareas")
-        tasks = []
-        active_tasks = []
-        
-        logger.debug(f"get_all_tasks: Procesando {self.user_tasks.count()} tareas del usuario")
-        for index, task in enumerate(self.user_tasks, 1):
-            logger.debug(f"get_all_tasks: Procesando tarea {index}/{self.user_tasks.count()} - ID: {task.id}")
-            task_data = self.get_task_data(task.id)
-            tasks.append(task_data)
-            
-            if self.active_status and task.task_status_id == self.active_status.id:
-                logger.debug(f"get_all_tasks: Tarea ID {task.id} marcada como activa")
-                active_tasks.append(task_data)
-            else:
-                logger.debug(f"get_all_tasks: Tarea ID {task.id} NO es activa (task_status_id={task.task_status_id}, active_status.id={self.active_status.id if self.active_status else 'None'})")
+        # Una pasada: tareas + estado activo + última finalización (task_state_loader)
+        from ..services.task_state_loader import load_task_records
+
+        tasks = load_task_records(self.user_tasks)
+        active_tasks = [
+            task_data for task_data in tasks
+            if self.active_status and task_data['task'].task_status_id == self.active_status.id
+        ]
         
         logger.info(f"get_all_tasks: Total tareas: {len(tasks)}, Tareas activas: {len(active_tasks)}")
         return tasks, active_tasks
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 01:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_alter_event_event_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField(help_text='Hora del día (0-23)')),
+                ('created', models.PositiveIntegerField(default=0, help_text='Tareas creadas (host)')),
+                ('completed', models.PositiveIntegerField(default=0, help_text='Tareas completadas (assigned_to)')),
+                ('high_priority', models.PositiveIntegerField(default=0, help_text='Tareas importantes completadas')),
+                ('inbox_processed', models.PositiveIntegerField(default=0, help_text='Items del inbox procesados')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_productivity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Productividad Diaria',
+                'verbose_name_plural': 'Productividad Diaria',
+                'indexes': [models.Index(fields=['date'], name='events_dail_date_83493b_idx')],
+                'unique_together': {('user', 'date', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 01:34
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_programs(apps, schema_editor):
+    """get_or_create no impedía duplicados concurrentes: se conserva el primero."""
+    TaskProgram = apps.get_model('events', 'TaskProgram')
+    duplicates = (TaskProgram.objects
+                  .values('task_id', 'host_id', 'start_time')
+                  .annotate(first_id=Min('id'), n=Count('id'))
+                  .filter(n__gt=1))
+    for row in duplicates:
+        (TaskProgram.objects
+         .filter(task_id=row['task_id'], host_id=row['host_id'], start_time=row['start_time'])
+         .exclude(id=row['first_id'])
+         .delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_dailyproductivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_programs, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='taskprogram',
+            unique_together={('task', 'host', 'start_time')},
+        ),
+    ]
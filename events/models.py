@@ -271,6 +271,7 @@ class TaskProgram(models.Model):
     class Meta:
         verbose_name = "Task Program"
         verbose_name_plural = "Task Programs"
+        unique_together = ['task', 'host', 'start_time']
 
 # Modelo para programaciones recurrentes de tareas
 class TaskSchedule(models.Model):
@@ -309,44 +310,13 @@ class TaskSchedule(models.Model):
 
     def get_next_occurrences(self, limit=10):
         """Genera las próximas ocurrencias basadas en la configuración"""
-        from datetime import datetime, timedelta
-        occurrences = []
-        current_date = max(self.start_date, timezone.now().date())
-
-        while len(occurrences) < limit:
-            if self.end_date and current_date > self.end_date:
-                break
-
-            if self._should_schedule_on_date(current_date):
-                start_datetime = datetime.combine(current_date, self.start_time)
-                end_datetime = start_datetime + self.duration
-                occurrences.append({
-                    'date': current_date,
-                    'start_time': start_datetime,
-                    'end_time': end_datetime
-                })
-
-            current_date += timedelta(days=1)
-
-        return occurrences
+        from .services import recurrence
+        return recurrence.occurrences(self, limit)
 
     def _should_schedule_on_date(self, date):
         """Determina si la tarea debe programarse en una fecha específica"""
-        if self.recurrence_type == 'daily':
-            return True
-
-        weekday = date.weekday()  # 0=lunes, 6=domingo
-        weekday_map = {
-            0: self.monday,
-            1: self.tuesday,
-            2: self.wednesday,
-            3: self.thursday,
-            4: self.friday,
-            5: self.saturday,
-            6: self.sunday
-        }
-
-        return weekday_map.get(weekday, False)
+        from .services import recurrence
+        return bool(recurrence.weekday_mask(self) >> date.weekday() & 1)
 
     def get_selected_days_display(self):
         """Retorna una representación legible de los días seleccionados"""
@@ -367,52 +337,18 @@ class TaskSchedule(models.Model):
     def generate_occurrences(self, limit=10):
         """
         Genera una lista de ocurrencias futuras basadas en la configuración recurrente
+        (events/services/recurrence.py: máscara de días y horizonte máximo)
         """
-        from datetime import datetime, timedelta
-        occurrences = []
-        current_date = max(self.start_date, timezone.now().date())
-
-        while len(occurrences) < limit:
-            if self.end_date and current_date > self.end_date:
-                break
-
-            if self._should_schedule_on_date(current_date):
-                start_datetime = datetime.combine(current_date, self.start_time)
-                end_datetime = start_datetime + self.duration
-                occurrences.append({
-                    'date': current_date,
-                    'start_time': start_datetime,
-                    'end_time': end_datetime
-                })
-
-            current_date += timedelta(days=1)
-
-        return occurrences
+        from .services import recurrence
+        return recurrence.occurrences(self, limit)
 
     def create_task_programs(self, occurrences=None):
         """
-        Crea instancias de TaskProgram para las ocurrencias especificadas
+        Crea instancias de TaskProgram para las ocurrencias especificadas (en bloque,
+        ignorando las que ya existen)
         """
-        if occurrences is None:
-            occurrences = self.generate_occurrences()
-
-        created_programs = []
-        for occurrence in occurrences:
-            # Crear TaskProgram
-            program, created = TaskProgram.objects.get_or_create(
-                task=self.task,
-                host=self.host,  # Usar el host de la programación, no de la tarea
-                start_time=occurrence['start_time'],
-                defaults={
-                    'title': f"{self.task.title} - {occurrence['start_time'].strftime('%d/%m/%Y %H:%M')}",
-                    'end_time': occurrence['end_time'],
-                }
-            )
-
-            if created:
-                created_programs.append(program)
-
-        return created_programs
+        from .services import recurrence
+        return recurrence.materialize(self, occurrences)
 
     def get_next_occurrence(self):
         """
@@ -1081,3 +1017,27 @@ class GTDProcessingSettings(models.Model):
             cls.objects.filter(created_by=self.created_by, is_active=True).exclude(pk=self.pk).update(is_active=False)
         super().save(*args, **kwargs)
 
+
+# Hechos diarios de productividad (los mantiene events/signals.py)
+class DailyProductivity(models.Model):
+    """
+    Contadores por usuario, día y hora. Una fila por (user, date, hour);
+    las señales suman con F() y `backfill_productivity` reconstruye rangos.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_productivity')
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField(help_text="Hora del día (0-23)")
+
+    created = models.PositiveIntegerField(default=0, help_text="Tareas creadas (host)")
+    completed = models.PositiveIntegerField(default=0, help_text="Tareas completadas (assigned_to)")
+    high_priority = models.PositiveIntegerField(default=0, help_text="Tareas importantes completadas")
+    inbox_processed = models.PositiveIntegerField(default=0, help_text="Items del inbox procesados")
+
+    def __str__(self):
+        return f"{self.user_id} {self.date} {self.hour:02d}h"
+
+    class Meta:
+        verbose_name = "Productividad Diaria"
+        verbose_name_plural = "Productividad Diaria"
+        unique_together = ['user', 'date', 'hour']
+        indexes = [models.Index(fields=['date'])]
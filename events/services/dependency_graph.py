@@ -0,0 +1,253 @@
+"""
+Dependency Graph
+
+Grafo en memoria de TaskDependency. Las aristas de un ámbito se leen en UNA
+consulta (sólo ids y tipo) y se guardan en caché; todas las consultas de
+grafo se resuelven con mapas de adyacencia:
+
+    graph = graph_for_project(project_id)      # o graph_for_user / graph_for_task
+    graph = graph_around(task)                 # componente completo, ámbitos en caché
+    graph.prerequisites(task_id)               cierre transitivo hacia arriba
+    graph.dependents(task_id)                  cierre transitivo hacia abajo
+    graph.would_create_cycle(task_id, depends_on_id)
+    graph.find_cycle()                         [ids...] o None
+    graph.topological_order()                  prerequisitos primero
+    graph.critical_path(durations)             cadena más larga (ids, total)
+    creates_cycle(task_id, depends_on_id)      validación contra la BD al crear
+
+Dirección: TaskDependency(task=A, depends_on=B) es la arista B → A
+("B bloquea a A"). `requires[A]` = {B}, `blocks[B]` = {A}.
+
+Ámbitos en caché (CACHE_TTL):
+
+    project:<id>    aristas con algún extremo en el proyecto
+    user:<id>       aristas con algún extremo cuyo host es el usuario
+
+events/signals.py invalida los ámbitos de proyecto/usuario de ambos extremos
+en cada post_save/post_delete de TaskDependency: una escritura sólo vacía los
+ámbitos que toca. No hay un ámbito global: las dependencias que cruzan
+proyectos u hosts se siguen sumando ámbitos (graph_around) y la validación
+de ciclos recorre la BD por niveles (creates_cycle).
+"""
+
+from collections import defaultdict, deque
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from ..models import Task, TaskDependency
+
+CACHE_PREFIX = 'task_deps'
+CACHE_TTL = 600  # 10 minutos
+
+
+class DependencyCycleError(ValueError):
+    """El grafo tiene un ciclo; `cycle` son los ids que lo forman."""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Dependencia circular: {' → '.join(str(task_id) for task_id in cycle)}")
+
+
+class DependencyGraph:
+    """Adyacencias de un conjunto de aristas (task_id, depends_on_id, dependency_type)."""
+
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.requires = defaultdict(set)
+        self.blocks = defaultdict(set)
+        self.edge_types = {}
+        for task_id, depends_on_id, dependency_type in self.edges:
+            self.requires[task_id].add(depends_on_id)
+            self.blocks[depends_on_id].add(task_id)
+            self.edge_types[(depends_on_id, task_id)] = dependency_type
+
+    @property
+    def nodes(self) -> set:
+        return set(self.requires) | set(self.blocks)
+
+    # ── Cierres transitivos ──────────────────────────────────────────────
+
+    @staticmethod
+    def _reach(adjacency, start) -> set:
+        seen, queue = set(), deque(adjacency.get(start, ()))
+        while queue:
+            node = queue.popleft()
+            if node not in seen:
+                seen.add(node)
+                queue.extend(adjacency.get(node, ()))
+        return seen
+
+    def prerequisites(self, task_id) -> set:
+        """Tareas que deben resolverse antes de `task_id` (directas e indirectas)."""
+        return self._reach(self.requires, task_id)
+
+    def dependents(self, task_id) -> set:
+        """Tareas bloqueadas, directa o indirectamente, por `task_id`."""
+        return self._reach(self.blocks, task_id)
+
+    def component(self, task_id) -> set:
+        """`task_id` + sus prerequisitos + sus dependientes."""
+        return {task_id} | self.prerequisites(task_id) | self.dependents(task_id)
+
+    # ── Ciclos y orden ───────────────────────────────────────────────────
+
+    def would_create_cycle(self, task_id, depends_on_id) -> bool:
+        """¿Cerraría un ciclo la nueva arista "task depende de depends_on"?"""
+        return task_id == depends_on_id or task_id in self.prerequisites(depends_on_id)
+
+    def find_cycle(self):
+        """Primer ciclo encontrado como lista de ids (DFS iterativo), o None."""
+        state = {}  # 1 = en la pila, 2 = terminado
+        for root in sorted(self.nodes):
+            if root in state:
+                continue
+            path, stack = [root], [iter(sorted(self.blocks.get(root, ())))]
+            state[root] = 1
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(child) == 1:
+                    return path[path.index(child):] + [child]
+                elif child not in state:
+                    state[child] = 1
+                    path.append(child)
+                    stack.append(iter(sorted(self.blocks.get(child, ()))))
+        return None
+
+    def topological_order(self) -> list:
+        """Ids con los prerequisitos antes que sus dependientes (Kahn)."""
+        pending = {node: len(self.requires.get(node, ())) for node in self.nodes}
+        ready = deque(sorted(node for node, count in pending.items() if not count))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for child in sorted(self.blocks.get(node, ())):
+                pending[child] -= 1
+                if not pending[child]:
+                    ready.append(child)
+        if len(order) != len(pending):
+            raise DependencyCycleError(self.find_cycle() or [])
+        return order
+
+    def subgraph(self, nodes) -> 'DependencyGraph':
+        """Aristas con ambos extremos en `nodes`."""
+        nodes = set(nodes)
+        return DependencyGraph(e for e in self.edges if e[0] in nodes and e[1] in nodes)
+
+    def critical_path(self, durations=None, nodes=None):
+        """
+        Cadena de mayor duración total (por defecto 1 por tarea).
+        Devuelve (ids en orden de ejecución, duración total). Con `nodes`,
+        sólo se ordena ese subgrafo: un ciclo fuera de él no lo afecta.
+        """
+        if nodes is not None:
+            return self.subgraph(nodes).critical_path(durations)
+        durations = durations or {}
+        best, previous = {}, {}
+        for node in self.topological_order():
+            weight = durations.get(node, 1)
+            parents = [p for p in self.requires.get(node, ()) if p in best]
+            parent = max(parents, key=best.get, default=None)
+            best[node] = weight + (best[parent] if parent is not None else 0)
+            previous[node] = parent
+
+        if not best:
+            return [], 0
+        node = max(best, key=best.get)
+        total, path = best[node], []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1], total
+
+
+# ── Carga y caché por ámbito ─────────────────────────────────────────────
+
+def _cache_key(scope: str) -> str:
+    return f"{CACHE_PREFIX}:{scope}"
+
+
+def _load(scope: str, condition) -> DependencyGraph:
+    key = _cache_key(scope)
+    edges = cache.get(key)
+    if edges is None:
+        edges = list(TaskDependency.objects.filter(condition)
+                     .values_list('task_id', 'depends_on_id', 'dependency_type'))
+        cache.set(key, edges, CACHE_TTL)
+    return DependencyGraph(edges)
+
+
+def graph_for_project(project_id) -> DependencyGraph:
+    return _load(f'project:{project_id}',
+                 Q(task__project_id=project_id) | Q(depends_on__project_id=project_id))
+
+
+def graph_for_user(user_id) -> DependencyGraph:
+    return _load(f'user:{user_id}', Q(task__host_id=user_id) | Q(depends_on__host_id=user_id))
+
+
+def _scope(project_id, host_id) -> tuple:
+    return ('project', project_id) if project_id else ('user', host_id)
+
+
+def _graph_for_scope(project_id, host_id) -> DependencyGraph:
+    return graph_for_project(project_id) if project_id else graph_for_user(host_id)
+
+
+def graph_for_task(task) -> DependencyGraph:
+    """Ámbito de la tarea: su proyecto si tiene, si no las del host."""
+    return _graph_for_scope(task.project_id, task.host_id)
+
+
+def graph_around(task) -> DependencyGraph:
+    """
+    Componente de `task` armado con los ámbitos en caché: empieza por el de
+    la tarea y suma el de cada tarea alcanzada de otro proyecto/host hasta
+    que el componente no crece. Cada ámbito trae todas las aristas que tocan
+    sus tareas, así que el componente queda completo.
+    """
+    scopes = {_scope(task.project_id, task.host_id)}
+    edges = set(graph_for_task(task).edges)
+    scoped = {task.id}
+    while True:
+        component = DependencyGraph(edges).component(task.id)
+        pending = component - scoped
+        if not pending:
+            return DependencyGraph(edges).subgraph(component)
+        scoped |= pending
+        for project_id, host_id in Task.objects.filter(id__in=pending).values_list('project_id', 'host_id'):
+            if _scope(project_id, host_id) not in scopes:
+                scopes.add(_scope(project_id, host_id))
+                edges.update(_graph_for_scope(project_id, host_id).edges)
+
+
+def creates_cycle(task_id, depends_on_id) -> bool:
+    """
+    ¿Cerraría un ciclo "task depende de depends_on"? Recorre los prerequisitos
+    de depends_on en la BD (sin caché), una consulta por nivel: se usa dentro
+    de la transacción que crea la arista.
+    """
+    if task_id == depends_on_id:
+        return True
+    seen, frontier = {depends_on_id}, {depends_on_id}
+    while frontier:
+        frontier = set(TaskDependency.objects.filter(task_id__in=frontier)
+                       .values_list('depends_on_id', flat=True)) - seen
+        if task_id in frontier:
+            return True
+        seen |= frontier
+    return False
+
+
+def invalidate(*task_ids) -> None:
+    """Borra los ámbitos de proyecto/usuario de las tareas dadas."""
+    keys = set()
+    for project_id, host_id in Task.objects.filter(id__in=task_ids).values_list('project_id', 'host_id'):
+        if project_id:
+            keys.add(_cache_key(f'project:{project_id}'))
+        keys.add(_cache_key(f'user:{host_id}'))
+    cache.delete_many(list(keys))
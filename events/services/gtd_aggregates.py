@@ -0,0 +1,320 @@
+"""
+GTD Aggregates
+
+Capa de agregación compartida por los tres motores GTD (gtd_analytics,
+gtd_metrics, gtd_reviews). Cada dimensión es UNA consulta con agregados
+condicionales (`Count(filter=Q(...))`) o una agrupación por
+TruncDate, y se calcula sólo si alguien la lee:
+
+    agg = aggregates_for(user_id, *window(30))
+    agg.tasks['completed'], agg.daily, agg.hours, agg.contexts
+
+    tasks           conteos de tareas del usuario (creadas, completadas,
+                    pendientes, bloqueadas, delegadas...) + tiempo promedio
+                    de completación                              1 consulta
+    task_days       actividad diaria: actualizadas / completadas  1 consulta
+    task_clock      completadas por (hora, día de semana), desde la
+                    tabla de hechos DailyProductivity             1 consulta
+    projects        conteos de proyectos                          1 consulta
+    project_rows    tareas totales/completadas/pendientes por proyecto
+    inbox           capturados, procesados, clarificados + tiempo promedio
+                    en inbox                                      1 consulta
+    inbox_breakdown items por (contexto, prioridad)               1 consulta
+    inbox_days      días con captura                              1 consulta
+
+Memoización: aggregates_for() devuelve la misma instancia para el mismo
+(user_id, start, end) durante un request — la memo es por hilo y se vacía en
+request_started/request_finished (y expira a los MEMO_TTL fuera de un
+request). window(days) fija el "ahora" del request para que los tres motores
+pidan exactamente la misma ventana.
+
+Mapeo a los campos reales (los motores usaban user_id/status/captured_at):
+
+    dueño de tarea/proyecto  host o assigned_to
+    completada               done=True o estado 'Completed'
+    pendiente                estado 'To Do' / 'In Progress' sin done
+    en espera                estado 'Blocked'
+    delegada                 assigned_to distinto de host
+    contexto / prioridad     InboxItem.context / InboxItem.priority
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.signals import request_finished, request_started
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from ..models import InboxItem, Project, Task
+from . import productivity_facts
+
+COMPLETED_STATUS = 'Completed'
+PENDING_STATUSES = ('To Do', 'In Progress')
+WAITING_STATUS = 'Blocked'
+
+MEMO_TTL = 30          # segundos; acota la memo fuera de un request
+STALE_WAITING_DAYS = 7
+STALLED_PROJECT_DAYS = 14
+DUE_SOON_DAYS = 3
+
+WEEKDAY_NAMES = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+
+def _user_scope(user_id) -> Q:
+    return Q(host_id=user_id) | Q(assigned_to_id=user_id)
+
+
+def task_completed_q(prefix: str = '') -> Q:
+    return Q(**{f'{prefix}done': True}) | Q(**{f'{prefix}task_status__status_name': COMPLETED_STATUS})
+
+
+def project_completed_q() -> Q:
+    return Q(done=True) | Q(project_status__status_name=COMPLETED_STATUS)
+
+
+def _elapsed(start_field: str, end_field: str):
+    return ExpressionWrapper(F(end_field) - F(start_field), output_field=DurationField())
+
+
+def format_duration(value) -> str:
+    """timedelta → '3h 20m' / '45m'; 'N/A' si no hay dato."""
+    if value is None:
+        return 'N/A'
+    if not isinstance(value, timedelta):
+        value = timedelta(microseconds=value)
+    hours = value.days * 24 + value.seconds // 3600
+    minutes = (value.seconds % 3600) // 60
+    return f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+
+
+class GTDAggregates:
+    """Agregados GTD de un usuario en la ventana [start, end]."""
+
+    def __init__(self, user_id, start, end):
+        self.user_id = user_id
+        self.start = start
+        self.end = end
+
+    @property
+    def total_days(self) -> int:
+        return max((self.end - self.start).days, 1)
+
+    def _tasks(self):
+        return Task.objects.filter(_user_scope(self.user_id))
+
+    def _inbox(self):
+        return InboxItem.objects.filter(created_by_id=self.user_id)
+
+    # ── Tareas ────────────────────────────────────────────────────────────
+
+    @cached_property
+    def tasks(self) -> dict:
+        created = Q(created_at__range=(self.start, self.end))
+        updated = Q(updated_at__range=(self.start, self.end))
+        completed = task_completed_q() & updated
+        pending = Q(task_status__status_name__in=PENDING_STATUSES, done=False)
+        data = self._tasks().aggregate(
+            created=Count('id', filter=created),
+            completed=Count('id', filter=completed),
+            pending=Count('id', filter=pending),
+            pending_important=Count('id', filter=pending & Q(important=True)),
+            waiting=Count('id', filter=created & Q(task_status__status_name=WAITING_STATUS)),
+            stale_waiting=Count('id', filter=Q(task_status__status_name=WAITING_STATUS,
+                                               created_at__lte=self.end - timedelta(days=STALE_WAITING_DAYS))),
+            delegated=Count('id', filter=created & ~Q(assigned_to_id=F('host_id'))),
+            with_description=Count('id', filter=created & Q(description__isnull=False) & ~Q(description='')),
+            in_project=Count('id', filter=created & Q(project__isnull=False)),
+            important=Count('id', filter=created & Q(important=True)),
+            updated=Count('id', filter=updated),
+            updated_last_week=Count('id', filter=Q(updated_at__gt=self.end - timedelta(days=7),
+                                                   updated_at__lte=self.end)),
+            total=Count('id', filter=Q(created_at__lte=self.end)),
+            avg_completion=Avg(_elapsed('created_at', 'updated_at'), filter=completed),
+        )
+        data['completion_rate'] = data['completed'] / max(data['created'], 1) * 100
+        return data
+
+    @cached_property
+    def task_days(self) -> list:
+        """[{'date': 'YYYY-MM-DD', 'updated', 'completed'}] de los días con actividad."""
+        rows = (self._tasks()
+                .filter(updated_at__range=(self.start, self.end))
+                .annotate(day=TruncDate('updated_at'))
+                .values('day')
+                .annotate(updated=Count('id'), completed=Count('id', filter=task_completed_q()))
+                .order_by('day'))
+        return [{'date': r['day'].isoformat(), 'updated': r['updated'], 'completed': r['completed']}
+                for r in rows]
+
+    @cached_property
+    def task_clock(self) -> list:
+        """
+        [(hora, día 0=domingo, completadas)] en los días de la ventana, leído
+        de DailyProductivity (completadas atribuidas a assigned_to).
+        """
+        return productivity_facts.clock(self.user_id, self.start.date(), self.end.date())
+
+    @property
+    def daily(self) -> list:
+        """Días con al menos una completada: [{'date', 'completed'}]."""
+        return [{'date': d['date'], 'completed': d['completed']} for d in self.task_days if d['completed']]
+
+    @property
+    def active_days(self) -> int:
+        return len(self.task_days)
+
+    @property
+    def hours(self) -> dict:
+        """{'0'..'23': completadas}."""
+        out = {str(h): 0 for h in range(24)}
+        for hour, _, n in self.task_clock:
+            out[str(hour)] += n
+        return out
+
+    @property
+    def weekdays(self) -> dict:
+        """{'Domingo'..'Sábado': completadas}."""
+        out = {name: 0 for name in WEEKDAY_NAMES}
+        for _, weekday, n in self.task_clock:
+            out[WEEKDAY_NAMES[weekday]] += n
+        return out
+
+    def weekly_completed(self) -> list:
+        """Completadas por semana desde start (7 días por semana), de la más vieja a la más reciente."""
+        first = self.start.date()
+        weeks = [0] * ((self.end.date() - first).days // 7 + 1)
+        for d in self.task_days:
+            weeks[(date.fromisoformat(d['date']) - first).days // 7] += d['completed']
+        return weeks
+
+    def completed_halves(self) -> tuple:
+        """(completadas en la primera mitad, en la segunda) desde task_days."""
+        mid = (self.start + (self.end - self.start) / 2).date().isoformat()
+        first = sum(d['completed'] for d in self.task_days if d['date'] < mid)
+        return first, sum(d['completed'] for d in self.task_days) - first
+
+    # ── Proyectos ─────────────────────────────────────────────────────────
+
+    @cached_property
+    def projects(self) -> dict:
+        done = project_completed_q()
+        return Project.objects.filter(_user_scope(self.user_id)).aggregate(
+            total=Count('id', filter=Q(created_at__lte=self.end)),
+            active=Count('id', filter=~done),
+            completed=Count('id', filter=done & Q(updated_at__range=(self.start, self.end))),
+            updated=Count('id', filter=Q(updated_at__range=(self.start, self.end))),
+            stalled=Count('id', filter=~done & Q(updated_at__lte=self.end - timedelta(days=STALLED_PROJECT_DAYS))),
+        )
+
+    @cached_property
+    def project_rows(self) -> list:
+        """Un dict por proyecto del usuario con sus conteos de tareas."""
+        done = task_completed_q('task__')
+        pending = Q(task__task_status__status_name__in=PENDING_STATUSES, task__done=False)
+        rows = (Project.objects
+                .filter(_user_scope(self.user_id), created_at__lte=self.end)
+                .annotate(total_tasks=Count('task'),
+                          completed_tasks=Count('task', filter=done),
+                          pending_tasks=Count('task', filter=pending))
+                .values('id', 'title', 'created_at', 'done', 'project_status__status_name',
+                        'total_tasks', 'completed_tasks', 'pending_tasks')
+                .order_by('-total_tasks', 'id'))
+        for row in rows:
+            row['status'] = row.pop('project_status__status_name')
+            row['active'] = not row['done'] and row['status'] != COMPLETED_STATUS
+        return list(rows)
+
+    # ── Inbox ─────────────────────────────────────────────────────────────
+
+    @cached_property
+    def inbox(self) -> dict:
+        captured = Q(created_at__range=(self.start, self.end))
+        processed = captured & Q(is_processed=True)
+        data = self._inbox().aggregate(
+            captured=Count('id', filter=captured),
+            processed=Count('id', filter=processed),
+            with_context=Count('id', filter=captured & ~Q(context='')),
+            clarified=Count('id', filter=captured & ~Q(gtd_category='pendiente')),
+            with_due_date=Count('id', filter=captured & Q(due_date__isnull=False)),
+            due_soon=Count('id', filter=Q(is_processed=False,
+                                          due_date__range=(self.end, self.end + timedelta(days=DUE_SOON_DAYS)))),
+            avg_processing=Avg(_elapsed('created_at', 'processed_at'),
+                               filter=processed & Q(processed_at__isnull=False)),
+        )
+        data['processing_rate'] = data['processed'] / max(data['captured'], 1) * 100
+        return data
+
+    @cached_property
+    def inbox_breakdown(self) -> list:
+        """[{'context', 'priority', 'total', 'processed'}] de lo capturado en la ventana."""
+        return list(self._inbox()
+                    .filter(created_at__range=(self.start, self.end))
+                    .values('context', 'priority')
+                    .annotate(total=Count('id'), processed=Count('id', filter=Q(is_processed=True)))
+                    .order_by('context', 'priority'))
+
+    @cached_property
+    def inbox_days(self) -> int:
+        """Días de la ventana con al menos un item capturado."""
+        return (self._inbox()
+                .filter(created_at__range=(self.start, self.end))
+                .annotate(day=TruncDate('created_at'))
+                .values('day').distinct().count())
+
+    @property
+    def contexts(self) -> dict:
+        """{contexto: {'total', 'processed'}} ordenado por total; '' → 'sin contexto'."""
+        out = {}
+        for row in self.inbox_breakdown:
+            ctx = out.setdefault(row['context'] or 'sin contexto', {'total': 0, 'processed': 0})
+            ctx['total'] += row['total']
+            ctx['processed'] += row['processed']
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]['total']))
+
+    @property
+    def priorities(self) -> dict:
+        out = {}
+        for row in self.inbox_breakdown:
+            out[row['priority']] = out.get(row['priority'], 0) + row['total']
+        return out
+
+
+# ── Memo por request ──────────────────────────────────────────────────────────
+
+_local = threading.local()
+
+
+def _memo() -> dict:
+    memo = getattr(_local, 'memo', None)
+    if memo is None or time.monotonic() - memo['at'] > MEMO_TTL:
+        memo = _local.memo = {'at': time.monotonic(), 'now': None, 'entries': {}}
+    return memo
+
+
+def reset(**kwargs) -> None:
+    """Vacía la memo del hilo (conectado a request_started/request_finished)."""
+    _local.memo = None
+
+
+request_started.connect(reset, dispatch_uid='events.gtd_aggregates.reset.started')
+request_finished.connect(reset, dispatch_uid='events.gtd_aggregates.reset.finished')
+
+
+def window(days: int):
+    """(start, end) de los últimos `days` días con el mismo "ahora" en todo el request."""
+    memo = _memo()
+    if memo['now'] is None:
+        memo['now'] = timezone.now()
+    return memo['now'] - timedelta(days=days), memo['now']
+
+
+def aggregates_for(user_id, start, end) -> GTDAggregates:
+    """Instancia memoizada por (user_id, start, end)."""
+    entries = _memo()['entries']
+    key = (user_id, start, end)
+    if key not in entries:
+        entries[key] = GTDAggregates(user_id, start, end)
+    return entries[key]
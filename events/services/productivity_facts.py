@@ -0,0 +1,215 @@
+"""
+Productivity Facts
+
+Tabla de hechos `DailyProductivity`: una fila por (usuario, día, hora) con
+contadores que las lecturas sólo tienen que sumar.
+
+    created          tareas creadas            → host, a created_at
+    completed        tareas completadas        → assigned_to, al completarse
+    high_priority    completadas importantes   → assigned_to, al completarse
+    inbox_processed  items del inbox procesados → created_by, a processed_at
+
+Mantenimiento incremental: events/signals.py llama a bump() en la misma
+transacción que el save (UPDATE ... SET n = n + 1, o INSERT si la fila aún no
+existe) y a unbump() cuando una tarea completada se reabre. Los `queryset.update()` y las cargas masivas no disparan señales; para
+eso está `manage.py backfill_productivity`, que reconstruye un rango con
+rebuild() a partir de Task/InboxItem.
+
+Lecturas (una consulta cada una, sin escanear Task):
+
+    daily_totals(user_id, start, end)   {date: {created, completed, ...}}
+    hourly_totals(user_id)              {hora: completadas}
+    weekday_totals(user_id)             {día 0=domingo: completadas}
+    clock(user_id, start, end)          [(hora, día 0=domingo, completadas)]
+    global_daily(field, since)          [(date, total)] de todos los usuarios
+
+Las fechas y horas se calculan en la zona horaria activa, igual que
+TruncDate/ExtractHour, así que bump() y rebuild() caen en el mismo bucket.
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractWeekDay, TruncDate
+from django.utils import timezone
+
+from ..models import DailyProductivity, InboxItem, Task, TaskStatus
+
+COMPLETED_STATUS = 'Completed'
+FACT_FIELDS = ('created', 'completed', 'high_priority', 'inbox_processed')
+BATCH_SIZE = 1000
+
+
+def bucket(when) -> tuple:
+    """datetime → (date, hora) en la zona horaria activa."""
+    local = timezone.localtime(when) if timezone.is_aware(when) else when
+    return local.date(), local.hour
+
+
+def bump(user_id, when, **deltas) -> None:
+    """Suma `deltas` (created=1, completed=1...) al bucket de `when`."""
+    deltas = {field: n for field, n in deltas.items() if n}
+    if not user_id or not deltas:
+        return
+
+    day, hour = bucket(when or timezone.now())
+    rows = DailyProductivity.objects.filter(user_id=user_id, date=day, hour=hour)
+    updates = {field: F(field) + n for field, n in deltas.items()}
+
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DailyProductivity.objects.create(user_id=user_id, date=day, hour=hour, **deltas)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        rows.update(**updates)
+
+
+def unbump(user_id, when, **deltas) -> None:
+    """
+    Resta `deltas` del bucket de `when`; si ese bucket no los tiene, de la
+    fila anterior más reciente que sí. Nunca deja un contador en negativo.
+    """
+    deltas = {field: n for field, n in deltas.items() if n}
+    if not user_id or not deltas:
+        return
+
+    day, hour = bucket(when or timezone.now())
+    rows = DailyProductivity.objects.filter(user_id=user_id, **{f'{field}__gte': n for field, n in deltas.items()})
+    updates = {field: F(field) - n for field, n in deltas.items()}
+
+    if rows.filter(date=day, hour=hour).update(**updates):
+        return
+    # La tarea se volvió a guardar después de completarse: el bucket quedó antes
+    earlier = (rows.filter(Q(date__lt=day) | Q(date=day, hour__lt=hour))
+               .order_by('-date', '-hour').values_list('id', flat=True).first())
+    if earlier:
+        rows.filter(id=earlier).update(**updates)
+
+
+def is_task_completed(done, status_id) -> bool:
+    """Mismo criterio que gtd_aggregates: done=True o estado 'Completed'."""
+    if done:
+        return True
+    if not status_id:
+        return False
+    return TaskStatus.objects.filter(id=status_id, status_name=COMPLETED_STATUS).exists()
+
+
+# ── Lecturas ─────────────────────────────────────────────────────────────
+
+def _facts(user_id=None, start=None, end=None):
+    qs = DailyProductivity.objects.all()
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    return qs
+
+
+def daily_totals(user_id, start, end) -> dict:
+    """{date: {'created', 'completed', 'high_priority', 'inbox_processed'}} de los días con actividad."""
+    rows = (_facts(user_id, start, end)
+            .values('date')
+            .annotate(**{field: Sum(field) for field in FACT_FIELDS})
+            .order_by())
+    return {row.pop('date'): row for row in rows}
+
+
+def hourly_totals(user_id, start=None, end=None, field: str = 'completed') -> dict:
+    """{hora: total} sólo de las horas con actividad."""
+    rows = (_facts(user_id, start, end)
+            .values('hour')
+            .annotate(n=Sum(field))
+            .filter(n__gt=0)
+            .order_by())
+    return {row['hour']: row['n'] for row in rows}
+
+
+def weekday_totals(user_id, start=None, end=None, field: str = 'completed') -> dict:
+    """{día 0=domingo: total} sólo de los días de semana con actividad."""
+    rows = (_facts(user_id, start, end)
+            .annotate(weekday=ExtractWeekDay('date'))
+            .values('weekday')
+            .annotate(n=Sum(field))
+            .filter(n__gt=0)
+            .order_by())
+    return {row['weekday'] - 1: row['n'] for row in rows}
+
+
+def clock(user_id, start, end, field: str = 'completed') -> list:
+    """[(hora, día 0=domingo, total)] — la forma de GTDAggregates.task_clock."""
+    rows = (_facts(user_id, start, end)
+            .annotate(weekday=ExtractWeekDay('date'))
+            .values('hour', 'weekday')
+            .annotate(n=Sum(field))
+            .filter(n__gt=0)
+            .order_by())
+    return [(row['hour'], row['weekday'] - 1, row['n']) for row in rows]
+
+
+def global_daily(field: str, since) -> list:
+    """[(date, total)] de todos los usuarios desde `since`, ordenado por fecha."""
+    rows = (_facts(start=since)
+            .values('date')
+            .annotate(n=Sum(field))
+            .order_by('date'))
+    return [(row['date'], row['n']) for row in rows]
+
+
+# ── Reconstrucción ───────────────────────────────────────────────────────
+
+def _grouped(queryset, user_field: str, time_field: str, **extra):
+    """Cuenta filas por (usuario, día, hora) de `time_field`."""
+    return (queryset
+            .exclude(**{f'{user_field}__isnull': True})
+            .annotate(day=TruncDate(time_field), hour=ExtractHour(time_field))
+            .values(user_field, 'day', 'hour')
+            .annotate(n=Count('id'), **extra)
+            .order_by())
+
+
+def rebuild(start, end, user_ids=None) -> int:
+    """
+    Recalcula los hechos de los días [start, end] desde Task e InboxItem.
+    Borra y reinserta en una transacción; devuelve las filas escritas.
+    """
+    tasks = Task.objects.all()
+    inbox = InboxItem.objects.filter(is_processed=True)
+    facts = _facts(start=start, end=end)
+    if user_ids:
+        tasks = tasks.filter(Q(host_id__in=user_ids) | Q(assigned_to_id__in=user_ids))
+        inbox = inbox.filter(created_by_id__in=user_ids)
+        facts = facts.filter(user_id__in=user_ids)
+
+    counters = defaultdict(lambda: dict.fromkeys(FACT_FIELDS, 0))
+    sources = (
+        (_grouped(tasks.filter(created_at__date__range=(start, end)), 'host_id', 'created_at'),
+         'host_id', {'created': 'n'}),
+        (_grouped(tasks.filter(Q(done=True) | Q(task_status__status_name=COMPLETED_STATUS),
+                               updated_at__date__range=(start, end)),
+                  'assigned_to_id', 'updated_at', important=Count('id', filter=Q(important=True))),
+         'assigned_to_id', {'completed': 'n', 'high_priority': 'important'}),
+        (_grouped(inbox.filter(processed_at__date__range=(start, end)), 'created_by_id', 'processed_at'),
+         'created_by_id', {'inbox_processed': 'n'}),
+    )
+    for rows, user_field, mapping in sources:
+        for row in rows:
+            if user_ids and row[user_field] not in user_ids:
+                continue
+            key = (row[user_field], row['day'], row['hour'])
+            for field, column in mapping.items():
+                counters[key][field] += row[column]
+
+    with transaction.atomic():
+        facts.delete()
+        DailyProductivity.objects.bulk_create(
+            [DailyProductivity(user_id=user_id, date=day, hour=hour, **values)
+             for (user_id, day, hour), values in counters.items()],
+            batch_size=BATCH_SIZE,
+        )
+    return len(counters)
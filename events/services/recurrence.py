@@ -0,0 +1,157 @@
+"""
+Recurrence
+
+Motor de recurrencia de TaskSchedule: calcula ocurrencias con aritmética de
+fechas y materializa TaskProgram en bloque.
+
+    occurrences(schedule, limit=10)            [{'date', 'start_time', 'end_time'}]
+    materialize(schedule, occurrences=None)    TaskProgram nuevos (3 consultas)
+    roll_forward(horizon_days=30)              materializa todas las activas
+
+Los días de la semana se guardan como máscara de bits (bit 0 = lunes, igual
+que date.weekday()) y se salta directamente al siguiente día marcado con una
+tabla de 7 desplazamientos, en lugar de avanzar día a día. Todo iterador
+tiene un horizonte duro (MAX_HORIZON_DAYS): una programación semanal sin días
+marcados no produce ocurrencias y una sin end_date se corta en el horizonte.
+
+La materialización usa bulk_create(ignore_conflicts=True) sobre el
+unique_together (task, host, start_time) de TaskProgram, así que dos procesos
+que materialicen la misma programación no duplican filas.
+"""
+
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import TaskProgram, TaskSchedule
+
+WEEKDAY_FIELDS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+ALL_DAYS = 0b1111111
+
+MAX_HORIZON_DAYS = 366      # ninguna iteración pasa de aquí
+DEFAULT_HORIZON_DAYS = 30   # ventana de roll_forward
+BATCH_SIZE = 500
+
+
+def weekday_mask(schedule) -> int:
+    """Máscara de días: todos si es diaria, si no los flags monday..sunday."""
+    if schedule.recurrence_type == 'daily':
+        return ALL_DAYS
+    return sum(1 << day for day, field in enumerate(WEEKDAY_FIELDS) if getattr(schedule, field))
+
+
+def _gaps(mask: int) -> list:
+    """Para cada día de la semana, días hasta el siguiente día marcado (1-7)."""
+    return [next(step for step in range(1, 8) if mask >> ((day + step) % 7) & 1) for day in range(7)]
+
+
+def iter_dates(schedule, start=None, until=None):
+    """
+    Fechas de ocurrencia desde max(start_date, start) hasta
+    min(end_date, until, start + MAX_HORIZON_DAYS), en orden.
+    """
+    mask = weekday_mask(schedule)
+    if not mask:
+        return
+
+    current = max(schedule.start_date, start or timezone.localdate())
+    last = current + timedelta(days=MAX_HORIZON_DAYS)
+    for bound in (schedule.end_date, until):
+        if bound is not None:
+            last = min(last, bound)
+
+    gaps = _gaps(mask)
+    if not mask >> current.weekday() & 1:
+        current += timedelta(days=gaps[current.weekday()])
+    while current <= last:
+        yield current
+        current += timedelta(days=gaps[current.weekday()])
+
+
+def _as_datetime(day, time_of_day):
+    value = datetime.combine(day, time_of_day)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def occurrences(schedule, limit=10, start=None, until=None) -> list:
+    """Hasta `limit` ocurrencias con hora de inicio y fin (None = sin límite)."""
+    result = []
+    for day in islice(iter_dates(schedule, start, until), limit):
+        start_time = _as_datetime(day, schedule.start_time)
+        result.append({
+            'date': day,
+            'start_time': start_time,
+            'end_time': start_time + schedule.duration,
+        })
+    return result
+
+
+def _program(schedule, occurrence):
+    return TaskProgram(
+        task_id=schedule.task_id,
+        host_id=schedule.host_id,
+        title=f"{schedule.task.title} - {occurrence['start_time'].strftime('%d/%m/%Y %H:%M')}",
+        start_time=occurrence['start_time'],
+        end_time=occurrence['end_time'],
+    )
+
+
+def materialize(schedule, occurrences_list=None) -> list:
+    """
+    Crea los TaskProgram que falten para las ocurrencias dadas (por defecto
+    las próximas 10) y devuelve los creados.
+    """
+    if occurrences_list is None:
+        occurrences_list = occurrences(schedule)
+    if not occurrences_list:
+        return []
+
+    programs = TaskProgram.objects.filter(task_id=schedule.task_id, host_id=schedule.host_id)
+    existing = set(programs.filter(
+        start_time__in=[o['start_time'] for o in occurrences_list]
+    ).values_list('start_time', flat=True))
+    missing = [o for o in occurrences_list if o['start_time'] not in existing]
+    if not missing:
+        return []
+
+    TaskProgram.objects.bulk_create(
+        [_program(schedule, o) for o in missing], batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+    # ignore_conflicts no devuelve PKs: se releen las filas insertadas
+    return list(programs.filter(
+        start_time__in=[o['start_time'] for o in missing]
+    ).order_by('start_time'))
+
+
+def roll_forward(horizon_days=DEFAULT_HORIZON_DAYS, schedules=None) -> dict:
+    """
+    Materializa todas las programaciones activas hasta hoy + horizon_days.
+    Una consulta de programaciones, una de existentes y los INSERT en bloque.
+    """
+    horizon_days = min(horizon_days, MAX_HORIZON_DAYS)
+    today = timezone.localdate()
+    until = today + timedelta(days=horizon_days)
+
+    if schedules is None:
+        schedules = TaskSchedule.objects.filter(is_active=True)
+    schedules = list(schedules.select_related('task').exclude(end_date__lt=today))
+    if not schedules:
+        return {'schedules': 0, 'created': 0}
+
+    existing = set(TaskProgram.objects.filter(
+        task_id__in={s.task_id for s in schedules},
+        start_time__gte=_as_datetime(today, datetime.min.time()),
+    ).values_list('task_id', 'host_id', 'start_time'))
+
+    new_programs = []
+    for schedule in schedules:
+        for occurrence in occurrences(schedule, limit=None, start=today, until=until):
+            key = (schedule.task_id, schedule.host_id, occurrence['start_time'])
+            if key not in existing:
+                existing.add(key)
+                new_programs.append(_program(schedule, occurrence))
+
+    TaskProgram.objects.bulk_create(new_programs, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return {'schedules': len(schedules), 'created': len(new_programs)}
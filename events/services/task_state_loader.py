@@ -0,0 +1,101 @@
+"""
+Task State Loader
+
+Carga las tareas con su estado activo y su última finalización en un número
+fijo de consultas, sin importar cuántas tareas tenga el usuario.
+
+    records = load_task_records(Task.objects.filter(...))
+    # [{'task', 'project', 'event', 'status', 'active_state', 'completed_state'}, ...]
+
+Antes cada vista hacía `task.taskstate_set.filter(...).first()` y `.exists()`
+por tarea: eso descarta el prefetch y cuesta hasta tres consultas por tarea.
+Aquí los dos estados salen de dos Prefetch con queryset filtrado:
+
+    active_state     TaskState 'In Progress' sin end_time (el primero por id)
+    completed_state  último TaskState 'Completed' por end_time — Prefetch
+                     con slice [:1], que Django resuelve con ROW_NUMBER()
+                     particionado por tarea: una sola fila por tarea
+
+Lo usan el panel de tareas (tasks_views), TaskManager.get_all_tasks
+(Kanban, Eisenhower, gráficos) y los paneles de proyectos.
+"""
+
+from django.db.models import Prefetch
+
+from ..models import Task, TaskState
+
+ACTIVE_STATUS = 'In Progress'
+COMPLETED_STATUS = 'Completed'
+
+TASK_RELATED = (
+    'task_status',
+    'project',
+    'project__project_status',
+    'event',
+    'event__event_status',
+    'assigned_to',
+    'host',
+)
+
+
+def with_task_states(queryset):
+    """Agrega los Prefetch del estado activo y la última finalización al queryset de tareas."""
+    active = (TaskState.objects
+              .filter(end_time__isnull=True, status__status_name=ACTIVE_STATUS)
+              .select_related('status')
+              .order_by('id'))
+    completed = (TaskState.objects
+                 .filter(status__status_name=COMPLETED_STATUS)
+                 .select_related('status')
+                 .order_by('-end_time', '-id'))[:1]
+    return queryset.prefetch_related(
+        Prefetch('taskstate_set', queryset=active, to_attr='active_states'),
+        Prefetch('taskstate_set', queryset=completed, to_attr='completed_states'),
+    )
+
+
+def task_record(task) -> dict:
+    """Registro compacto de una tarea cargada con with_task_states()."""
+    active = getattr(task, 'active_states', None) or []
+    completed = getattr(task, 'completed_states', None) or []
+    return {
+        'task': task,
+        'project': task.project,
+        'event': task.event,
+        'status': task.task_status,
+        'active_state': active[0] if active else None,
+        'completed_state': completed[0] if completed else None,
+    }
+
+
+def load_task_records(queryset, related=TASK_RELATED) -> list:
+    """Registros de todas las tareas del queryset (3 consultas en total)."""
+    return [task_record(task) for task in with_task_states(queryset.select_related(*related))]
+
+
+def load_task_record(task_id, queryset=None, related=TASK_RELATED):
+    """Registro de una sola tarea, o None si no existe en el queryset."""
+    queryset = Task.objects.all() if queryset is None else queryset
+    task = with_task_states(queryset.select_related(*related)).filter(id=task_id).first()
+    return task_record(task) if task else None
+
+
+def tasks_by_project(project_ids) -> dict:
+    """{project_id: [Task, ...]} con task_status y assigned_to en una sola consulta."""
+    grouped = {}
+    tasks = (Task.objects
+             .filter(project_id__in=list(project_ids))
+             .select_related('task_status', 'assigned_to')
+             .order_by('-created_at'))
+    for task in tasks:
+        grouped.setdefault(task.project_id, []).append(task)
+    return grouped
+
+
+def count_by_status(tasks) -> dict:
+    """{status_name: n} de una lista de tareas con task_status ya cargado."""
+    counts = {}
+    for task in tasks:
+        name = task.task_status.status_name
+        counts[name] = counts.get(name, 0) + 1
+    return counts
@@ -1,9 +1,15 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
-from .models import Task, InboxItem, TaskStatus
+from .models import Task, InboxItem, TaskDependency, TaskStatus
+from .services import dependency_graph, productivity_facts
+
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Task)
 def create_inbox_item_for_task(sender, instance, created, **kwargs):
@@ -79,4 +85,89 @@ def create_inbox_item_for_task(sender, instance, created, **kwargs):
                 print(f"Inbox item creado automáticamente para tarea: {instance.title}")
 
         except Exception as e:
-            print(f"Error al crear inbox item para tarea {instance.title}: {e}")
\ No newline at end of file
+            print(f"Error al crear inbox item para tarea {instance.title}: {e}")
+
+
+# ── Hechos de productividad (DailyProductivity) ─────────────────────────────
+# post_init guarda el estado leído de la BD para detectar la transición a
+# completada/procesada (o la reapertura) en post_save sin una consulta extra.
+# Se lee __dict__ para no cargar campos diferidos (.only()/.defer()).
+
+def _completion_bucket(values):
+    """(assigned_to_id, updated_at, important): dónde se contó la completada."""
+    return values.get('assigned_to_id'), values.get('updated_at'), values.get('important')
+
+
+@receiver(post_init, sender=Task)
+def snapshot_task_completion(sender, instance, **kwargs):
+    instance._completion_snapshot = (instance.__dict__.get('done'), instance.__dict__.get('task_status_id'))
+    instance._completion_bucket = _completion_bucket(instance.__dict__)
+
+
+@receiver(post_save, sender=Task)
+def track_task_productivity(sender, instance, created, **kwargs):
+    """
+    Suma la tarea a DailyProductivity: creada (host) y completada (assigned_to).
+    Si una tarea completada se reabre, resta la completada donde se contó.
+    """
+    current = (instance.done, instance.task_status_id)
+    previous = getattr(instance, '_completion_snapshot', (None, None))
+    assigned_to_id, completed_at, important = getattr(instance, '_completion_bucket', (None, None, None))
+    instance._completion_snapshot = current
+    instance._completion_bucket = _completion_bucket(instance.__dict__)
+
+    try:
+        if created:
+            productivity_facts.bump(instance.host_id, instance.created_at, created=1)
+
+        if created or current != previous:
+            is_completed = productivity_facts.is_task_completed(*current)
+            was_completed = not created and productivity_facts.is_task_completed(*previous)
+            if is_completed and not was_completed:
+                productivity_facts.bump(
+                    instance.assigned_to_id, instance.updated_at,
+                    completed=1, high_priority=int(bool(instance.important)),
+                )
+            elif was_completed and not is_completed:
+                productivity_facts.unbump(
+                    assigned_to_id, completed_at,
+                    completed=1, high_priority=int(bool(important)),
+                )
+    except Exception:
+        logger.exception("Error al actualizar productividad para tarea %s", instance.pk)
+
+
+@receiver(post_init, sender=InboxItem)
+def snapshot_inbox_processing(sender, instance, **kwargs):
+    instance._processed_snapshot = instance.__dict__.get('is_processed')
+
+
+@receiver(post_save, sender=InboxItem)
+def track_inbox_productivity(sender, instance, created, **kwargs):
+    """
+    Suma el item procesado a DailyProductivity (created_by, a processed_at)
+    """
+    was_processed = not created and getattr(instance, '_processed_snapshot', False)
+    instance._processed_snapshot = instance.is_processed
+
+    if instance.is_processed and not was_processed:
+        try:
+            productivity_facts.bump(
+                instance.created_by_id, instance.processed_at or timezone.now(), inbox_processed=1,
+            )
+        except Exception:
+            logger.exception("Error al actualizar productividad para inbox item %s", instance.pk)
+
+
+# ── Grafo de dependencias (caché por proyecto/usuario) ──────────────────────
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def invalidate_dependency_graph(sender, instance, **kwargs):
+    """
+    Invalida los grafos en caché de ambos extremos de la dependencia
+    """
+    try:
+        dependency_graph.invalidate(instance.task_id, instance.depends_on_id)
+    except Exception:
+        logger.exception("Error al invalidar grafo de dependencias %s", instance.pk)
@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Project, ProjectStatus, Task, TaskDependency, TaskStatus
+from ..services import dependency_graph
+from ..services.dependency_graph import DependencyCycleError, DependencyGraph
+
+User = get_user_model()
+
+
+class TestDependencyGraphAlgorithms(TestCase):
+    """
+    Consultas en memoria sobre aristas (task_id, depends_on_id, tipo)
+    """
+
+    def setUp(self):
+        # 1 → 2 → 4, 1 → 3 → 4, 4 → 5  (prerequisito → dependiente)
+        self.graph = DependencyGraph([
+            (2, 1, 'finish_to_start'), (3, 1, 'finish_to_start'),
+            (4, 2, 'finish_to_start'), (4, 3, 'start_to_start'), (5, 4, 'finish_to_start'),
+        ])
+
+    def test_transitive_closure(self):
+        self.assertEqual(self.graph.prerequisites(4), {1, 2, 3})
+        self.assertEqual(self.graph.dependents(2), {4, 5})
+        self.assertEqual(self.graph.component(3), {1, 3, 4, 5})
+
+    def test_cycles(self):
+        self.assertTrue(self.graph.would_create_cycle(1, 5))
+        self.assertTrue(self.graph.would_create_cycle(3, 3))
+        self.assertFalse(self.graph.would_create_cycle(5, 1))
+        self.assertIsNone(self.graph.find_cycle())
+
+        cyclic = DependencyGraph(self.graph.edges + [(1, 5, 'finish_to_start')])
+        self.assertEqual(cyclic.find_cycle()[0], cyclic.find_cycle()[-1])
+        with self.assertRaises(DependencyCycleError):
+            cyclic.topological_order()
+
+    def test_critical_path_ignores_unrelated_cycle(self):
+        graph = DependencyGraph(self.graph.edges + [(11, 10, 'finish_to_start'), (10, 11, 'finish_to_start')])
+        self.assertEqual(graph.critical_path(nodes=graph.component(1)), ([1, 2, 4, 5], 4))
+        with self.assertRaises(DependencyCycleError):
+            graph.critical_path()
+
+    def test_topological_order_and_critical_path(self):
+        order = self.graph.topological_order()
+        for task_id, depends_on_id, _ in self.graph.edges:
+            self.assertLess(order.index(depends_on_id), order.index(task_id))
+
+        self.assertEqual(self.graph.critical_path(), ([1, 2, 4, 5], 4))
+        self.assertEqual(self.graph.critical_path({3: 5}), ([1, 3, 4, 5], 8))
+
+
+class TestDependencyGraphLoading(TestCase):
+    """
+    Una consulta por ámbito, caché e invalidación por señales, validación en la vista
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='deps', password='pass123')
+        self.status = TaskStatus.objects.create(status_name='To Do')
+        self.project = Project.objects.create(
+            title='Proyecto', project_status=ProjectStatus.objects.create(status_name='In Progress'),
+            host=self.user, assigned_to=self.user,
+        )
+        self.a, self.b, self.c = (
+            Task.objects.create(title=title, host=self.user, assigned_to=self.user, project=self.project,
+                                task_status=self.status, ticket_price=0)
+            for title in 'ABC'
+        )
+        TaskDependency.objects.create(task=self.b, depends_on=self.a, dependency_type='finish_to_start')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_project_graph_cached_and_invalidated(self):
+        with self.assertNumQueries(1):
+            graph = dependency_graph.graph_for_project(self.project.id)
+        self.assertEqual(graph.dependents(self.a.id), {self.b.id})
+
+        with self.assertNumQueries(0):
+            dependency_graph.graph_for_project(self.project.id)
+
+        TaskDependency.objects.create(task=self.c, depends_on=self.b, dependency_type='finish_to_start')
+        self.assertEqual(dependency_graph.graph_for_task(self.a).dependents(self.a.id), {self.b.id, self.c.id})
+
+    def test_create_view_rejects_cycle(self):
+        self.client.force_login(self.user)
+        TaskDependency.objects.create(task=self.c, depends_on=self.b, dependency_type='finish_to_start')
+
+        self.client.post(reverse('events:create_task_dependency', args=[self.a.id]),
+                         {'depends_on': self.c.id, 'dependency_type': 'finish_to_start'})
+
+        self.assertFalse(TaskDependency.objects.filter(task=self.a, depends_on=self.c).exists())
+
+    def test_graph_view_deduplicated_edges(self):
+        self.client.force_login(self.user)
+        TaskDependency.objects.create(task=self.c, depends_on=self.b, dependency_type='finish_to_start')
+
+        response = self.client.get(reverse('events:task_dependency_graph', args=[self.b.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(e['from'], e['to']) for e in response.context['edges']],
+                         [(self.a.id, self.b.id), (self.b.id, self.c.id)])
+        self.assertEqual(response.context['critical_path'], [self.a.id, self.b.id, self.c.id])
+
+    def test_graph_view_includes_cross_project_dependencies(self):
+        self.client.force_login(self.user)
+        other = User.objects.create_user(username='ajeno', password='pass123')
+        foreign = Task.objects.create(title='Ajena', host=other, assigned_to=other,
+                                      task_status=self.status, ticket_price=0)
+        TaskDependency.objects.create(task=self.a, depends_on=foreign, dependency_type='finish_to_start')
+
+        response = self.client.get(reverse('events:task_dependency_graph', args=[self.b.id]))
+
+        self.assertEqual(response.context['critical_path'], [foreign.id, self.a.id, self.b.id])
+
+    def test_create_view_checks_cycles_against_database(self):
+        self.client.force_login(self.user)
+        dependency_graph.graph_for_project(self.project.id)   # caché sin la arista c → b
+        TaskDependency.objects.bulk_create([
+            TaskDependency(task=self.c, depends_on=self.b, dependency_type='finish_to_start'),
+        ])                                               # sin señales: la caché queda vieja
+
+        self.client.post(reverse('events:create_task_dependency', args=[self.a.id]),
+                         {'depends_on': self.c.id, 'dependency_type': 'finish_to_start'})
+
+        self.assertFalse(TaskDependency.objects.filter(task=self.a, depends_on=self.c).exists())
+
+    def test_creates_cycle_walks_one_query_per_level(self):
+        TaskDependency.objects.create(task=self.c, depends_on=self.b, dependency_type='finish_to_start')
+        with self.assertNumQueries(2):      # c → {b} → {a}
+            self.assertTrue(dependency_graph.creates_cycle(self.a.id, self.c.id))
+        with self.assertNumQueries(1):
+            self.assertFalse(dependency_graph.creates_cycle(self.c.id, self.a.id))
+
+    def test_unrelated_write_keeps_project_cache(self):
+        dependency_graph.graph_for_project(self.project.id)
+        other = User.objects.create_user(username='otro', password='pass123')
+        x, y = (Task.objects.create(title=t, host=other, assigned_to=other, task_status=self.status,
+                                    ticket_price=0) for t in 'XY')
+        TaskDependency.objects.create(task=y, depends_on=x, dependency_type='finish_to_start')
+
+        with self.assertNumQueries(0):
+            dependency_graph.graph_for_project(self.project.id)
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from ..gtd_analytics import gtd_analytics
+from ..gtd_metrics import gtd_metrics
+from ..gtd_reviews import gtd_review_system
+from ..models import InboxItem, Project, ProjectStatus, Task, TaskStatus
+from ..services import gtd_aggregates
+from ..services.gtd_aggregates import aggregates_for, window
+
+User = get_user_model()
+
+
+class TestGTDAggregates(TestCase):
+    """
+    Agregados GTD compartidos: una consulta por dimensión y memo por request
+    """
+
+    def setUp(self):
+        gtd_aggregates.reset()
+        gtd_analytics.metrics_cache.clear()
+        self.user = User.objects.create_user(username='gtd', password='pass123')
+        self.other = User.objects.create_user(username='otro', password='pass123')
+        self.todo = TaskStatus.objects.create(status_name='To Do')
+        self.completed = TaskStatus.objects.create(status_name='Completed')
+        self.blocked = TaskStatus.objects.create(status_name='Blocked')
+        self.project = Project.objects.create(
+            title='Proyecto', project_status=ProjectStatus.objects.create(status_name='In Progress'),
+            host=self.user, assigned_to=self.user,
+        )
+
+    def tearDown(self):
+        gtd_aggregates.reset()
+
+    def _task(self, status, done=False, assigned_to=None, **kwargs):
+        return Task.objects.create(title='T', host=self.user, assigned_to=assigned_to or self.user,
+                                   task_status=status, done=done, ticket_price=0, **kwargs)
+
+    def _inbox(self, context='', processed=False, priority='media'):
+        return InboxItem.objects.create(title='I', created_by=self.user, context=context,
+                                        is_processed=processed, priority=priority)
+
+    def test_task_counts(self):
+        self._task(self.completed, project=self.project, description='detalle')
+        self._task(self.todo, done=True)
+        self._task(self.todo, important=True)
+        self._task(self.blocked, assigned_to=self.other)
+        Task.objects.create(title='Ajena', host=self.other, assigned_to=self.other,
+                            task_status=self.completed, ticket_price=0)
+
+        tasks = aggregates_for(self.user.id, *window(30)).tasks
+        self.assertEqual(tasks['created'], 4)
+        self.assertEqual(tasks['completed'], 2)
+        self.assertEqual(tasks['pending'], 1)
+        self.assertEqual(tasks['pending_important'], 1)
+        self.assertEqual(tasks['waiting'], 1)
+        self.assertEqual(tasks['delegated'], 1)
+        self.assertEqual(tasks['in_project'], 1)
+        self.assertEqual(tasks['with_description'], 1)
+        self.assertEqual(tasks['completion_rate'], 50)
+
+    def test_daily_and_clock_groupings(self):
+        self._task(self.completed)
+        self._task(self.completed)
+        self._task(self.todo)
+
+        agg = aggregates_for(self.user.id, *window(7))
+        today = timezone.now().date().isoformat()
+        self.assertEqual(agg.task_days, [{'date': today, 'updated': 3, 'completed': 2}])
+        self.assertEqual(sum(agg.hours.values()), 2)
+        self.assertEqual(sum(agg.weekdays.values()), 2)
+        self.assertEqual(agg.weekly_completed()[-1], 2)
+        self.assertEqual(agg.completed_halves(), (0, 2))
+
+    def test_inbox_contexts_and_priorities(self):
+        base = InboxItem.objects.filter(created_by=self.user).count()
+        self._inbox('@casa', processed=True, priority='alta')
+        self._inbox('@casa')
+        self._inbox('@trabajo', priority='baja')
+
+        agg = aggregates_for(self.user.id, *window(30))
+        self.assertEqual(agg.inbox['captured'], base + 3)
+        self.assertEqual(agg.contexts['@casa'], {'total': 2, 'processed': 1})
+        self.assertEqual(agg.contexts['@trabajo'], {'total': 1, 'processed': 0})
+        self.assertEqual(agg.priorities['alta'], 1)
+        self.assertEqual(agg.inbox_days, 1)
+
+    def test_memoized_per_window(self):
+        start, end = window(30)
+        self.assertEqual(window(30), (start, end))
+        agg = aggregates_for(self.user.id, start, end)
+        self.assertIs(aggregates_for(self.user.id, start, end), agg)
+        self.assertIsNot(aggregates_for(self.user.id, start + timedelta(days=1), end), agg)
+
+        agg.tasks
+        with self.assertNumQueries(0):
+            aggregates_for(self.user.id, start, end).tasks
+
+        gtd_aggregates.reset()
+        self.assertIsNot(aggregates_for(self.user.id, start, end), agg)
+
+    def test_query_budget(self):
+        """Benchmark: los tres motores juntos sobre la misma ventana."""
+        for status in (self.completed, self.todo, self.blocked):
+            self._task(status, project=self.project)
+        self._inbox('@casa', processed=True)
+
+        with self.assertNumQueries(7):
+            analytics = gtd_analytics.get_comprehensive_analytics(self.user.id)
+        self.assertEqual(analytics['overview']['completed_tasks'], 1)
+
+        # Misma ventana: sólo inbox_days y las dos mitades de la tendencia (6 + 6) consultan
+        with self.assertNumQueries(13):
+            metrics = gtd_metrics.get_comprehensive_gtd_metrics(self.user.id)
+        self.assertEqual(metrics['gtd_dimensions']['engage']['completion_rate'], 33.3)
+
+        # Revisión mensual: sólo la ventana "desde el 1 del mes" de los objetivos es nueva
+        with self.assertNumQueries(1):
+            review = gtd_review_system.generate_review('monthly', self.user.id)
+        self.assertEqual(review['basic_data']['tasks_completed'], 1)
+        self.assertEqual(review['monthly_trends']['total_month'], 1)
@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..gtd_calendar import gtd_calendar
+from ..models import DailyProductivity, InboxItem, Task, TaskStatus
+from ..services import gtd_aggregates, productivity_facts
+from ..services.gtd_aggregates import aggregates_for, window
+
+User = get_user_model()
+
+
+class TestProductivityFacts(TestCase):
+    """
+    Tabla de hechos DailyProductivity: señales incrementales, backfill y lecturas
+    """
+
+    def setUp(self):
+        gtd_aggregates.reset()
+        self.user = User.objects.create_user(username='facts', password='pass123')
+        self.other = User.objects.create_user(username='otro', password='pass123')
+        self.todo = TaskStatus.objects.create(status_name='To Do')
+        self.completed = TaskStatus.objects.create(status_name='Completed')
+        self.today = timezone.localdate()
+
+    def tearDown(self):
+        gtd_aggregates.reset()
+
+    def _task(self, status=None, assigned_to=None, **kwargs):
+        return Task.objects.create(title='T', host=self.user, assigned_to=assigned_to or self.user,
+                                   task_status=status or self.todo, ticket_price=0, **kwargs)
+
+    def _totals(self, user=None):
+        return productivity_facts.daily_totals((user or self.user).id, self.today, self.today).get(
+            self.today, dict.fromkeys(productivity_facts.FACT_FIELDS, 0))
+
+    def test_signals_count_creation_and_completion_once(self):
+        task = self._task(important=True)
+        self._task(self.completed, assigned_to=self.other)
+        self.assertEqual(self._totals()['created'], 2)
+        self.assertEqual(self._totals()['completed'], 0)
+        self.assertEqual(self._totals(self.other)['completed'], 1)
+
+        task.task_status = self.completed
+        task.save()
+        task.done = True
+        task.save()
+
+        reloaded = Task.objects.get(pk=task.pk)
+        reloaded.title = 'Renombrada'
+        reloaded.save()
+
+        totals = self._totals()
+        self.assertEqual(totals['completed'], 1)
+        self.assertEqual(totals['high_priority'], 1)
+
+    def test_reopening_completed_task_decrements(self):
+        task = self._task(important=True)
+        task.task_status = self.completed
+        task.save()
+
+        reopened = Task.objects.get(pk=task.pk)
+        reopened.task_status = self.todo
+        reopened.save()
+        self.assertEqual((self._totals()['completed'], self._totals()['high_priority']), (0, 0))
+
+        reopened.done = True
+        reopened.save()
+        reopened.done = False
+        reopened.save()
+        reopened.save()
+        totals = self._totals()
+        self.assertEqual((totals['created'], totals['completed'], totals['high_priority']), (1, 0, 0))
+
+    def test_inbox_processing_transition(self):
+        item = InboxItem.objects.create(title='I', created_by=self.user)
+        self.assertEqual(self._totals()['inbox_processed'], 0)
+
+        item.is_processed = True
+        item.processed_at = timezone.now()
+        item.save()
+        item.save()
+        self.assertEqual(self._totals()['inbox_processed'], 1)
+
+    def test_backfill_matches_signals(self):
+        self._task(self.completed, important=True)
+        self._task()
+        InboxItem.objects.create(title='I', created_by=self.user, is_processed=True,
+                                 processed_at=timezone.now())
+        expected = list(DailyProductivity.objects.order_by('user_id', 'date', 'hour').values(
+            'user_id', 'date', 'hour', *productivity_facts.FACT_FIELDS))
+
+        DailyProductivity.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_productivity', '--days', '1', stdout=out)
+
+        self.assertIn('Successfully wrote', out.getvalue())
+        self.assertEqual(list(DailyProductivity.objects.order_by('user_id', 'date', 'hour').values(
+            'user_id', 'date', 'hour', *productivity_facts.FACT_FIELDS)), expected)
+
+    def test_readers_use_facts(self):
+        for _ in range(3):
+            self._task(self.completed)
+        hour = timezone.localtime().hour
+
+        self.assertEqual(productivity_facts.hourly_totals(self.user.id), {hour: 3})
+        self.assertEqual(gtd_calendar._get_peak_productivity_hours(self.user.id), [f"{hour:02d}"])
+        self.assertEqual(gtd_calendar._get_energy_patterns(self.user.id), {f"{hour:02d}": 'high'})
+        self.assertEqual(sum(aggregates_for(self.user.id, *window(7)).hours.values()), 3)
+
+        with self.assertNumQueries(1):
+            heatmap = gtd_calendar.get_calendar_heatmap(self.user.id, months=1)
+        self.assertEqual(heatmap['data'][self.today.strftime('%Y-%m-%d')]['completed'], 3)
+        self.assertEqual(heatmap['summary']['total_completed'], 3)
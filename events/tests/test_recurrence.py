@@ -0,0 +1,77 @@
+from datetime import date, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Task, TaskProgram, TaskSchedule, TaskStatus
+from ..services import recurrence
+
+User = get_user_model()
+
+
+class TestRecurrence(TestCase):
+    """
+    Motor de recurrencia: máscara de días, horizonte duro y materialización en bloque
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sched', password='pass123')
+        self.task = Task.objects.create(title='Recurrente', host=self.user, assigned_to=self.user,
+                                        task_status=TaskStatus.objects.create(status_name='To Do'),
+                                        ticket_price=0)
+        self.today = timezone.localdate()
+
+    def _schedule(self, **kwargs):
+        values = dict(task=self.task, host=self.user, start_time=time(9, 0),
+                      duration=timedelta(hours=1), start_date=self.today)
+        values.update(kwargs)
+        return TaskSchedule.objects.create(**values)
+
+    def test_weekly_without_days_terminates(self):
+        schedule = self._schedule(recurrence_type='weekly')
+        self.assertEqual(recurrence.weekday_mask(schedule), 0)
+        self.assertEqual(schedule.generate_occurrences(limit=10), [])
+        self.assertIsNone(schedule.get_next_occurrence())
+
+    def test_unbounded_schedule_stops_at_horizon(self):
+        schedule = self._schedule(recurrence_type='daily')
+        dates = list(recurrence.iter_dates(schedule))
+        self.assertEqual(len(dates), recurrence.MAX_HORIZON_DAYS + 1)
+        self.assertEqual(dates[-1], self.today + timedelta(days=recurrence.MAX_HORIZON_DAYS))
+
+    def test_weekday_mask_jumps(self):
+        monday = date(2030, 1, 7)
+        schedule = self._schedule(recurrence_type='weekly', monday=True, friday=True,
+                                  start_date=monday - timedelta(days=2))
+        self.assertEqual(recurrence.weekday_mask(schedule), 0b10001)
+        dates = list(recurrence.iter_dates(schedule, until=monday + timedelta(days=14)))
+        self.assertEqual(dates, [monday, monday + timedelta(days=4), monday + timedelta(days=7),
+                                 monday + timedelta(days=11), monday + timedelta(days=14)])
+        self.assertTrue(schedule._should_schedule_on_date(monday))
+        self.assertFalse(schedule._should_schedule_on_date(monday + timedelta(days=1)))
+
+    def test_materialize_is_bulk_and_idempotent(self):
+        schedule = self._schedule(recurrence_type='daily', end_date=self.today + timedelta(days=4))
+
+        with self.assertNumQueries(3):  # existentes, INSERT, relectura
+            created = schedule.create_task_programs()
+        self.assertEqual(len(created), 5)
+        self.assertTrue(all(program.pk for program in created))
+
+        self.assertEqual(schedule.create_task_programs(), [])
+        self.assertEqual(TaskProgram.objects.filter(task=self.task).count(), 5)
+
+    def test_roll_forward_command(self):
+        self._schedule(recurrence_type='weekly', monday=True, wednesday=True)
+        self._schedule(recurrence_type='weekly')
+        self._schedule(recurrence_type='daily', is_active=False)
+
+        out = StringIO()
+        call_command('materialize_schedules', '--days', '13', stdout=out)
+        self.assertIn('Created 4 task programs from 2 schedules', out.getvalue())
+
+        call_command('materialize_schedules', '--days', '13', stdout=out)
+        self.assertEqual(TaskProgram.objects.filter(task=self.task).count(), 4)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from ..management.task_manager import TaskManager
+from ..models import Project, ProjectStatus, Task, TaskState, TaskStatus
+from ..services.task_state_loader import (
+    count_by_status, load_task_record, load_task_records, tasks_by_project
+)
+
+User = get_user_model()
+
+
+class TestTaskStateLoader(TestCase):
+    """
+    Estado activo y última finalización por Prefetch: consultas fijas por página
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='loader', password='pass123')
+        self.todo = TaskStatus.objects.create(status_name='To Do')
+        self.in_progress = TaskStatus.objects.create(status_name='In Progress')
+        self.completed = TaskStatus.objects.create(status_name='Completed')
+        self.project = Project.objects.create(
+            title='Proyecto', project_status=ProjectStatus.objects.create(status_name='In Progress'),
+            host=self.user, assigned_to=self.user,
+        )
+
+    def _task(self, title, status, project=None):
+        return Task.objects.create(title=title, host=self.user, assigned_to=self.user,
+                                   task_status=status, project=project, ticket_price=0)
+
+    def _state(self, task, status, end_time=None):
+        state = TaskState.objects.create(task=task, status=status)
+        if end_time:
+            TaskState.objects.filter(id=state.id).update(end_time=end_time)
+        return state
+
+    def test_active_and_last_completed_state(self):
+        now = timezone.now()
+        task = self._task('A', self.completed, self.project)
+        self._state(task, self.in_progress, end_time=now - timedelta(hours=3))
+        self._state(task, self.completed, end_time=now - timedelta(hours=2))
+        last = self._state(task, self.completed, end_time=now - timedelta(hours=1))
+        running = self._task('B', self.in_progress)
+        active = self._state(running, self.in_progress)
+
+        records = {r['task'].title: r for r in load_task_records(Task.objects.order_by('title'))}
+
+        self.assertEqual(records['A']['completed_state'].id, last.id)
+        self.assertIsNone(records['A']['active_state'])
+        self.assertEqual(records['B']['active_state'].id, active.id)
+        self.assertIsNone(records['B']['completed_state'])
+        self.assertEqual(records['A']['project'], self.project)
+        self.assertEqual(records['B']['status'], self.in_progress)
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        for i in range(20):
+            task = self._task(f'T{i}', self.in_progress)
+            self._state(task, self.in_progress)
+            self._state(task, self.completed, end_time=timezone.now())
+
+        with self.assertNumQueries(3):
+            records = load_task_records(Task.objects.all())
+            states = [(r['active_state'].status.status_name, r['completed_state'].status.status_name)
+                      for r in records]
+        self.assertEqual(len(states), 20)
+
+    def test_single_record(self):
+        task = self._task('Solo', self.todo)
+        self.assertEqual(load_task_record(task.id)['task'], task)
+        self.assertIsNone(load_task_record(task.id + 1000))
+
+    def test_task_manager_uses_loader(self):
+        self._task('Activa', self.in_progress)
+        self._task('Pendiente', self.todo)
+        manager = TaskManager(self.user)
+        tasks, active = manager.get_all_tasks()
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual([t['task'].title for t in active], ['Activa'])
+        self.assertIn('active_state', tasks[0])
+
+    def test_tasks_by_project(self):
+        self._task('P1', self.completed, self.project)
+        self._task('P2', self.todo, self.project)
+        self._task('Libre', self.todo)
+        with self.assertNumQueries(1):
+            grouped = tasks_by_project([self.project.id])
+            counts = count_by_status(grouped[self.project.id])
+        self.assertEqual(counts, {'Completed': 1, 'To Do': 1})
@@ -6,8 +6,11 @@ Centraliza funciones de estadísticas y visualización
 from collections import defaultdict
 from datetime import timedelta
 from django.db.models import Count, F, ExpressionWrapper, DurationField
+from django.db.models.functions import TruncDate
 from django.core.exceptions import ObjectDoesNotExist
-from ..models import TaskState, TaskStatus
+from django.utils import timezone
+from ..models import Event, Project, TaskState, TaskStatus
+from ..services import productivity_facts
 from .time_utils import get_date_range
 import logging
 
@@ -287,16 +290,13 @@ def get_optimized_chart_data():
             count=Count('id')
         ).order_by('date')
 
-        tasks_chart = Task.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).annotate(date=TruncDate('created_at')).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
+        # Tareas creadas por día desde la tabla de hechos DailyProductivity
+        tasks_chart = productivity_facts.global_daily('created', thirty_days_ago.date())
 
         events_data = [item['count'] for item in events_chart] if events_chart else []
-        tasks_data = [item['count'] for item in tasks_chart] if tasks_chart else []
+        tasks_data = [count for _, count in tasks_chart]
         event_dates = [item['date'].strftime('%Y-%m-%d') for item in events_chart] if events_chart else []
-        task_dates = [item['date'].strftime('%Y-%m-%d') for item in tasks_chart] if tasks_chart else []
+        task_dates = [day.strftime('%Y-%m-%d') for day, _ in tasks_chart]
 
         # Ensure all arrays have the same length for chart compatibility
         max_length = max(len(projects_data), len(events_data), len(tasks_data))
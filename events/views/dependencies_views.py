@@ -7,9 +7,11 @@ import logging
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import redirect, render, get_object_or_404
 
 from ..models import Task, TaskDependency
+from ..services import dependency_graph
 
 logger = logging.getLogger(__name__)
 
@@ -143,26 +145,39 @@ def _process_create_dependency(request, task):
         depends_on_task = Task.objects.get(id=depends_on_id)
 
         # Validar que no se cree una dependencia circular
-        if task.id == depends_on_id:
+        if task.id == depends_on_task.id:
             messages.error(request, 'Una tarea no puede depender de sí misma.')
             return redirect('events:task_dependencies_list', task_id=task.id)
 
-        # Verificar si ya existe esta dependencia
-        existing = TaskDependency.objects.filter(
-            task=task,
-            depends_on=depends_on_task
-        ).exists()
-
-        if existing:
-            messages.error(request, 'Esta dependencia ya existe.')
-            return redirect('events:task_dependencies_list', task_id=task.id)
-
-        # Crear la dependencia
-        TaskDependency.objects.create(
-            task=task,
-            depends_on=depends_on_task,
-            dependency_type=dependency_type
-        )
+        with transaction.atomic():
+            # Bloquea ambos extremos: dos altas cruzadas (A→B y B→A) no pueden
+            # pasar la validación a la vez. El ciclo se busca en la BD, no en la caché.
+            list(Task.objects.select_for_update().filter(id__in=[task.id, depends_on_task.id]).order_by('id'))
+
+            # Ciclo indirecto: depends_on ya depende (transitivamente) de esta tarea
+            if dependency_graph.creates_cycle(task.id, depends_on_task.id):
+                messages.error(
+                    request,
+                    f'Dependencia circular: "{depends_on_task.title}" ya depende de "{task.title}".'
+                )
+                return redirect('events:task_dependencies_list', task_id=task.id)
+
+            # Verificar si ya existe esta dependencia
+            existing = TaskDependency.objects.filter(
+                task=task,
+                depends_on=depends_on_task
+            ).exists()
+
+            if existing:
+                messages.error(request, 'Esta dependencia ya existe.')
+                return redirect('events:task_dependencies_list', task_id=task.id)
+
+            # Crear la dependencia
+            TaskDependency.objects.create(
+                task=task,
+                depends_on=depends_on_task,
+                dependency_type=dependency_type
+            )
 
         messages.success(request, f'Dependencia creada: "{task.title}" depende de "{depends_on_task.title}"')
         return redirect('events:task_dependencies_list', task_id=task.id)
@@ -266,104 +281,61 @@ def task_dependency_graph(request, task_id):
         messages.error(request, 'Tarea no encontrada.')
         return redirect('events:tasks')
 
-    # Obtener todas las dependencias relacionadas
-    all_dependencies = _get_all_dependencies(task)
+    # Componente de la tarea con los ámbitos en caché (también los de otros
+    # proyectos/hosts que alcance); un ciclo ajeno no afecta la ruta crítica
+    graph = dependency_graph.graph_around(task)
+    component = graph.component(task.id)
+    tasks_by_id = Task.objects.select_related('task_status').in_bulk(component)
+
+    try:
+        critical_path, _ = graph.critical_path(nodes=component)
+    except dependency_graph.DependencyCycleError as e:
+        logger.warning(f"[task_dependency_graph] {e}")
+        critical_path = []
 
     # Crear estructura para el gráfico
-    nodes, edges = _build_graph_structure(task, all_dependencies)
+    nodes, edges = _build_graph_structure(task, graph, tasks_by_id, critical_path)
 
     context = {
         'title': f'Gráfico de Dependencias: {task.title}',
         'task': task,
         'nodes': nodes,
         'edges': edges,
+        'critical_path': critical_path,
     }
 
     return render(request, 'events/task_dependency_graph.html', context)
 
 
-def _get_all_dependencies(task, visited=None):
-    """
-    Obtener todas las dependencias recursivamente
-    """
-    if visited is None:
-        visited = set()
-
-    if task.id in visited:
-        return []
-
-    visited.add(task.id)
-    dependencies = []
-
-    # Tareas que dependen de esta tarea (tareas bloqueadas)
-    blocking = TaskDependency.objects.filter(depends_on=task)
-    for dep in blocking:
-        dependencies.append({
-            'task': dep.task,
-            'type': 'blocking',
-            'dependency_type': dep.dependency_type
-        })
-        # Recursivamente obtener dependencias de las tareas bloqueadas
-        dependencies.extend(_get_all_dependencies(dep.task, visited))
-
-    # Tareas de las que esta tarea depende
-    depending_on = TaskDependency.objects.filter(task=task)
-    for dep in depending_on:
-        dependencies.append({
-            'task': dep.depends_on,
-            'type': 'depends_on',
-            'dependency_type': dep.dependency_type
-        })
-        # Recursivamente obtener dependencias de las tareas que son dependencias
-        dependencies.extend(_get_all_dependencies(dep.depends_on, visited))
-
-    return dependencies
-
-
-def _build_graph_structure(main_task, all_dependencies):
+def _build_graph_structure(main_task, graph, tasks_by_id, critical_path=()):
     """
     Construye la estructura de nodos y aristas para el gráfico
     """
-    nodes = []
-    edges = []
-    processed_tasks = set()
-
-    def add_task_to_graph(task_obj):
-        if task_obj.id in processed_tasks:
-            return
+    critical = set(critical_path)
+    downstream = {main_task.id} | graph.dependents(main_task.id)
 
-        processed_tasks.add(task_obj.id)
-        nodes.append({
+    nodes = [
+        {
             'id': task_obj.id,
             'label': task_obj.title,
             'status': task_obj.task_status.status_name,
             'color': task_obj.task_status.color,
-            'important': task_obj.important
-        })
-
-    # Añadir la tarea principal
-    add_task_to_graph(main_task)
-
-    # Añadir todas las tareas relacionadas
-    for dep in all_dependencies:
-        add_task_to_graph(dep['task'])
-
-        # Crear arista
-        if dep['type'] == 'blocking':
-            # Esta tarea bloquea a dep['task']
-            edges.append({
-                'from': main_task.id,
-                'to': dep['task'].id,
-                'label': dep['dependency_type'].replace('_', ' ').title(),
-                'type': 'blocking'
-            })
-        else:
-            # Esta tarea depende de dep['task']
-            edges.append({
-                'from': dep['task'].id,
-                'to': main_task.id,
-                'label': dep['dependency_type'].replace('_', ' ').title(),
-                'type': 'depends_on'
-            })
-
-    return nodes, edges
\ No newline at end of file
+            'important': task_obj.important,
+            'critical': task_obj.id in critical,
+        }
+        for task_obj in [main_task] + [t for task_id, t in sorted(tasks_by_id.items()) if task_id != main_task.id]
+    ]
+
+    # Cada arista una sola vez: prerequisito → dependiente
+    edges = [
+        {
+            'from': from_id,
+            'to': to_id,
+            'label': dependency_type.replace('_', ' ').title(),
+            'type': 'blocking' if from_id in downstream else 'depends_on',
+        }
+        for (from_id, to_id), dependency_type in sorted(graph.edge_types.items())
+        if from_id in tasks_by_id and to_id in tasks_by_id
+    ]
+
+    return nodes, edges
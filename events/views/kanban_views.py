@@ -180,7 +180,7 @@ def kanban_project(request, project_id):
     # Obtener tareas del proyecto específico
     tasks = Task.objects.filter(project=project).select_related(
         'task_status', 'assigned_to', 'host'
-    )
+    ).prefetch_related('tags')
 
     # Organizar tareas por estado
     kanban_columns = {
@@ -24,6 +24,7 @@ from ..forms import CreateNewProject
 
 # Gestión de proyectos
 from ..management.project_manager import ProjectManager
+from ..services.task_state_loader import count_by_status, tasks_by_project
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +40,7 @@ def get_projects_for_user(user):
         'host', 
         'assigned_to'
     ).prefetch_related(
-        'attendees',
-        'task_set'
+        'attendees'
     ).order_by('-created_at')
     
     projects_data = []
@@ -48,23 +48,22 @@ def get_projects_for_user(user):
     completed_projects = []
     blocked_projects = []
     
+    # Tareas de todos los proyectos en una consulta (services/task_state_loader.py)
+    projects = list(projects)
+    project_tasks_map = tasks_by_project(project.id for project in projects)
+    
     for project in projects:
-        # Contar tareas del proyecto
-        count_tasks = project.task_set.count()
-        
-        # Obtener tareas del proyecto con sus estados
-        project_tasks = project.task_set.select_related('task_status').all()
+        project_tasks = project_tasks_map.get(project.id, [])
         
         # Calcular estadísticas de tareas
-        completed_tasks = project_tasks.filter(task_status__status_name='Completed').count()
-        in_progress_tasks = project_tasks.filter(task_status__status_name='In Progress').count()
+        status_counts = count_by_status(project_tasks)
         
         project_data = {
             'project': project,
-            'count_tasks': count_tasks,
+            'count_tasks': len(project_tasks),
             'tasks': project_tasks,
-            'completed_tasks': completed_tasks,
-            'in_progress_tasks': in_progress_tasks,
+            'completed_tasks': status_counts.get('Completed', 0),
+            'in_progress_tasks': status_counts.get('In Progress', 0),
         }
         
         projects_data.append(project_data)
@@ -92,8 +91,7 @@ def render_single_project_view(request, project_id, title, statuses):
             'host', 
             'assigned_to'
         ).prefetch_related(
-            'attendees',
-            'task_set'
+            'attendees'
         ), id=project_id)
         
         # Verificar permisos
@@ -102,16 +100,14 @@ def render_single_project_view(request, project_id, title, statuses):
             return redirect('events:project_panel')
         
         # Obtener tareas del proyecto
-        tasks = project.task_set.select_related(
-            'task_status', 
-            'assigned_to'
-        ).order_by('-created_at')
+        tasks = tasks_by_project([project.id]).get(project.id, [])
         
         # Calcular estadísticas del proyecto
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(task_status__status_name='Completed').count()
-        in_progress_tasks = tasks.filter(task_status__status_name='In Progress').count()
-        pending_tasks = tasks.filter(task_status__status_name='To Do').count()
+        status_counts = count_by_status(tasks)
+        total_tasks = len(tasks)
+        completed_tasks = status_counts.get('Completed', 0)
+        in_progress_tasks = status_counts.get('In Progress', 0)
+        pending_tasks = status_counts.get('To Do', 0)
         
         # Calcular porcentaje de completado
         completion_rate = 0
@@ -582,22 +578,19 @@ def projects(request, project_id=None):
             'host', 
             'assigned_to'
         ).prefetch_related(
-            'attendees',
-            'task_set'
+            'attendees'
         ).order_by('-created_at')
         
         # Preparar datos de proyectos con estadísticas
         projects_data = []
+        projects_list = list(projects_list)
+        project_tasks_map = tasks_by_project(project.id for project in projects_list)
         for project in projects_list:
-            # Contar tareas del proyecto
-            count_tasks = project.task_set.count()
-            
-            # Obtener tareas del proyecto
-            project_tasks = project.task_set.select_related('task_status').all()
+            project_tasks = project_tasks_map.get(project.id, [])
             
             project_data = {
                 'project': project,
-                'count_tasks': count_tasks,
+                'count_tasks': len(project_tasks),
                 'tasks': project_tasks,
             }
             
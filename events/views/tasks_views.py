@@ -29,6 +29,7 @@ from ..utils import statuses_get
 from ..utils import update_status, add_credits_to_user
 
 from ..forms import CreateNewTask
+from ..services.task_state_loader import load_task_record, load_task_records
 
 # ============================================================================
 # CONFIGURACIÓN DE LOGGING
@@ -55,45 +56,17 @@ def get_tasks_for_user(user):
     """
     Obtiene todas las tareas para un usuario específico con optimización completa
     """
-    tasks = Task.objects.filter(
+    # Estado activo y última finalización por Prefetch (services/task_state_loader.py)
+    tasks_data = load_task_records(Task.objects.filter(
         Q(host=user) | Q(assigned_to=user)
-    ).select_related(
-        'task_status', 
-        'project', 
-        'project__project_status',
-        'event', 
-        'event__event_status',
-        'assigned_to',
-        'host'
-    ).prefetch_related(
-        'taskstate_set'
-    ).order_by('task_status__status_name', '-updated_at')  # Primero por estado, luego por fecha
+    ).order_by('task_status__status_name', '-updated_at'))  # Primero por estado, luego por fecha
     
-    tasks_data = []
     active_tasks = []
     completed_tasks = []
     blocked_tasks = []
     
-    for task in tasks:
-        active_state = task.taskstate_set.filter(
-            end_time__isnull=True,
-            status__status_name='In Progress'
-        ).first()
-
-        completed_state_qs = task.taskstate_set.filter(
-            status__status_name='Completed'
-        ).order_by('-end_time')
-        
-        completed_state = completed_state_qs.first() if completed_state_qs.exists() else None
-        
-        task_data = {
-            'task': task,
-            'active_state': active_state,
-            'completed_state': completed_state,
-        }
-        
-        tasks_data.append(task_data)
-        
+    for task_data in tasks_data:
+        task = task_data['task']
         if task.task_status.status_name == 'In Progress':
             active_tasks.append(task_data)
         elif task.task_status.status_name == 'Completed':
@@ -143,37 +116,15 @@ def render_single_task_view(request, task_id, title, other_task_statuses, status
     Renderiza la vista detallada de una tarea específica con optimización
     """
     try:
-        task = get_object_or_404(Task.objects.select_related(
-            'task_status', 
-            'project', 
-            'project__project_status',
-            'event', 
-            'event__event_status',
-            'assigned_to', 
-            'host'
-        ).prefetch_related('taskstate_set'), id=task_id)
+        task_data = load_task_record(task_id)
+        if task_data is None:
+            raise Http404('Task not found')
+        task = task_data['task']
         
         if task.host != request.user and task.assigned_to != request.user:
             messages.error(request, 'No tienes permiso para ver esta tarea.')
             return redirect('events:task_panel')
         
-        active_state = task.taskstate_set.filter(
-            end_time__isnull=True,
-            status__status_name='In Progress'
-        ).first()
-
-        completed_state_qs = task.taskstate_set.filter(
-            status__status_name='Completed'
-        ).order_by('-end_time')
-        
-        completed_state = completed_state_qs.first() if completed_state_qs.exists() else None
-        
-        task_data = {
-            'task': task,
-            'active_state': active_state,
-            'completed_state': completed_state,
-        }
-        
         project_data = None
         if task.project:
             project_tasks = Task.objects.filter(
@@ -557,56 +508,12 @@ def tasks(request, task_id=None, project_id=None):
         })
 
     else:
-        if not project_id:
-            tasks_list = Task.objects.filter(
-                Q(host=request.user) | Q(assigned_to=request.user)
-            ).select_related(
-                'task_status', 
-                'project', 
-                'project__project_status',
-                'event', 
-                'event__event_status',
-                'assigned_to',
-                'host'
-            ).prefetch_related(
-                'taskstate_set'
-            ).order_by('task_status__status_name', '-updated_at')  # CORREGIDO: primero por estado, luego por última actualización
-        else:
-            tasks_list = Task.objects.filter(
-                Q(host=request.user) | Q(assigned_to=request.user), 
-                project_id=project_id
-            ).select_related(
-                'task_status', 
-                'project', 
-                'project__project_status',
-                'event', 
-                'event__event_status',
-                'assigned_to',
-                'host'
-            ).prefetch_related(
-                'taskstate_set'
-            ).order_by('task_status__status_name', '-updated_at')  # CORREGIDO: primero por estado, luego por última actualización
-
-        tasks_data = []
-        for task in tasks_list:
-            active_state = task.taskstate_set.filter(
-                end_time__isnull=True,
-                status__status_name='In Progress'
-            ).first()
-
-            completed_state_qs = task.taskstate_set.filter(
-                status__status_name='Completed'
-            ).order_by('-end_time')
-            
-            completed_state = completed_state_qs.first() if completed_state_qs.exists() else None
-            
-            task_data = {
-                'task': task,
-                'active_state': active_state,
-                'completed_state': completed_state,
-            }
-            
-            tasks_data.append(task_data)
+        tasks_qs = Task.objects.filter(Q(host=request.user) | Q(assigned_to=request.user))
+        if project_id:
+            tasks_qs = tasks_qs.filter(project_id=project_id)
+        # CORREGIDO: primero por estado, luego por última actualización
+        tasks_data = load_task_records(tasks_qs.order_by('task_status__status_name', '-updated_at'))
+        tasks_list = [task_data['task'] for task_data in tasks_data]
 
         alerts = generate_tasks_overview_alerts(tasks_data, request.user)
 
@@ -163,6 +163,25 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Chat — ventana de coalescencia del fan-out de notificaciones (chat/notification_fanout.py)
+CHAT_FANOUT_WINDOW_S = 0.5
+
+# Rooms — Centrifugo (rooms.views.CentrifugoMixin) y relay del outbox
+# (python manage.py relay_outbox, rooms/outbox_relay.py). 'outbox' sólo entrega
+# si el proceso `relay` del Procfile está levantado; por defecto API directa.
+CENTRIFUGO_HTTP_API_ENDPOINT = os.environ.get('CENTRIFUGO_HTTP_API_ENDPOINT', 'http://localhost:8001')
+CENTRIFUGO_HTTP_API_KEY      = os.environ.get('CENTRIFUGO_HTTP_API_KEY', '')
+CENTRIFUGO_BROADCAST_MODE    = os.environ.get('CENTRIFUGO_BROADCAST_MODE', 'api')
+CENTRIFUGO_OUTBOX_PARTITIONS = int(os.environ.get('CENTRIFUGO_OUTBOX_PARTITIONS', 4))
+ROOMS_OUTBOX_TRANSPORT       = os.environ.get('ROOMS_OUTBOX_TRANSPORT', 'centrifugo')
+
+# Rooms — flush a BD del buffer de presencia/posición (rooms/presence.py)
+ROOMS_PRESENCE_FLUSH_S = 5
+
+# Chat — ventana de contexto del asistente IA (Conversation.context_window)
+CHAT_AI_CONTEXT_TURNS  = 50      # últimos mensajes como máximo
+CHAT_AI_CONTEXT_TOKENS = 6000    # tokens estimados (~4 caracteres/token)
+
 if not DEBUG:
     CHANNEL_LAYERS['default']['CONFIG']['hosts'] = [
         {
@@ -482,3 +501,26 @@ BITACORA_CONFIG = {
 # Analyst ETL
 ANALYST_ETL_ALLOWED_APPS = []   # [] = todas las apps no excluidas por el sistema
 ANALYST_ETL_MAX_ROWS = 100_000  # límite para usuarios no-superuser
+ANALYST_ETL_STREAM_TO_STORE = config('ANALYST_ETL_STREAM_TO_STORE', default=True, cast=bool)  # tramos → dataset (Parquet)
+ANALYST_ETL_SPILL_ROWS      = 200_000   # filas acumuladas por volcado (un part Parquet cada uno)
+
+# Analyst — almacenamiento de StoredDataset (analyst/services/dataset_store.py)
+ANALYST_DATASET_ROOT           = config('ANALYST_DATASET_ROOT', default='')     # '' = sin almacenamiento persistente
+ANALYST_DATASET_STORAGE        = config('ANALYST_DATASET_STORAGE', default='')  # 'parquet' | 'blob' | '' = parquet sólo si hay ROOT
+ANALYST_DATASET_ROW_GROUP_SIZE = 50_000
+ANALYST_DATASET_COMPRESSION    = 'zstd'
+
+# Analyst — cola de trabajos en BD (analyst/services/job_queue.py, manage.py run_jobs)
+# Los consume el proceso `worker` del Procfile; con la cola desactivada los
+# trabajos se ejecutan en línea dentro del request.
+ANALYST_JOB_QUEUE_ENABLED   = config('ANALYST_JOB_QUEUE_ENABLED', default=True, cast=bool)
+ANALYST_JOB_WORKERS         = config('ANALYST_JOB_WORKERS', default=2, cast=int)
+ANALYST_JOB_MAX_ATTEMPTS    = 3
+ANALYST_JOB_RETRY_BACKOFF_S = 30      # 30s, 60s, 120s… (tope: 1h)
+ANALYST_JOB_STALE_AFTER_S   = 600     # sin heartbeat → el job se reencola
+ANALYST_ETL_SCHEDULE_HOUR   = 2       # hora local a partir de la que corren las fuentes programadas
+
+# Sim — backend del generador histórico (sim/engine.py)
+SIM_GENERATOR_BACKEND = config('SIM_GENERATOR_BACKEND', default='numpy')  # 'numpy' | 'python'
+SIM_GENERATOR_WORKERS = config('SIM_GENERATOR_WORKERS', default=1, cast=int)  # >1 = pool de procesos por tramos de días
+SIM_CLOCK_INTERVAL_S  = config('SIM_CLOCK_INTERVAL_S', default=3, cast=int)  # cadencia del clock ws/sim/<sid>/
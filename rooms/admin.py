@@ -129,8 +129,8 @@ class MessageAdmin(admin.ModelAdmin):
 
 @admin.register(Outbox)
 class OutboxAdmin(admin.ModelAdmin):
-    list_display = ('id', 'method', 'partition', 'created_at')
-    list_filter = ('method', 'partition', 'created_at')
+    list_display = ('id', 'method', 'partition', 'attempts', 'created_at')
+    list_filter = ('method', 'partition', 'attempts', 'created_at')
     search_fields = ('payload',)
     date_hierarchy = 'created_at'
 
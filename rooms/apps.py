@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class RoomsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rooms'
+
+    def ready(self):
+        # Señales: invalidación del grafo de navegación (rooms/graph.py)
+        from . import signals  # noqa: F401
@@ -0,0 +1,416 @@
+# rooms/graph.py
+"""
+Grafo de navegación de habitaciones, en memoria por proceso.
+
+    g = graph.get_graph()
+    g.exits(room_id)                      # aristas salientes (puertas, portales, jerarquía)
+    g.shortest_path(a, b, user_id=uid)    # Dijkstra por costo de energía
+    g.travel_options(a, b, user_id=uid)   # camino vs teletransporte (TELEPORT_COST)
+    g.room_payload_3d(room_id)            # parte estática de get_room_3d_data, memoizada
+
+Se arma con una consulta por tabla (Room, RoomConnection, EntranceExit +
+allowed_users, Portal + Room.portals, RoomObject) y se reutiliza mientras
+no cambie la versión en la cache (rooms:graph:version). rooms/signals.py
+llama invalidate() cuando cambia la topología o algo que se dibuja en 3D.
+
+Los guardados que no tocan el grafo (Room.last_message en cada mensaje,
+EntranceExit.usage_count en cada transición, Portal.last_used) NO invalidan:
+build() deja en la cache, en UNA clave por versión (rooms:graph:sigs:<v>,
+con SIGS_TTL), la firma de los GRAPH_FIELDS de cada objeto, y sólo una
+firma distinta (o sin blob para la versión actual) cambia la versión. Lo transitorio (cooldown de portales) no
+vive en el grafo: se consulta aparte.
+"""
+import hashlib
+import heapq
+import logging
+import uuid
+from types import SimpleNamespace
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY     = 'rooms:graph:version'
+SIGS_TTL        = 24 * 3600   # el blob de firmas de una versión
+HIERARCHY_COST  = 1      # = PlayerProfile.use_exit('hierarchy')
+TELEPORT_COST   = 20     # = PlayerProfile.can_teleport_to
+EXIT_OBJECTS    = ('DOOR', 'PORTAL')
+
+GRAPH_FIELDS = {
+    'Room': (
+        'name', 'description', 'is_active', 'parent_room_id', 'permissions',
+        'x', 'y', 'z', 'length', 'width', 'height',
+        'color_primary', 'color_secondary', 'material_type', 'lighting_intensity', 'temperature',
+    ),
+    'RoomConnection': ('from_room_id', 'to_room_id', 'entrance_id', 'bidirectional', 'energy_cost'),
+    'EntranceExit': (
+        'name', 'room_id', 'face', 'enabled', 'connection_id', 'position_x', 'position_y',
+        'width', 'height', 'door_type', 'material', 'color', 'interaction_distance',
+        'is_locked', 'required_key', 'energy_cost_modifier', 'experience_reward',
+    ),
+    'Portal': ('name', 'entrance_id', 'exit_id', 'energy_cost', 'cooldown'),
+    'RoomObject': ('name', 'room_id', 'object_type'),
+}
+
+
+def _sigs_key(version) -> str:
+    return f'rooms:graph:sigs:{version}'
+
+
+def signature(values) -> str:
+    return hashlib.md5(repr(tuple(values)).encode()).hexdigest()
+
+
+def instance_signature(instance) -> str:
+    return signature(getattr(instance, f) for f in GRAPH_FIELDS[type(instance).__name__])
+
+
+# ── Grafo ─────────────────────────────────────────────────────────────────────
+
+class RoomGraph:
+
+    def __init__(self, rooms, connections, entrances, allowed, portals, room_portals, objects):
+        """Filas de values() de cada tabla; ver build()."""
+        self.rooms       = {r['id']: SimpleNamespace(**r) for r in rooms}
+        self.connections = {c['id']: SimpleNamespace(**c) for c in connections}
+        self.entrances   = {}
+        self.room_entrances = {}   # room_id → [entrada...] ordenadas por id
+        self.portals     = {p['id']: SimpleNamespace(**p) for p in portals}
+        self.room_portals = {}
+        self.objects     = {}
+        self.children    = {}
+        self._edges      = {}
+        self._payloads   = {}
+
+        allowed_by_entrance = {}
+        for entrance_id, user_id in allowed:
+            allowed_by_entrance.setdefault(entrance_id, set()).add(user_id)
+        for e in sorted(entrances, key=lambda e: e['id']):
+            node = self.entrances[e['id']] = SimpleNamespace(
+                **e, allowed_user_ids=frozenset(allowed_by_entrance.get(e['id'], ())))
+            self.room_entrances.setdefault(node.room_id, []).append(node)
+        for room_id, portal_id in room_portals:
+            if portal_id in self.portals:
+                self.room_portals.setdefault(room_id, []).append(portal_id)
+        for o in objects:
+            self.objects.setdefault(o['room_id'], []).append(SimpleNamespace(**o))
+        for room in self.rooms.values():
+            if room.parent_room_id in self.rooms and room.is_active:
+                self.children.setdefault(room.parent_room_id, []).append(room.id)
+
+        self._build_edges()
+
+    # ── Aristas ──────────────────────────────────────────────────────────────
+
+    def entrance_target(self, entrance):
+        """Habitación destino de una puerta (= RoomTransitionManager._determine_target_room)."""
+        conn = self.connections.get(entrance.connection_id)
+        if conn is None:
+            return None
+        if conn.from_room_id == entrance.room_id:
+            return conn.to_room_id
+        if conn.to_room_id == entrance.room_id and conn.bidirectional:
+            return conn.from_room_id
+        return None
+
+    def entrance_cost(self, entrance) -> int:
+        """= RoomTransitionManager._calculate_energy_cost"""
+        return max(0, self.connections[entrance.connection_id].energy_cost + entrance.energy_cost_modifier)
+
+    def _add_edge(self, src, dst, kind, ref, cost):
+        if src in self.rooms and dst in self.rooms:
+            self._edges.setdefault(src, []).append(
+                SimpleNamespace(kind=kind, id=ref, from_room=src, to_room=dst, energy_cost=cost))
+
+    def _build_edges(self):
+        for e in self.entrances.values():
+            target = self.entrance_target(e) if e.enabled else None
+            if target is not None:
+                self._add_edge(e.room_id, target, 'entrance', e.id, self.entrance_cost(e))
+        for p in self.portals.values():
+            a = self.entrances.get(p.entrance_id)
+            b = self.entrances.get(p.exit_id)
+            if a and b:
+                # room_transition permite usar el portal en ambos sentidos
+                self._add_edge(a.room_id, b.room_id, 'portal', p.id, p.energy_cost)
+                self._add_edge(b.room_id, a.room_id, 'portal', p.id, p.energy_cost)
+        for room in self.rooms.values():
+            if room.parent_room_id:
+                self._add_edge(room.id, room.parent_room_id, 'hierarchy', room.parent_room_id, HIERARCHY_COST)
+            for child in self.children.get(room.id, ()):
+                self._add_edge(room.id, child, 'hierarchy', child, HIERARCHY_COST)
+
+    def exits(self, room_id) -> list:
+        return self._edges.get(room_id, [])
+
+    def can_pass(self, edge, user_id=None) -> bool:
+        """Destino activo y, si es puerta, sin llave ni lista de usuarios que lo excluya."""
+        if not self.rooms[edge.to_room].is_active:
+            return False
+        if edge.kind == 'entrance':
+            return access_check(self.entrances[edge.id], user_id)['allowed']
+        return True
+
+    # ── Caminos ──────────────────────────────────────────────────────────────
+
+    def shortest_path(self, src, dst, user_id=None, max_cost=None):
+        """
+        Camino de menor energía (Dijkstra). → {'rooms': [...], 'steps': [edge...],
+        'energy_cost': n} o None si no hay camino (o cuesta más que max_cost).
+        Los cooldowns de portales no se consideran.
+        """
+        if src not in self.rooms or dst not in self.rooms:
+            return None
+        best = {src: 0}
+        prev = {}
+        heap = [(0, src)]
+        while heap:
+            cost, room = heapq.heappop(heap)
+            if room == dst:
+                break
+            if cost > best.get(room, cost):
+                continue
+            for edge in self.exits(room):
+                new = cost + edge.energy_cost
+                if (max_cost is not None and new > max_cost) or new >= best.get(edge.to_room, new + 1):
+                    continue
+                if not self.can_pass(edge, user_id):
+                    continue
+                best[edge.to_room] = new
+                prev[edge.to_room] = edge
+                heapq.heappush(heap, (new, edge.to_room))
+        if dst not in best:
+            return None
+
+        steps, room = [], dst
+        while room != src:
+            steps.append(prev[room])
+            room = prev[room].from_room
+        steps.reverse()
+        return {'rooms': [src] + [s.to_room for s in steps], 'steps': steps, 'energy_cost': best[dst]}
+
+    def reachable(self, src, budget: int, user_id=None) -> dict:
+        """{room_id: costo mínimo} de todas las habitaciones alcanzables con `budget`."""
+        best = {src: 0}
+        heap = [(0, src)]
+        while heap:
+            cost, room = heapq.heappop(heap)
+            if cost > best[room]:
+                continue
+            for edge in self.exits(room):
+                new = cost + edge.energy_cost
+                if new <= budget and new < best.get(edge.to_room, budget + 1) and self.can_pass(edge, user_id):
+                    best[edge.to_room] = new
+                    heapq.heappush(heap, (new, edge.to_room))
+        return best
+
+    def travel_options(self, src, dst, user_id=None) -> dict:
+        """Camino por puertas/portales vs teletransporte directo; 'best' el más barato."""
+        path = self.shortest_path(src, dst, user_id)
+        target = self.rooms.get(dst)
+        teleport = TELEPORT_COST if target is not None and target.is_active and src != dst else None
+        options = [(path['energy_cost'], 'path')] if path else []
+        if teleport is not None:
+            options.append((teleport, 'teleport'))
+        return {
+            'path':          path,
+            'path_cost':     path['energy_cost'] if path else None,
+            'teleport_cost': teleport,
+            'best':          min(options)[1] if options else None,
+        }
+
+    # ── Payload 3D ───────────────────────────────────────────────────────────
+
+    def room_payload_3d(self, room_id):
+        """
+        room / objects / connections de get_room_3d_data, sin jugador ni
+        estado de cooldown de portales. Uno por habitación y versión del grafo.
+        """
+        try:
+            return self._payloads[room_id]
+        except KeyError:
+            pass
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+
+        objects, connections = [], []
+        for e in (e for e in self.room_entrances.get(room_id, ()) if e.enabled):
+            obj = {
+                'type': 'door',
+                'id': e.id,
+                'name': e.name,
+                'position': {'x': e.position_x or 0, 'y': e.position_y or 0, 'z': 0},
+                'dimensions': {'width': e.width / 100, 'height': e.height / 100, 'depth': 0.2},  # cm → m
+                'properties': {
+                    'face': e.face,
+                    'is_locked': e.is_locked,
+                    'door_type': e.door_type,
+                    'material': e.material,
+                    'color': e.color,
+                    'interaction_distance': e.interaction_distance / 100,
+                },
+            }
+            conn = self.connections.get(e.connection_id)
+            if conn is not None:
+                target = conn.to_room_id if conn.from_room_id == room_id else conn.from_room_id
+                obj['connection'] = {
+                    'target_room_id': target,
+                    'energy_cost': conn.energy_cost,
+                    'bidirectional': conn.bidirectional,
+                }
+                if target in self.rooms:
+                    connections.append({
+                        'direction': e.face,
+                        'target_room_id': target,
+                        'target_room_name': self.rooms[target].name,
+                        'energy_cost': conn.energy_cost,
+                        'entrance_id': e.id,
+                    })
+            objects.append(obj)
+
+        for portal_id in self.room_portals.get(room_id, ()):
+            p = self.portals[portal_id]
+            entrance, exit_ = self.entrances.get(p.entrance_id), self.entrances.get(p.exit_id)
+            if entrance is None or exit_ is None:
+                continue
+            portal_exit = exit_ if entrance.room_id == room_id else entrance
+            objects.append({
+                'type': 'portal',
+                'id': p.id,
+                'name': p.name,
+                'position': {'x': portal_exit.position_x or 0, 'y': portal_exit.position_y or 0,
+                             'z': room.height // 2},
+                'dimensions': {'width': 2, 'height': 3, 'depth': 0.1},
+                'properties': {
+                    'energy_cost': p.energy_cost,
+                    'cooldown': p.cooldown,
+                    'target_room_id': portal_exit.room_id,
+                },
+            })
+
+        payload = self._payloads[room_id] = {
+            'room': {
+                'id': room.id,
+                'name': room.name,
+                'description': room.description,
+                'dimensions': {'length': room.length, 'width': room.width, 'height': room.height},
+                'position': {'x': room.x, 'y': room.y, 'z': room.z},
+                'colors': {'primary': room.color_primary, 'secondary': room.color_secondary},
+                'material': room.material_type,
+                'lighting_intensity': room.lighting_intensity,
+                'temperature': float(room.temperature),
+            },
+            'objects': objects,
+            'connections': connections,
+        }
+        return payload
+
+
+def portal_ready(cooldown: int, last_used) -> bool:
+    """= Portal.is_active, con last_used leído aparte (no vive en el grafo)."""
+    from datetime import timedelta
+    from django.utils import timezone
+
+    return last_used is None or last_used + timedelta(seconds=cooldown) < timezone.now()
+
+
+def access_check(entrance, user_id) -> dict:
+    """
+    Llave / lista de usuarios de una puerta (= RoomTransitionManager._validate_access).
+    `entrance`: nodo del grafo o cualquier objeto con name, is_locked,
+    required_key y allowed_user_ids.
+    """
+    if entrance.is_locked:
+        if entrance.required_key:
+            return {
+                'allowed': False,
+                'reason': 'REQUIRES_KEY',
+                'message': f'Necesitas la llave: {entrance.required_key}'
+            }
+        return {
+            'allowed': False,
+            'reason': 'DOOR_LOCKED',
+            'message': f'La puerta {entrance.name} está cerrada con llave.'
+        }
+    if entrance.allowed_user_ids and user_id not in entrance.allowed_user_ids:
+        return {
+            'allowed': False,
+            'reason': 'ACCESS_DENIED',
+            'message': 'No tienes permisos para usar esta puerta.'
+        }
+    return {'allowed': True}
+
+
+# ── Cache por proceso + versión ───────────────────────────────────────────────
+
+_graph = None    # (versión, RoomGraph)
+
+
+def build(version=None) -> RoomGraph:
+    """Una consulta por tabla; con `version`, guarda además el blob de firmas."""
+    from rooms.models import EntranceExit, Portal, Room, RoomConnection, RoomObject
+
+    def rows(model, qs=None):
+        return list((qs if qs is not None else model.objects.all())
+                    .values('id', *GRAPH_FIELDS[model.__name__]))
+
+    data = {
+        'Room':           rows(Room),
+        'RoomConnection': rows(RoomConnection),
+        'EntranceExit':   rows(EntranceExit),
+        'Portal':         rows(Portal),
+        'RoomObject':     rows(RoomObject, RoomObject.objects.filter(object_type__in=EXIT_OBJECTS)),
+    }
+    graph = RoomGraph(
+        data['Room'], data['RoomConnection'], data['EntranceExit'],
+        EntranceExit.allowed_users.through.objects.values_list('entranceexit_id', 'user_id'),
+        data['Portal'],
+        Room.portals.through.objects.values_list('room_id', 'portal_id'),
+        data['RoomObject'],
+    )
+    # Firmas para que las señales distingan cambios de topología de los que no
+    if version is not None:
+        sigs = {(name, r['id']): signature(r[f] for f in GRAPH_FIELDS[name])
+                for name, model_rows in data.items() for r in model_rows}
+        cache.set(_sigs_key(version), sigs, SIGS_TTL)
+    return graph
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add: dos procesos que arrancan a la vez acaban con la misma versión
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_graph() -> RoomGraph:
+    global _graph
+    version = _current_version()
+    if _graph is not None and _graph[0] == version:
+        return _graph[1]
+    graph  = build(version)
+    _graph = (version, graph)
+    return graph
+
+
+def invalidate() -> None:
+    global _graph
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _graph = None
+
+
+def on_saved(instance, update_fields=None) -> bool:
+    """post_save: invalida sólo si cambió algún GRAPH_FIELD del objeto. → invalidó"""
+    name   = type(instance).__name__
+    fields = GRAPH_FIELDS[name]
+    if update_fields is not None and not any(f in fields or f + '_id' in fields for f in update_fields):
+        return False
+    version = cache.get(VERSION_KEY)
+    sigs    = cache.get(_sigs_key(version)) if version is not None else None
+    if sigs is not None and sigs.get((name, instance.pk)) == instance_signature(instance):
+        return False
+    invalidate()
+    return True
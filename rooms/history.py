@@ -0,0 +1,288 @@
+# rooms/history.py
+"""
+Historial de mensajes de sala (rooms.Message) paginado por cursor, con los
+últimos mensajes de cada sala en un ring buffer.
+
+    data = history(room_id, before=cursor, limit=50, user=request.user)
+    # {'messages': [...viejo → nuevo], 'next_cursor': 'MjAy...' | None}
+
+Paginación keyset sobre el índice (room, created_at): el cursor codifica
+(created_at, id) del mensaje más viejo de la página y la siguiente página es
+"created_at < c OR (created_at = c AND id < id)" — el costo no crece con la
+profundidad, a diferencia de OFFSET.
+
+Ring buffer (rooms:history:<room_id>): los últimos RING_SIZE mensajes ya
+serializados. La primera página sin cursor sale de UNA lectura de cache;
+si la clave no existe se arma desde la BD. Lo mantiene rooms/signals.py:
+
+    Message creado        → append()     (on_commit; sólo si la clave existe)
+    Message editado/borrado, reacción     → invalidate()  (on_commit)
+
+append() e invalidate() suben además una generación por sala
+(rooms:history:gen:<room_id>). recent() la lee antes de ir a la BD y otra vez
+después de llenar el buffer: si cambió, un mensaje pudo caer entre la lectura
+y el llenado (RPUSHX sobre una clave que aún no existía) y el buffer se tira
+para que lo arme el próximo lector. Un append que llega tras el llenado con
+un mensaje que la BD ya devolvió se descarta al leer (ids únicos).
+
+Lo propio de cada usuario (is_read) no va en el buffer: se agrega por página
+con una consulta a MessageRead.
+"""
+import base64
+import json
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+RING_SIZE     = 100
+RING_TTL      = 60 * 10     # acota la deriva si se pierde una invalidación
+PAGE_SIZE     = 50
+MAX_PAGE_SIZE = 100
+PREVIEW_CHARS = 120
+
+
+def _ring_key(room_id) -> str:
+    return f"rooms:history:{room_id}"
+
+
+def _gen_key(room_id) -> str:
+    return f"rooms:history:gen:{room_id}"
+
+
+# ── Cursor ────────────────────────────────────────────────────────────────────
+
+def encode_cursor(created_at: str, message_id: int) -> str:
+    raw = f"{created_at}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """→ (created_at, id). ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except Exception:
+        raise ValueError(f'cursor inválido: {cursor!r}')
+
+
+def cursor_of(item: dict) -> str:
+    return encode_cursor(item['created_at'], item['id'])
+
+
+# ── Serialización ─────────────────────────────────────────────────────────────
+
+def display_name(user) -> str:
+    if user is None:
+        return 'Usuario'
+    return f"{user.first_name} {user.last_name}".strip() or user.username
+
+
+def serialize(message) -> dict:
+    """Forma pública de un mensaje (la del ring buffer y de room_history_api)."""
+    reactions = {}
+    for r in message.reactions.all():
+        reactions.setdefault(r.emoji, []).append(r.user_id)
+    reply = message.reply_to
+    return {
+        'id':           message.id,
+        'user_id':      message.user_id or 0,
+        'display_name': display_name(message.user),
+        'content':      message.content,
+        'message_type': message.message_type,
+        'created_at':   message.created_at.isoformat(),
+        'timestamp':    message.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'edited':       message.edited_at is not None,
+        'is_deleted':   message.is_deleted,
+        'reply_to':     {
+            'id':           reply.id,
+            'display_name': display_name(reply.user),
+            'content':      reply.content[:PREVIEW_CHARS],
+        } if reply else None,
+        'reactions':    [{'emoji': e, 'count': len(ids), 'user_ids': ids} for e, ids in reactions.items()],
+    }
+
+
+def messages_qs(room_id):
+    """Mensajes de la sala con todo lo que usa serialize() en 3 consultas fijas."""
+    from rooms.models import Message
+
+    return (Message.objects.filter(room_id=room_id)
+            .select_related('user', 'reply_to__user')
+            .prefetch_related('reactions')
+            .order_by('-created_at', '-id'))
+
+
+def page(room_id, before=None, limit: int = PAGE_SIZE) -> dict:
+    """Página desde la BD: `limit` mensajes anteriores al cursor `before`."""
+    qs = messages_qs(room_id)
+    if before:
+        created_at, message_id = decode_cursor(before)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+    rows  = list(qs[:limit + 1])
+    items = [serialize(m) for m in reversed(rows[:limit])]
+    return {
+        'messages':    items,
+        'next_cursor': cursor_of(items[0]) if len(rows) > limit else None,
+    }
+
+
+# ── Ring buffer ───────────────────────────────────────────────────────────────
+
+class _RedisRing:
+    """Lista JSON por sala: RPUSHX + LTRIM (sólo se agrega a buffers ya armados)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, room_id):
+        values = self.client.lrange(_ring_key(room_id), 0, -1)
+        return [json.loads(v) for v in values] if values else None
+
+    def fill(self, room_id, items: list) -> None:
+        if not items:
+            return      # sala vacía: Redis no guarda listas vacías
+        key  = _ring_key(room_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.rpush(key, *[json.dumps(i) for i in items[-RING_SIZE:]])
+        pipe.expire(key, RING_TTL)
+        pipe.execute()
+
+    def push(self, room_id, item: dict) -> None:
+        key  = _ring_key(room_id)
+        pipe = self.client.pipeline()
+        pipe.rpushx(key, json.dumps(item))
+        pipe.ltrim(key, -RING_SIZE, -1)
+        pipe.execute()
+
+    def delete(self, room_id) -> None:
+        self.client.delete(_ring_key(room_id))
+
+    def generation(self, room_id):
+        return self.client.get(_gen_key(room_id))
+
+    def bump(self, room_id) -> None:
+        pipe = self.client.pipeline()
+        pipe.incr(_gen_key(room_id))
+        pipe.expire(_gen_key(room_id), RING_TTL)
+        pipe.execute()
+
+
+class _CacheRing:
+    """Fallback sobre la cache de Django: la lista completa por clave."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def get(self, room_id):
+        from django.core.cache import cache
+        return cache.get(_ring_key(room_id))
+
+    def fill(self, room_id, items: list) -> None:
+        from django.core.cache import cache
+        cache.set(_ring_key(room_id), list(items[-RING_SIZE:]), RING_TTL)
+
+    def push(self, room_id, item: dict) -> None:
+        from django.core.cache import cache
+        with self._lock:
+            items = cache.get(_ring_key(room_id))
+            if items is not None:
+                cache.set(_ring_key(room_id), (items + [item])[-RING_SIZE:], RING_TTL)
+
+    def delete(self, room_id) -> None:
+        from django.core.cache import cache
+        cache.delete(_ring_key(room_id))
+
+    def generation(self, room_id):
+        from django.core.cache import cache
+        return cache.get(_gen_key(room_id))
+
+    def bump(self, room_id) -> None:
+        from django.core.cache import cache
+        cache.add(_gen_key(room_id), 0, RING_TTL)
+        try:
+            cache.incr(_gen_key(room_id))
+        except ValueError:      # expiró entre add e incr
+            cache.set(_gen_key(room_id), 1, RING_TTL)
+
+
+_ring = None
+
+
+def ring():
+    """Redis si la cache default es django_redis; si no, la cache de Django."""
+    global _ring
+    if _ring is None:
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        if backend.startswith('django_redis'):
+            from django_redis import get_redis_connection
+            _ring = _RedisRing(get_redis_connection('default'))
+        else:
+            _ring = _CacheRing()
+    return _ring
+
+
+def _unique(items: list) -> list:
+    seen = set()
+    return [i for i in items if not (i['id'] in seen or seen.add(i['id']))]
+
+
+def recent(room_id) -> list:
+    """Últimos RING_SIZE mensajes (viejo → nuevo): buffer, o BD + llenado del buffer."""
+    buffer = ring()
+    items  = buffer.get(room_id)
+    if items is None:
+        generation = buffer.generation(room_id)
+        items = page(room_id, limit=RING_SIZE)['messages']
+        buffer.fill(room_id, items)
+        if buffer.generation(room_id) != generation:
+            buffer.delete(room_id)      # append/invalidate durante el llenado
+    return _unique(items)
+
+
+def append(message) -> None:
+    """Agrega un mensaje recién creado al buffer de su sala (si el buffer existe)."""
+    buffer = ring()
+    buffer.bump(message.room_id)
+    buffer.push(message.room_id, serialize(message))
+
+
+def invalidate(room_id) -> None:
+    buffer = ring()
+    buffer.bump(room_id)
+    buffer.delete(room_id)
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def with_read_state(items: list, user) -> list:
+    """Agrega is_read del usuario a cada mensaje con una sola consulta."""
+    from rooms.models import MessageRead
+
+    ids  = [i['id'] for i in items]
+    read = set(MessageRead.objects.filter(user=user, message_id__in=ids)
+                                  .values_list('message_id', flat=True)) if ids else set()
+    return [dict(i, is_read=i['id'] in read or i['user_id'] == user.id) for i in items]
+
+
+def history(room_id, before=None, limit: int = PAGE_SIZE, user=None) -> dict:
+    """
+    Página de historial. Sin cursor y con limit ≤ RING_SIZE sale del buffer;
+    con cursor (páginas anteriores) va a la BD por keyset.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if before is None and limit <= RING_SIZE:
+        items = recent(room_id)
+        data  = {
+            'messages':    items[-limit:],
+            # El buffer lleno (o con más de `limit`) puede tener mensajes anteriores
+            'next_cursor': cursor_of(items[-limit]) if len(items) > limit or len(items) >= RING_SIZE else None,
+        }
+    else:
+        data = page(room_id, before=before, limit=limit)
+    if user is not None and user.is_authenticated:
+        data['messages'] = with_read_state(data['messages'], user)
+    return data
@@ -0,0 +1,63 @@
+# rooms/management/commands/relay_outbox.py
+"""
+Publica las filas de rooms.Outbox (CENTRIFUGO_BROADCAST_MODE='outbox') y las
+borra; las rechazadas MAX_ATTEMPTS veces quedan como dead letter. Ver
+rooms/outbox_relay.py.
+
+Uso:
+    python manage.py relay_outbox                              # todas las particiones, en bucle
+    python manage.py relay_outbox --partition 0 --partition 1  # un relay por grupo de particiones
+    python manage.py relay_outbox --transport channels         # por el channel layer
+    python manage.py relay_outbox --once                       # vacía el outbox y termina
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms.outbox_relay import BATCH_SIZE, MAX_ATTEMPTS, TRANSPORTS, OutboxRelay
+
+
+class Command(BaseCommand):
+    help = 'Relay del outbox de Centrifugo: SKIP LOCKED por lotes, publica y borra.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partition', type=int, action='append', default=[],
+                            help='Partición a atender (repetible). Default: todas.')
+        parser.add_argument('--transport', choices=list(TRANSPORTS),
+                            default=getattr(settings, 'ROOMS_OUTBOX_TRANSPORT', 'centrifugo'))
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS,
+                            help='Rechazos tras los que una fila deja de reclamarse.')
+        parser.add_argument('--idle-sleep', type=float, default=0.5,
+                            help='Segundos de espera con el outbox vacío.')
+        parser.add_argument('--stats-every', type=float, default=10,
+                            help='Segundos entre reportes de lag/backlog.')
+        parser.add_argument('--once', action='store_true',
+                            help='Procesar hasta vaciar (o sólo fallos) y terminar.')
+
+    def handle(self, *args, **options):
+        try:
+            relay = OutboxRelay(options['transport'], options['partition'] or None, options['batch_size'],
+                                options['max_attempts'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['once']:
+            while relay.has_more(relay.run_once()):
+                pass
+            self._report(relay.measure_backlog())
+            return
+
+        self.stdout.write(f"relay_outbox: {options['transport']}, particiones "
+                          f"{options['partition'] or 'todas'}, lotes de {options['batch_size']}")
+        try:
+            relay.run_forever(options['idle_sleep'], options['stats_every'], report=self._report)
+        except KeyboardInterrupt:
+            self._report(relay.stats.snapshot())
+
+    def _report(self, s: dict):
+        self.stdout.write(
+            f"  publicadas={s['published']} fallidas={s['failed']} lotes={s['batches']} "
+            f"lag={s['last_lag_s']}s (máx {s['max_lag_s']}s) "
+            f"pendientes={s['backlog']} más vieja={s['oldest_s']}s sin intentos={s['dead']}"
+        )
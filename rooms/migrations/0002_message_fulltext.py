@@ -0,0 +1,36 @@
+# Índice full-text de rooms.Message.content según el motor (ver rooms/search.py).
+# Es un índice del motor: no hay campo en el modelo ni sincronización en save().
+
+from django.db import migrations
+
+FORWARD_SQL = {
+    'mysql': "CREATE FULLTEXT INDEX rooms_message_content_ft ON rooms_message (content)",
+    'postgresql': (
+        "CREATE INDEX rooms_message_content_fts ON rooms_message USING GIN "
+        "(to_tsvector('spanish'::regconfig, COALESCE(content, '')))"
+    ),
+}
+
+REVERSE_SQL = {
+    'mysql':      "DROP INDEX rooms_message_content_ft ON rooms_message",
+    'postgresql': "DROP INDEX IF EXISTS rooms_message_content_fts",
+}
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        sql = statements.get(schema_editor.connection.vendor)
+        if sql:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
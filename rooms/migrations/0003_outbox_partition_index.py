@@ -0,0 +1,18 @@
+# Índice (partition, id) para el relay del outbox (rooms/outbox_relay.py):
+# SELECT … WHERE partition IN (…) ORDER BY id FOR UPDATE SKIP LOCKED.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_message_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outbox',
+            index=models.Index(fields=['partition', 'id'], name='rooms_outbox_partition_id'),
+        ),
+    ]
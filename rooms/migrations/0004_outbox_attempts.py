@@ -0,0 +1,19 @@
+# Contador de rechazos del relay del outbox (rooms/outbox_relay.py): las filas
+# con attempts >= MAX_ATTEMPTS no se vuelven a reclamar y no bloquean el lote.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_outbox_partition_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outbox',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -52,35 +52,45 @@ class PlayerProfile(models.Model):
             return self.position_x, self.current_room.width
 
     def get_available_exits(self):
-        """Devuelve todas las salidas disponibles de la habitación actual."""
+        """Devuelve todas las salidas disponibles de la habitación actual (grafo en memoria)."""
+        from .graph import get_graph, portal_ready
+
         exits = []
-        current_room = self.current_room
+        g = get_graph()
+        current_room = g.rooms[self.current_room_id]
 
         # 1. Entradas físicas habilitadas
-        for entrance in current_room.entrance_exits.filter(enabled=True):
-            if entrance.connection:
+        for entrance in g.room_entrances.get(current_room.id, ()):
+            if not entrance.enabled:
+                continue
+            connection = g.connections.get(entrance.connection_id)
+            if connection:
                 exits.append({
                     'type': 'entrance',
                     'id': entrance.id,
                     'direction': entrance.face,
                     'name': entrance.name,
-                    'to_room': entrance.connection.to_room.id,
-                    'energy_cost': entrance.connection.energy_cost
+                    'to_room': connection.to_room_id,
+                    'energy_cost': connection.energy_cost
                 })
 
-        # 2. Portales activos
-        for portal in current_room.portals.all():
-            if portal.is_active():
-                exits.append({
-                    'type': 'portal',
-                    'id': portal.id,
-                    'name': portal.name,
-                    'to_room': portal.exit.room.id,
-                    'energy_cost': portal.energy_cost
-                })
+        # 2. Portales activos (el cooldown no vive en el grafo: una consulta)
+        portal_ids = g.room_portals.get(current_room.id, [])
+        if portal_ids:
+            last_used = dict(Portal.objects.filter(id__in=portal_ids).values_list('id', 'last_used'))
+            for portal_id in portal_ids:
+                portal = g.portals[portal_id]
+                if portal_id in last_used and portal_ready(portal.cooldown, last_used[portal_id]):
+                    exits.append({
+                        'type': 'portal',
+                        'id': portal.id,
+                        'name': portal.name,
+                        'to_room': g.entrances[portal.exit_id].room_id,
+                        'energy_cost': portal.energy_cost
+                    })
 
         # 3. Objetos transportables
-        for obj in current_room.room_objects.filter(object_type__in=['DOOR', 'PORTAL']):
+        for obj in g.objects.get(current_room.id, []):
             exits.append({
                 'type': 'object',
                 'id': obj.id,
@@ -90,19 +100,20 @@ class PlayerProfile(models.Model):
 
         # 4. Navegación jerárquica (padre/hijo)
         # Ir al padre (si existe)
-        if current_room.parent_room:
+        parent = g.rooms.get(current_room.parent_room_id)
+        if parent:
             exits.append({
                 'type': 'hierarchy',
-                'id': current_room.parent_room.id,
-                'name': f"⬆️ Ir a {current_room.parent_room.name} (padre)",
-                'to_room': current_room.parent_room.id,
+                'id': parent.id,
+                'name': f"⬆️ Ir a {parent.name} (padre)",
+                'to_room': parent.id,
                 'energy_cost': 1,  # Costo mínimo para navegación jerárquica
                 'direction': 'UP'
             })
 
         # Ir a habitaciones hijas (si existen)
-        child_rooms = current_room.child_of_rooms.filter(is_active=True)
-        for child in child_rooms:
+        for child_id in g.children.get(current_room.id, []):
+            child = g.rooms[child_id]
             exits.append({
                 'type': 'hierarchy',
                 'id': child.id,
@@ -116,53 +127,63 @@ class PlayerProfile(models.Model):
 
     def can_use_exit(self, exit_type, exit_id):
         """Verifica si el jugador puede usar una salida específica."""
+        from .graph import get_graph, portal_ready
+
+        g = get_graph()
+        try:
+            exit_id = int(exit_id)
+        except (TypeError, ValueError):
+            return False
         if exit_type == 'entrance':
-            entrance = EntranceExit.objects.get(id=exit_id)
-            return entrance.enabled and entrance.connection
+            entrance = g.entrances.get(exit_id)
+            return bool(entrance and entrance.enabled and entrance.connection_id in g.connections)
         elif exit_type == 'portal':
-            portal = Portal.objects.get(id=exit_id)
-            return portal.is_active() and self.energy >= portal.energy_cost
+            portal = g.portals.get(exit_id)
+            if portal is None:
+                return False
+            last_used = Portal.objects.filter(id=exit_id).values_list('last_used', flat=True).first()
+            return portal_ready(portal.cooldown, last_used) and self.energy >= portal.energy_cost
         elif exit_type == 'hierarchy':
             # Para navegación jerárquica, verificar que la habitación existe y está activa
-            from .models import Room
-            try:
-                target_room = Room.objects.get(id=exit_id)
-                return target_room.is_active and self.energy >= 1
-            except Room.DoesNotExist:
-                return False
+            target_room = g.rooms.get(exit_id)
+            return bool(target_room and target_room.is_active and self.energy >= 1)
         return True
 
     def use_exit(self, exit_type, exit_id):
         """Utiliza una salida y actualiza la posición del jugador"""
+        from .graph import get_graph
+
         if not self.can_use_exit(exit_type, exit_id):
             return False
 
+        g = get_graph()
+        exit_id = int(exit_id)
+
         # Record current room in navigation history before moving
-        self.add_to_navigation_history(self.current_room.id)
+        self.add_to_navigation_history(self.current_room_id)
 
         if exit_type == 'entrance':
-            entrance = EntranceExit.objects.get(id=exit_id)
-            self.current_room = entrance.connection.to_room
+            connection = g.connections[g.entrances[exit_id].connection_id]
+            self.current_room_id = connection.to_room_id
             # Posicionar al jugador frente a la entrada correspondiente
-            opposite_entrance = entrance.connection.entrance
+            opposite_entrance = g.entrances[connection.entrance_id]
             self.position_x = opposite_entrance.position_x
             self.position_y = opposite_entrance.position_y
-            self.energy -= entrance.connection.energy_cost
+            self.energy -= connection.energy_cost
 
         elif exit_type == 'portal':
-            portal = Portal.objects.get(id=exit_id)
-            self.current_room = portal.exit.room
-            self.position_x = portal.exit.position_x
-            self.position_y = portal.exit.position_y
+            portal = g.portals[exit_id]
+            portal_exit = g.entrances[portal.exit_id]
+            self.current_room_id = portal_exit.room_id
+            self.position_x = portal_exit.position_x
+            self.position_y = portal_exit.position_y
             self.energy -= portal.energy_cost
-            portal.last_used = timezone.now()
-            portal.save()
+            Portal.objects.filter(id=exit_id).update(last_used=timezone.now())
 
         elif exit_type == 'hierarchy':
             # Navegación jerárquica directa
-            from .models import Room
-            target_room = Room.objects.get(id=exit_id)
-            self.current_room = target_room
+            target_room = g.rooms[exit_id]
+            self.current_room_id = target_room.id
             # Centrar al jugador en la nueva habitación
             self.position_x = target_room.length // 2
             self.position_y = target_room.width // 2
@@ -563,6 +584,11 @@ class EntranceExit(models.Model):
             self.position_x = self.room.length // 2
             self.position_y = self.room.width // 2
 
+    @property
+    def allowed_user_ids(self):
+        """IDs de allowed_users (vacío = sin restricción) — ver graph.access_check"""
+        return set(self.allowed_users.values_list('id', flat=True))
+
     def can_player_use(self, player_profile):
         """
         Verifica si un jugador puede usar esta puerta.
@@ -834,6 +860,13 @@ class Outbox(models.Model):
     payload = models.JSONField()
     partition = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Rechazos de Centrifugo/channel layer; con MAX_ATTEMPTS el relay deja de
+    # reclamarla (queda como dead letter, visible en el admin)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        # relay_outbox reclama por partición en orden de id (SKIP LOCKED)
+        indexes = [models.Index(fields=['partition', 'id'], name='rooms_outbox_partition_id')]
 
 
 class CDC(models.Model):
@@ -0,0 +1,278 @@
+# rooms/outbox_relay.py
+"""
+Relay del outbox de Centrifugo (rooms.Outbox) — lo corre
+`python manage.py relay_outbox`.
+
+    relay = OutboxRelay(transport='centrifugo', partitions=[0, 1], batch_size=200)
+    relay.run_once()      # → filas publicadas en este lote
+    relay.stats.snapshot()
+
+Cada lote, en una transacción:
+  1. SELECT … FOR UPDATE SKIP LOCKED sobre las filas más viejas de las
+     particiones asignadas: varios relays (uno por partición o todos sobre
+     todas) nunca toman la misma fila
+  2. publica el lote — centrifugo: UN POST a /api/batch por la sesión HTTP
+     compartida (keep-alive); channels: group_send a personal_<user_id>
+  3. borra las filas publicadas; a las rechazadas les suma un intento. Con
+     MAX_ATTEMPTS rechazos una fila deja de reclamarse (dead letter en la
+     tabla, contada en stats) y no tapa a las que vienen detrás. Si falla el
+     lote entero (Centrifugo caído, timeout) no se cuentan intentos
+
+Entrega at-least-once: si el proceso muere entre 2 y 3, la transacción se
+revierte y las filas se vuelven a publicar (Centrifugo deduplica por
+idempotency_key).
+
+http_session() también la usa CentrifugoMixin.broadcast_room en modo 'api'.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE     = 100
+MAX_ATTEMPTS   = 5
+HTTP_TIMEOUT   = 5
+POOL_SIZE      = 10
+STATS_KEY      = 'rooms:outbox:relay'
+STATS_TTL      = 60 * 5
+
+
+def partitions_count() -> int:
+    # CENTRIFUGU_: nombre histórico (con typo) de la misma setting
+    return (getattr(settings, 'CENTRIFUGO_OUTBOX_PARTITIONS', None)
+            or getattr(settings, 'CENTRIFUGU_OUTBOX_PARTITIONS', 1))
+
+
+def partition_for(room_id) -> int:
+    return hash(room_id) % partitions_count()
+
+
+# ── HTTP (Centrifugo) ─────────────────────────────────────────────────────────
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """requests.Session compartida por proceso: pool de conexiones keep-alive."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retries = Retry(total=1, backoff_factor=1, status_forcelist=[500, 502, 503, 504],
+                            allowed_methods=None)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retries)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'Content-type': 'application/json',
+                'X-API-Key': settings.CENTRIFUGO_HTTP_API_KEY,
+                'X-Centrifugo-Error-Mode': 'transport',
+            })
+            _session = session
+    return _session
+
+
+def centrifugo_post(path: str, body: dict):
+    response = http_session().post(settings.CENTRIFUGO_HTTP_API_ENDPOINT + path,
+                                   data=json.dumps(body), timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response
+
+
+# ── Transportes ───────────────────────────────────────────────────────────────
+
+def _publish_centrifugo(rows) -> list:
+    """Un POST /api/batch con todos los comandos. → ids publicados."""
+    commands = [{row.method: row.payload} for row in rows]
+    replies  = centrifugo_post('/api/batch', {'commands': commands}).json().get('replies', [])
+    ok = []
+    for row, reply in zip(rows, replies):
+        error = (reply or {}).get('error') or ((reply or {}).get(row.method) or {}).get('error')
+        if error:
+            logger.warning("outbox %s: Centrifugo respondió %s", row.id, error)
+        else:
+            ok.append(row.id)
+    return ok
+
+
+def group_for(channel: str) -> str:
+    """'personal:5' → 'personal_5' (los grupos de Channels no admiten ':')."""
+    return channel.replace(':', '_')
+
+
+def _publish_channels(rows) -> list:
+    """group_send por canal del payload (NotificationConsumer.outbox_message)."""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+
+    async def send_all():
+        ok = []
+        for row in rows:
+            channels = row.payload.get('channels') or [row.payload.get('channel')]
+            try:
+                for channel in filter(None, channels):
+                    await layer.group_send(group_for(channel), {
+                        'type':    'outbox.message',
+                        'channel': channel,
+                        'data':    row.payload.get('data'),
+                    })
+            except Exception as e:
+                logger.warning("outbox %s: channel layer: %s", row.id, e)
+            else:
+                ok.append(row.id)
+        return ok
+
+    return async_to_sync(send_all)()
+
+
+TRANSPORTS = {
+    'centrifugo': _publish_centrifugo,
+    'channels':   _publish_channels,
+}
+
+
+# ── Relay ─────────────────────────────────────────────────────────────────────
+
+class RelayStats:
+    """Contadores del relay + lag (created_at → publicado) del último lote."""
+
+    def __init__(self):
+        self.published  = 0
+        self.failed     = 0
+        self.batches    = 0
+        self.last_lag_s = 0.0
+        self.max_lag_s  = 0.0
+        self.backlog    = None
+        self.oldest_s   = None
+        self.dead       = None
+
+    def record(self, rows, ok_ids, now):
+        ok = set(ok_ids)
+        self.batches   += 1
+        self.published += len(ok)
+        self.failed    += len(rows) - len(ok)
+        lags = [(now - row.created_at).total_seconds() for row in rows if row.id in ok]
+        if lags:
+            self.last_lag_s = max(lags)
+            self.max_lag_s  = max(self.max_lag_s, self.last_lag_s)
+
+    def snapshot(self) -> dict:
+        return {
+            'published':  self.published,
+            'failed':     self.failed,
+            'batches':    self.batches,
+            'last_lag_s': round(self.last_lag_s, 3),
+            'max_lag_s':  round(self.max_lag_s, 3),
+            'backlog':    self.backlog,
+            'oldest_s':   self.oldest_s,
+            'dead':       self.dead,
+        }
+
+
+class OutboxRelay:
+
+    def __init__(self, transport: str = 'centrifugo', partitions=None, batch_size: int = BATCH_SIZE,
+                 max_attempts: int = MAX_ATTEMPTS):
+        if transport not in TRANSPORTS:
+            raise ValueError(f'transport desconocido: {transport} (opciones: {", ".join(TRANSPORTS)})')
+        self.transport  = transport
+        self.publish    = TRANSPORTS[transport]
+        self.partitions = list(partitions) if partitions else None
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.stats      = RelayStats()
+        self.last_claimed  = 0     # filas del último lote
+        self.last_rejected = 0     # … rechazadas una a una (no cuenta un fallo del lote entero)
+
+    def _queryset(self):
+        from rooms.models import Outbox
+
+        qs = Outbox.objects.all()
+        if self.partitions is not None:
+            qs = qs.filter(partition__in=self.partitions)
+        return qs
+
+    def run_once(self) -> int:
+        """Reclama, publica y borra un lote. → filas publicadas."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            rows = list(self._queryset().filter(attempts__lt=self.max_attempts)
+                        .select_for_update(skip_locked=True).order_by('id')[:self.batch_size])
+            self.last_claimed, self.last_rejected = len(rows), 0
+            if not rows:
+                return 0
+            try:
+                ok_ids = self.publish(rows)
+                ok = set(ok_ids)
+                rejected = [row for row in rows if row.id not in ok]
+            except Exception as e:
+                # Todo el lote falló (Centrifugo caído, timeout): se reintenta sin gastar intentos
+                logger.error("outbox relay: lote de %s filas sin publicar: %s", len(rows), e)
+                ok_ids, rejected = [], []
+            if ok_ids:
+                self._queryset().filter(id__in=ok_ids).delete()
+            if rejected:
+                self._queryset().filter(id__in=[row.id for row in rejected]).update(attempts=F('attempts') + 1)
+                dead = [row.id for row in rejected if row.attempts + 1 >= self.max_attempts]
+                if dead:
+                    logger.error("outbox relay: %s fila(s) sin más intentos, quedan en el outbox: %s",
+                                 len(dead), dead)
+            self.last_rejected = len(rejected)
+        self.stats.record(rows, ok_ids, timezone.now())
+        return len(ok_ids)
+
+    def has_more(self, published: int) -> bool:
+        """¿Conviene otro lote ya? Lote lleno que avanzó (publicó o gastó intentos)."""
+        return self.last_claimed == self.batch_size and bool(published or self.last_rejected)
+
+    def measure_backlog(self) -> dict:
+        """Filas pendientes, antigüedad de la más vieja y dead letters; publica el snapshot en cache."""
+        from django.core.cache import cache
+        from django.db.models import Count, Min, Q
+
+        pending = Q(attempts__lt=self.max_attempts)
+        agg = self._queryset().aggregate(n=Count('id', filter=pending),
+                                         oldest=Min('created_at', filter=pending),
+                                         dead=Count('id', filter=~pending))
+        self.stats.backlog  = agg['n']
+        self.stats.dead     = agg['dead']
+        self.stats.oldest_s = (round((timezone.now() - agg['oldest']).total_seconds(), 3)
+                               if agg['oldest'] else 0.0)
+        snapshot = self.stats.snapshot()
+        cache.set(STATS_KEY, dict(snapshot, transport=self.transport, partitions=self.partitions,
+                                  at=timezone.now().isoformat()), STATS_TTL)
+        return snapshot
+
+    def run_forever(self, idle_sleep: float = 0.5, stats_every: float = 10, report=None):
+        """Lotes seguidos mientras haya filas; `idle_sleep` cuando el outbox está vacío."""
+        from django.db import close_old_connections
+
+        next_stats = 0.0
+        while True:
+            try:
+                published = self.run_once()
+            except Exception as e:
+                logger.error("outbox relay: %s", e, exc_info=True)
+                close_old_connections()
+                published = 0
+            if time.monotonic() >= next_stats:
+                snapshot = self.measure_backlog()
+                if report:
+                    report(snapshot)
+                next_stats = time.monotonic() + stats_every
+            if not self.has_more(published):
+                time.sleep(idle_sleep)
@@ -0,0 +1,308 @@
+# rooms/presence.py
+"""
+Presencia y posición en memoria/Redis con escritura diferida a la BD.
+
+    presence.update_position(user_id, room_id, x, y, z)   # 3D: cada movimiento
+    presence.update_presence(user_id, 'online', room_id)  # chat: cada heartbeat
+    presence.position_of(profile)                         # lectura (buffer → BD)
+    presence.presence_of([user_ids])                      # lectura (buffer → BD)
+
+Las actualizaciones sólo escriben el último estado del usuario en el store
+(rooms:pos:<id> / chat:presence:<id>) y lo marcan sucio. Un hilo por
+proceso llama flush() cada ROOMS_PRESENCE_FLUSH_S: toma los usuarios sucios
+y escribe su estado coalescido con bulk_update/bulk_create — N movimientos
+de un jugador entre dos flush son UN UPDATE.
+
+La posición se difunde por Channels al grupo de la sala (chat_<room_id>,
+handler ChatConsumer.player_position) en el momento, sin pasar por la BD.
+
+Conflictos: una posición del buffer sólo se aplica (y se lee) si el perfil
+sigue en la misma sala — portales y transiciones escriben la BD directo y
+ganan sobre un buffer viejo.
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+POSITION       = 'pos'
+PRESENCE       = 'presence'
+STATE_TTL      = 60 * 30     # estado sin flush más viejo que esto ya no importa
+BATCH_SIZE     = 500
+ONLINE_WINDOW  = 300         # = UserPresence.is_online
+DEFAULT_Z      = 1.7
+
+_PREFIX = {POSITION: 'rooms:pos', PRESENCE: 'chat:presence'}
+
+
+def _state_key(kind, user_id) -> str:
+    return f"{_PREFIX[kind]}:{user_id}"
+
+
+def _dirty_key(kind) -> str:
+    return f"{_PREFIX[kind]}:dirty"
+
+
+# ── Stores ────────────────────────────────────────────────────────────────────
+
+class _RedisStore:
+    """Estado en claves JSON + conjunto de sucios (SPOP: un solo flusher por usuario)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def put(self, kind, user_id, state: dict) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(_state_key(kind, user_id), json.dumps(state), ex=STATE_TTL)
+        pipe.sadd(_dirty_key(kind), user_id)
+        pipe.execute()
+
+    def get_many(self, kind, user_ids) -> dict:
+        ids = list(user_ids)
+        if not ids:
+            return {}
+        values = self.client.mget([_state_key(kind, uid) for uid in ids])
+        return {uid: json.loads(v) for uid, v in zip(ids, values) if v is not None}
+
+    def take_dirty(self, kind) -> list:
+        ids = []
+        while True:
+            batch = self.client.spop(_dirty_key(kind), BATCH_SIZE)
+            if not batch:
+                return ids
+            ids += [int(uid) for uid in batch]
+
+    def mark_dirty(self, kind, user_ids) -> None:
+        if user_ids:
+            self.client.sadd(_dirty_key(kind), *user_ids)
+
+
+class _CacheStore:
+    """Fallback: estado en la cache de Django, sucios por proceso."""
+
+    def __init__(self):
+        self._dirty = {POSITION: set(), PRESENCE: set()}
+        self._lock  = threading.Lock()
+
+    def put(self, kind, user_id, state: dict) -> None:
+        from django.core.cache import cache
+        cache.set(_state_key(kind, user_id), state, STATE_TTL)
+        with self._lock:
+            self._dirty[kind].add(int(user_id))
+
+    def get_many(self, kind, user_ids) -> dict:
+        from django.core.cache import cache
+        keys = {_state_key(kind, uid): uid for uid in user_ids}
+        return {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+
+    def take_dirty(self, kind) -> list:
+        with self._lock:
+            ids, self._dirty[kind] = list(self._dirty[kind]), set()
+        return ids
+
+    def mark_dirty(self, kind, user_ids) -> None:
+        with self._lock:
+            self._dirty[kind].update(user_ids)
+
+
+_store = None
+
+
+def store():
+    """Redis si la cache default es django_redis; si no, la cache de Django."""
+    global _store
+    if _store is None:
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        if backend.startswith('django_redis'):
+            from django_redis import get_redis_connection
+            _store = _RedisStore(get_redis_connection('default'))
+        else:
+            _store = _CacheStore()
+    return _store
+
+
+# ── Escrituras ────────────────────────────────────────────────────────────────
+
+def update_position(user_id, room_id, x, y, z=DEFAULT_Z, broadcast=True) -> dict:
+    """Guarda la última posición y la difunde a la sala. No toca la BD."""
+    state = {'room_id': room_id, 'x': x, 'y': y, 'z': z, 'ts': time.time()}
+    store().put(POSITION, user_id, state)
+    flusher().ensure_started()
+    if broadcast and room_id:
+        broadcast_position(room_id, user_id, state)
+    return state
+
+
+def update_presence(user_id, status: str, room_id=None) -> dict:
+    """Guarda el último estado de presencia (heartbeat). No toca la BD."""
+    state = {'status': status, 'room_id': room_id, 'ts': time.time()}
+    store().put(PRESENCE, user_id, state)
+    flusher().ensure_started()
+    return state
+
+
+def broadcast_position(room_id, user_id, state: dict) -> None:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(layer.group_send)(f"chat_{room_id}", {
+            'type':    'player_position',
+            'user_id': user_id,
+            'x':       state['x'],
+            'y':       state['y'],
+            'z':       state['z'],
+        })
+    except Exception as e:
+        # La posición ya quedó en el store: sólo se pierde el push en vivo
+        logger.warning("presence: no se pudo difundir la posición de %s: %s", user_id, e)
+
+
+# ── Lecturas ──────────────────────────────────────────────────────────────────
+
+def position_of(profile) -> dict:
+    """{x, y, z} del buffer si el perfil sigue en esa sala; si no, de la BD."""
+    state = store().get_many(POSITION, [profile.user_id]).get(profile.user_id)
+    if state and state.get('room_id') == profile.current_room_id:
+        return {'x': state['x'], 'y': state['y'], 'z': state.get('z', DEFAULT_Z)}
+    return {'x': profile.position_x or 0, 'y': profile.position_y or 0, 'z': DEFAULT_Z}
+
+
+def presence_of(user_ids) -> dict:
+    """{user_id: {status, last_seen, room_id}} — buffer primero, BD para el resto."""
+    from chat.models import UserPresence
+
+    ids = [int(uid) for uid in user_ids]
+    out = {
+        uid: {'status': s['status'], 'room_id': s.get('room_id'),
+              'last_seen': datetime.fromtimestamp(s['ts'], tz=dt_timezone.utc)}
+        for uid, s in store().get_many(PRESENCE, ids).items()
+    }
+    missing = [uid for uid in ids if uid not in out]
+    if missing:
+        for uid, status, room_id, last_seen in (UserPresence.objects.filter(user_id__in=missing)
+                                                .values_list('user_id', 'status', 'current_room_id', 'last_seen')):
+            out[uid] = {'status': status, 'room_id': room_id, 'last_seen': last_seen}
+    return out
+
+
+def is_online(state: dict, now: datetime = None) -> bool:
+    now = now or datetime.now(dt_timezone.utc)
+    return state['status'] == 'online' and (now - state['last_seen']).total_seconds() < ONLINE_WINDOW
+
+
+# ── Flush ─────────────────────────────────────────────────────────────────────
+
+def _take(kind):
+    s   = store()
+    ids = s.take_dirty(kind)
+    return s, ids, s.get_many(kind, ids)
+
+
+def flush_positions() -> int:
+    from rooms.models import PlayerProfile
+
+    s, ids, states = _take(POSITION)
+    if not states:
+        return 0
+    try:
+        changed = []
+        for profile in PlayerProfile.objects.filter(user_id__in=states).only('id', 'user_id', 'current_room_id'):
+            state = states[profile.user_id]
+            if state.get('room_id') != profile.current_room_id:
+                continue    # cambió de sala por otra vía: gana la BD
+            profile.position_x = int(state['x'])
+            profile.position_y = int(state['y'])
+            changed.append(profile)
+        PlayerProfile.objects.bulk_update(changed, ['position_x', 'position_y'], batch_size=BATCH_SIZE)
+        return len(changed)
+    except Exception:
+        s.mark_dirty(POSITION, ids)
+        raise
+
+
+def flush_presence() -> int:
+    from chat.models import UserPresence
+    from rooms.models import Room
+
+    s, ids, states = _take(PRESENCE)
+    if not states:
+        return 0
+    try:
+        existing = {p.user_id: p for p in UserPresence.objects.filter(user_id__in=states)}
+        room_ids = {st['room_id'] for st in states.values() if st.get('room_id')}
+        rooms    = set(Room.objects.filter(id__in=room_ids).values_list('id', flat=True)) if room_ids else set()
+
+        to_update, to_create = [], []
+        for uid, state in states.items():
+            p = existing.get(uid) or UserPresence(user_id=uid)
+            p.status    = state['status']
+            p.last_seen = datetime.fromtimestamp(state['ts'], tz=dt_timezone.utc)
+            if state.get('room_id') in rooms:
+                p.current_room_id = state['room_id']
+            (to_update if uid in existing else to_create).append(p)
+        UserPresence.objects.bulk_update(to_update, ['status', 'last_seen', 'current_room'], batch_size=BATCH_SIZE)
+        UserPresence.objects.bulk_create(to_create, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(states)
+    except Exception:
+        s.mark_dirty(PRESENCE, ids)
+        raise
+
+
+def flush() -> dict:
+    """Escribe el estado coalescido de todos los usuarios sucios."""
+    return {'positions': flush_positions(), 'presence': flush_presence()}
+
+
+class _Flusher:
+    """Hilo daemon por proceso: flush() cada `interval_s`."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._lock      = threading.Lock()
+        self._thread    = None
+
+    def ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='rooms-presence', daemon=True)
+                self._thread.start()
+
+    def flush(self) -> dict:
+        try:
+            return flush()
+        except Exception as e:
+            logger.error("presence flush: %s", e, exc_info=True)
+            return {}
+        finally:
+            close_old_connections()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_s)
+            self.flush()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def flusher() -> _Flusher:
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = _Flusher(getattr(settings, 'ROOMS_PRESENCE_FLUSH_S', 5))
+            atexit.register(_flusher.flush)
+    return _flusher
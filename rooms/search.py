@@ -0,0 +1,131 @@
+# rooms/search.py
+"""
+Búsqueda full-text de mensajes (rooms.Message) sobre el índice nativo del motor.
+
+    results = search_messages('cuota mensual', room_id=3, user='ana', since=dt, limit=50)
+    # [{'message': Message, 'rank': float, 'snippet': '... <mark>cuota</mark> ...'}, ...]
+
+Índices (migración 0002_message_fulltext):
+    mysql       FULLTEXT(content)                          → MATCH ... AGAINST (BOOLEAN MODE)
+    postgresql  GIN(to_tsvector('spanish', content))       → @@ to_tsquery + ts_rank
+    otros       sin índice (sqlite de tests)               → icontains por término
+
+Los índices son del motor: se mantienen al día en cada INSERT/UPDATE de
+Message sin señales ni tareas. Filtros de sala/usuario/fecha van en la misma
+consulta que el MATCH. Los snippets se arman en Python sobre las filas ya
+limitadas (highlight), igual para todos los motores.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+PG_CONFIG       = 'spanish'
+SNIPPET_CHARS   = 160
+MAX_TERMS       = 8
+MYSQL_MIN_TOKEN = 3     # innodb_ft_min_token_size por defecto
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def terms(query: str) -> list:
+    """Palabras buscables del query (sin operadores del motor), sin duplicados."""
+    seen = []
+    for t in _TERM_RE.findall(query.lower()):
+        if t not in seen:
+            seen.append(t)
+    return seen[:MAX_TERMS]
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+def _mysql(qs, words):
+    # InnoDB no indexa tokens cortos: un "+ab*" anularía todo. Esos términos se
+    # filtran con LIKE sobre las filas que ya devolvió el índice.
+    indexed = [w for w in words if len(w) >= MYSQL_MIN_TOKEN]
+    if not indexed:
+        return _fallback(qs, words)
+    for w in words:
+        if len(w) < MYSQL_MIN_TOKEN:
+            qs = qs.filter(content__icontains=w)
+    # Todos los términos obligatorios, con prefijo (búsqueda mientras se escribe)
+    against = ' '.join(f'+{w}*' for w in indexed)
+    match   = 'MATCH (rooms_message.content) AGAINST (%s IN BOOLEAN MODE)'
+    return (qs.alias(ft=RawSQL(match, [against], output_field=FloatField()))
+              .filter(ft__gt=0)
+              .annotate(rank=RawSQL(match, [against], output_field=FloatField()))
+              .order_by('-rank', '-created_at'))
+
+
+def _postgresql(qs, words):
+    tsquery = ' & '.join(f'{w}:*' for w in words)
+    vector  = f"to_tsvector('{PG_CONFIG}'::regconfig, COALESCE(rooms_message.content, ''))"
+    query   = f"to_tsquery('{PG_CONFIG}'::regconfig, %s)"
+    return (qs.alias(hit=RawSQL(f'{vector} @@ {query}', [tsquery], output_field=BooleanField()))
+              .filter(hit=True)
+              .annotate(rank=RawSQL(f'ts_rank({vector}, {query})', [tsquery],
+                                    output_field=FloatField()))
+              .order_by('-rank', '-created_at'))
+
+
+def _fallback(qs, words):
+    for w in words:
+        qs = qs.filter(content__icontains=w)
+    return qs.annotate(rank=Value(0.0, output_field=FloatField())).order_by('-created_at')
+
+
+BACKENDS = {
+    'mysql':      _mysql,
+    'postgresql': _postgresql,
+}
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def search_messages(query: str, room_id=None, user: str = None, since=None,
+                    limit: int = 50) -> list:
+    """Mensajes que contienen todos los términos, por relevancia y luego fecha."""
+    from rooms.models import Message
+
+    words = terms(query)
+    if not words:
+        return []
+
+    qs = Message.objects.filter(is_deleted=False).select_related('user', 'room')
+    if room_id:
+        qs = qs.filter(room_id=room_id)
+    if user:
+        qs = qs.filter(user__username__icontains=user)
+    if since:
+        qs = qs.filter(created_at__gte=since)
+
+    backend = BACKENDS.get(connections[qs.db].vendor, _fallback)
+    return [
+        {'message': m, 'rank': float(m.rank or 0), 'snippet': highlight(m.content, words)}
+        for m in backend(qs, words)[:limit]
+    ]
+
+
+def highlight(content: str, words: list, width: int = SNIPPET_CHARS) -> str:
+    """
+    Fragmento de `content` centrado en la primera coincidencia, HTML-escapado,
+    con los términos (y sus continuaciones: prefijo) dentro de <mark>.
+    """
+    if not words:
+        return escape(content[:width])
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(w) for w in words) + r')\w*',
+                         re.IGNORECASE | re.UNICODE)
+    first = pattern.search(content)
+    start = max(0, (first.start() if first else 0) - width // 3)
+    end   = min(len(content), start + width)
+    piece = content[start:end]
+
+    out, pos = [], 0
+    for m in pattern.finditer(piece):
+        out.append(escape(piece[pos:m.start()]))
+        out.append(f'<mark>{escape(m.group(0))}</mark>')
+        pos = m.end()
+    out.append(escape(piece[pos:]))
+    return ('…' if start else '') + ''.join(out) + ('…' if end < len(content) else '')
@@ -1,15 +1,79 @@
-# signals.py (nuevo archivo)
-from django.db.models.signals import post_save
+# rooms/signals.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import PlayerProfile
+
+from . import graph, history
+from .models import EntranceExit, Message, PlayerProfile, Portal, Room, RoomConnection, RoomObject
 import requests  # Para llamadas a API del CRM
 
+
 @receiver(post_save, sender=PlayerProfile)
 def sync_with_crm(sender, instance, **kwargs):
+    # Sólo con ROOMS_CRM_SYNC_URL configurada: sin ella no hay CRM al que avisar
+    url = getattr(settings, 'ROOMS_CRM_SYNC_URL', None)
+    if not url:
+        return
     if kwargs.get('created') or kwargs.get('update_fields'):
         data = {
             'user_id': instance.user.id,
             'state': instance.state,
             'productivity': instance.productivity
         }
-        requests.post('https://crm-api.example.com/update_player', json=data)
\ No newline at end of file
+        requests.post(url, json=data)
+
+
+# ── Grafo de navegación (rooms/graph.py) ──────────────────────────────────────
+
+TOPOLOGY_MODELS = (Room, RoomConnection, EntranceExit, Portal, RoomObject)
+
+
+# Tras el commit: si la versión sube antes, otro proceso puede reconstruir
+# leyendo todavía la fila vieja y quedarse con ese grafo hasta el próximo cambio
+
+def topology_saved(sender, instance, update_fields=None, **kwargs):
+    transaction.on_commit(lambda: graph.on_saved(instance, update_fields))
+
+
+def topology_deleted(sender, instance, **kwargs):
+    transaction.on_commit(graph.invalidate)
+
+
+def topology_m2m_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(graph.invalidate)
+
+
+for _model in TOPOLOGY_MODELS:
+    post_save.connect(topology_saved, sender=_model, dispatch_uid=f'rooms_graph_save_{_model.__name__}')
+    post_delete.connect(topology_deleted, sender=_model, dispatch_uid=f'rooms_graph_delete_{_model.__name__}')
+
+m2m_changed.connect(topology_m2m_changed, sender=Room.portals.through, dispatch_uid='rooms_graph_room_portals')
+m2m_changed.connect(topology_m2m_changed, sender=EntranceExit.allowed_users.through,
+                    dispatch_uid='rooms_graph_allowed_users')
+
+
+# ── Historial de sala (rooms/history.py) ──────────────────────────────────────
+
+@receiver(post_save, sender=Message)
+def history_message_saved(sender, instance, created=False, **kwargs):
+    if created:
+        transaction.on_commit(lambda: history.append(instance))
+    else:
+        # Tras el commit, igual que el grafo: si no, un lector puede rearmar
+        # el buffer con la fila vieja antes de que se confirme la nueva
+        transaction.on_commit(lambda: history.invalidate(instance.room_id))
+
+
+@receiver(post_delete, sender=Message)
+def history_message_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: history.invalidate(instance.room_id))
+
+
+@receiver(post_save, sender='chat.MessageReaction')
+@receiver(post_delete, sender='chat.MessageReaction')
+def history_reaction_changed(sender, instance, **kwargs):
+    room_id = Message.objects.filter(id=instance.message_id).values_list('room_id', flat=True).first()
+    if room_id:
+        transaction.on_commit(lambda: history.invalidate(room_id))
@@ -0,0 +1,168 @@
+# rooms/tests/test_graph.py
+"""
+Tests unitarios para el grafo de navegación (rooms/graph.py).
+No requieren base de datos — el grafo se arma con filas literales y cache locmem.
+
+Cobertura:
+  aristas         → puertas (sentido/bidireccional, costo + modificador), portales, jerarquía
+  shortest_path   → menor energía, puertas cerradas/restringidas, max_cost
+  travel_options  → camino vs teletransporte
+  room_payload_3d → forma de get_room_3d_data, memoizado
+  on_saved        → sólo invalida si cambia un GRAPH_FIELD (blob de firmas por versión)
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from rooms import graph
+from rooms.transition_manager import RoomTransitionManager
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'rooms-graph-tests'}}
+
+
+def _room(pk, name, parent=None, active=True, **kw):
+    row = dict(id=pk, name=name, description='', is_active=active, parent_room_id=parent,
+               permissions='public', x=0, y=0, z=0, length=30, width=20, height=10,
+               color_primary='#000000', color_secondary='#ffffff', material_type='CONCRETE',
+               lighting_intensity=50, temperature=Decimal('22.0'))
+    row.update(kw)
+    return row
+
+
+def _door(pk, room, conn, **kw):
+    row = dict(id=pk, name=f'door{pk}', room_id=room, face='NORTH', enabled=True, connection_id=conn,
+               position_x=5, position_y=0, width=100, height=200, door_type='SINGLE', material='WOOD',
+               color='#8B4513', interaction_distance=150, is_locked=False, required_key='',
+               energy_cost_modifier=0, experience_reward=1)
+    row.update(kw)
+    return row
+
+
+def _conn(pk, a, b, entrance, cost, bidirectional=True):
+    return dict(id=pk, from_room_id=a, to_room_id=b, entrance_id=entrance,
+                bidirectional=bidirectional, energy_cost=cost)
+
+
+def _graph(allowed=()):
+    """
+    1 ─(10)─ 2 ─(3, sólo ida)→ 3        1 ═portal(4)═ 4        4 ⊃ 5 (hijo)
+    1 ─(1 + 1 mod)─ 6 (puerta restringida al usuario 7)
+    """
+    rooms = [_room(1, 'Lobby'), _room(2, 'Pasillo'), _room(3, 'Oficina'),
+             _room(4, 'Sala'), _room(5, 'Cabina', parent=4), _room(6, 'Privada')]
+    conns = [_conn(1, 1, 2, 11, 10), _conn(2, 2, 3, 21, 3, bidirectional=False), _conn(3, 1, 6, 16, 1)]
+    doors = [_door(11, 1, 1), _door(12, 2, 1), _door(21, 2, 2), _door(31, 3, 2),
+             _door(16, 1, 3, energy_cost_modifier=1), _door(40, 4, None), _door(41, 1, None)]
+    portals = [dict(id=1, name='P', entrance_id=41, exit_id=40, energy_cost=4, cooldown=300)]
+    return graph.RoomGraph(rooms, conns, doors, list(allowed), portals, [(1, 1), (4, 1)],
+                           [dict(id=9, room_id=1, name='Puerta', object_type='DOOR')])
+
+
+class TestEdges(SimpleTestCase):
+
+    def test_exits(self):
+        g = _graph()
+        self.assertEqual(sorted((e.kind, e.to_room, e.energy_cost) for e in g.exits(1)),
+                         [('entrance', 2, 10), ('entrance', 6, 2), ('portal', 4, 4)])
+        # Conexión de sólo ida: la puerta 31 (en 3) no lleva a 2
+        self.assertEqual(g.exits(3), [])
+        self.assertEqual(sorted((e.kind, e.to_room) for e in g.exits(4)), [('hierarchy', 5), ('portal', 1)])
+
+
+class TestPaths(SimpleTestCase):
+
+    def test_cheapest_path(self):
+        route = _graph().shortest_path(5, 3)
+        self.assertEqual(route['rooms'], [5, 4, 1, 2, 3])
+        self.assertEqual(route['energy_cost'], 1 + 4 + 10 + 3)
+        self.assertEqual([s.kind for s in route['steps']], ['hierarchy', 'portal', 'entrance', 'entrance'])
+
+    def test_one_way_and_budget(self):
+        g = _graph()
+        self.assertIsNone(g.shortest_path(3, 1))
+        self.assertIsNone(g.shortest_path(1, 3, max_cost=12))
+        self.assertEqual(g.reachable(1, 5), {1: 0, 6: 2, 4: 4, 5: 5})
+
+    def test_restricted_door(self):
+        g = _graph(allowed=[(16, 7)])
+        self.assertIsNone(g.shortest_path(1, 6, user_id=8))
+        self.assertEqual(g.shortest_path(1, 6, user_id=7)['energy_cost'], 2)
+
+    def test_travel_options(self):
+        g = _graph()
+        self.assertEqual(g.travel_options(1, 2)['best'], 'path')
+        far = g.travel_options(5, 3)
+        self.assertEqual((far['path_cost'], far['teleport_cost'], far['best']), (18, 20, 'path'))
+        self.assertEqual(g.travel_options(3, 1)['best'], 'teleport')
+
+
+class TestPayload(SimpleTestCase):
+
+    def test_shape_and_memo(self):
+        g = _graph()
+        payload = g.room_payload_3d(1)
+        self.assertIs(g.room_payload_3d(1), payload)
+        self.assertEqual(payload['room']['temperature'], 22.0)
+        doors = [o for o in payload['objects'] if o['type'] == 'door']
+        self.assertEqual([d['id'] for d in doors], [11, 16, 41])
+        self.assertEqual(doors[0]['connection'], {'target_room_id': 2, 'energy_cost': 10, 'bidirectional': True})
+        portal = next(o for o in payload['objects'] if o['type'] == 'portal')
+        self.assertEqual(portal['properties']['target_room_id'], 4)
+        self.assertEqual([c['target_room_name'] for c in payload['connections']], ['Pasillo', 'Privada'])
+        self.assertIsNone(g.room_payload_3d(99))
+
+    def test_entrances_indexed_by_room(self):
+        g = _graph()
+        self.assertEqual([e.id for e in g.room_entrances[1]], [11, 16, 41])
+        self.assertTrue(all(e.room_id == 1 for e in g.room_entrances[1]))
+
+
+class TestTransitions(SimpleTestCase):
+
+    def test_available_from_graph(self):
+        player = SimpleNamespace(current_room_id=1, user_id=8)
+        with patch('rooms.graph.get_graph', return_value=_graph(allowed=[(16, 7)])):
+            transitions = RoomTransitionManager().get_available_transitions(player)
+        summary = sorted((t['target_room'].name, t['energy_cost'], t['accessible']) for t in transitions)
+        self.assertEqual(summary, [('Pasillo', 10, True), ('Privada', 2, False)])
+
+
+@override_settings(CACHES=LOCMEM)
+class TestInvalidation(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        graph._graph = None
+
+    def _room_instance(self, **kw):
+        from rooms.models import Room
+        return Room(id=1, **{k: v for k, v in _room(1, 'Lobby', **kw).items() if k not in ('id', 'parent_room_id')})
+
+    def test_only_graph_fields(self):
+        room = self._room_instance()
+        self.assertTrue(graph.on_saved(room))          # sin blob de firmas
+        version = cache.get(graph.VERSION_KEY)
+        cache.set(graph._sigs_key(version), {('Room', 1): graph.instance_signature(room)})
+        room.version = 5                                # no es parte del grafo
+        self.assertFalse(graph.on_saved(room))
+        self.assertFalse(graph.on_saved(room, update_fields=['last_message']))
+        self.assertEqual(cache.get(graph.VERSION_KEY), version)
+        room.is_active = False
+        self.assertTrue(graph.on_saved(room, update_fields=['is_active']))
+        self.assertNotEqual(cache.get(graph.VERSION_KEY), version)
+
+    def test_get_graph_rebuilds_on_version(self):
+        built = []
+        with patch.object(graph, 'build', side_effect=lambda version: built.append(version) or object()):
+            first = graph.get_graph()
+            self.assertIs(graph.get_graph(), first)
+            graph.invalidate()
+            self.assertIsNot(graph.get_graph(), first)
+        # cada build recibe la versión vigente, bajo la que guarda sus firmas
+        self.assertEqual(len(set(built)), 2)
+        self.assertEqual(built[-1], cache.get(graph.VERSION_KEY))
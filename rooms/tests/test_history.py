@@ -0,0 +1,122 @@
+# rooms/tests/test_history.py
+"""
+Tests unitarios para el historial paginado y el ring buffer (rooms/history.py).
+No requieren base de datos — mensajes falsos y cache locmem.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from rooms import history, signals
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'rooms-history-tests'}}
+
+
+def _user(pk, first='', username='u'):
+    return SimpleNamespace(id=pk, first_name=first, last_name='', username=username)
+
+
+def _message(pk, room_id=1, user=None, reactions=(), reply_to=None):
+    return SimpleNamespace(
+        id=pk, room_id=room_id, user=user, user_id=user.id if user else None,
+        content=f'mensaje {pk}', message_type='text', edited_at=None, is_deleted=False,
+        created_at=datetime(2026, 1, 1, 12, 0, pk % 60, tzinfo=timezone.utc), reply_to=reply_to,
+        reactions=SimpleNamespace(all=lambda: [SimpleNamespace(emoji=e, user_id=u) for e, u in reactions]),
+    )
+
+
+def _item(pk):
+    return history.serialize(_message(pk, user=_user(1)))
+
+
+class TestCursor(SimpleTestCase):
+
+    def test_roundtrip(self):
+        item = _item(7)
+        created_at, message_id = history.decode_cursor(history.cursor_of(item))
+        self.assertEqual((created_at.isoformat(), message_id), (item['created_at'], 7))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            history.decode_cursor('no-es-un-cursor')
+
+
+class TestSerialize(SimpleTestCase):
+
+    def test_shape(self):
+        reply = _message(1, user=_user(2, username='bob'))
+        item  = history.serialize(_message(2, user=_user(1, first='Ana'), reply_to=reply,
+                                           reactions=[('👍', 1), ('👍', 2), ('🎉', 2)]))
+        self.assertEqual(item['display_name'], 'Ana')
+        self.assertEqual(item['reply_to'], {'id': 1, 'display_name': 'bob', 'content': 'mensaje 1'})
+        self.assertEqual(item['reactions'], [{'emoji': '👍', 'count': 2, 'user_ids': [1, 2]},
+                                             {'emoji': '🎉', 'count': 1, 'user_ids': [2]}])
+        self.assertEqual(history.serialize(_message(3))['display_name'], 'Usuario')
+
+
+@override_settings(CACHES=LOCMEM)
+class TestRing(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        history._ring = None
+
+    def test_push_only_to_filled_ring(self):
+        ring = history.ring()
+        ring.push(1, _item(1))
+        self.assertIsNone(ring.get(1))
+        ring.fill(1, [_item(i) for i in range(1, history.RING_SIZE + 1)])
+        ring.push(1, _item(500))
+        items = ring.get(1)
+        self.assertEqual(len(items), history.RING_SIZE)
+        self.assertEqual((items[0]['id'], items[-1]['id']), (2, 500))
+
+    def test_first_page_from_ring(self):
+        items = [_item(i) for i in range(1, 11)]
+        with patch.object(history, 'page', return_value={'messages': items, 'next_cursor': None}) as page:
+            first = history.history(1, limit=4)
+            again = history.history(1, limit=20)
+        page.assert_called_once_with(1, limit=history.RING_SIZE)     # sólo al armar el buffer
+        self.assertEqual([m['id'] for m in first['messages']], [7, 8, 9, 10])
+        self.assertEqual(history.decode_cursor(first['next_cursor'])[1], 7)
+        self.assertEqual(len(again['messages']), 10)
+        self.assertIsNone(again['next_cursor'])
+
+    def test_older_pages_from_db(self):
+        cursor = history.cursor_of(_item(5))
+        with patch.object(history, 'page', return_value={'messages': [], 'next_cursor': None}) as page:
+            history.history(1, before=cursor, limit=500)
+        page.assert_called_once_with(1, before=cursor, limit=history.MAX_PAGE_SIZE)
+
+    def test_signals(self):
+        ring = history.ring()
+        ring.fill(1, [_item(1)])
+        message = _message(2, user=_user(1))
+        with patch('rooms.signals.transaction.on_commit', side_effect=lambda fn: fn()):
+            signals.history_message_saved(None, message, created=True)
+        self.assertEqual([m['id'] for m in ring.get(1)], [1, 2])
+        with patch('rooms.signals.transaction.on_commit') as on_commit:
+            signals.history_message_saved(None, message, created=False)
+        self.assertIsNotNone(ring.get(1))                   # nada antes del commit
+        on_commit.call_args[0][0]()
+        self.assertIsNone(ring.get(1))
+
+    def test_append_during_fill_drops_buffer(self):
+        def page(room_id, limit):
+            # El mensaje 3 se confirma entre la lectura de la BD y el llenado
+            history.append(_message(3, user=_user(1)))
+            return {'messages': [_item(1), _item(2)], 'next_cursor': None}
+
+        with patch.object(history, 'page', side_effect=page):
+            self.assertEqual([m['id'] for m in history.recent(1)], [1, 2])
+        self.assertIsNone(history.ring().get(1))            # el próximo lector lo rearma
+
+        with patch.object(history, 'page', return_value={'messages': [_item(1), _item(2), _item(3)]}):
+            history.recent(1)
+        history.append(_message(3, user=_user(1)))          # on_commit tardío: ya estaba en la BD
+        self.assertEqual([m['id'] for m in history.recent(1)], [1, 2, 3])
@@ -0,0 +1,156 @@
+# rooms/tests/test_outbox_relay.py
+"""
+Tests unitarios para el relay del outbox (rooms/outbox_relay.py).
+No requieren base de datos ni Centrifugo — queryset, transacción y HTTP falsos.
+
+Cobertura:
+  partition_for / group_for → setting con y sin typo, canal → grupo
+  _publish_centrifugo       → un POST /api/batch, respuestas con error quedan
+  _publish_channels         → group_send por canal, error de una fila no corta el lote
+  run_once                  → SKIP LOCKED, borra sólo lo publicado, lag en stats;
+                              rechazos suman intentos, las agotadas no se reclaman
+  relay_outbox --once       → sigue tras un lote lleno con rechazos, para si no avanza
+"""
+
+import contextlib
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from rooms import outbox_relay
+
+
+def _row(pk, channels=('personal:1',), age_s=0, method='broadcast', attempts=0):
+    return SimpleNamespace(id=pk, method=method, created_at=timezone.now() - timedelta(seconds=age_s),
+                           payload={'channels': list(channels), 'data': {'n': pk}}, attempts=attempts)
+
+
+class TestPartitions(SimpleTestCase):
+
+    @override_settings(CENTRIFUGO_OUTBOX_PARTITIONS=4)
+    def test_partition_in_range(self):
+        self.assertEqual({outbox_relay.partition_for(i) for i in range(20)}, {0, 1, 2, 3})
+
+    @override_settings(CENTRIFUGO_OUTBOX_PARTITIONS=None, CENTRIFUGU_OUTBOX_PARTITIONS=3)
+    def test_legacy_setting_name(self):
+        self.assertEqual(outbox_relay.partitions_count(), 3)
+
+    def test_group_for(self):
+        self.assertEqual(outbox_relay.group_for('personal:42'), 'personal_42')
+
+
+class TestCentrifugo(SimpleTestCase):
+
+    def test_single_batch_request(self):
+        rows = [_row(1), _row(2), _row(3)]
+        response = SimpleNamespace(json=lambda: {'replies': [
+            {'broadcast': {}}, {'error': {'code': 102}}, {'broadcast': {'error': 'x'}},
+        ]})
+        with patch.object(outbox_relay, 'centrifugo_post', return_value=response) as post:
+            self.assertEqual(outbox_relay._publish_centrifugo(rows), [1])
+        post.assert_called_once()
+        path, body = post.call_args[0]
+        self.assertEqual(path, '/api/batch')
+        self.assertEqual(body['commands'][0], {'broadcast': rows[0].payload})
+
+    @override_settings(CENTRIFUGO_HTTP_API_KEY='k')
+    def test_session_shared(self):
+        outbox_relay._session = None
+        self.addCleanup(setattr, outbox_relay, '_session', None)
+        self.assertIs(outbox_relay.http_session(), outbox_relay.http_session())
+        self.assertEqual(outbox_relay.http_session().headers['X-API-Key'], 'k')
+
+
+class _FakeLayer:
+    def __init__(self, fail_group=None):
+        self.sent, self.fail_group = [], fail_group
+
+    async def group_send(self, group, message):
+        if group == self.fail_group:
+            raise ConnectionError('down')
+        self.sent.append((group, message))
+
+
+class TestChannels(SimpleTestCase):
+
+    def test_group_send_per_channel(self):
+        layer = _FakeLayer(fail_group='personal_9')
+        rows = [_row(1, ['personal:1', 'personal:2']), _row(2, ['personal:9']), _row(3)]
+        with patch('channels.layers.get_channel_layer', return_value=layer):
+            self.assertEqual(outbox_relay._publish_channels(rows), [1, 3])
+        self.assertEqual([g for g, _ in layer.sent], ['personal_1', 'personal_2', 'personal_1'])
+        self.assertEqual(layer.sent[0][1], {'type': 'outbox.message', 'channel': 'personal:1',
+                                            'data': {'n': 1}})
+
+
+class TestRunOnce(SimpleTestCase):
+
+    def _relay(self, rows, publish):
+        relay = outbox_relay.OutboxRelay('centrifugo', partitions=[0, 1], batch_size=10)
+        relay.publish = publish
+        qs = MagicMock()
+        locked = qs.filter.return_value.select_for_update.return_value.order_by.return_value
+        locked.__getitem__.return_value = rows
+        relay._queryset = lambda: qs
+        return relay, qs
+
+    def _run(self, relay):
+        with patch('django.db.transaction.atomic', contextlib.nullcontext):
+            return relay.run_once()
+
+    def test_deletes_only_published(self):
+        rows = [_row(1, age_s=2), _row(2, age_s=5)]
+        relay, qs = self._relay(rows, lambda rows: [1])
+        self.assertEqual(self._run(relay), 1)
+        qs.filter.assert_any_call(attempts__lt=outbox_relay.MAX_ATTEMPTS)
+        qs.filter.return_value.select_for_update.assert_called_once_with(skip_locked=True)
+        qs.filter.assert_any_call(id__in=[1])
+        qs.filter.return_value.delete.assert_called_once()
+        qs.filter.assert_any_call(id__in=[2])
+        update = qs.filter.return_value.update.call_args.kwargs['attempts']
+        self.assertEqual(str(update), str(F('attempts') + 1))
+        self.assertEqual((relay.last_claimed, relay.last_rejected), (2, 1))
+        s = relay.stats.snapshot()
+        self.assertEqual((s['published'], s['failed'], s['batches']), (1, 1, 1))
+        self.assertAlmostEqual(s['last_lag_s'], 2, delta=1)
+
+    def test_publish_error_keeps_rows(self):
+        def boom(rows):
+            raise ConnectionError('centrifugo down')
+
+        relay, qs = self._relay([_row(1)], boom)
+        self.assertEqual(self._run(relay), 0)
+        self.assertEqual(qs.filter.call_count, 1)             # sólo el reclamo
+        qs.filter.return_value.update.assert_not_called()     # no gasta intentos
+        self.assertEqual(relay.stats.failed, 1)
+        self.assertFalse(relay.has_more(0))
+
+    def test_exhausted_row_logged(self):
+        relay, qs = self._relay([_row(1, attempts=outbox_relay.MAX_ATTEMPTS - 1)], lambda rows: [])
+        with self.assertLogs('rooms.outbox_relay', 'ERROR'):
+            self._run(relay)
+        qs.filter.return_value.update.assert_called_once()
+
+    def test_once_continues_past_rejected_batches(self):
+        relay, _ = self._relay([], None)
+        results = iter([(0, 10, 10), (3, 10, 7), (2, 2, 0)])    # (publicadas, reclamadas, rechazadas)
+
+        def run_once():
+            published, relay.last_claimed, relay.last_rejected = next(results)
+            return published
+
+        relay.run_once = run_once
+        with patch('rooms.management.commands.relay_outbox.OutboxRelay', return_value=relay), \
+                patch.object(relay, 'measure_backlog', return_value=relay.stats.snapshot()):
+            call_command('relay_outbox', '--once', '--batch-size', '10', stdout=StringIO())
+        self.assertIsNone(next(results, None))
+
+    def test_unknown_transport(self):
+        with self.assertRaises(ValueError):
+            outbox_relay.OutboxRelay('kafka')
@@ -0,0 +1,128 @@
+# rooms/tests/test_presence.py
+"""
+Tests unitarios para el buffer de presencia/posición (rooms/presence.py).
+No requieren base de datos — cache locmem, managers y channel layer falsos.
+
+Cobertura:
+  _CacheStore      → último estado por usuario, sucios coalescidos
+  position_of      → buffer sólo si el perfil sigue en la sala
+  presence_of      → buffer primero, BD sólo para los faltantes
+  flush_positions  → un bulk_update por lote, error → vuelven a sucios
+  broadcast        → grupo chat_<room_id>, handler player_position
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from rooms import presence
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'rooms-presence-tests'}}
+
+
+class _FakeLayer:
+    def __init__(self, error=None):
+        self.sent  = []
+        self.error = error
+
+    async def group_send(self, group, message):
+        if self.error:
+            raise self.error
+        self.sent.append((group, message))
+
+
+@override_settings(CACHES=LOCMEM)
+class PresenceTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        presence._store = presence._CacheStore()
+        patcher = patch.object(presence, 'flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, presence, '_store', None)
+
+
+class TestStore(PresenceTestCase):
+
+    def test_coalesces_updates(self):
+        for x in range(10):
+            presence.update_position(7, 3, x, 2, broadcast=False)
+        s = presence.store()
+        self.assertEqual(s.take_dirty(presence.POSITION), [7])
+        self.assertEqual(s.take_dirty(presence.POSITION), [])
+        self.assertEqual(s.get_many(presence.POSITION, [7])[7]['x'], 9)
+
+
+class TestReads(PresenceTestCase):
+
+    def test_position_only_in_same_room(self):
+        presence.update_position(7, 3, 4, 5, 1.2, broadcast=False)
+        profile = SimpleNamespace(user_id=7, current_room_id=3, position_x=1, position_y=1)
+        self.assertEqual(presence.position_of(profile), {'x': 4, 'y': 5, 'z': 1.2})
+        profile.current_room_id = 9      # portal: la BD manda
+        self.assertEqual(presence.position_of(profile), {'x': 1, 'y': 1, 'z': presence.DEFAULT_Z})
+
+    def test_presence_db_only_for_missing(self):
+        presence.update_presence(1, 'online', 3)
+        seen = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        with patch('chat.models.UserPresence.objects') as objects:
+            objects.filter.return_value.values_list.return_value = [(2, 'away', None, seen)]
+            states = presence.presence_of([1, 2, 3])
+        objects.filter.assert_called_once_with(user_id__in=[2, 3])
+        self.assertEqual((states[1]['status'], states[1]['room_id']), ('online', 3))
+        self.assertEqual(states[2]['last_seen'], seen)
+        self.assertNotIn(3, states)
+
+    def test_is_online(self):
+        now = datetime.now(dt_timezone.utc)
+        self.assertTrue(presence.is_online({'status': 'online', 'last_seen': now}))
+        self.assertFalse(presence.is_online({'status': 'online', 'last_seen': now - timedelta(days=1)}))
+        self.assertFalse(presence.is_online({'status': 'away', 'last_seen': now}))
+
+
+class TestFlush(PresenceTestCase):
+
+    def _profiles(self, *rows):
+        return [SimpleNamespace(user_id=uid, current_room_id=room, position_x=0, position_y=0)
+                for uid, room in rows]
+
+    def test_positions_bulk_update(self):
+        presence.update_position(1, 3, 10.6, 4, broadcast=False)
+        presence.update_position(1, 3, 11.2, 5, broadcast=False)
+        presence.update_position(2, 3, 1, 1, broadcast=False)
+        with patch('rooms.models.PlayerProfile.objects') as objects:
+            objects.filter.return_value.only.return_value = self._profiles((1, 3), (2, 8))
+            self.assertEqual(presence.flush_positions(), 1)
+        changed, fields = objects.bulk_update.call_args[0]
+        self.assertEqual([(p.user_id, p.position_x, p.position_y) for p in changed], [(1, 11, 5)])
+        self.assertEqual(fields, ['position_x', 'position_y'])
+        self.assertEqual(presence.store().take_dirty(presence.POSITION), [])
+
+    def test_failure_keeps_dirty(self):
+        presence.update_position(1, 3, 1, 1, broadcast=False)
+        with patch('rooms.models.PlayerProfile.objects') as objects:
+            objects.filter.side_effect = RuntimeError('db down')
+            with self.assertRaises(RuntimeError):
+                presence.flush_positions()
+        self.assertEqual(presence.store().take_dirty(presence.POSITION), [1])
+
+
+class TestBroadcast(PresenceTestCase):
+
+    def test_group_and_type(self):
+        layer = _FakeLayer()
+        with patch('channels.layers.get_channel_layer', return_value=layer):
+            presence.update_position(7, 3, 1, 2, 1.7)
+        self.assertEqual(layer.sent, [('chat_3', {'type': 'player_position', 'user_id': 7,
+                                                  'x': 1, 'y': 2, 'z': 1.7})])
+
+    def test_layer_error_does_not_raise(self):
+        layer = _FakeLayer(ConnectionError('redis down'))
+        with patch('channels.layers.get_channel_layer', return_value=layer):
+            presence.update_position(7, 3, 1, 2)
+        self.assertEqual(presence.store().take_dirty(presence.POSITION), [7])
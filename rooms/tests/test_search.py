@@ -0,0 +1,66 @@
+# rooms/tests/test_search.py
+"""
+Tests unitarios para la búsqueda full-text de mensajes (rooms/search.py).
+No requieren base de datos — se inspecciona el SQL compilado.
+
+Cobertura:
+  terms      → sólo palabras, minúsculas, sin duplicados, tope MAX_TERMS
+  highlight  → <mark> con prefijo, HTML escapado, recorte con elipsis
+  _mysql     → MATCH ... AGAINST en el WHERE con los filtros; tokens cortos por LIKE
+  _postgresql→ to_tsvector @@ to_tsquery con prefijo + ts_rank
+"""
+
+from django.test import SimpleTestCase
+
+from rooms import search
+from rooms.models import Message
+
+
+def _sql(qs) -> str:
+    return str(qs.query)
+
+
+class TestTerms(SimpleTestCase):
+
+    def test_words_only(self):
+        self.assertEqual(search.terms('Cuota +mensual* "cuota" -x'), ['cuota', 'mensual', 'x'])
+
+    def test_cap(self):
+        self.assertEqual(len(search.terms(' '.join(f'w{i}' for i in range(20)))), search.MAX_TERMS)
+
+
+class TestHighlight(SimpleTestCase):
+
+    def test_marks_prefix_and_escapes(self):
+        out = search.highlight('<b>Cuotas</b> de la cuota', ['cuota'])
+        self.assertEqual(out, '&lt;b&gt;<mark>Cuotas</mark>&lt;/b&gt; de la <mark>cuota</mark>')
+
+    def test_window_around_first_hit(self):
+        content = 'x ' * 200 + 'pago final' + ' y' * 200
+        out = search.highlight(content, ['pago'], width=60)
+        self.assertTrue(out.startswith('…') and out.endswith('…'))
+        self.assertIn('<mark>pago</mark>', out)
+
+
+class TestBackends(SimpleTestCase):
+
+    def setUp(self):
+        self.qs = Message.objects.filter(is_deleted=False, room_id=3)
+
+    def test_mysql_match_in_where(self):
+        sql = _sql(search._mysql(self.qs, ['cuota', 'ab']))
+        where = sql.split(' WHERE ', 1)[1]
+        self.assertIn('MATCH (rooms_message.content) AGAINST (+cuota* IN BOOLEAN MODE)', where)
+        self.assertIn('LIKE %ab%', where)
+        # El quoting del nombre depende del backend de la BD de tests
+        self.assertRegex(where, r'\broom_id\W* = 3')
+
+    def test_mysql_short_terms_only(self):
+        sql = _sql(search._mysql(self.qs, ['ab']))
+        self.assertNotIn('MATCH', sql)
+        self.assertIn('LIKE %ab%', sql)
+
+    def test_postgresql_tsquery(self):
+        sql = _sql(search._postgresql(self.qs, ['cuota', 'mes']))
+        self.assertIn("@@ to_tsquery('spanish'::regconfig, cuota:* & mes:*)", sql)
+        self.assertIn('ts_rank(', sql)
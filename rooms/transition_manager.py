@@ -142,33 +142,10 @@ class RoomTransitionManager:
             # Por ahora, asumimos que el usuario tiene acceso básico
             pass
 
-        # Verificar si está bloqueada
-        if entrance_exit.is_locked:
-            if entrance_exit.required_key:
-                # Verificar si el jugador tiene la llave requerida
-                # Esto requeriría un sistema de inventario
-                return {
-                    'allowed': False,
-                    'reason': 'REQUIRES_KEY',
-                    'message': f'Necesitas la llave: {entrance_exit.required_key}'
-                }
-            else:
-                return {
-                    'allowed': False,
-                    'reason': 'DOOR_LOCKED',
-                    'message': f'La puerta {entrance_exit.name} está cerrada con llave.'
-                }
-
-        # Verificar usuarios permitidos
-        if entrance_exit.allowed_users.exists():
-            if not entrance_exit.allowed_users.filter(id=player_profile.user.id).exists():
-                return {
-                    'allowed': False,
-                    'reason': 'ACCESS_DENIED',
-                    'message': 'No tienes permisos para usar esta puerta.'
-                }
-
-        return {'allowed': True}
+        # Llave y usuarios permitidos: misma regla que el grafo de navegación
+        # (Verificar la llave requeriría un sistema de inventario)
+        from .graph import access_check
+        return access_check(entrance_exit, player_profile.user_id)
 
     def _check_usage_limits(self, entrance_exit):
         """
@@ -302,26 +279,28 @@ class RoomTransitionManager:
         """
         Obtiene todas las transiciones disponibles para un jugador desde su habitación actual.
         """
-        if not player_profile.current_room:
+        if not player_profile.current_room_id:
             return []
 
+        # Puertas, destinos y costos del grafo en memoria: sin consultas
+        from .graph import access_check, get_graph
+        g = get_graph()
+
         transitions = []
-        for entrance in player_profile.current_room.entrance_exits.filter(enabled=True):
-            if entrance.connection:
-                target_room = self._determine_target_room(player_profile.current_room, entrance.connection)
-                if target_room:
-                    # Verificar acceso rápido
-                    access_check = self._validate_access(player_profile, entrance)
-                    energy_cost = self._calculate_energy_cost(entrance.connection, entrance)
-
-                    transitions.append({
-                        'entrance': entrance,
-                        'target_room': target_room,
-                        'energy_cost': energy_cost,
-                        'accessible': access_check['allowed'],
-                        'reason': access_check.get('reason'),
-                        'experience_reward': entrance.experience_reward
-                    })
+        for edge in g.exits(player_profile.current_room_id):
+            if edge.kind != 'entrance':
+                continue
+            entrance = g.entrances[edge.id]
+            # Verificar acceso rápido
+            access = access_check(entrance, player_profile.user_id)
+            transitions.append({
+                'entrance': entrance,
+                'target_room': g.rooms[edge.to_room],
+                'energy_cost': edge.energy_cost,
+                'accessible': access['allowed'],
+                'reason': access.get('reason'),
+                'experience_reward': entrance.experience_reward
+            })
 
         return transitions
 
@@ -116,6 +116,7 @@ urlpatterns = [
     path('api/3d/transition/', views.room_transition, name='room-transition-api'),
     path('api/3d/player/position/', views.update_player_position, name='update-player-position-api'),
     path('api/3d/player/status/', views.get_player_status, name='player-status-api'),
+    path('api/3d/route/<int:room_id>/', views.get_room_route, name='room-route-api'),
 
     # Basic 3D Environment
     path('3d-basic/', views.basic_3d_environment, name='basic_3d_environment'),
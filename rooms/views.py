@@ -738,7 +738,6 @@ import requests
 
 logger = logging.getLogger(__name__)
 import math
-from requests.adapters import HTTPAdapter, Retry
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Exists, OuterRef, Count
@@ -747,12 +746,14 @@ from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
 from .models import Message, Room, RoomMember, Outbox, CDC
+from . import outbox_relay
 from .serializers import (
     MessageSerializer, RoomSearchSerializer, RoomSerializer, RoomMemberSerializer,
     RoomCRUDSerializer, EntranceExitCRUDSerializer, PortalCRUDSerializer, RoomConnectionCRUDSerializer
@@ -981,20 +982,10 @@ class CentrifugoMixin:
         # Using Centrifugo HTTP API is the simplest way to send real-time message, and usually
         # it provides the best latency. The trade-off here is that error here may result in
         # lost real-time event. Depending on the application requirements this may be fine or not.  
+        # Sesión HTTP compartida por proceso (keep-alive): sin handshake por mensaje.
         def broadcast():
-            session = requests.Session()
-            retries = Retry(total=1, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-            session.mount('http://', HTTPAdapter(max_retries=retries))
             try:
-                session.post(
-                    settings.CENTRIFUGO_HTTP_API_ENDPOINT + '/api/broadcast',
-                    data=json.dumps(broadcast_payload),
-                    headers={
-                        'Content-type': 'application/json', 
-                        'X-API-Key': settings.CENTRIFUGO_HTTP_API_KEY,
-                        'X-Centrifugo-Error-Mode': 'transport'
-                    }
-                )
+                outbox_relay.centrifugo_post('/api/broadcast', broadcast_payload)
             except requests.exceptions.RequestException as e:
                 logging.error(e)
 
@@ -1007,8 +998,8 @@ class CentrifugoMixin:
         elif settings.CENTRIFUGO_BROADCAST_MODE == 'outbox':
             # In outbox case we can set partition for parallel processing, but
             # it must be in predefined range and match Centrifugo PostgreSQL
-            # consumer configuration.
-            partition = hash(room_id)%settings.CENTRIFUGU_OUTBOX_PARTITIONS
+            # consumer configuration. Lo drena `manage.py relay_outbox`.
+            partition = outbox_relay.partition_for(room_id)
             # Creating outbox object inside transaction will guarantee that Centrifugo will
             # process the command at some point. In normal conditions – almost instantly.
             Outbox.objects.create(method='broadcast', payload=broadcast_payload, partition=partition)
@@ -1039,15 +1030,23 @@ class CentrifugoMixin:
             raise ValueError(f'unknown CENTRIFUGO_BROADCAST_MODE: {settings.CENTRIFUGO_BROADCAST_MODE}')
 
 
+class MessageCursorPagination(CursorPagination):
+    """Keyset sobre el índice (room, created_at): ?cursor=…&limit=… (máx. 100)."""
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    ordering = ('-created_at', '-id')
+
+
 class MessageListCreateAPIView(ListCreateAPIView, CentrifugoMixin):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MessageCursorPagination
 
     def get_queryset(self):
         room_id = self.kwargs['room_id']
         get_object_or_404(RoomMember, user=self.request.user, room_id=room_id)
-        return Message.objects.filter(
-            room_id=room_id).prefetch_related('user', 'room').order_by('-created_at')
+        return Message.objects.filter(room_id=room_id).select_related('user', 'room')
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -1863,13 +1862,20 @@ def get_room_3d_data(request, room_id):
     API endpoint para obtener datos 3D completos de una habitación.
     Incluye geometría, objetos, conexiones y estado del player.
     """
+    from .graph import get_graph, portal_ready
+
     try:
-        room = get_object_or_404(Room, pk=room_id)
+        # Geometría, puertas, portales y conexiones: payload estático del
+        # grafo, uno por habitación y versión (rooms/graph.py)
+        graph = get_graph()
+        room = graph.rooms.get(room_id)
+        if room is None:
+            raise Http404
 
         # Verificar permisos de acceso
         if room.permissions == 'private':
             # Solo miembros pueden acceder a habitaciones privadas
-            if not RoomMember.objects.filter(room=room, user=request.user).exists():
+            if not RoomMember.objects.filter(room_id=room_id, user=request.user).exists():
                 return Response({
                     'success': False,
                     'message': 'No tienes acceso a esta habitación.'
@@ -1884,29 +1890,7 @@ def get_room_3d_data(request, room_id):
                 'message': 'No tienes un perfil de jugador activo.'
             }, status=400)
 
-        # Datos básicos de la habitación
-        room_data = {
-            'id': room.id,
-            'name': room.name,
-            'description': room.description,
-            'dimensions': {
-                'length': room.length,
-                'width': room.width,
-                'height': room.height
-            },
-            'position': {
-                'x': room.x,
-                'y': room.y,
-                'z': room.z
-            },
-            'colors': {
-                'primary': room.color_primary,
-                'secondary': room.color_secondary
-            },
-            'material': room.material_type,
-            'lighting_intensity': room.lighting_intensity,
-            'temperature': float(room.temperature)
-        }
+        static = graph.room_payload_3d(room_id)
 
         # Estado del jugador
         player_data = {
@@ -1920,99 +1904,25 @@ def get_room_3d_data(request, room_id):
             'social': player_profile.social
         }
 
-        # Obtener objetos 3D (puertas y portales)
-        objects_3d = []
-
-        # Puertas (EntranceExit)
-        for entrance in room.entrance_exits.filter(enabled=True):
-            obj_data = {
-                'type': 'door',
-                'id': entrance.id,
-                'name': entrance.name,
-                'position': {
-                    'x': entrance.position_x or 0,
-                    'y': entrance.position_y or 0,
-                    'z': 0
-                },
-                'dimensions': {
-                    'width': entrance.width / 100,  # Convertir cm a metros
-                    'height': entrance.height / 100,
-                    'depth': 0.2
-                },
-                'properties': {
-                    'face': entrance.face,
-                    'is_locked': entrance.is_locked,
-                    'door_type': entrance.door_type,
-                    'material': entrance.material,
-                    'color': entrance.color,
-                    'interaction_distance': entrance.interaction_distance / 100  # Convertir cm a metros
-                }
-            }
-
-            # Agregar información de conexión si existe
-            if entrance.connection:
-                obj_data['connection'] = {
-                    'target_room_id': entrance.connection.to_room.id if entrance.connection.from_room == room else entrance.connection.from_room.id,
-                    'energy_cost': entrance.connection.energy_cost,
-                    'bidirectional': entrance.connection.bidirectional
-                }
-
-            objects_3d.append(obj_data)
-
-        # Portales
-        for portal in room.portals.all():
-            # Determinar si este portal sale de esta habitación
-            if portal.entrance.room == room:
-                portal_exit = portal.exit
-                target_room = portal_exit.room
-            else:
-                portal_exit = portal.entrance
-                target_room = portal.entrance.room
-
-            obj_data = {
-                'type': 'portal',
-                'id': portal.id,
-                'name': portal.name,
-                'position': {
-                    'x': portal_exit.position_x or 0,
-                    'y': portal_exit.position_y or 0,
-                    'z': room.height // 2  # Centro vertical de la habitación
-                },
-                'dimensions': {
-                    'width': 2,
-                    'height': 3,
-                    'depth': 0.1
-                },
-                'properties': {
-                    'energy_cost': portal.energy_cost,
-                    'cooldown': portal.cooldown,
-                    'is_active': portal.is_active(),
-                    'target_room_id': target_room.id
-                }
-            }
-            objects_3d.append(obj_data)
-
-        # Obtener conexiones disponibles
-        connections = []
-        for entrance in room.entrance_exits.filter(enabled=True, connection__isnull=False):
-            connection = entrance.connection
-            target_room = connection.to_room if connection.from_room == room else connection.from_room
-
-            connections.append({
-                'direction': entrance.face,
-                'target_room_id': target_room.id,
-                'target_room_name': target_room.name,
-                'energy_cost': connection.energy_cost,
-                'entrance_id': entrance.id
-            })
+        # Cooldown de portales: lo único variable, una consulta
+        objects_3d = static['objects']
+        portal_ids = [obj['id'] for obj in objects_3d if obj['type'] == 'portal']
+        if portal_ids:
+            last_used = dict(Portal.objects.filter(id__in=portal_ids).values_list('id', 'last_used'))
+            objects_3d = [
+                dict(obj, properties=dict(obj['properties'],
+                                          is_active=portal_ready(obj['properties']['cooldown'], last_used.get(obj['id']))))
+                if obj['type'] == 'portal' else obj
+                for obj in objects_3d
+            ]
 
         # Datos de respuesta
         response_data = {
             'success': True,
-            'room': room_data,
+            'room': static['room'],
             'player': player_data,
             'objects': objects_3d,
-            'connections': connections,
+            'connections': static['connections'],
             'portals': [obj for obj in objects_3d if obj['type'] == 'portal']
         }
 
@@ -2171,10 +2081,9 @@ def update_player_position(request):
                 'message': 'Faltan coordenadas de posición.'
             }, status=400)
 
-        # Obtener perfil del jugador
-        try:
-            player_profile = request.user.player_profile
-        except PlayerProfile.DoesNotExist:
+        # Obtener perfil del jugador (con la sala, en una consulta)
+        player_profile = PlayerProfile.objects.select_related('current_room').filter(user=request.user).first()
+        if player_profile is None:
             return Response({
                 'success': False,
                 'message': 'No tienes un perfil de jugador activo.'
@@ -2188,18 +2097,19 @@ def update_player_position(request):
             position_y = max(0, min(position_y, room.width))
             position_z = max(0, min(position_z, room.height))
 
-        # Actualizar posición
-        player_profile.position_x = position_x
-        player_profile.position_y = position_y
-        # Nota: position_z no se guarda en el modelo actual, pero se puede agregar si es necesario
-        player_profile.save()
+        # Actualizar posición: buffer + difusión a la sala; la BD la escribe
+        # el flush periódico (rooms/presence.py)
+        # Nota: position_z no se guarda en el modelo actual, sólo en el buffer
+        from . import presence
+        presence.update_position(request.user.id, player_profile.current_room_id,
+                                 position_x, position_y, position_z)
 
         return Response({
             'success': True,
             'message': 'Posición actualizada correctamente.',
             'position': {
-                'x': player_profile.position_x,
-                'y': player_profile.position_y,
+                'x': position_x,
+                'y': position_y,
                 'z': position_z
             }
         })
@@ -2217,6 +2127,8 @@ def get_player_status(request):
     """
     API endpoint para obtener el estado completo del player.
     """
+    from . import presence
+
     try:
         # Obtener perfil del jugador
         try:
@@ -2248,11 +2160,7 @@ def get_player_status(request):
                 'energy': player_profile.energy,
                 'productivity': player_profile.productivity,
                 'social': player_profile.social,
-                'position': {
-                    'x': player_profile.position_x or 0,
-                    'y': player_profile.position_y or 0,
-                    'z': 1.7
-                },
+                'position': presence.position_of(player_profile),
                 'state': player_profile.state,
                 'skills': player_profile.skills
             },
@@ -2268,6 +2176,54 @@ def get_player_status(request):
         }, status=500)
 
 
+@api_view(['GET'])
+def get_room_route(request, room_id):
+    """
+    API endpoint: camino de menor energía desde la habitación actual del
+    player hasta `room_id`, comparado con teletransportarse (rooms/graph.py).
+    """
+    from .graph import get_graph
+
+    try:
+        player_profile = PlayerProfile.objects.filter(user=request.user).first()
+        if player_profile is None or not player_profile.current_room_id:
+            return Response({
+                'success': False,
+                'message': 'No tienes un perfil de jugador activo.'
+            }, status=400)
+
+        graph = get_graph()
+        if room_id not in graph.rooms:
+            return Response({
+                'success': False,
+                'message': 'Habitación no encontrada.'
+            }, status=404)
+
+        options = graph.travel_options(player_profile.current_room_id, room_id, user_id=request.user.id)
+        path = options['path']
+        return Response({
+            'success': True,
+            'from_room_id': player_profile.current_room_id,
+            'to_room_id': room_id,
+            'best': options['best'],
+            'path': {
+                'rooms': [{'id': rid, 'name': graph.rooms[rid].name} for rid in path['rooms']],
+                'steps': [{'type': step.kind, 'id': step.id, 'to_room_id': step.to_room,
+                           'energy_cost': step.energy_cost} for step in path['steps']],
+                'energy_cost': path['energy_cost'],
+            } if path else None,
+            'teleport_cost': options['teleport_cost'],
+            'player_energy': player_profile.energy,
+        })
+
+    except Exception as e:
+        logger.error(f"Error en get_room_route: {e}", exc_info=True)
+        return Response({
+            'success': False,
+            'message': 'Error interno del sistema.'
+        }, status=500)
+
+
 @login_required
 def create_navigation_test_zone(request):
     """
@@ -0,0 +1,114 @@
+# sim/acd_router.py
+"""
+SIM-7a — Núcleo de enrutamiento ACD en memoria.
+
+_do_routing (views/acd.py) carga los slots de la sesión una vez por tick,
+arma un SlotRouter con los disponibles y asigna toda la cola en una pasada.
+Los cambios se acumulan en un RoutingBatch y se escriben al final con
+bulk_update: el costo por poll no depende de cuántas consultas haga cada
+asignación.
+
+Prioridad (igual que el routing original):
+  1. Mismo skill que la interacción (si no hay, cualquier disponible)
+  2. Agentes reales OJT primero (para que practiquen)
+  3. Menor carga acumulada (stats['atendidas'])
+  4. Orden de slot
+"""
+import heapq
+
+
+class SlotRouter:
+    """
+    Disponibilidad indexada: un heap por skill + uno global, con entradas
+    (real_primero, carga, orden, versión, slot). Un slot tomado queda marcado;
+    release() lo vuelve a publicar con su carga actual. Las entradas viejas
+    se descartan al salir del heap (versión distinta o slot tomado).
+    """
+
+    def __init__(self, slots):
+        self._by_skill = {}
+        self._all      = []
+        self._order    = {}
+        self._version  = {}
+        self._taken    = set()
+        for i, slot in enumerate(slots):
+            self._order[slot.id] = i
+            self._push(slot)
+
+    def __len__(self):
+        return len(self._order) - len(self._taken)
+
+    def pick(self, skill: str):
+        """Mejor slot libre para `skill`; sin match de skill, el mejor global."""
+        heap = self._by_skill.get(skill)
+        return (self._pop(heap) if heap else None) or self._pop(self._all)
+
+    def pick_any(self):
+        """Mejor slot libre sin importar el skill (transferencias)."""
+        return self._pop(self._all)
+
+    def release(self, slot) -> None:
+        """El slot vuelve a estar disponible en este mismo tick."""
+        if slot.id not in self._order:
+            self._order[slot.id] = len(self._order)
+        self._taken.discard(slot.id)
+        self._push(slot)
+
+    # ── internos ──────────────────────────────────────────────────────────────
+
+    def _push(self, slot) -> None:
+        version = self._version.get(slot.id, 0) + 1
+        self._version[slot.id] = version
+        entry = (
+            0 if slot.agent_type == 'real' else 1,
+            (slot.stats or {}).get('atendidas', 0),
+            self._order[slot.id],
+            version,
+            slot,
+        )
+        heapq.heappush(self._by_skill.setdefault(slot.skill, []), entry)
+        heapq.heappush(self._all, entry)
+
+    def _pop(self, heap):
+        while heap:
+            *_, version, slot = heapq.heappop(heap)
+            if slot.id in self._taken or version != self._version[slot.id]:
+                continue
+            self._taken.add(slot.id)
+            return slot
+        return None
+
+
+class RoutingBatch:
+    """
+    Interacciones y slots modificados durante un tick. flush() los escribe
+    con un bulk_update por modelo y recién entonces notifica las completadas.
+    """
+
+    INTERACTION_FIELDS = ('slot', 'status', 'assigned_at', 'answered_at', 'ended_at',
+                          'duration_s', 'hold_s', 'acw_s', 'tipificacion')
+    SLOT_FIELDS        = ('status', 'stats')
+
+    def __init__(self):
+        self.interactions = {}
+        self.slots        = {}
+        self.completed    = []     # (interaction, slot) para _emit_completed
+
+    def interaction(self, ix) -> None:
+        self.interactions[ix.id] = ix
+
+    def slot(self, slot) -> None:
+        self.slots[slot.id] = slot
+
+    def flush(self, on_completed=None) -> None:
+        from sim.models import ACDAgentSlot, ACDInteraction
+
+        if self.interactions:
+            ACDInteraction.objects.bulk_update(list(self.interactions.values()),
+                                               self.INTERACTION_FIELDS)
+        if self.slots:
+            ACDAgentSlot.objects.bulk_update(list(self.slots.values()), self.SLOT_FIELDS)
+        if on_completed:
+            for ix, slot in self.completed:
+                on_completed(ix, slot)
+        self.interactions, self.slots, self.completed = {}, {}, []
@@ -0,0 +1,231 @@
+# sim/clock.py
+"""
+Clock del servidor para sesiones GTR/ACD.
+
+Sin clock, cada poll HTTP del cliente avanza la simulación (gtr_tick,
+acd_session_state). Con viewers conectados a ws/sim/<sid>/ el proceso ASGI
+corre una tarea asyncio por sesión que ejecuta el mismo paso a cadencia fija
+(SIM_CLOCK_INTERVAL_S) y publica el estado al grupo de Channels "sim_<sid>":
+un solo tick por intervalo sin importar cuántas pestañas miren la sesión.
+
+Un lock en cache (sim:clock:<kind>:<sid>) garantiza un único clock por
+sesión entre procesos; los polls HTTP consultan is_running() y, si hay clock,
+sólo leen el estado.
+
+Deltas — cada tick publica sólo lo que cambió respecto del tick anterior
+(delta(); los dicts se comparan clave a clave). El cliente parte del snapshot
+que recibe al conectar y fusiona cada delta. Un viewer nuevo pide un resync
+(request_resync): el siguiente tick del dueño, esté en el proceso que esté,
+publica el estado completo.
+
+Registro de pasos: STEPS = {'gtr': _gtr_step, 'acd': _acd_step}. Cada paso es
+síncrono (ORM/cache) y devuelve (payload, terminado).
+"""
+import asyncio
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+LOCK_TTL_FACTOR = 3       # el lock vence si el dueño deja de renovarlo
+_clocks = {}              # (kind, sid) → SessionClock (por proceso)
+
+# Eventos del tick (no estado): se publican sólo si traen algo
+EVENT_KEYS = frozenset({'new_interactions', 'new_interactions_data', 'new_alerts'})
+
+
+def group_name(sid) -> str:
+    return f"sim_{sid}"
+
+
+def _lock_key(kind: str, sid) -> str:
+    return f"sim:clock:{kind}:{sid}"
+
+
+def interval_s() -> int:
+    return max(1, getattr(settings, 'SIM_CLOCK_INTERVAL_S', 3))
+
+
+def _resync_key(kind: str, sid) -> str:
+    return f"sim:clock:resync:{kind}:{sid}"
+
+
+def is_running(kind: str, sid) -> bool:
+    """True si algún proceso tiene el clock de la sesión activo."""
+    return cache.get(_lock_key(kind, sid)) is not None
+
+
+def request_resync(kind: str, sid) -> None:
+    """El próximo tick publica el estado completo (viewer nuevo)."""
+    cache.set(_resync_key(kind, sid), 1, interval_s() * LOCK_TTL_FACTOR)
+
+
+# ── Pasos ─────────────────────────────────────────────────────────────────────
+
+def _gtr_step(sid: str):
+    from sim import gtr_engine as engine
+
+    state = engine.tick(sid)
+    if 'error' in state:
+        return {'success': False, 'error': state['error']}, True
+    return {'success': True, **state}, state['status'] == 'finished'
+
+
+def _acd_step(sid: str):
+    from sim.models import ACDSession
+    from sim.views.acd import acd_tick
+
+    session = ACDSession.objects.filter(id=sid).select_related('account').first()
+    if session is None:
+        return {'success': False, 'error': 'session_not_found'}, True
+    state = acd_tick(session)
+    return {'success': True, **state}, session.status == 'finished'
+
+
+STEPS = {
+    'gtr': _gtr_step,
+    'acd': _acd_step,
+}
+
+
+def to_wire(payload: dict) -> dict:
+    """UUID/datetime → str: el channel layer serializa con msgpack."""
+    return json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+
+
+def delta(prev, cur: dict) -> dict:
+    """
+    Claves de `cur` que cambiaron respecto de `prev` (prev None → todo).
+    Los dicts anidados se comparan recursivamente; listas y escalares se
+    envían completos. EVENT_KEYS van sólo si no están vacíos.
+    """
+    out = {}
+    for key, value in cur.items():
+        if key in EVENT_KEYS:
+            if value:
+                out[key] = value
+            continue
+        old = prev.get(key) if prev is not None else None
+        if isinstance(value, dict) and isinstance(old, dict):
+            sub = delta(old, value)
+            if sub:
+                out[key] = sub
+        elif prev is None or key not in prev or value != old:
+            out[key] = value
+    return out
+
+
+# ── Clock ─────────────────────────────────────────────────────────────────────
+
+class SessionClock:
+    """Tarea asyncio que ejecuta STEPS[kind](sid) cada `interval` segundos."""
+
+    def __init__(self, kind: str, sid, interval: int = None):
+        self.kind     = kind
+        self.sid      = str(sid)
+        self.interval = interval or interval_s()
+        self.owner    = uuid.uuid4().hex
+        self.viewers  = 0
+        self.task     = None
+        self.last     = None      # último estado publicado (base del delta)
+
+    @property
+    def lock_key(self) -> str:
+        return _lock_key(self.kind, self.sid)
+
+    def acquire(self) -> bool:
+        """Toma o renueva el lock. False si otro proceso es dueño."""
+        ttl = self.interval * LOCK_TTL_FACTOR
+        if cache.add(self.lock_key, self.owner, ttl):
+            return True
+        if cache.get(self.lock_key) == self.owner:
+            cache.touch(self.lock_key, ttl)
+            return True
+        return False
+
+    def release(self) -> None:
+        if cache.get(self.lock_key) == self.owner:
+            cache.delete(self.lock_key)
+
+    def step(self):
+        """STEPS[kind] → (cambios a publicar, terminado)."""
+        resync = _resync_key(self.kind, self.sid)
+        if cache.get(resync) is not None:
+            cache.delete(resync)
+            self.last = None
+        payload, done = STEPS[self.kind](self.sid)
+        payload = to_wire(payload)
+        changes, self.last = delta(self.last, payload), payload
+        return changes, done
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+    def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    async def run(self) -> None:
+        from asgiref.sync import sync_to_async
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        try:
+            while True:
+                if not await sync_to_async(self.acquire)():
+                    # Otro proceso corre esta sesión: sus updates llegan por el grupo.
+                    # Si luego pasa a ser dueño, su base del delta ya no vale.
+                    self.last = None
+                    await asyncio.sleep(self.interval)
+                    continue
+                try:
+                    changes, done = await sync_to_async(self.step)()
+                except Exception as e:
+                    logger.error("sim clock %s/%s: %s", self.kind, self.sid, e, exc_info=True)
+                    changes, done = {'success': False, 'error': str(e)}, True
+                if changes:
+                    await layer.group_send(group_name(self.sid), {
+                        'type':    'sim.update',
+                        'payload': changes,
+                    })
+                if done:
+                    break
+                await asyncio.sleep(self.interval)
+        finally:
+            await sync_to_async(self.release)()
+            if _clocks.get((self.kind, self.sid)) is self:
+                del _clocks[(self.kind, self.sid)]
+
+
+def subscribe(kind: str, sid) -> SessionClock:
+    """Un viewer más; arranca el clock de la sesión si no corría aquí."""
+    key = (kind, str(sid))
+    clock = _clocks.get(key)
+    if clock is None:
+        clock = _clocks[key] = SessionClock(kind, sid)
+    clock.viewers += 1
+    clock.start()
+    return clock
+
+
+def unsubscribe(kind: str, sid) -> None:
+    """
+    Un viewer menos; sin viewers el clock se detiene y libera el lock.
+    Sale del registro en el acto: un subscribe posterior crea un clock nuevo
+    en lugar de reutilizar uno cuya tarea todavía se está cancelando (el
+    finally de esa tarea sólo borra su propia entrada).
+    """
+    key = (kind, str(sid))
+    clock = _clocks.get(key)
+    if clock is None:
+        return
+    clock.viewers -= 1
+    if clock.viewers <= 0:
+        del _clocks[key]
+        clock.stop()
@@ -0,0 +1,95 @@
+# sim/compiled_config.py
+"""
+Config compilada por cuenta — compartida por el generador histórico, el
+tick GTR y el routing ACD.
+
+    cc = compiled_config.get(account_id)
+    cc.section('inbound')                       # dict crudo de la config
+    cc.table('gtr_inbound', _compile_inbound)   # tabla derivada, memoizada
+    cc.samplers(['inbound', 'outbound'])        # samplers de generators/vectorized
+
+Cada consumidor registra su propio compilador (función config → tabla, con
+sus defaults) y lo pide con table(): pesos acumulados (Categorical),
+intradía con horas int, medias de TMO/ACW. Se calcula una vez por cuenta y
+proceso, no en cada tick.
+
+Invalidación: la versión vive en la cache de Django (sim:account_cfg:<id>).
+get() compara la versión local con la de la cache — un tick en régimen no
+consulta la BD. account_config_save llama invalidate() y todos los procesos
+recompilan en su siguiente get(). Una versión ausente (cuenta nueva o clave
+desalojada) se estrena con cache.add(), así nunca coincide con una entrada
+local compilada antes; si la cache no la conserva, get() no usa la memoria.
+"""
+import logging
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_compiled = {}     # account_id → (versión, CompiledConfig), por proceso
+
+
+def _version_key(account_id) -> str:
+    return f"sim:account_cfg:{account_id}"
+
+
+class CompiledConfig:
+
+    def __init__(self, config: dict):
+        self.config  = config or {}
+        self._tables = {}
+
+    def section(self, canal: str) -> dict:
+        return self.config.get(canal) or {}
+
+    def table(self, name, build):
+        """build(config) la primera vez; después, el resultado memoizado."""
+        try:
+            return self._tables[name]
+        except KeyError:
+            value = self._tables[name] = build(self.config)
+            return value
+
+    def samplers(self, canales) -> dict:
+        """compile_samplers(canales, config), memoizado por conjunto de canales."""
+        from sim.generators.vectorized import compile_samplers
+
+        key = ('samplers', tuple(sorted(canales)))
+        return self.table(key, lambda config: compile_samplers(list(canales), config))
+
+
+def get(account_id, config: dict = None) -> CompiledConfig:
+    """
+    CompiledConfig de la cuenta. `config` evita la consulta cuando el
+    llamador ya tiene SimAccount.config cargado.
+    """
+    account_id = str(account_id)     # GTR guarda el id como str, ACD como UUID
+    key = _version_key(account_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)   # add: no pisa la de otro proceso
+        version = cache.get(key)
+    hit = _compiled.get(account_id)
+    if hit is not None and version is not None and hit[0] == version:
+        return hit[1]
+
+    if config is None:
+        try:
+            from sim.models import SimAccount
+            config = (SimAccount.objects.filter(id=account_id)
+                      .values_list('config', flat=True).first())
+        except Exception as e:
+            # Sin cuenta legible: defaults de cada consumidor, sin cachear
+            logger.warning("compiled_config: no se pudo leer la cuenta %s: %s", account_id, e)
+            return CompiledConfig({})
+
+    compiled = CompiledConfig(config)
+    _compiled[account_id] = (version, compiled)
+    return compiled
+
+
+def invalidate(account_id) -> None:
+    """La config cambió: nueva versión en cache + descarte local inmediato."""
+    cache.set(_version_key(account_id), uuid.uuid4().hex, None)
+    _compiled.pop(str(account_id), None)
@@ -0,0 +1,92 @@
+# sim/consumers.py
+"""
+WebSocket ws/sim/<session_id>/ — push del estado de sesiones GTR/ACD.
+
+connect   → valida usuario y sesión (ACD y GTR: sólo su creador), se une al
+            grupo "sim_<sid>", manda un snapshot y suscribe el clock del
+            servidor (sim/clock.py) pidiendo un resync
+receive   → {"action": "snapshot"} reenvía el estado actual sin avanzar
+sim.update→ {"type": "delta", ...} lo que cambió desde el tick anterior; el
+            cliente lo fusiona sobre el snapshot
+
+Códigos de cierre: 4001 sin permiso, 4002 sesión inexistente.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from sim import clock
+
+logger = logging.getLogger(__name__)
+
+
+class SimSessionConsumer(AsyncJsonWebsocketConsumer):
+
+    async def connect(self):
+        self.sid  = self.scope['url_route']['kwargs']['session_id']
+        self.kind = None
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        self.kind = await database_sync_to_async(self._resolve_kind)(user)
+        if self.kind is None:
+            await self.close(code=4002)
+            return
+
+        await self.channel_layer.group_add(clock.group_name(self.sid), self.channel_name)
+        await self.accept()
+        await self.send_json(await database_sync_to_async(self._snapshot)())
+        await sync_to_async(clock.request_resync)(self.kind, self.sid)
+        clock.subscribe(self.kind, self.sid)
+
+    async def disconnect(self, code):
+        if self.kind is None:
+            return
+        clock.unsubscribe(self.kind, self.sid)
+        await self.channel_layer.group_discard(clock.group_name(self.sid), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('action') == 'snapshot':
+            await self.send_json(await database_sync_to_async(self._snapshot)())
+
+    async def sim_update(self, event):
+        await self.send_json({'type': 'delta', **event['payload']})
+
+    # ── sync ──────────────────────────────────────────────────────────────────
+
+    def _resolve_kind(self, user):
+        """'acd' / 'gtr' si la sesión existe y la creó el usuario; si no, None."""
+        from sim import gtr_engine as engine
+        from sim.models import ACDSession
+
+        try:
+            if ACDSession.objects.filter(id=self.sid, created_by=user).exists():
+                return 'acd'
+        except Exception:
+            pass   # sid no es un UUID válido para el pk
+        gtr = engine.load_session(self.sid)
+        if gtr is not None and gtr.user_id == user.id:
+            return 'gtr'
+        return None
+
+    def _snapshot(self) -> dict:
+        from sim import gtr_engine as engine
+
+        if self.kind == 'acd':
+            from sim.models import ACDSession
+            from sim.views.acd import acd_snapshot
+
+            session = ACDSession.objects.filter(id=self.sid).first()
+            if session is None:
+                return {'type': 'snapshot', 'success': False, 'error': 'session_not_found'}
+            state = acd_snapshot(session)
+        else:
+            gtr = engine.load_session(self.sid)
+            if gtr is None:
+                return {'type': 'snapshot', 'success': False, 'error': 'session_not_found'}
+            state = engine._state_response(gtr, [], [])
+        return {'type': 'snapshot', 'success': True, **clock.to_wire(state)}
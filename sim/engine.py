@@ -2,13 +2,39 @@
 """
 Motor de generación histórica.
 Orquesta los 3 generadores de canal, persiste en BD y registra el SimRun.
+
+Backend de generación (settings.SIM_GENERATOR_BACKEND):
+  'numpy'  → sim/generators/vectorized.py — cada día se sortea en bloque con
+             Generators derivados de (seed, fecha); `seed` (argumento,
+             config['seed'] o una aleatoria) queda en SimRun.seed y hace la
+             generación reproducible.
+  'python' → generate_day original de cada canal (una interacción por vez).
+
+Escritura:
+  serie     → los INSERT (bulk_create) corren en un hilo escritor mientras se
+              genera el día siguiente.
+  paralelo  → (backend numpy, workers > 1) el rango se reparte en tramos de
+              días entre un pool de procesos; cada proceso genera e inserta
+              sus días con su propia conexión. Volúmenes y lead_offset se
+              sortean antes (vectorized.plan_days), así el resultado es el
+              mismo que en serie.
+El SimRun informa el avance (days_done / days_total) a medida que se
+completan días, y cada día insertado se suma al rollup InteractionDaily
+(sim/rollup.py) que leen get_account_kpis y el dashboard.
 """
-import time
 import logging
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime, timedelta, date
 
+from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
+from django.db import close_old_connections, connection
+from django.db.models import F
 
 logger = logging.getLogger(__name__)
 
@@ -21,48 +47,151 @@ def _get_generators():
     from sim.generators import inbound, outbound, digital
     return inbound, outbound, digital
 
+from sim import compiled_config, rollup
 from sim.generators.base import generate_agent_pool
 
 
+class _BulkWriter:
+    """
+    bulk_create en un hilo aparte: el INSERT de un día se solapa con la
+    generación del siguiente. put() bloquea si hay `depth` días pendientes,
+    así la memoria queda acotada. on_written(n, meta) se llama tras cada
+    INSERT con el `meta` que acompañó al put.
+    """
+
+    def __init__(self, model, batch_size: int, depth: int = 4, on_written=None):
+        self.model      = model
+        self.batch_size = batch_size
+        self.on_written = on_written
+        self.written    = 0
+        self.error      = None
+        self._queue     = queue.Queue(maxsize=depth)
+        self._thread    = threading.Thread(target=self._loop, name='sim-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, objs: list, meta=None) -> None:
+        if self.error is not None:
+            raise self.error
+        self._queue.put((objs, meta))
+
+    def close(self) -> None:
+        """Espera a que se vacíe la cola; relanza el error del escritor si lo hubo."""
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _loop(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                objs, meta = item
+                if self.error is not None:
+                    continue            # drenar sin escribir tras un error
+                try:
+                    if objs:
+                        self.model.objects.bulk_create(
+                            objs, batch_size=self.batch_size, ignore_conflicts=True)
+                    self.written += len(objs)
+                    if self.on_written:
+                        self.on_written(len(objs), meta)
+                except Exception as exc:
+                    self.error = exc
+        finally:
+            connection.close()
+
+
+def _worker_init():
+    # Procesos 'spawn': inicializar Django en el hijo
+    import django
+    django.setup()
+
+
+def _generate_days_worker(task: dict) -> tuple:
+    """
+    Proceso del pool: genera e inserta un tramo de días del plan.
+    Devuelve (días, interacciones).
+    """
+    from sim.generators.vectorized import compile_samplers, generate_planned_day
+    Interaction = _get_models()[2]
+
+    close_old_connections()
+    try:
+        samplers  = compile_samplers(task['canales'], task['config'])
+        agent_ids = task['agent_ids']
+        total     = 0
+        for plan in task['plans']:
+            rows    = generate_planned_day(samplers, plan, task['agent_pool'], task['entropy'])
+            buckets = rollup.accumulate({}, rows)
+            objs = [
+                Interaction(account_id=task['account_id'],
+                            agent_id=agent_ids.get(row.pop('agent_codigo')), **row)
+                for row in rows
+            ]
+            Interaction.objects.bulk_create(objs, batch_size=task['batch_size'],
+                                            ignore_conflicts=True)
+            rollup.apply(task['account_id'], buckets)
+            total += len(objs)
+        return len(task['plans']), total
+    finally:
+        close_old_connections()
+
+
 class HistoricalEngine:
     """
     Genera N días de interacciones para una SimAccount.
 
     Uso:
-        engine = HistoricalEngine(account, user)
+        engine = HistoricalEngine(account, user, seed=42)
         run = engine.generate(date_from, date_to, canales=['inbound','outbound'])
+        run = engine.generate(date_from, date_to, workers=4)   # pool de procesos
     """
 
     BATCH_SIZE = 2000   # bulk_create batch
 
-    def __init__(self, account, user):
+    def __init__(self, account, user, backend: str = None, seed: int = None):
         self.account = account
         self.user    = user
+        self.backend = backend or getattr(settings, 'SIM_GENERATOR_BACKEND', 'numpy')
+        self.seed    = seed if seed is not None else (account.config or {}).get('seed')
 
     def generate(self, date_from: date, date_to: date,
-                  canales: list = None) -> 'SimRun':
+                  canales: list = None, run=None, should_stop=None,
+                  workers: int = None) -> 'SimRun':
         """
         Genera todas las interacciones del rango de fechas.
         Crea o reutiliza agentes existentes.
+
+        run         — SimRun ya creado (encolado); None = crear uno.
+        should_stop — callable consultado al inicio de cada día (en paralelo,
+                      al completarse cada tramo); True cancela (lo ya
+                      insertado se conserva).
+        workers     — procesos para el modo paralelo (default
+                      SIM_GENERATOR_WORKERS); 1 = serie.
         Returns: SimRun con resultado.
         """
         _, SimAgent, Interaction, SimRun = _get_models()
-        inbound_gen, outbound_gen, digital_gen = _get_generators()
 
         canal   = self.account.canal
         canales = canales or self._default_canales(canal)
 
-        run = SimRun.objects.create(
-            account      = self.account,
-            date_from    = date_from,
-            date_to      = date_to,
-            canales      = canales,
-            status       = 'running',
-            triggered_by = self.user,
-        )
+        if run is None:
+            run = SimRun.objects.create(
+                account      = self.account,
+                date_from    = date_from,
+                date_to      = date_to,
+                canales      = canales,
+                status       = 'running',
+                triggered_by = self.user,
+            )
+        else:
+            run.canales = canales
+            run.status  = 'running'
+            run.save(update_fields=['canales', 'status'])
 
         t0 = time.time()
-        total_interactions = 0
         cfg = self.account.config
 
         try:
@@ -85,65 +214,32 @@ class HistoricalEngine:
                 for a in agent_objs
             ]
 
-            # Mapa codigo → SimAgent pk para FK lookup
-            agent_pk_map = {a.codigo: a for a in agent_objs}
-
-            # ── Generar día a día ─────────────────────────────────────────
-            current = date_from
+            days        = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
             lead_offset = Interaction.objects.filter(account=self.account).count()
-
-            buffer = []
-
-            while current <= date_to:
-                dt = datetime.combine(current, datetime.min.time())
-                day_interactions = []
-
-                if 'inbound' in canales:
-                    day_interactions += inbound_gen.generate_day(
-                        dt, agent_pool,
-                        cfg.get('inbound', {}),
-                        lead_offset
-                    )
-                if 'outbound' in canales:
-                    day_interactions += outbound_gen.generate_day(
-                        dt, agent_pool,
-                        cfg.get('outbound', {}),
-                        lead_offset + len(day_interactions)
-                    )
-                if 'digital' in canales:
-                    day_interactions += digital_gen.generate_day(
-                        dt, agent_pool,
-                        cfg.get('digital', {}),
-                        lead_offset + len(day_interactions)
-                    )
-
-                # Convertir dicts → Interaction objects
-                for row in day_interactions:
-                    agent_codigo = row.pop('agent_codigo', None)
-                    agent_obj    = agent_pk_map.get(agent_codigo) if agent_codigo else None
-                    buffer.append(Interaction(
-                        account   = self.account,
-                        agent     = agent_obj,
-                        **row
-                    ))
-
-                lead_offset += len(day_interactions)
-                total_interactions += len(day_interactions)
-
-                # Flush buffer
-                if len(buffer) >= self.BATCH_SIZE:
-                    Interaction.objects.bulk_create(buffer, ignore_conflicts=True)
-                    buffer = []
-                    logger.info("sim engine: flushed batch at %s — total=%d", current, total_interactions)
-
-                current += timedelta(days=1)
-
-            # Flush final
-            if buffer:
-                Interaction.objects.bulk_create(buffer, ignore_conflicts=True)
+            workers     = workers or getattr(settings, 'SIM_GENERATOR_WORKERS', 1)
+
+            if self.backend == 'numpy' and self.seed is None:
+                from sim.generators.vectorized import new_entropy
+                self.seed = new_entropy()
+
+            run.seed                   = self.seed if self.backend == 'numpy' else None
+            run.days_total             = len(days)
+            run.days_done              = 0
+            run.interactions_generated = 0
+            run.save(update_fields=['seed', 'days_total', 'days_done', 'interactions_generated'])
+
+            parallel = self.backend == 'numpy' and workers > 1 and len(days) > 1
+            if parallel:
+                total_interactions = self._generate_parallel(
+                    run, days, canales, cfg, agent_pool, agent_objs, lead_offset,
+                    workers, should_stop)
+            else:
+                total_interactions = self._generate_serial(
+                    run, days, canales, cfg, agent_pool, agent_objs, lead_offset, should_stop)
 
             # ── Actualizar SimRun ─────────────────────────────────────────
             run.status                 = 'done'
+            run.days_done              = len(days)
             run.interactions_generated = total_interactions
             run.agents_generated       = len(agent_objs)
             run.duration_s             = round(time.time() - t0, 2)
@@ -151,8 +247,9 @@ class HistoricalEngine:
             run.save()
 
             logger.info(
-                "sim engine: DONE account=%s | %s→%s | %d interactions | %.1fs",
-                self.account.name, date_from, date_to, total_interactions, run.duration_s
+                "sim engine: DONE account=%s | %s→%s | %d interactions | %.1fs%s",
+                self.account.name, date_from, date_to, total_interactions, run.duration_s,
+                f" | {workers} procesos" if parallel else ""
             )
 
         except Exception as exc:
@@ -160,11 +257,116 @@ class HistoricalEngine:
             run.error_msg = str(exc)
             run.duration_s = round(time.time() - t0, 2)
             run.finished_at = timezone.now()
-            run.save()
+            # Sin pisar days_done / interactions_generated: los lleva el avance
+            run.save(update_fields=['status', 'error_msg', 'duration_s', 'finished_at'])
             logger.error("sim engine ERROR: %s", exc, exc_info=True)
 
         return run
 
+    # ── Serie ─────────────────────────────────────────────────────────────────
+
+    def _generate_serial(self, run, days, canales, cfg, agent_pool, agent_objs,
+                         lead_offset, should_stop) -> int:
+        Interaction, SimRun = _get_models()[2:]
+        agent_pk_map = {a.codigo: a for a in agent_objs}   # codigo → SimAgent para el FK
+
+        def progress(n, buckets):
+            # Hilo escritor: un día insertado → rollup + avance
+            rollup.apply(self.account.id, buckets)
+            SimRun.objects.filter(id=run.id).update(
+                days_done=F('days_done') + 1,
+                interactions_generated=F('interactions_generated') + n)
+
+        writer = _BulkWriter(Interaction, self.BATCH_SIZE, on_written=progress)
+        total  = 0
+        try:
+            for day, rows in self._iter_days(days, canales, cfg, agent_pool, lead_offset):
+                if should_stop and should_stop():
+                    raise RuntimeError(f"Generación cancelada en {day}.")
+
+                buckets = rollup.accumulate({}, rows)
+
+                # Convertir dicts → Interaction objects
+                objs = []
+                for row in rows:
+                    agent_codigo = row.pop('agent_codigo', None)
+                    objs.append(Interaction(
+                        account = self.account,
+                        agent   = agent_pk_map.get(agent_codigo) if agent_codigo else None,
+                        **row
+                    ))
+                writer.put(objs, buckets)
+                total += len(objs)
+        finally:
+            writer.close()
+        return total
+
+    def _iter_days(self, days, canales, cfg, agent_pool, lead_offset):
+        """(día, list[dict]) en orden, con el backend configurado."""
+        if self.backend == 'numpy':
+            from sim.generators.vectorized import generate_planned_day, plan_days
+
+            samplers = compiled_config.get(self.account.id, cfg).samplers(canales)
+            for plan in plan_days(samplers, days, self.seed, lead_offset):
+                yield plan['day'], generate_planned_day(samplers, plan, agent_pool, self.seed)
+            return
+
+        if self.backend != 'python':
+            raise ValueError(f"SIM_GENERATOR_BACKEND desconocido: '{self.backend}'")
+        modules = dict(zip(('inbound', 'outbound', 'digital'), _get_generators()))
+        order   = [c for c in modules if c in canales]
+        for day in days:
+            dt = datetime.combine(day, datetime.min.time())
+            rows = []
+            for c in order:
+                rows += modules[c].generate_day(dt, agent_pool, cfg.get(c, {}), lead_offset + len(rows))
+            lead_offset += len(rows)
+            yield day, rows
+
+    # ── Paralelo ──────────────────────────────────────────────────────────────
+
+    def _generate_parallel(self, run, days, canales, cfg, agent_pool, agent_objs,
+                           lead_offset, workers, should_stop) -> int:
+        from sim.generators.vectorized import plan_days
+        SimRun = _get_models()[3]
+
+        samplers = compiled_config.get(self.account.id, cfg).samplers(canales)
+        plans    = plan_days(samplers, days, self.seed, lead_offset)
+        size  = max(1, math.ceil(len(plans) / (workers * 4)))   # tramos chicos → avance fluido
+        base  = {
+            'account_id': self.account.id,
+            'config':     cfg,
+            'canales':    canales,
+            'agent_pool': agent_pool,
+            'agent_ids':  {a.codigo: a.pk for a in agent_objs},
+            'entropy':    self.seed,
+            'batch_size': self.BATCH_SIZE,
+        }
+
+        connection.close()   # los hijos abren su propia conexión
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_worker_init)
+        total = 0
+        try:
+            pending = {pool.submit(_generate_days_worker, {**base, 'plans': plans[i:i + size]})
+                       for i in range(0, len(plans), size)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    n_days, n_rows = fut.result()
+                    total += n_rows
+                    SimRun.objects.filter(id=run.id).update(
+                        days_done=F('days_done') + n_days,
+                        interactions_generated=F('interactions_generated') + n_rows)
+                if pending and should_stop and should_stop():
+                    for fut in pending:
+                        fut.cancel()
+                    raise RuntimeError("Generación cancelada.")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return total
+
     def _default_canales(self, canal: str) -> list:
         return {
             'inbound':  ['inbound'],
@@ -205,20 +407,53 @@ class HistoricalEngine:
         return list(SimAgent.objects.filter(account=self.account, is_active=True))
 
 
-def get_account_kpis(account) -> dict:
-    """KPIs resumidos de una cuenta — para el panel."""
-    from sim.models import Interaction
-    from django.db.models import Count, Avg, Sum
+def generate_task(payload: dict, job=None) -> dict:
+    """
+    Handler 'sim_generate' de la cola de analyst (analyst/services/job_queue.py).
+    payload = {run_id} — el SimRun se crea en estado 'queued' al encolar.
+    """
+    from analyst.services.job_queue import JobFailed, job_should_stop
+    SimRun = _get_models()[3]
+
+    try:
+        run = SimRun.objects.select_related('account', 'triggered_by').get(id=payload['run_id'])
+    except SimRun.DoesNotExist:
+        raise JobFailed(f"SimRun {payload.get('run_id')} no existe.")
+    if run.status == 'done':
+        return {'interactions': run.interactions_generated}
+
+    engine = HistoricalEngine(run.account, run.triggered_by)
+    run = engine.generate(run.date_from, run.date_to, run.canales or None, run=run,
+                          should_stop=lambda: job_should_stop(job))
+    if run.status == 'error':
+        raise JobFailed(run.error_msg)
+    return {'interactions': run.interactions_generated}
+
 
-    qs = Interaction.objects.filter(account=account)
-    total = qs.count()
+def _fail_generate(payload: dict, msg: str) -> None:
+    SimRun = _get_models()[3]
+    SimRun.objects.filter(id=payload.get('run_id'), status__in=['queued', 'running']).update(
+        status='error', error_msg=msg, finished_at=timezone.now())
+
+
+generate_task.on_failure = _fail_generate
+
+
+def get_account_kpis(account) -> dict:
+    """KPIs resumidos de una cuenta — para el panel. Lee el rollup diario."""
+    by_canal, by_status = {}, {}
+    n_duracion = duracion_sum = 0
+    for r in rollup.totals(account, by=('canal', 'status')):
+        by_canal[r['canal']]   = by_canal.get(r['canal'], 0) + r['n']
+        by_status[r['status']] = by_status.get(r['status'], 0) + r['n']
+        n_duracion   += r['n_duracion']
+        duracion_sum += r['duracion_s_sum']
+
+    total = sum(by_canal.values())
     if total == 0:
         return {'total': 0}
 
-    by_canal  = dict(qs.values_list('canal').annotate(n=Count('id')).values_list('canal', 'n'))
-    by_status = dict(qs.values_list('status').annotate(n=Count('id')).values_list('status', 'n'))
-    tmo_avg   = qs.filter(duracion_s__gt=0).aggregate(avg=Avg('duracion_s'))['avg'] or 0
-
+    tmo_avg   = duracion_sum / n_duracion if n_duracion else 0
     atendidas = by_status.get('atendida', 0) + by_status.get('venta', 0) + by_status.get('agenda', 0)
     return {
         'total':         total,
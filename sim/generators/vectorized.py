@@ -0,0 +1,434 @@
+# sim/generators/vectorized.py
+"""
+Backend NumPy de los generadores de canal.
+
+Mismas distribuciones que inbound/outbound/digital.generate_day, pero cada
+día se sortea en bloque: volumen, hora/minuto/segundo, skill, tipificación,
+duraciones, abandono y agente salen como arrays de un numpy.random.Generator
+sembrable, en lugar de una llamada a weighted_choice / gaussian_duration /
+intraday_slot por interacción.
+
+    samplers = compile_samplers(['inbound', 'outbound'], account.config)
+    rng      = np.random.default_rng(seed)
+    rows     = samplers['inbound'].generate_day(dt, agent_pool, lead_offset, rng)
+
+compile_samplers() hace el trabajo por-config una sola vez (merge con el
+DEFAULT_CONFIG del canal, tablas acumuladas de pesos, TMO por
+tipificación); generate_day() devuelve list[dict] con el mismo formato que
+los generadores originales, así el engine los trata igual.
+
+Determinismo por día — day_streams(entropy, día) deriva dos Generators
+independientes del día (volumen / resto) y plan_days() sortea de antemano
+los volúmenes de todo el rango para asignar los lead_offset. Así cada día
+puede generarse en cualquier orden o proceso con el mismo resultado.
+
+Sin dependencias de Django — solo numpy.
+"""
+import bisect
+import random
+from datetime import datetime
+
+import numpy as np
+
+from . import digital, inbound, outbound
+from .base import synthetic_lead_id
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Primitivas
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Categorical:
+    """
+    weighted_choice compilado: claves + pesos acumulados.
+    Misma regla que weighted_choice — r ~ U(0, total), primera clave con
+    r <= acumulado.
+    """
+
+    def __init__(self, weights: dict):
+        if not weights:
+            raise ValueError("Categorical necesita al menos una clave.")
+        self.keys  = list(weights.keys())
+        self.cum   = np.cumsum(np.asarray(list(weights.values()), dtype=float))
+        self.total = float(self.cum[-1])
+        self._cum_list = self.cum.tolist()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def sample(self, rng, n: int) -> np.ndarray:
+        """Índices en self.keys."""
+        idx = np.searchsorted(self.cum, rng.random(n) * self.total, side='left')
+        return np.minimum(idx, len(self.keys) - 1)
+
+    def choice(self, rnd=random):
+        """
+        Una clave con el RNG de stdlib (bisect sobre los acumulados). Consume
+        un rnd.random() igual que weighted_choice: mismo estado, misma clave.
+        """
+        i = bisect.bisect_left(self._cum_list, rnd.random() * self.total)
+        return self.keys[min(i, len(self.keys) - 1)]
+
+
+def gaussian_durations(rng, mean, sigma_factor, min_s, max_s, n: int) -> np.ndarray:
+    """gaussian_duration vectorizado; mean/sigma/min/max pueden ser arrays por fila."""
+    mean = np.asarray(mean, dtype=float)
+    vals = rng.normal(mean, mean * np.asarray(sigma_factor, dtype=float), n)
+    return np.clip(np.trunc(vals), min_s, max_s).astype(np.int64)
+
+
+def daily_volume(rng, base_vol: int, weekday: int,
+                 weekend_factor: float = 0.59, variance: float = 0.08) -> int:
+    factor = weekend_factor if weekday >= 5 else 1.0
+    return max(0, int(base_vol * factor * rng.normal(1.0, variance)))
+
+
+class IntradaySlots:
+    """intraday_slot compilado: hora por peso + minuto y segundo uniformes."""
+
+    def __init__(self, intraday: dict):
+        self.hours = Categorical({int(h): w for h, w in intraday.items()})
+        self.hour_values = np.asarray(self.hours.keys, dtype=np.int64)
+
+    def sample(self, rng, date: datetime, n: int):
+        """(índice de hora, array datetime64[s] de inicio)."""
+        h_idx   = self.hours.sample(rng, n)
+        seconds = (self.hour_values[h_idx] * 3600
+                   + rng.integers(0, 60, n) * 60
+                   + rng.integers(0, 60, n))
+        base = np.datetime64(date.replace(hour=0, minute=0, second=0, microsecond=0), 's')
+        return h_idx, base + seconds.astype('timedelta64[s]')
+
+
+def _agent_codes(agent_pool: list) -> np.ndarray:
+    return np.asarray([a['codigo'] for a in agent_pool] + [None], dtype=object)
+
+
+def _rows(canal: str, date: datetime, lead_offset: int, cols: dict) -> list:
+    """Columnas → list[dict] con el formato de los generadores originales."""
+    n = len(cols['duracion_s'])
+    if not n:
+        return []
+    fecha  = date.date()
+    inicio = cols['hora_inicio'].astype(object).tolist()
+    fin    = cols['hora_fin'].astype(object).tolist()
+    data   = [cols[k].tolist() for k in ('skill', 'sub_canal', 'duracion_s', 'acw_s',
+                                         'tipificacion', 'status', 'agent_codigo', 'intento_num')]
+    return [
+        {
+            'canal':        canal,
+            'skill':        skill,
+            'sub_canal':    sub,
+            'fecha':        fecha,
+            'hora_inicio':  inicio[i],
+            'hora_fin':     fin[i],
+            'duracion_s':   dur,
+            'acw_s':        acw,
+            'tipificacion': tipif,
+            'status':       status,
+            'lead_id':      synthetic_lead_id(canal, lead_offset + i),
+            'agent_codigo': agent,
+            'intento_num':  intento,
+            'is_simulated': True,
+        }
+        for i, (skill, sub, dur, acw, tipif, status, agent, intento) in enumerate(zip(*data))
+    ]
+
+
+def _const(value, n: int) -> np.ndarray:
+    out = np.empty(n, dtype=object)
+    out[:] = value
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Samplers por canal
+# ─────────────────────────────────────────────────────────────────────────────
+
+class InboundSampler:
+    canal = 'inbound'
+
+    def __init__(self, account_config: dict):
+        cfg = inbound._get_config(account_config)
+        self.cfg      = cfg
+        self.slots    = IntradaySlots(cfg['intraday'])
+        self.abandon  = np.asarray(
+            [cfg['abandon_by_hour'].get(h, cfg['abandon_rate']) for h in self.slots.hours.keys])
+        self.skills   = Categorical({k: v['weight'] for k, v in cfg['skills'].items()})
+
+        # Tipificaciones de todas las skills en un vocabulario común
+        vocab, self.tipif_by_skill = {}, []
+        for skill in self.skills.keys:
+            tipifs = cfg['skills'][skill]['tipificaciones']
+            codes  = np.asarray([vocab.setdefault(t, len(vocab)) for t in tipifs], dtype=np.int64)
+            self.tipif_by_skill.append((Categorical(tipifs), codes))
+        self.tipif_labels = np.asarray(list(vocab), dtype=object)
+
+        default = {'mean': cfg['tmo_s'], 'sigma': 0.15}
+        tmo_map = cfg.get('tmo_by_tipif', {})
+        self.tmo_mean  = np.asarray([tmo_map.get(t, default)['mean'] for t in vocab], dtype=float)
+        self.tmo_sigma = np.asarray([tmo_map.get(t, default)['sigma'] for t in vocab], dtype=float)
+        self.skill_labels = np.asarray(self.skills.keys, dtype=object)
+
+    def volume(self, date: datetime, rng) -> int:
+        return daily_volume(rng, self.cfg['weekday_vol'], date.weekday(),
+                            self.cfg.get('weekend_factor', 0.59))
+
+    def generate_day(self, date: datetime, agent_pool: list,
+                     lead_offset: int, rng, volume: int = None) -> list:
+        cfg = self.cfg
+        n   = self.volume(date, rng) if volume is None else volume
+        if n == 0:
+            return []
+
+        # Agentes activos para el día (adherencia)
+        adherence = np.asarray([a.get('adherencia_base', 0.931) for a in agent_pool], dtype=float)
+        active    = np.flatnonzero(rng.random(len(agent_pool)) < adherence)
+
+        h_idx, hora = self.slots.sample(rng, date, n)
+        skill = self.skills.sample(rng, n)
+        tipif = np.empty(n, dtype=np.int64)
+        for s, (sampler, codes) in enumerate(self.tipif_by_skill):
+            mask = skill == s
+            k    = int(mask.sum())
+            if k:
+                tipif[mask] = codes[sampler.sample(rng, k)]
+
+        tmo       = gaussian_durations(rng, self.tmo_mean[tipif], self.tmo_sigma[tipif], 30, 900, n)
+        abandoned = rng.random(n) < self.abandon[h_idx]
+        abandon_s = rng.integers(5, int(cfg['sl_s'] * 3) + 1, n)
+        acw       = gaussian_durations(rng, cfg['acw_s'], 0.30, 5, 180, n)
+
+        agent = np.full(n, -1, dtype=np.int64)
+        if len(active):
+            agent = active[rng.integers(0, len(active), n)]
+
+        tmo   = np.where(abandoned, abandon_s, tmo)
+        acw   = np.where(abandoned, 0, acw)
+        agent = np.where(abandoned, -1, agent)
+
+        return _rows(self.canal, date, lead_offset, {
+            'skill':        self.skill_labels[skill],
+            'sub_canal':    _const('', n),
+            'hora_inicio':  hora,
+            'hora_fin':     hora + (tmo + acw).astype('timedelta64[s]'),
+            'duracion_s':   tmo,
+            'acw_s':        acw,
+            'tipificacion': self.tipif_labels[tipif],
+            'status':       np.where(abandoned, 'abandonada', 'atendida').astype(object),
+            'agent_codigo': _agent_codes(agent_pool)[agent],
+            'intento_num':  np.ones(n, dtype=np.int64),
+        })
+
+
+class OutboundSampler:
+    canal = 'outbound'
+
+    # Orden de status → (status, mean, sigma, min, max); mean None = config
+    _OUTCOMES = (
+        ('venta',       300,  0.20, 120, 720),
+        ('agenda',      240,  0.20,  60, 600),
+        ('atendida',     45,  0.30,  10, 120),
+        ('rechazo',     None, 0.20,  60, 600),
+        ('no_contacto', None, 0.25,   5,  90),
+    )
+
+    def __init__(self, account_config: dict):
+        cfg = {**outbound.DEFAULT_CONFIG, **account_config}
+        self.cfg        = cfg
+        self.slots      = IntradaySlots(cfg['intraday'])
+        self.contact    = Categorical(cfg['tipif_contacto'])
+        self.no_contact = Categorical(cfg['tipif_no_contacto'])
+        self.producto   = Categorical(cfg['producto'])
+        self.sub_prod   = Categorical(cfg['sub_producto'])
+
+        # Mismas reglas que outbound.generate_day, resueltas por tipificación
+        def outcome(tipif):
+            if tipif == 'Venta':
+                return 0
+            if 'Agenda' in tipif:
+                return 1
+            if 'corta' in tipif.lower():
+                return 2
+            return 3
+        self.contact_outcome = np.asarray([outcome(t) for t in self.contact.keys], dtype=np.int64)
+
+        from_cfg = {'rechazo': cfg['tmo_contacto_s'], 'no_contacto': cfg['tmo_no_contesta_s']}
+        self.status_labels = np.asarray([o[0] for o in self._OUTCOMES], dtype=object)
+        self.out_mean  = np.asarray([from_cfg.get(o[0], o[1]) for o in self._OUTCOMES], dtype=float)
+        self.out_sigma = np.asarray([o[2] for o in self._OUTCOMES], dtype=float)
+        self.out_min   = np.asarray([o[3] for o in self._OUTCOMES], dtype=np.int64)
+        self.out_max   = np.asarray([o[4] for o in self._OUTCOMES], dtype=np.int64)
+        self.tipif_labels = np.asarray(self.contact.keys + self.no_contact.keys, dtype=object)
+        self.producto_labels = np.asarray(self.producto.keys, dtype=object)
+        self.sub_prod_labels = np.asarray(self.sub_prod.keys, dtype=object)
+
+    def volume(self, date: datetime, rng) -> int:
+        weekday = date.weekday()
+        if weekday == 6:
+            return 0
+        factor = 0.70 if weekday == 5 else 1.0
+        return max(0, int(self.cfg['daily_marcaciones'] * factor * rng.normal(1.0, 0.05)))
+
+    def generate_day(self, date: datetime, agent_pool: list,
+                     lead_offset: int, rng, volume: int = None) -> list:
+        cfg = self.cfg
+        n   = self.volume(date, rng) if volume is None else volume
+        if n == 0:
+            return []
+
+        _, hora    = self.slots.sample(rng, date, n)
+        is_contact = rng.random(n) < cfg['contact_rate']
+        k          = int(is_contact.sum())
+
+        tipif   = np.empty(n, dtype=np.int64)
+        outcome = np.full(n, 4, dtype=np.int64)          # no_contacto
+        c_idx   = self.contact.sample(rng, k)
+        tipif[is_contact]   = c_idx
+        outcome[is_contact] = self.contact_outcome[c_idx]
+        tipif[~is_contact]  = len(self.contact) + self.no_contact.sample(rng, n - k)
+
+        tmo = gaussian_durations(rng, self.out_mean[outcome], self.out_sigma[outcome],
+                                 self.out_min[outcome], self.out_max[outcome], n)
+        acw = np.where(is_contact, gaussian_durations(rng, 30, 0.30, 10, 120, n), 0)
+
+        agent = np.full(n, -1, dtype=np.int64)
+        if agent_pool:
+            agent = np.where(is_contact, rng.integers(0, len(agent_pool), n), -1)
+
+        return _rows(self.canal, date, lead_offset, {
+            'skill':        self.producto_labels[self.producto.sample(rng, n)],
+            'sub_canal':    self.sub_prod_labels[self.sub_prod.sample(rng, n)],
+            'hora_inicio':  hora,
+            'hora_fin':     hora + (tmo + acw).astype('timedelta64[s]'),
+            'duracion_s':   tmo,
+            'acw_s':        acw,
+            'tipificacion': self.tipif_labels[tipif],
+            'status':       self.status_labels[outcome],
+            'agent_codigo': _agent_codes(agent_pool)[agent],
+            'intento_num':  rng.integers(1, 6, n),
+        })
+
+
+class DigitalSampler:
+    canal = 'digital'
+
+    def __init__(self, account_config: dict):
+        cfg = {**digital.DEFAULT_CONFIG, **account_config}
+        self.cfg      = cfg
+        self.slots    = IntradaySlots(cfg['intraday'])
+        self.channels = Categorical(cfg['channels'])
+
+        # Fuera de 'bxi' todos los canales usan las tipificaciones de app
+        vocab, self.tipif_by_channel = {}, []
+        for channel in self.channels.keys:
+            tipifs = cfg['tipificaciones_bxi'] if channel == 'bxi' else cfg['tipificaciones_app']
+            codes  = np.asarray([vocab.setdefault(t, len(vocab)) for t in tipifs], dtype=np.int64)
+            self.tipif_by_channel.append((Categorical(tipifs), codes))
+        self.tipif_labels = np.asarray(list(vocab), dtype=object)
+
+        tmo = [digital._match_tmo(t, cfg['tmo_by_tipif']) for t in vocab]
+        self.tmo_mean  = np.asarray([t['mean'] for t in tmo], dtype=float)
+        self.tmo_sigma = np.asarray([t['sigma'] for t in tmo], dtype=float)
+        self.channel_labels = np.asarray(self.channels.keys, dtype=object)
+
+    def volume(self, date: datetime, rng) -> int:
+        return daily_volume(rng, self.cfg['daily_vol'], date.weekday(), weekend_factor=0.75)
+
+    def generate_day(self, date: datetime, agent_pool: list,
+                     lead_offset: int, rng, volume: int = None) -> list:
+        cfg = self.cfg
+        n   = self.volume(date, rng) if volume is None else volume
+        if n == 0:
+            return []
+
+        _, hora = self.slots.sample(rng, date, n)
+        channel = self.channels.sample(rng, n)
+        tipif   = np.empty(n, dtype=np.int64)
+        for c, (sampler, codes) in enumerate(self.tipif_by_channel):
+            mask = channel == c
+            k    = int(mask.sum())
+            if k:
+                tipif[mask] = codes[sampler.sample(rng, k)]
+
+        tmo = gaussian_durations(rng, self.tmo_mean[tipif], self.tmo_sigma[tipif], 30, 900, n)
+        acw = gaussian_durations(rng, 20, 0.30, 5, 90, n)
+
+        agent = np.full(n, -1, dtype=np.int64)
+        if agent_pool:
+            agent = rng.integers(0, len(agent_pool), n)
+
+        return _rows(self.canal, date, lead_offset, {
+            'skill':        _const('CANALES DIGITALES', n),
+            'sub_canal':    self.channel_labels[channel],
+            'hora_inicio':  hora,
+            'hora_fin':     hora + (tmo + acw).astype('timedelta64[s]'),
+            'duracion_s':   tmo,
+            'acw_s':        acw,
+            'tipificacion': self.tipif_labels[tipif],
+            'status':       _const('atendida', n),
+            'agent_codigo': _agent_codes(agent_pool)[agent],
+            'intento_num':  np.ones(n, dtype=np.int64),
+        })
+
+
+SAMPLERS = {
+    'inbound':  InboundSampler,
+    'outbound': OutboundSampler,
+    'digital':  DigitalSampler,
+}
+
+
+def compile_samplers(canales: list, config: dict) -> dict:
+    """
+    {canal: sampler} para los canales pedidos, con la sección de config de
+    cada uno, en el orden de generación inbound → outbound → digital.
+    """
+    return {c: SAMPLERS[c](config.get(c, {})) for c in SAMPLERS if c in canales}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Plan por días
+# ─────────────────────────────────────────────────────────────────────────────
+
+def new_entropy() -> int:
+    """Semilla raíz aleatoria (para runs sin seed: se registra en SimRun.seed)."""
+    return int(np.random.SeedSequence().entropy % 2 ** 63)
+
+
+def day_streams(entropy: int, day):
+    """(rng_volumen, rng_día) derivados de la semilla raíz y la fecha."""
+    vol_ss, body_ss = np.random.SeedSequence([int(entropy), day.toordinal()]).spawn(2)
+    return np.random.default_rng(vol_ss), np.random.default_rng(body_ss)
+
+
+def plan_days(samplers: dict, days: list, entropy: int, lead_offset: int = 0) -> list:
+    """
+    Sortea el volumen de cada canal y día y asigna lead_offset consecutivos
+    (mismo orden que la generación serie: día a día, canal a canal), de modo
+    que synthetic_lead_id no se repite aunque los días se generen en paralelo.
+
+    Devuelve [{'day', 'volumes': {canal: n}, 'offsets': {canal: offset}}, ...]
+    """
+    plans, offset = [], lead_offset
+    for day in days:
+        vol_rng, _ = day_streams(entropy, day)
+        dt = datetime.combine(day, datetime.min.time())
+        volumes, offsets = {}, {}
+        for canal, sampler in samplers.items():
+            volumes[canal] = sampler.volume(dt, vol_rng)
+            offsets[canal] = offset
+            offset += volumes[canal]
+        plans.append({'day': day, 'volumes': volumes, 'offsets': offsets})
+    return plans
+
+
+def generate_planned_day(samplers: dict, plan: dict, agent_pool: list, entropy: int) -> list:
+    """Filas de un día del plan (todos los canales, en orden)."""
+    _, rng = day_streams(entropy, plan['day'])
+    dt   = datetime.combine(plan['day'], datetime.min.time())
+    rows = []
+    for canal, sampler in samplers.items():
+        rows += sampler.generate_day(dt, agent_pool, plan['offsets'][canal], rng,
+                                     volume=plan['volumes'][canal])
+    return rows
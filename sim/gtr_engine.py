@@ -15,9 +15,13 @@ Clock speeds:
   60x  → 1 min real = 1 hora simulada   ← demo rápido
 
 Formato clave Redis:
-  gtr:session:{session_id}        → estado completo
-  gtr:interactions:{session_id}   → lista de interacciones acumuladas
+  gtr:session:{session_id}        → estado completo (cache)
+  gtr:interactions:{session_id}   → log append-only de interacciones (Redis List,
+                                    RPUSH/LRANGE; una fila JSON por elemento)
   TTL: 4 horas
+
+Sin Redis (FileBasedCache) el log vive en memoria del proceso (_MemoryLog).
+El log no se recorta: persist_session lo lee completo por tramos.
 """
 
 import time
@@ -25,6 +29,7 @@ import uuid
 import json
 import logging
 import random
+import threading
 from datetime import datetime, date, timedelta
 from typing import Optional
 
@@ -34,6 +39,7 @@ from django.utils import timezone
 logger = logging.getLogger(__name__)
 
 GTR_TTL = 60 * 60 * 4   # 4 hours
+GTR_PERSIST_BATCH = 2000   # filas del log por lectura/bulk_create en persist_session
 
 # ── Thresholds para alertas ───────────────────────────────────────────────────
 DEFAULT_THRESHOLDS = {
@@ -245,29 +251,147 @@ def load_session(session_id: str) -> Optional[GTRSession]:
 
 def delete_session(session_id: str):
     cache.delete(_session_key(session_id))
-    cache.delete(_interactions_key(session_id))
+    _interaction_log().delete(_interactions_key(session_id))
+
+
+# ── Interaction log (append-only) ─────────────────────────────────────────────
+
+class _RedisLog:
+    """Log sobre una Redis List: RPUSH atómico, lectura por rango con LRANGE."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def append(self, key: str, rows: list) -> int:
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *[json.dumps(r, default=str) for r in rows])
+        pipe.expire(key, GTR_TTL)
+        return pipe.execute()[0]
 
-def add_interactions(session_id: str, new_rows: list):
-    """Append interactions to the session's interaction list in cache."""
-    key  = _interactions_key(session_id)
-    existing = cache.get(key) or []
-    existing.extend(new_rows)
-    # Keep last 2000 interactions to avoid memory bloat
-    if len(existing) > 2000:
-        existing = existing[-2000:]
-    cache.set(key, existing, timeout=GTR_TTL)
+    def range(self, key: str, start: int, stop: int = None) -> list:
+        if stop is not None and stop <= start:
+            return []
+        end = -1 if stop is None else stop - 1
+        return [json.loads(raw) for raw in self.client.lrange(key, start, end)]
 
-def get_interactions(session_id: str, since_index: int = 0) -> list:
-    key  = _interactions_key(session_id)
-    rows = cache.get(key) or []
-    return rows[since_index:]
+    def length(self, key: str) -> int:
+        return self.client.llen(key)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+
+class _MemoryLog:
+    """
+    Fallback en proceso (cache sin Redis). Mismo contrato que _RedisLog;
+    sólo lo ven las requests del mismo proceso (runserver / un worker).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs = {}            # key → (expira_en, [rows])
+
+    def append(self, key: str, rows: list) -> int:
+        now = time.time()
+        with self._lock:
+            for k in [k for k, (exp, _) in self._logs.items() if exp < now]:
+                del self._logs[k]
+            _, log = self._logs.get(key, (None, []))
+            log.extend(json.loads(json.dumps(r, default=str)) for r in rows)
+            self._logs[key] = (now + GTR_TTL, log)
+            return len(log)
+
+    def range(self, key: str, start: int, stop: int = None) -> list:
+        with self._lock:
+            _, log = self._logs.get(key, (None, []))
+            return list(log[start:stop])
+
+    def length(self, key: str) -> int:
+        with self._lock:
+            return len(self._logs.get(key, (None, []))[1])
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._logs.pop(key, None)
+
+
+_log_backend = None
+
+
+def _interaction_log():
+    """Redis si la cache default es django_redis; si no, memoria del proceso."""
+    global _log_backend
+    if _log_backend is None:
+        from django.conf import settings
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        if backend.startswith('django_redis'):
+            from django_redis import get_redis_connection
+            _log_backend = _RedisLog(get_redis_connection('default'))
+        else:
+            _log_backend = _MemoryLog()
+    return _log_backend
+
+
+def add_interactions(session_id: str, new_rows: list) -> int:
+    """Agrega filas al log de la sesión (sin leer ni recortar). Devuelve el largo."""
+    if not new_rows:
+        return interactions_count(session_id)
+    return _interaction_log().append(_interactions_key(session_id), new_rows)
+
+def get_interactions(session_id: str, since_index: int = 0, limit: int = None) -> list:
+    """Filas del log desde `since_index` (hasta `limit` filas)."""
+    stop = since_index + limit if limit is not None else None
+    return _interaction_log().range(_interactions_key(session_id), since_index, stop)
+
+def interactions_count(session_id: str) -> int:
+    return _interaction_log().length(_interactions_key(session_id))
+
+def iter_interactions(session_id: str, batch: int = GTR_PERSIST_BATCH):
+    """El log completo en tramos de `batch` filas."""
+    start = 0
+    while True:
+        rows = get_interactions(session_id, start, batch)
+        if rows:
+            yield rows
+        if len(rows) < batch:
+            return
+        start += len(rows)
 
 
 # ── GTR Engine ───────────────────────────────────────────────────────────────
 
+def _row_to_interaction(row: dict, account, session: GTRSession, Interaction):
+    """Fila del log GTR → Interaction (sin guardar)."""
+    hora_str = row.get('hora', '09:00:00')
+    try:
+        hora_inicio = datetime.strptime(f"{session.sim_date} {hora_str}", "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        hora_inicio = datetime.combine(session.sim_date, datetime.min.time()).replace(hour=9)
+
+    dur_s = int(row.get('duracion_s', 0))
+    acw_s = int(row.get('acw_s', 0))
+    return Interaction(
+        account      = account,
+        canal        = row.get('canal', session.canal),
+        skill        = row.get('skill', ''),
+        sub_canal    = row.get('sub_canal', ''),
+        fecha        = session.sim_date,
+        hora_inicio  = hora_inicio,
+        hora_fin     = hora_inicio + timedelta(seconds=dur_s + acw_s),
+        duracion_s   = dur_s,
+        acw_s        = acw_s,
+        tipificacion = row.get('tipificacion', ''),
+        status       = row.get('status', 'atendida'),
+        lead_id      = '',
+        intento_num  = 1,
+        is_simulated = True,
+    )
+
+
 def persist_session(session_id: str) -> Optional['SimRun']:
     """
     SIM-6a: Persiste todas las interacciones GTR en Redis → Interaction en BD.
+    Lee el log completo en tramos de GTR_PERSIST_BATCH (nada se descarta).
     Crea un SimRun con canal 'gtr' para identificar el origen.
     Limpia Redis al finalizar.
 
@@ -279,21 +403,19 @@ def persist_session(session_id: str) -> Optional['SimRun']:
     if not session:
         return None
 
-    rows = get_interactions(session_id)
-    if not rows:
+    if not interactions_count(session_id):
         delete_session(session_id)
         return None
 
     try:
         from django.contrib.auth import get_user_model
+        from sim import rollup
         from sim.models import SimAccount, Interaction, SimRun
 
         User    = get_user_model()
         account = SimAccount.objects.get(id=session.account_id)
         user    = User.objects.get(id=session.user_id) if session.user_id else None
 
-        sim_dt = datetime.combine(session.sim_date, datetime.min.time())
-
         # Crear SimRun GTR
         run = SimRun.objects.create(
             account       = account,
@@ -304,51 +426,28 @@ def persist_session(session_id: str) -> Optional['SimRun']:
             triggered_by  = user,
         )
 
-        # Convertir dicts Redis → Interaction objects
-        batch = []
-        for row in rows:
-            hora_str = row.get('hora', '09:00:00')
-            try:
-                hora_inicio = datetime.strptime(
-                    f"{session.sim_date} {hora_str}", "%Y-%m-%d %H:%M:%S"
-                )
-            except ValueError:
-                hora_inicio = sim_dt.replace(hour=9)
-
-            dur_s    = int(row.get('duracion_s', 0))
-            acw_s    = int(row.get('acw_s', 0))
-            hora_fin = hora_inicio + timedelta(seconds=dur_s + acw_s)
-
-            batch.append(Interaction(
-                account      = account,
-                canal        = row.get('canal', session.canal),
-                skill        = row.get('skill', ''),
-                sub_canal    = row.get('sub_canal', ''),
-                fecha        = session.sim_date,
-                hora_inicio  = hora_inicio,
-                hora_fin     = hora_fin,
-                duracion_s   = dur_s,
-                acw_s        = acw_s,
-                tipificacion = row.get('tipificacion', ''),
-                status       = row.get('status', 'atendida'),
-                lead_id      = '',
-                intento_num  = 1,
-                is_simulated = True,
+        # Log completo → Interaction, por tramos (sin cargar el día entero)
+        total, buckets = 0, {}
+        for rows in iter_interactions(session_id):
+            batch = [_row_to_interaction(row, account, session, Interaction) for row in rows]
+            Interaction.objects.bulk_create(batch, ignore_conflicts=True)
+            # Rollup diario (sin agente: las interacciones GTR no lo asignan)
+            rollup.accumulate(buckets, (
+                {'fecha': i.fecha, 'canal': i.canal, 'skill': i.skill, 'status': i.status,
+                 'duracion_s': i.duracion_s, 'acw_s': i.acw_s}
+                for i in batch
             ))
-
-        # bulk_create en batches de 2000
-        BATCH = 2000
-        for i in range(0, len(batch), BATCH):
-            Interaction.objects.bulk_create(batch[i:i+BATCH], ignore_conflicts=True)
+            total += len(batch)
+        rollup.apply(account.id, buckets)
 
         run.status                 = 'done'
-        run.interactions_generated = len(batch)
+        run.interactions_generated = total
         run.finished_at            = timezone.now()
         run.save(update_fields=['status', 'interactions_generated', 'finished_at'])
 
         logger.info(
             "GTR persisted: session=%s | %d interactions → BD | run=%s",
-            session_id, len(batch), run.id
+            session_id, total, run.id
         )
 
     except Exception as exc:
@@ -554,6 +653,72 @@ def inject_event(session_id: str, event_type: str, params: dict) -> dict:
 
 # ── Internal helpers ──────────────────────────────────────────────────────────
 
+# ── Tablas compiladas por cuenta (sim/compiled_config.py) ─────────────────────
+
+def _intraday(weights: dict) -> dict:
+    # JSONField guarda las horas como str: normalizar a int para el lookup
+    return {int(h): w for h, w in weights.items()}
+
+
+def _compile_inbound(config: dict) -> dict:
+    from sim.generators.vectorized import Categorical
+
+    cfg    = config.get('inbound') or {}
+    skills = cfg.get('skills', {'PLD': {'weight':1.0,'tipificaciones':{'CONSULTA':1.0}}})
+    weights = {k: v['weight'] for k, v in skills.items()}
+    return {
+        'intraday':     _intraday(cfg.get('intraday', {
+            9:0.123,10:0.135,11:0.136,12:0.116,
+            13:0.102,14:0.096,15:0.096,16:0.109,17:0.087
+        })),
+        'weekday_vol':  cfg.get('weekday_vol', 1490),
+        'abandon_rate': cfg.get('abandon_rate', 0.039),
+        'tmo_s':        cfg.get('tmo_s', 313),
+        'acw_s':        cfg.get('acw_s', 18),
+        'skill_weights': weights,
+        'skills':       Categorical(weights),
+        'tipifs':       {k: Categorical(v['tipificaciones']) for k, v in skills.items()},
+    }
+
+
+def _compile_outbound(config: dict) -> dict:
+    from sim.generators.vectorized import Categorical
+
+    cfg = config.get('outbound') or {}
+    return {
+        'intraday':     _intraday(cfg.get('intraday', {
+            8:0.06, 9:0.10, 10:0.13, 11:0.13,
+            12:0.11, 13:0.10, 14:0.10, 15:0.10,
+            16:0.09, 17:0.07, 18:0.01,
+        })),
+        'daily_marcaciones': cfg.get('daily_marcaciones', 131400),
+        'contact_rate': cfg.get('contact_rate', 0.276),
+        'tipif_contacto': Categorical(cfg.get('tipif_contacto', {
+            'Cliente corta llamada':         0.415,
+            'Cliente ocupado':               0.229,
+            'No venta - No interesado':      0.188,
+            'Agenda (Usuario)':              0.090,
+            'Agenda (Titular)':              0.032,
+            'Venta':                         0.008,
+            'No venta - No volver a llamar': 0.012,
+            'No venta - Otro':               0.026,
+        })),
+        'tipif_no_contacto': Categorical(cfg.get('tipif_no_contacto', {
+            'No contesta':        0.524,
+            'Buzon de voz':       0.328,
+            'Timeout conclusion': 0.053,
+            'Desconectada':       0.034,
+            'Ocupado':            0.061,
+        })),
+        'productos':    Categorical(cfg.get('producto', {'PORTABILIDAD': 0.92, 'LINEA NUEVA': 0.08})),
+    }
+
+
+def _window_tables(session: GTRSession, name: str, build) -> dict:
+    from sim import compiled_config
+    return compiled_config.get(session.account_id).table(name, build)
+
+
 def _generate_window(session: GTRSession, from_h: int, from_m: int,
                       to_h: int, to_m: int) -> list:
     """Dispatcher: enruta al generador correcto según canal."""
@@ -565,31 +730,22 @@ def _generate_window(session: GTRSession, from_h: int, from_m: int,
 def _generate_window_inbound(session: GTRSession, from_h: int, from_m: int,
                               to_h: int, to_m: int) -> list:
     """Generate inbound interactions for the time window [from → to]."""
-    from sim.generators import inbound as inb_gen
-    from sim.generators.base import weighted_choice, gaussian_duration
+    from sim.generators.base import gaussian_duration
+    from sim.generators.vectorized import Categorical
 
     # Minutes elapsed in this window
     mins_elapsed = (to_h - from_h) * 60 + (to_m - from_m)
     if mins_elapsed <= 0:
         return []
 
-    # Get account config
-    try:
-        from sim.models import SimAccount, SimAgent
-        account = SimAccount.objects.get(id=session.account_id)
-        cfg_inbound = account.config.get('inbound', {})
-    except Exception:
-        cfg_inbound = {}
+    # Tablas compiladas de la cuenta (sin BD en régimen)
+    t = _window_tables(session, 'gtr_inbound', _compile_inbound)
 
     # Intraday weight for current hour
-    INTRADAY = cfg_inbound.get('intraday', {
-        9:0.123,10:0.135,11:0.136,12:0.116,
-        13:0.102,14:0.096,15:0.096,16:0.109,17:0.087
-    })
-    hour_weight = INTRADAY.get(from_h, 0.10)
+    hour_weight = t['intraday'].get(from_h, 0.10)
 
     # Volume for this window
-    base_vol     = cfg_inbound.get('weekday_vol', 1490)
+    base_vol     = t['weekday_vol']
     vol_per_min  = base_vol * hour_weight / 60
     spike        = session.kpis.get('_spike_factor', 1.0)
     vol_override = session.kpis.get('_vol_override', 1.0)   # SIM-6b
@@ -606,7 +762,7 @@ def _generate_window_inbound(session: GTRSession, from_h: int, from_m: int,
     if vol == 0:
         return []
 
-    abandon_rate = cfg_inbound.get('abandon_rate', 0.039)
+    abandon_rate = t['abandon_rate']
     if session.kpis.get('_high_aht_ticks', 0) > 0:
         abandon_rate *= 1.8
         session.kpis['_high_aht_ticks'] -= 1
@@ -615,15 +771,15 @@ def _generate_window_inbound(session: GTRSession, from_h: int, from_m: int,
     hold_rate_override = session.kpis.get('_hold_rate_override', None)
 
     # SIM-6b: AHT/ACW overrides
-    tmo_mean = cfg_inbound.get('tmo_s', 313) * session.kpis.get('_aht_override', 1.0)
-    acw_mean = cfg_inbound.get('acw_s', 18)  * session.kpis.get('_acw_override', 1.0)
+    tmo_mean = t['tmo_s'] * session.kpis.get('_aht_override', 1.0)
+    acw_mean = t['acw_s'] * session.kpis.get('_acw_override', 1.0)
 
-    # SIM-6b: skill weight overrides
-    skills_cfg    = cfg_inbound.get('skills', {'PLD': {'weight':1.0,'tipificaciones':{'CONSULTA':1.0}}})
+    # SIM-6b: skill weight overrides (tabla ad hoc sólo si hay override)
     skill_overrides = session.kpis.get('_skill_overrides', {})
-    skill_weights = {}
-    for k, v in skills_cfg.items():
-        skill_weights[k] = skill_overrides.get(k, v['weight'])
+    skills = t['skills']
+    if skill_overrides:
+        skills = Categorical({k: skill_overrides.get(k, w) for k, w in t['skill_weights'].items()})
+    tipifs = t['tipifs']
 
     interactions = []
     sim_dt = datetime.combine(session.sim_date, datetime.min.time()).replace(
@@ -634,8 +790,8 @@ def _generate_window_inbound(session: GTRSession, from_h: int, from_m: int,
         offset    = random.randint(0, mins_elapsed * 60)
         hora      = sim_dt + timedelta(seconds=offset)
         abandoned = random.random() < abandon_rate
-        skill     = weighted_choice(skill_weights)
-        tipif     = weighted_choice(skills_cfg[skill]['tipificaciones'])
+        skill     = skills.choice()
+        tipif     = tipifs[skill].choice()
 
         if abandoned:
             dur    = random.randint(5, 30)
@@ -670,27 +826,18 @@ def _generate_window_outbound(session: GTRSession, from_h: int, from_m: int,
     Generate outbound interactions for the time window [from → to].
     Calibrado con Conduent/ENTEL — contactabilidad 27.6%, conv 0.84%.
     """
-    from sim.generators.base import weighted_choice, gaussian_duration
+    from sim.generators.base import gaussian_duration
 
     mins_elapsed = (to_h - from_h) * 60 + (to_m - from_m)
     if mins_elapsed <= 0:
         return []
 
-    try:
-        from sim.models import SimAccount
-        account  = SimAccount.objects.get(id=session.account_id)
-        cfg_out  = account.config.get('outbound', {})
-    except Exception:
-        cfg_out = {}
+    # Tablas compiladas de la cuenta (sin BD en régimen)
+    t = _window_tables(session, 'gtr_outbound', _compile_outbound)
 
     # Intraday outbound
-    INTRADAY = cfg_out.get('intraday', {
-        8:0.06, 9:0.10, 10:0.13, 11:0.13,
-        12:0.11, 13:0.10, 14:0.10, 15:0.10,
-        16:0.09, 17:0.07, 18:0.01,
-    })
-    hour_weight  = INTRADAY.get(from_h, 0.10)
-    base_daily   = cfg_out.get('daily_marcaciones', 131400)
+    hour_weight  = t['intraday'].get(from_h, 0.10)
+    base_daily   = t['daily_marcaciones']
     vol_per_min  = base_daily * hour_weight / 60
     spike        = session.kpis.get('_spike_factor', 1.0)
     vol_override = session.kpis.get('_vol_override', 1.0)   # SIM-6b
@@ -707,33 +854,16 @@ def _generate_window_outbound(session: GTRSession, from_h: int, from_m: int,
     if vol == 0:
         return []
 
-    contact_rate = cfg_out.get('contact_rate', 0.276)
-    conv_rate    = cfg_out.get('conv_rate',    0.0084)
-    agenda_rate  = cfg_out.get('agenda_rate',  0.128)
+    contact_rate = t['contact_rate']
 
     # SIM-6b: reducir contactabilidad por agentes en break + ausentes
     absent = session.kpis.get('_absent_agents', 0) + session.kpis.get('_agents_on_break', 0)
     if absent > 0:
         contact_rate *= max(0.5, 1 - absent / 100)
 
-    tipif_contacto = cfg_out.get('tipif_contacto', {
-        'Cliente corta llamada':         0.415,
-        'Cliente ocupado':               0.229,
-        'No venta - No interesado':      0.188,
-        'Agenda (Usuario)':              0.090,
-        'Agenda (Titular)':              0.032,
-        'Venta':                         0.008,
-        'No venta - No volver a llamar': 0.012,
-        'No venta - Otro':               0.026,
-    })
-    tipif_no_contacto = cfg_out.get('tipif_no_contacto', {
-        'No contesta':        0.524,
-        'Buzon de voz':       0.328,
-        'Timeout conclusion': 0.053,
-        'Desconectada':       0.034,
-        'Ocupado':            0.061,
-    })
-    productos = cfg_out.get('producto', {'PORTABILIDAD': 0.92, 'LINEA NUEVA': 0.08})
+    tipif_contacto    = t['tipif_contacto']
+    tipif_no_contacto = t['tipif_no_contacto']
+    productos         = t['productos']
 
     interactions = []
     sim_dt = datetime.combine(session.sim_date, datetime.min.time()).replace(
@@ -744,10 +874,10 @@ def _generate_window_outbound(session: GTRSession, from_h: int, from_m: int,
         offset     = random.randint(0, mins_elapsed * 60)
         hora       = sim_dt + timedelta(seconds=offset)
         is_contact = random.random() < contact_rate
-        producto   = weighted_choice(productos)
+        producto   = productos.choice()
 
         if is_contact:
-            tipif = weighted_choice(tipif_contacto)
+            tipif = tipif_contacto.choice()
             if tipif == 'Venta':
                 status = 'venta'
                 dur    = gaussian_duration(300, 0.20, 120, 720)
@@ -762,7 +892,7 @@ def _generate_window_outbound(session: GTRSession, from_h: int, from_m: int,
                 dur    = gaussian_duration(180, 0.20, 60, 600)
             acw = gaussian_duration(30, 0.30, 10, 120)
         else:
-            tipif  = weighted_choice(tipif_no_contacto)
+            tipif  = tipif_no_contacto.choice()
             status = 'no_contacto'
             dur    = gaussian_duration(25, 0.25, 5, 90)
             acw    = 0
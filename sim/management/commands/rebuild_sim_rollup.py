@@ -0,0 +1,35 @@
+# sim/management/commands/rebuild_sim_rollup.py
+"""
+Recalcula el rollup diario (InteractionDaily) desde Interaction.
+Necesario una vez tras la migración 0011 y ante cualquier carga de
+Interaction que no pase por HistoricalEngine / persist_session.
+
+Uso:
+    python manage.py rebuild_sim_rollup
+    python manage.py rebuild_sim_rollup --account <uuid> [--account <uuid> ...]
+"""
+
+from django.core.management.base import BaseCommand
+
+from sim import rollup
+from sim.models import SimAccount
+
+
+class Command(BaseCommand):
+    help = 'Recalcula InteractionDaily desde Interaction (todas las cuentas o las indicadas).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account', action='append', default=[],
+                            help='UUID de SimAccount (repetible). Default: todas.')
+
+    def handle(self, *args, **options):
+        accounts = SimAccount.objects.all().order_by('name')
+        if options['account']:
+            accounts = accounts.filter(id__in=options['account'])
+
+        total = 0
+        for acc in accounts:
+            n = rollup.rebuild(acc)
+            total += n
+            self.stdout.write(f'  {acc.name}: {n} filas')
+        self.stdout.write(self.style.SUCCESS(f'Rollup reconstruido: {total} filas.'))
@@ -0,0 +1,29 @@
+"""
+sim/migrations/0008_simrun_queued_status.py
+
+SimRun.status admite 'queued': la generación histórica se encola en la
+cola de trabajos de analyst (manage.py run_jobs) en lugar de ejecutarse
+dentro del request.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sim', '0007_bot2_acd'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='simrun',
+            name='status',
+            field=models.CharField(
+                choices=[('queued', 'En cola'), ('running', 'Ejecutando'),
+                         ('done', 'Completado'), ('error', 'Error')],
+                default='running',
+                max_length=10,
+            ),
+        ),
+    ]
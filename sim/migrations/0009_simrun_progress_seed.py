@@ -0,0 +1,33 @@
+"""
+sim/migrations/0009_simrun_progress_seed.py
+
+SimRun registra el avance de la generación (days_done / days_total) y la
+semilla raíz usada por el backend numpy, para poder reproducir el run.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sim', '0008_simrun_queued_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simrun',
+            name='days_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simrun',
+            name='days_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simrun',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+"""
+sim/migrations/0010_interaction_keyset_idx.py
+
+Índice (account, hora_inicio, id) para el export por cursor (keyset):
+cada página es un range scan desde la última fila entregada.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sim', '0009_simrun_progress_seed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['account', 'hora_inicio', 'id'], name='sim_interac_account_233f74_idx'),
+        ),
+    ]
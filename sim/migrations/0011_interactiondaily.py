@@ -0,0 +1,41 @@
+"""
+sim/migrations/0011_interactiondaily.py
+
+InteractionDaily: rollup diario de Interaction que leen los dashboards.
+Las cuentas existentes se pueblan en 0012_backfill_interactiondaily.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sim', '0010_interaction_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteractionDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('canal', models.CharField(choices=[('inbound', 'Inbound Voz'), ('outbound', 'Outbound Discador'), ('digital', 'Digital (Chat/Mail/App)'), ('mixed', 'Mixto')], max_length=20)),
+                ('skill', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('atendida', 'Atendida'), ('abandonada', 'Abandonada'), ('no_contacto', 'No Contacto'), ('venta', 'Venta'), ('agenda', 'Agenda / Callback'), ('rechazo', 'Rechazo')], max_length=20)),
+                ('agent_codigo', models.CharField(blank=True, default='', max_length=20)),
+                ('n', models.IntegerField(default=0)),
+                ('n_duracion', models.IntegerField(default=0)),
+                ('duracion_s_sum', models.BigIntegerField(default=0)),
+                ('acw_s_sum', models.BigIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='sim.simaccount')),
+            ],
+            options={
+                'verbose_name': 'Rollup diario de interacciones',
+                'verbose_name_plural': 'Rollups diarios de interacciones',
+                'indexes': [models.Index(fields=['account', 'fecha'], name='sim_interac_account_2ff0af_idx')],
+                'unique_together': {('account', 'fecha', 'canal', 'skill', 'status', 'agent_codigo')},
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+"""
+sim/migrations/0012_backfill_interactiondaily.py
+
+Puebla InteractionDaily con las interacciones existentes (mismo cálculo que
+rollup.rebuild, para todas las cuentas): sin esto los dashboards mostraban
+cero hasta correr `rebuild_sim_rollup`.
+"""
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+MEASURES   = ('n', 'n_duracion', 'duracion_s_sum', 'acw_s_sum')
+BATCH_SIZE = 1000
+
+
+def backfill_rollup(apps, schema_editor):
+    Interaction      = apps.get_model('sim', 'Interaction')
+    InteractionDaily = apps.get_model('sim', 'InteractionDaily')
+
+    grouped = (
+        Interaction.objects
+        .values('account_id', 'fecha', 'canal', 'skill', 'status', 'agent__codigo')
+        .annotate(
+            n=Count('id'),
+            n_duracion=Count('id', filter=Q(duracion_s__gt=0)),
+            duracion_s_sum=Sum('duracion_s'),
+            acw_s_sum=Sum('acw_s'),
+        )
+        .order_by()
+    )
+    InteractionDaily.objects.all().delete()
+    batch = []
+    for g in grouped.iterator():
+        batch.append(InteractionDaily(
+            account_id   = g['account_id'],
+            fecha        = g['fecha'],
+            canal        = g['canal'],
+            skill        = g['skill'],
+            status       = g['status'],
+            agent_codigo = g['agent__codigo'] or '',
+            **{m: g[m] or 0 for m in MEASURES},
+        ))
+        if len(batch) >= BATCH_SIZE:
+            InteractionDaily.objects.bulk_create(batch)
+            batch = []
+    InteractionDaily.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sim', '0011_interactiondaily'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -166,6 +166,7 @@ class Interaction(models.Model):
             models.Index(fields=['account', 'fecha']),
             models.Index(fields=['account', 'canal', 'fecha']),
             models.Index(fields=['agent', 'fecha']),
+            models.Index(fields=['account', 'hora_inicio', 'id']),   # keyset del export
         ]
 
     def __str__(self):
@@ -176,12 +177,47 @@ class Interaction(models.Model):
         return self.duracion_s + self.acw_s
 
 
+class InteractionDaily(models.Model):
+    """
+    Rollup diario de Interaction por (cuenta, fecha, canal, skill, status, agente).
+    Lo mantienen HistoricalEngine y gtr_engine.persist_session al insertar;
+    `manage.py rebuild_sim_rollup` lo recalcula desde Interaction.
+    Los dashboards leen de aquí en lugar de agregar las filas crudas.
+
+    El agente va por código ('' = sin agente) y no por FK: un NULL en la clave
+    única no deduplica en MySQL y el upsert incremental necesita la clave completa.
+    """
+    account        = models.ForeignKey(SimAccount, on_delete=models.CASCADE, related_name='daily_rollups')
+    fecha          = models.DateField()
+    canal          = models.CharField(max_length=20, choices=CANAL_CHOICES)
+    skill          = models.CharField(max_length=100, blank=True)
+    status         = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    agent_codigo   = models.CharField(max_length=20, blank=True, default='')
+
+    n              = models.IntegerField(default=0)          # interacciones
+    n_duracion     = models.IntegerField(default=0)          # con duracion_s > 0
+    duracion_s_sum = models.BigIntegerField(default=0)
+    acw_s_sum      = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name        = 'Rollup diario de interacciones'
+        verbose_name_plural = 'Rollups diarios de interacciones'
+        unique_together     = [('account', 'fecha', 'canal', 'skill', 'status', 'agent_codigo')]
+        indexes             = [
+            models.Index(fields=['account', 'fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} | {self.canal} | {self.status} | {self.agent_codigo or '-'} | {self.n}"
+
+
 class SimRun(models.Model):
     """
     Registro de cada ejecución del generador histórico.
     Permite saber cuándo se generó, cuánto tardó y cuántas interacciones produjo.
     """
     STATUS = [
+        ('queued',  'En cola'),
         ('running', 'Ejecutando'),
         ('done',    'Completado'),
         ('error',   'Error'),
@@ -194,6 +230,9 @@ class SimRun(models.Model):
     status       = models.CharField(max_length=10, choices=STATUS, default='running')
     interactions_generated = models.IntegerField(default=0)
     agents_generated       = models.IntegerField(default=0)
+    days_total   = models.IntegerField(default=0)
+    days_done    = models.IntegerField(default=0)                  # avance mientras corre
+    seed         = models.BigIntegerField(null=True, blank=True)   # semilla raíz (backend numpy)
     duration_s   = models.FloatField(default=0.0)
     error_msg    = models.TextField(blank=True)
     triggered_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sim_runs')
@@ -0,0 +1,137 @@
+# sim/rollup.py
+"""
+Rollup diario de interacciones (InteractionDaily).
+
+Los escritores de Interaction (HistoricalEngine, gtr_engine.persist_session)
+acumulan en memoria las filas que insertan con accumulate() y las suman al
+rollup con apply() después del INSERT. rebuild() lo recalcula desde cero
+(comando rebuild_sim_rollup). Los dashboards leen con totals().
+
+Clave: (fecha, canal, skill, status, agent_codigo).
+Medidas: n, n_duracion (duracion_s > 0), duracion_s_sum, acw_s_sum.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_KEY = ('fecha', 'canal', 'skill', 'status', 'agent_codigo')
+MEASURES   = ('n', 'n_duracion', 'duracion_s_sum', 'acw_s_sum')
+BATCH_SIZE = 1000
+
+
+def accumulate(buckets: dict, rows) -> dict:
+    """
+    Suma `rows` (dicts con el formato de los generadores) en
+    buckets {clave: [n, n_duracion, duracion_s_sum, acw_s_sum]}.
+    """
+    for r in rows:
+        key = (r['fecha'], r['canal'], r.get('skill') or '', r['status'], r.get('agent_codigo') or '')
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = [0, 0, 0, 0]
+        dur = r.get('duracion_s') or 0
+        b[0] += 1
+        b[1] += dur > 0
+        b[2] += dur
+        b[3] += r.get('acw_s') or 0
+    return buckets
+
+
+def apply(account_id, buckets: dict) -> int:
+    """
+    Suma los buckets a InteractionDaily (upsert incremental bajo
+    select_for_update). Devuelve cuántas filas del rollup se tocaron.
+    """
+    if not buckets:
+        return 0
+    for attempt in range(2):
+        try:
+            return _apply(account_id, buckets)
+        except IntegrityError:
+            # Otro escritor creó la misma clave entre el SELECT y el INSERT
+            if attempt:
+                raise
+            logger.info("rollup: conflicto de clave en %s, reintentando", account_id)
+
+
+def _apply(account_id, buckets: dict) -> int:
+    from sim.models import InteractionDaily
+
+    fechas = {key[0] for key in buckets}
+    with transaction.atomic():
+        existing = {
+            tuple(getattr(r, f) for f in ROLLUP_KEY): r
+            for r in InteractionDaily.objects.select_for_update()
+                                             .filter(account_id=account_id, fecha__in=fechas)
+        }
+        new, changed = [], []
+        for key, values in buckets.items():
+            row = existing.get(key)
+            if row is None:
+                new.append(InteractionDaily(account_id=account_id,
+                                            **dict(zip(ROLLUP_KEY, key)),
+                                            **dict(zip(MEASURES, values))))
+                continue
+            for field, value in zip(MEASURES, values):
+                setattr(row, field, getattr(row, field) + value)
+            changed.append(row)
+
+        InteractionDaily.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        if changed:
+            InteractionDaily.objects.bulk_update(changed, MEASURES, batch_size=BATCH_SIZE)
+    return len(new) + len(changed)
+
+
+def rebuild(account) -> int:
+    """Recalcula el rollup de la cuenta desde Interaction. Devuelve filas creadas."""
+    from sim.models import Interaction, InteractionDaily
+
+    grouped = (
+        Interaction.objects.filter(account=account)
+        .values('fecha', 'canal', 'skill', 'status', 'agent__codigo')
+        .annotate(
+            n=Count('id'),
+            n_duracion=Count('id', filter=Q(duracion_s__gt=0)),
+            duracion_s_sum=Sum('duracion_s'),
+            acw_s_sum=Sum('acw_s'),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        InteractionDaily.objects.filter(account=account).delete()
+        batch, created = [], 0
+        for g in grouped.iterator():
+            batch.append(InteractionDaily(
+                account_id   = account.id,
+                fecha        = g['fecha'],
+                canal        = g['canal'],
+                skill        = g['skill'],
+                status       = g['status'],
+                agent_codigo = g['agent__codigo'] or '',
+                **{m: g[m] or 0 for m in MEASURES},
+            ))
+            if len(batch) >= BATCH_SIZE:
+                InteractionDaily.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        InteractionDaily.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def totals(account, by: tuple, since=None) -> list:
+    """Medidas sumadas del rollup agrupadas por `by` (campos de ROLLUP_KEY)."""
+    from sim.models import InteractionDaily
+
+    qs = InteractionDaily.objects.filter(account=account)
+    if since:
+        qs = qs.filter(fecha__gte=since)
+    # Alias con prefijo: annotate no admite el nombre de un campo del modelo
+    rows = qs.values(*by).annotate(**{f'sum_{m}': Sum(m) for m in MEASURES}).order_by(*by)
+    return [
+        {**{f: r[f] for f in by}, **{m: r[f'sum_{m}'] or 0 for m in MEASURES}}
+        for r in rows
+    ]
@@ -0,0 +1,8 @@
+# sim/routing.py
+from django.urls import re_path
+
+from .consumers import SimSessionConsumer
+
+websocket_urlpatterns = [
+    re_path(r'ws/sim/(?P<session_id>[0-9a-f-]+)/$', SimSessionConsumer.as_asgi()),
+]
@@ -0,0 +1,148 @@
+# sim/tests/test_acd_router.py
+"""
+Tests unitarios para el núcleo de routing ACD (sim/acd_router.py) y los
+helpers de views/acd.py que trabajan sobre slots ya cargados.
+No requieren base de datos — slots e interacciones son SimpleNamespace.
+
+Cobertura:
+  SlotRouter     → skill, reales primero, menor carga, orden, fallback global,
+                   release con carga nueva, entradas viejas, len
+  RoutingBatch   → un bulk_update por modelo, completadas después del flush
+  breaks         → sólo simulados/bot con perfil, cambios al batch
+  resolución     → rechazo sin escribir en BD
+  _do_routing    → la cola se lee acotada a ACD_ROUTE_BATCH por tick
+"""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from sim import compiled_config
+from sim.acd_router import RoutingBatch, SlotRouter
+from sim.views import acd
+
+
+def _slot(skill='GENERAL', agent_type='simulated', atendidas=0, status='available', profile=None):
+    return SimpleNamespace(id=uuid.uuid4(), skill=skill, agent_type=agent_type, status=status,
+                           stats={'atendidas': atendidas}, profile=profile)
+
+
+class TestSlotRouter(SimpleTestCase):
+
+    def test_skill_match_first(self):
+        other, match = _slot('PLD'), _slot('CONVENIOS', atendidas=9)
+        router = SlotRouter([other, match])
+        self.assertIs(router.pick('CONVENIOS'), match)
+
+    def test_real_before_simulated_then_least_load(self):
+        busy_sim, real, idle_sim = _slot(atendidas=5), _slot(agent_type='real', atendidas=50), _slot(atendidas=1)
+        router = SlotRouter([busy_sim, real, idle_sim])
+        self.assertEqual([router.pick('GENERAL') for _ in range(3)], [real, idle_sim, busy_sim])
+        self.assertIsNone(router.pick('GENERAL'))
+
+    def test_ties_keep_slot_order(self):
+        slots  = [_slot() for _ in range(4)]
+        router = SlotRouter(slots)
+        self.assertEqual([router.pick('GENERAL') for _ in range(4)], slots)
+
+    def test_fallback_to_any_skill(self):
+        only = _slot('PLD')
+        router = SlotRouter([only])
+        self.assertIs(router.pick('SIN_AGENTES'), only)
+        self.assertEqual(len(router), 0)
+
+    def test_slot_taken_once_across_heaps(self):
+        a = _slot('PLD')
+        router = SlotRouter([a])
+        self.assertIs(router.pick('PLD'), a)
+        self.assertIsNone(router.pick_any())
+
+    def test_release_uses_new_load(self):
+        a, b = _slot(atendidas=0), _slot(atendidas=1)
+        router = SlotRouter([a, b])
+        self.assertIs(router.pick('GENERAL'), a)
+        a.stats['atendidas'] = 3
+        router.release(a)
+        self.assertEqual(len(router), 2)
+        self.assertEqual([router.pick('GENERAL'), router.pick('GENERAL')], [b, a])
+        self.assertIsNone(router.pick('GENERAL'))
+
+
+class TestRoutingBatch(SimpleTestCase):
+
+    def test_flush_bulk_updates_then_emits(self):
+        batch = RoutingBatch()
+        ix, slot = SimpleNamespace(id=1), SimpleNamespace(id=2)
+        batch.interaction(ix)
+        batch.interaction(ix)
+        batch.slot(slot)
+        batch.completed.append((ix, slot))
+
+        calls = []
+        with patch('sim.models.ACDInteraction.objects.bulk_update',
+                   side_effect=lambda objs, fields: calls.append(('ix', objs))), \
+             patch('sim.models.ACDAgentSlot.objects.bulk_update',
+                   side_effect=lambda objs, fields: calls.append(('slot', objs))):
+            batch.flush(on_completed=lambda i, s: calls.append(('emit', i)))
+
+        self.assertEqual(calls, [('ix', [ix]), ('slot', [slot]), ('emit', ix)])
+        self.assertEqual((batch.interactions, batch.slots, batch.completed), ({}, {}, []))
+
+    def test_empty_flush_is_noop(self):
+        with patch('sim.models.ACDInteraction.objects.bulk_update') as upd:
+            RoutingBatch().flush()
+        upd.assert_not_called()
+
+
+class TestSimulatedBreaks(SimpleTestCase):
+
+    def test_only_profiled_simulated_slots(self):
+        always = SimpleNamespace(break_freq=3600 * 100, break_dur_s=60)
+        sim_slot  = _slot(profile=always)
+        real_slot = _slot(agent_type='real', profile=always)
+        no_prof   = _slot()
+        back      = _slot(agent_type='bot', status='break', profile=always)
+        batch = RoutingBatch()
+        acd._tick_simulated_breaks([sim_slot, real_slot, no_prof, back], batch)
+        self.assertEqual((sim_slot.status, real_slot.status, no_prof.status, back.status),
+                         ('break', 'available', 'available', 'available'))
+        self.assertEqual(set(batch.slots), {sim_slot.id, back.id})
+
+
+class TestResolveSimulated(SimpleTestCase):
+
+    def test_rejection_is_batched(self):
+        profile = SimpleNamespace(
+            answer_rate=0.0, conv_rate=0, agenda_rate=0, hold_rate=0, hold_dur_s=30,
+            aht_factor=1, acw_factor=1, corte_rate=0, transfer_rate=0, available_pct=1)
+        session = SimpleNamespace(canal='inbound', account_id=uuid.uuid4())
+        slot = _slot(status='ringing', profile=profile)
+        slot.session = session
+        ix = SimpleNamespace(id=uuid.uuid4(), status='ringing', ended_at=None)
+
+        batch = RoutingBatch()
+        with patch('sim.compiled_config.get', return_value=compiled_config.CompiledConfig({})):
+            acd._resolve_simulated_slot(slot, ix, batch, SlotRouter([]))
+
+        self.assertEqual((ix.status, slot.status), ('rejected', 'available'))
+        self.assertEqual(list(batch.interactions.values()), [ix])
+        self.assertEqual(list(batch.slots.values()), [slot])
+        self.assertEqual(batch.completed, [])
+
+
+class TestDoRouting(SimpleTestCase):
+
+    def test_queue_read_is_bounded(self):
+        session = SimpleNamespace(dialing_mode='predictive', canal='inbound', slots=MagicMock())
+        session.slots.select_related.return_value = [_slot(agent_type='real')]
+        ordered = MagicMock()
+        ordered.__getitem__.return_value = []
+
+        with patch.object(acd.ACDInteraction.objects, 'filter') as filter_, \
+                patch.object(acd, '_generate_acd_interactions'):
+            filter_.return_value.order_by.return_value = ordered
+            acd._do_routing(session, {})
+
+        ordered.__getitem__.assert_called_once_with(slice(None, acd.ACD_ROUTE_BATCH))
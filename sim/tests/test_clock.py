@@ -0,0 +1,217 @@
+# sim/tests/test_clock.py
+"""
+Tests unitarios para el clock del servidor (sim/clock.py).
+No requieren base de datos ni Redis — cache locmem y channel layer falso.
+
+Cobertura:
+  lock       → un dueño por sesión, renovación, release sólo del dueño
+  run        → publica los cambios de cada tick al grupo, termina con la sesión,
+               error → cierra
+  delta      → sólo claves cambiadas (dicts anidados), eventos vacíos fuera,
+               resync → estado completo
+  subscribe  → refcount de viewers, el último detiene el clock, resuscribir
+               mientras la tarea se cancela crea un clock nuevo
+  pasos      → _gtr_step con sesión inexistente / terminada
+  to_wire    → UUID serializable para msgpack
+  consumer   → GTR sólo para el usuario que creó la sesión
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from sim import clock
+from sim.consumers import SimSessionConsumer
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'sim-clock-tests'}}
+
+
+class _FakeLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+_real_sleep = asyncio.sleep
+
+
+async def _no_sleep(_):
+    await _real_sleep(0)
+
+
+@override_settings(CACHES=LOCMEM)
+class TestLock(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_single_owner(self):
+        a, b = clock.SessionClock('gtr', 's1', 1), clock.SessionClock('gtr', 's1', 1)
+        self.assertTrue(a.acquire())
+        self.assertTrue(a.acquire())          # renovación
+        self.assertFalse(b.acquire())
+        self.assertTrue(clock.is_running('gtr', 's1'))
+        self.assertFalse(clock.is_running('acd', 's1'))
+
+    def test_release_only_by_owner(self):
+        a, b = clock.SessionClock('gtr', 's1', 1), clock.SessionClock('gtr', 's1', 1)
+        a.acquire()
+        b.release()
+        self.assertTrue(clock.is_running('gtr', 's1'))
+        a.release()
+        self.assertFalse(clock.is_running('gtr', 's1'))
+        self.assertTrue(b.acquire())
+
+
+@override_settings(CACHES=LOCMEM)
+class TestRun(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.layer = _FakeLayer()
+
+    def _run(self, step):
+        c = clock.SessionClock('gtr', 's1', 1)
+        with patch.dict(clock.STEPS, {'gtr': step}), \
+             patch('channels.layers.get_channel_layer', return_value=self.layer), \
+             patch.object(clock.asyncio, 'sleep', _no_sleep):
+            asyncio.run(c.run())
+        return [m['payload'] for _, m in self.layer.sent]
+
+    def test_publishes_changes_until_finished(self):
+        ticks = iter([('active', False), ('active', False), ('finished', True)])
+
+        def step(sid):
+            status, done = next(ticks)
+            return {'success': True, 'status': status}, done
+
+        payloads = self._run(step)
+        # El segundo tick no cambió nada: no se publica
+        self.assertEqual(payloads, [{'success': True, 'status': 'active'}, {'status': 'finished'}])
+        self.assertEqual({g for g, _ in self.layer.sent}, {'sim_s1'})
+        self.assertEqual({m['type'] for _, m in self.layer.sent}, {'sim.update'})
+        self.assertFalse(clock.is_running('gtr', 's1'))
+
+    def test_step_error_stops_clock(self):
+        def step(sid):
+            raise RuntimeError('boom')
+
+        payloads = self._run(step)
+        self.assertEqual(payloads, [{'success': False, 'error': 'boom'}])
+        self.assertFalse(clock.is_running('gtr', 's1'))
+
+
+@override_settings(CACHES=LOCMEM)
+class TestDelta(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_changed_keys(self):
+        prev = {'success': True, 'sim_time': '09:00', 'kpis': {'entrantes': 5, 'sl_pct': 80.0},
+                'slots': [{'id': 1, 'status': 'available'}], 'new_alerts': [], 'new_interactions': 0}
+        cur = {'success': True, 'sim_time': '09:03', 'kpis': {'entrantes': 9, 'sl_pct': 80.0},
+               'slots': [{'id': 1, 'status': 'available'}], 'new_alerts': [], 'new_interactions': 4}
+        self.assertEqual(clock.delta(prev, cur),
+                         {'sim_time': '09:03', 'kpis': {'entrantes': 9}, 'new_interactions': 4})
+        self.assertEqual(clock.delta(None, prev),
+                         {'success': True, 'sim_time': '09:00', 'kpis': prev['kpis'], 'slots': prev['slots']})
+
+    def test_resync_publishes_full_state(self):
+        c = clock.SessionClock('gtr', 's1', 1)
+        with patch.dict(clock.STEPS, {'gtr': lambda sid: ({'status': 'active', 'n': 1}, False)}):
+            self.assertEqual(c.step()[0], {'status': 'active', 'n': 1})
+            self.assertEqual(c.step()[0], {})
+            clock.request_resync('gtr', 's1')
+            self.assertEqual(c.step()[0], {'status': 'active', 'n': 1})
+
+
+@override_settings(CACHES=LOCMEM)
+class TestSubscribe(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refcount(self):
+        async def scenario():
+            started = asyncio.Event()
+
+            async def fake_run(self):
+                started.set()
+                await asyncio.sleep(3600)
+
+            with patch.object(clock.SessionClock, 'run', fake_run):
+                first  = clock.subscribe('acd', 'x')
+                second = clock.subscribe('acd', 'x')
+                await started.wait()
+                self.assertIs(first, second)
+                self.assertEqual(first.viewers, 2)
+                clock.unsubscribe('acd', 'x')
+                self.assertFalse(first.task.cancelled() or first.task.done())
+                clock.unsubscribe('acd', 'x')
+                await asyncio.sleep(0)
+                self.assertTrue(first.task.cancelled())
+            clock._clocks.clear()
+
+        asyncio.run(scenario())
+
+    def test_resubscribe_while_cancelling(self):
+        async def scenario():
+            async def fake_run(self):
+                try:
+                    await asyncio.sleep(3600)
+                finally:
+                    if clock._clocks.get((self.kind, self.sid)) is self:
+                        del clock._clocks[(self.kind, self.sid)]
+
+            with patch.object(clock.SessionClock, 'run', fake_run):
+                old = clock.subscribe('gtr', 'x')
+                await asyncio.sleep(0)
+                clock.unsubscribe('gtr', 'x')
+                new = clock.subscribe('gtr', 'x')   # la tarea anterior aún no terminó
+                self.assertIsNot(new, old)
+                await asyncio.sleep(0)
+                self.assertTrue(old.task.cancelled())
+                self.assertIs(clock._clocks.get(('gtr', 'x')), new)
+                new.stop()
+            clock._clocks.clear()
+
+        asyncio.run(scenario())
+
+
+class TestSteps(SimpleTestCase):
+
+    def test_gtr_missing_session(self):
+        with patch('sim.gtr_engine.tick', return_value={'error': 'session_not_found'}):
+            self.assertEqual(clock._gtr_step('s'),
+                             ({'success': False, 'error': 'session_not_found'}, True))
+
+    def test_gtr_finished(self):
+        with patch('sim.gtr_engine.tick', return_value={'status': 'finished'}):
+            self.assertEqual(clock._gtr_step('s'), ({'success': True, 'status': 'finished'}, True))
+
+    def test_to_wire(self):
+        pk = uuid.uuid4()
+        self.assertEqual(clock.to_wire({'id': pk}), {'id': str(pk)})
+
+
+class TestConsumerOwnership(SimpleTestCase):
+
+    def _kind(self, gtr_user_id, user_id):
+        consumer = SimSessionConsumer()
+        consumer.sid = 'abc'
+        with patch('sim.models.ACDSession.objects.filter') as acd, \
+             patch('sim.gtr_engine.load_session', return_value=SimpleNamespace(user_id=gtr_user_id)):
+            acd.return_value.exists.return_value = False
+            return consumer._resolve_kind(SimpleNamespace(id=user_id))
+
+    def test_gtr_only_for_creator(self):
+        self.assertEqual(self._kind(7, 7), 'gtr')
+        self.assertIsNone(self._kind(7, 8))
@@ -0,0 +1,123 @@
+# sim/tests/test_compiled_config.py
+"""
+Tests unitarios para la config compilada por cuenta (sim/compiled_config.py)
+y sus compiladores en gtr_engine / views/acd.py.
+No requieren base de datos — cache locmem y config pasada a get().
+
+Cobertura:
+  get/invalidate     → reutiliza la compilación, invalidate recompila,
+                       versión desalojada de la cache = recompila
+  table / samplers   → memoizados por nombre / conjunto de canales
+  Categorical.choice → misma clave que weighted_choice con el mismo estado
+  GTR                → intradía con horas str, ventana sin consultas a BD
+  ACD                → skills y TMO/ACW por canal con defaults
+"""
+
+import random
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from sim import compiled_config, gtr_engine
+from sim.generators.base import weighted_choice
+from sim.generators.vectorized import Categorical
+from sim.views import acd
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'sim-compiled-config-tests'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class TestCompiledConfig(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        compiled_config._compiled.clear()
+        self.account_id = uuid.uuid4()
+
+    def test_reused_until_invalidated(self):
+        first = compiled_config.get(self.account_id, {'inbound': {}})
+        self.assertIs(compiled_config.get(str(self.account_id)), first)
+        compiled_config.invalidate(self.account_id)
+        second = compiled_config.get(self.account_id, {'inbound': {'tmo_s': 1}})
+        self.assertIsNot(second, first)
+        self.assertEqual(second.section('inbound'), {'tmo_s': 1})
+
+    def test_invalidation_seen_by_other_process(self):
+        first = compiled_config.get(self.account_id, {})
+        # Otro proceso invalidó: sólo cambia la versión en la cache
+        cache.set(compiled_config._version_key(str(self.account_id)), 'v2')
+        self.assertIsNot(compiled_config.get(self.account_id, {}), first)
+
+    def test_evicted_version_is_a_miss(self):
+        first = compiled_config.get(self.account_id, {})
+        # Otro proceso invalidó y luego la cache desalojó la versión
+        cache.delete(compiled_config._version_key(str(self.account_id)))
+        self.assertIsNot(compiled_config.get(self.account_id, {}), first)
+
+    def test_no_reuse_without_version(self):
+        with patch.object(compiled_config.cache, 'get', return_value=None):
+            first = compiled_config.get(self.account_id, {})
+            self.assertIsNot(compiled_config.get(self.account_id, {}), first)
+
+    def test_table_built_once(self):
+        cc, calls = compiled_config.CompiledConfig({'x': 1}), []
+        build = lambda config: calls.append(config) or len(calls)
+        self.assertEqual((cc.table('t', build), cc.table('t', build)), (1, 1))
+        self.assertEqual(calls, [{'x': 1}])
+
+    def test_samplers_memoized_by_channel_set(self):
+        cc = compiled_config.CompiledConfig({})
+        a = cc.samplers(['outbound', 'inbound'])
+        self.assertIs(cc.samplers(['inbound', 'outbound']), a)
+        self.assertEqual(list(a), ['inbound', 'outbound'])
+
+
+class TestCategoricalChoice(SimpleTestCase):
+
+    def test_matches_weighted_choice(self):
+        weights = {'A': 0.6, 'B': 0.3, 'C': 0.1}
+        cat = Categorical(weights)
+        random.seed(11)
+        expected = [weighted_choice(weights) for _ in range(200)]
+        random.seed(11)
+        self.assertEqual([cat.choice() for _ in range(200)], expected)
+
+
+@override_settings(CACHES=LOCMEM)
+class TestGtrTables(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        compiled_config._compiled.clear()
+
+    def test_intraday_keys_from_json(self):
+        t = gtr_engine._compile_inbound({'inbound': {'intraday': {'9': 0.5, '10': 0.5}}})
+        self.assertEqual(t['intraday'], {9: 0.5, 10: 0.5})
+
+    def test_window_without_db(self):
+        session = gtr_engine.GTRSession('s', 'acct-1', 'Banca', date(2026, 3, 16), 15, canal='outbound')
+        compiled_config.get('acct-1', {'outbound': {'daily_marcaciones': 100000}})
+        with patch('sim.models.SimAccount.objects') as objects:
+            rows = gtr_engine._generate_window(session, 10, 0, 10, 30)
+        objects.assert_not_called()
+        self.assertFalse(objects.filter.called)
+        self.assertTrue(rows)
+        self.assertEqual({r['canal'] for r in rows}, {'outbound'})
+
+
+class TestAcdTables(SimpleTestCase):
+
+    def test_defaults_by_channel(self):
+        out = acd._compile_acd('outbound')({})
+        self.assertEqual(out['skills'].keys, ['OUTBOUND'])
+        self.assertEqual((out['tmo_s'], out['acw_s']), (180, 12))
+        self.assertIsNone(out['tipif_contacto'])
+
+    def test_account_values(self):
+        dig = acd._compile_acd('digital')({'digital': {'duration_s': 500, 'tipificaciones': {'X': 1}}})
+        self.assertEqual((dig['tmo_s'], dig['acw_s'], dig['tipifs'].keys), (500, 10, ['X']))
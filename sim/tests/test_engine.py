@@ -0,0 +1,141 @@
+# sim/tests/test_engine.py
+"""
+Tests unitarios para la generación histórica por días (engine.py +
+vectorized.plan_days). No requieren base de datos — usan SimpleTestCase.
+
+Cobertura:
+  day_streams          → mismo (seed, día) = mismos números; días independientes
+  plan_days            → volúmenes deterministas, lead_offset consecutivos
+  generate_planned_day → mismo resultado en cualquier orden, lead_id únicos
+  _iter_days           → serie == plan (misma seed)
+  _BulkWriter          → inserta todo, avisa el avance (con meta), propaga errores
+"""
+
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from sim import engine as engine_mod
+from sim.engine import HistoricalEngine, _BulkWriter
+from sim.generators.vectorized import (
+    compile_samplers, day_streams, generate_planned_day, plan_days,
+)
+
+AGENT_POOL = [
+    {'codigo': f'AGT-{i:03d}', 'turno': 'MANANA', 'antiguedad': 'senior',
+     'sph_base': 0.128, 'adherencia_base': 0.95, 'tmo_factor': 1.0}
+    for i in range(1, 6)
+]
+
+CONFIG  = {'outbound': {'daily_marcaciones': 300}, 'inbound': {'weekday_vol': 200}}
+CANALES = ['inbound', 'outbound', 'digital']
+DAYS    = [date(2026, 3, 14) + timedelta(days=i) for i in range(8)]   # incluye sáb/dom
+
+
+class TestDayStreams(SimpleTestCase):
+
+    def test_deterministic(self):
+        a = day_streams(42, DAYS[0])[1].random(5)
+        b = day_streams(42, DAYS[0])[1].random(5)
+        self.assertEqual(a.tolist(), b.tolist())
+
+    def test_days_and_streams_differ(self):
+        vol, body = day_streams(42, DAYS[0])
+        self.assertNotEqual(vol.random(), body.random())
+        self.assertNotEqual(day_streams(42, DAYS[0])[1].random(),
+                            day_streams(42, DAYS[1])[1].random())
+
+
+class TestPlanDays(SimpleTestCase):
+
+    def setUp(self):
+        self.samplers = compile_samplers(CANALES, CONFIG)
+
+    def test_offsets_are_consecutive(self):
+        plans = plan_days(self.samplers, DAYS, 7, lead_offset=1000)
+        expected = 1000
+        for plan in plans:
+            for canal in CANALES:
+                self.assertEqual(plan['offsets'][canal], expected)
+                expected += plan['volumes'][canal]
+
+    def test_sunday_outbound_empty(self):
+        plans = plan_days(self.samplers, DAYS, 7)
+        sunday = next(p for p in plans if p['day'].weekday() == 6)
+        self.assertEqual(sunday['volumes']['outbound'], 0)
+
+    def test_same_seed_same_plan(self):
+        self.assertEqual(plan_days(self.samplers, DAYS, 7), plan_days(self.samplers, DAYS, 7))
+
+    def test_rows_match_plan_in_any_order(self):
+        plans = plan_days(self.samplers, DAYS, 7)
+        forward  = [generate_planned_day(self.samplers, p, AGENT_POOL, 7) for p in plans]
+        backward = [generate_planned_day(self.samplers, p, AGENT_POOL, 7) for p in reversed(plans)]
+        self.assertEqual(forward, list(reversed(backward)))
+
+        for plan, rows in zip(plans, forward):
+            self.assertEqual(len(rows), sum(plan['volumes'].values()))
+        ids = [(r['canal'], r['lead_id']) for rows in forward for r in rows]
+        self.assertEqual(len(ids), len(set(ids)))
+        numbers = sorted(int(lead.split('-')[1]) for _, lead in ids)
+        self.assertEqual(numbers, list(range(len(numbers))))
+
+
+class TestIterDays(SimpleTestCase):
+
+    def test_serial_matches_plan(self):
+        account = SimpleNamespace(id=uuid.uuid4(), config=CONFIG, canal='mixed')
+        engine  = HistoricalEngine(account, None, backend='numpy', seed=9)
+        serial  = [rows for _, rows in engine._iter_days(DAYS, CANALES, CONFIG, AGENT_POOL, 50)]
+
+        samplers = compile_samplers(CANALES, CONFIG)
+        planned  = [generate_planned_day(samplers, p, AGENT_POOL, 9)
+                    for p in plan_days(samplers, DAYS, 9, 50)]
+        self.assertEqual(serial, planned)
+
+    def test_python_backend_offsets_continue(self):
+        account = SimpleNamespace(id=uuid.uuid4(), config={}, canal='digital')
+        engine  = HistoricalEngine(account, None, backend='python')
+        days    = list(engine._iter_days(DAYS[:3], ['digital'], {}, AGENT_POOL, 0))
+        leads   = [r['lead_id'] for _, rows in days for r in rows]
+        self.assertEqual(len(leads), len(set(leads)))
+
+
+class _FakeManager:
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        if self.fail_on is not None and len(self.batches) == self.fail_on:
+            raise RuntimeError('boom')
+        self.batches.append(list(objs))
+
+
+class TestBulkWriter(SimpleTestCase):
+
+    def _model(self, **kw):
+        return SimpleNamespace(objects=_FakeManager(**kw))
+
+    def test_writes_everything_in_order(self):
+        model, seen = self._model(), []
+        writer = _BulkWriter(model, 100, depth=2, on_written=lambda n, meta: seen.append((n, meta)))
+        for i in range(10):
+            writer.put(list(range(i)), meta=f'd{i}')
+        writer.close()
+        self.assertEqual([len(b) for b in model.objects.batches], list(range(1, 10)))
+        self.assertEqual(seen, [(i, f'd{i}') for i in range(10)])
+        self.assertEqual(writer.written, 45)
+
+    def test_error_is_raised_on_close(self):
+        writer = _BulkWriter(self._model(fail_on=1), 100)
+        writer.put([1])
+        writer.put([2])
+        with self.assertRaises(RuntimeError):
+            writer.close()
+
+    def test_worker_function_is_importable(self):
+        # El pool 'spawn' necesita una función de módulo (picklable)
+        self.assertTrue(callable(engine_mod._generate_days_worker))
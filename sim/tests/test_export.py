@@ -0,0 +1,109 @@
+# sim/tests/test_export.py
+"""
+Tests unitarios para el export de interacciones por cursor (views/simulator.py).
+No requieren base de datos — usan SimpleTestCase.
+
+Cobertura:
+  cursor          → roundtrip, cursor inválido
+  fields          → todas por defecto, proyección, columnas desconocidas
+  _export_values  → claves del keyset + dependencias de tmo_total_s, JOIN agente
+  _export_row     → formato legacy, agente nulo
+  _keyset_iter    → recorre todas las páginas sin OFFSET
+  _stream_export  → ndjson y csv
+"""
+
+import json
+import uuid
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from sim.views import simulator as views
+
+TS = datetime(2026, 3, 16, 9, 30, 5, tzinfo=timezone.utc)
+
+
+def _values(i=0, agent=True):
+    return {
+        'id':                uuid.UUID(int=i + 1),
+        'canal':             'inbound',
+        'agent__codigo':     'AGT-001' if agent else None,
+        'agent__turno':      'MANANA' if agent else None,
+        'fecha':             date(2026, 3, 16),
+        'hora_inicio':       TS,
+        'duracion_s':        300,
+        'acw_s':             20,
+    }
+
+
+class TestCursor(SimpleTestCase):
+
+    def test_roundtrip(self):
+        pk = uuid.uuid4()
+        self.assertEqual(views._decode_cursor(views._encode_cursor(TS, pk)), (TS, pk))
+
+    def test_invalid(self):
+        for bad in ('nope', views._encode_cursor(TS, 'x')):
+            with self.assertRaises(ValueError):
+                views._decode_cursor(bad)
+
+
+class TestProjection(SimpleTestCase):
+
+    def test_all_columns_by_default(self):
+        self.assertEqual(views._export_columns(''), list(views.EXPORT_COLUMNS))
+
+    def test_projection_and_unknown(self):
+        self.assertEqual(views._export_columns('canal, agente'), ['canal', 'agente'])
+        with self.assertRaises(ValueError):
+            views._export_columns('canal,foo')
+
+    def test_values_include_keyset_and_join(self):
+        needed = views._export_values(['agente', 'tmo_total_s'])
+        self.assertEqual(set(needed), {'id', 'hora_inicio', 'agent__codigo', 'duracion_s', 'acw_s'})
+
+
+class TestExportRow(SimpleTestCase):
+
+    def test_legacy_format(self):
+        cols = ['id', 'cuenta', 'fecha', 'hora_inicio', 'tmo_total_s', 'agente']
+        row  = views._export_row(_values(), cols, 'Banca')
+        self.assertEqual(row, {
+            'id': str(uuid.UUID(int=1)), 'cuenta': 'Banca', 'fecha': '2026-03-16',
+            'hora_inicio': '2026-03-16 09:30:05', 'tmo_total_s': 320, 'agente': 'AGT-001',
+        })
+
+    def test_missing_agent(self):
+        row = views._export_row(_values(agent=False), ['agente', 'turno'], 'Banca')
+        self.assertEqual(row, {'agente': '', 'turno': ''})
+
+
+class TestKeysetIter(SimpleTestCase):
+
+    def test_walks_all_pages(self):
+        data  = [_values(i) for i in range(7)]
+        calls = []
+
+        def fake_page(qs, after, limit):
+            calls.append(after)
+            start = 0 if after is None else next(
+                i for i, v in enumerate(data) if v['id'] == after[1]) + 1
+            return data[start:start + limit]
+
+        with patch.object(views, '_keyset_page', fake_page):
+            rows = list(views._keyset_iter(None, None, chunk=3))
+
+        self.assertEqual(rows, data)
+        self.assertEqual(calls, [None, (TS, data[2]['id']), (TS, data[5]['id'])])
+
+
+class TestStreamExport(SimpleTestCase):
+
+    def test_ndjson(self):
+        lines = list(views._stream_export([_values(0), _values(1)], ['canal', 'tmo_total_s'], 'B', 'ndjson'))
+        self.assertEqual([json.loads(l) for l in lines], [{'canal': 'inbound', 'tmo_total_s': 320}] * 2)
+
+    def test_csv(self):
+        out = ''.join(views._stream_export([_values()], ['canal', 'agente'], 'B', 'csv'))
+        self.assertEqual(out.splitlines(), ['canal,agente', 'inbound,AGT-001'])
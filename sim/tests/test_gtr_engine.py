@@ -12,8 +12,10 @@ Cobertura:
   _update_kpis              → todos los estados de interacción
   _check_alerts             → umbral mínimo datos, alertas SL, abandono, atención
   inject_event              → 4 tipos de evento
-  add_interactions          → cap en 2000 entradas
-  get_interactions          → slicing por since_index
+  add_interactions          → log append-only, sin recorte
+  get_interactions          → lectura por rango (since_index, limit)
+  iter_interactions         → log completo por tramos
+  _RedisLog / _MemoryLog    → mismo contrato (Redis simulado / fallback en memoria)
   _session_key / _interactions_key → formato de clave Redis
 """
 
@@ -27,7 +29,8 @@ from sim.gtr_engine import (
     GTRSession, DEFAULT_THRESHOLDS,
     _session_key, _interactions_key,
     save_session, load_session, delete_session,
-    add_interactions, get_interactions,
+    add_interactions, get_interactions, interactions_count, iter_interactions,
+    _MemoryLog, _RedisLog, GTR_TTL,
     pause_session, resume_session, inject_event,
     _update_kpis, _check_alerts, _state_response,
 )
@@ -471,50 +474,96 @@ class TestSessionKeys(SimpleTestCase):
         self.assertEqual(_interactions_key('abc-123'), 'gtr:interactions:abc-123')
 
 
-class TestInteractionsPersistence(SimpleTestCase):
+class _FakeRedis:
+    """Lo mínimo de redis-py que usa _RedisLog (listas + pipeline)."""
 
-    def test_add_interactions_appends(self):
-        store = {}
-        def mock_get(key):  return store.get(key)
-        def mock_set(key, val, timeout=None): store[key] = val
+    def __init__(self):
+        self.lists, self.ttl = {}, {}
 
-        with patch('sim.gtr_engine.cache') as mc:
-            mc.get.side_effect  = mock_get
-            mc.set.side_effect  = mock_set
-            add_interactions('sid-1', [{'row': 1}, {'row': 2}])
-            add_interactions('sid-1', [{'row': 3}])
-            result = get_interactions('sid-1')
+    def pipeline(self):
+        return _FakePipeline(self)
 
-        self.assertEqual(len(result), 3)
+    def rpush(self, key, *vals):
+        self.lists.setdefault(key, []).extend(v.encode() for v in vals)
+        return len(self.lists[key])
 
-    def test_get_interactions_since_index(self):
-        rows = [{'i': i} for i in range(10)]
-        with patch('sim.gtr_engine.cache') as mc:
-            mc.get.return_value = rows
-            result = get_interactions('sid-x', since_index=5)
-        self.assertEqual(len(result), 5)
-        self.assertEqual(result[0]['i'], 5)
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+        return True
 
-    def test_add_interactions_caps_at_2000(self):
-        big_list = [{'i': i} for i in range(1990)]
-        store    = {_interactions_key('sid-cap'): big_list}
+    def lrange(self, key, start, end):
+        data = self.lists.get(key, [])
+        return data[start:] if end == -1 else data[start:end + 1]
 
-        def mock_get(key):  return store.get(key, [])
-        def mock_set(key, val, timeout=None): store[key] = val
+    def llen(self, key):
+        return len(self.lists.get(key, []))
 
-        with patch('sim.gtr_engine.cache') as mc:
-            mc.get.side_effect  = mock_get
-            mc.set.side_effect  = mock_set
-            add_interactions('sid-cap', [{'i': i} for i in range(50)])
+    def delete(self, key):
+        self.lists.pop(key, None)
 
-        saved = store[_interactions_key('sid-cap')]
-        self.assertLessEqual(len(saved), 2000)
 
-    def test_get_interactions_empty_when_no_cache(self):
-        with patch('sim.gtr_engine.cache') as mc:
-            mc.get.return_value = None
-            result = get_interactions('sid-vacio')
-        self.assertEqual(result, [])
+class _FakePipeline:
+    def __init__(self, client):
+        self.client, self.calls = client, []
+
+    def __getattr__(self, name):
+        return lambda *a: self.calls.append((name, a))
+
+    def execute(self):
+        return [getattr(self.client, name)(*a) for name, a in self.calls]
+
+
+class TestInteractionsPersistence(SimpleTestCase):
+    """Log append-only, con el fallback en memoria y con Redis simulado."""
+
+    def setUp(self):
+        patcher = patch('sim.gtr_engine._log_backend', _MemoryLog())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_add_interactions_appends(self):
+        self.assertEqual(add_interactions('sid-1', [{'row': 1}, {'row': 2}]), 2)
+        self.assertEqual(add_interactions('sid-1', [{'row': 3}]), 3)
+        self.assertEqual(get_interactions('sid-1'), [{'row': 1}, {'row': 2}, {'row': 3}])
+
+    def test_get_interactions_since_index(self):
+        add_interactions('sid-x', [{'i': i} for i in range(10)])
+        result = get_interactions('sid-x', since_index=5)
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result[0]['i'], 5)
+        self.assertEqual(get_interactions('sid-x', 2, limit=3), [{'i': 2}, {'i': 3}, {'i': 4}])
+
+    def test_log_is_not_trimmed(self):
+        add_interactions('sid-cap', [{'i': i} for i in range(1990)])
+        add_interactions('sid-cap', [{'i': i} for i in range(50)])
+        self.assertEqual(interactions_count('sid-cap'), 2040)
+
+    def test_iter_interactions_batches(self):
+        add_interactions('sid-it', [{'i': i} for i in range(7)])
+        batches = list(iter_interactions('sid-it', batch=3))
+        self.assertEqual([len(b) for b in batches], [3, 3, 1])
+        self.assertEqual([r['i'] for b in batches for r in b], list(range(7)))
+
+    def test_get_interactions_empty_when_no_log(self):
+        self.assertEqual(get_interactions('sid-vacio'), [])
+        self.assertEqual(list(iter_interactions('sid-vacio')), [])
+
+    def test_delete_session_drops_log(self):
+        add_interactions('sid-del', [{'i': 1}])
+        with patch('sim.gtr_engine.cache'):
+            delete_session('sid-del')
+        self.assertEqual(interactions_count('sid-del'), 0)
+
+    def test_redis_log_same_contract(self):
+        client = _FakeRedis()
+        with patch('sim.gtr_engine._log_backend', _RedisLog(client)):
+            add_interactions('sid-r', [{'i': 0}, {'i': 1}])
+            add_interactions('sid-r', [{'i': 2}])
+            self.assertEqual(get_interactions('sid-r', 1), [{'i': 1}, {'i': 2}])
+            self.assertEqual(get_interactions('sid-r', 0, limit=1), [{'i': 0}])
+            self.assertEqual(get_interactions('sid-r', 0, limit=0), [])
+            self.assertEqual(interactions_count('sid-r'), 3)
+        self.assertEqual(client.ttl[_interactions_key('sid-r')], GTR_TTL)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -548,9 +597,11 @@ class TestSessionPersistence(SimpleTestCase):
         self.assertIsNone(result)
 
     def test_delete_session_calls_cache_delete(self):
-        with patch('sim.gtr_engine.cache') as mc:
+        # El log de interacciones se borra aparte (test_delete_session_drops_log)
+        with patch('sim.gtr_engine.cache') as mc, \
+             patch('sim.gtr_engine._log_backend', _MemoryLog()):
             delete_session('sid-del')
-        self.assertEqual(mc.delete.call_count, 2)
+        mc.delete.assert_called_once_with(_session_key('sid-del'))
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -0,0 +1,90 @@
+# sim/tests/test_rollup.py
+"""
+Tests unitarios para el rollup diario (sim/rollup.py) y los KPIs que lo leen.
+No requieren base de datos — las lecturas del rollup se simulan con mocks.
+
+Cobertura:
+  accumulate        → clave completa, medidas, agente/skill vacíos, acumula sobre buckets
+  apply             → buckets vacíos, reintento ante conflicto de clave
+  get_account_kpis  → totales por canal/status, TMO ponderado, cuenta vacía
+"""
+
+from datetime import date
+from unittest.mock import patch
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase
+
+from sim import rollup
+from sim.engine import get_account_kpis
+
+DAY = date(2026, 3, 16)
+
+
+def _row(status='atendida', dur=300, acw=20, agent='AGT-001', canal='inbound'):
+    return {'fecha': DAY, 'canal': canal, 'skill': 'PLD', 'status': status,
+            'agent_codigo': agent, 'duracion_s': dur, 'acw_s': acw}
+
+
+class TestAccumulate(SimpleTestCase):
+
+    def test_groups_by_key(self):
+        buckets = rollup.accumulate({}, [_row(), _row(dur=100, acw=0), _row(agent='AGT-002')])
+        self.assertEqual(buckets[(DAY, 'inbound', 'PLD', 'atendida', 'AGT-001')], [2, 2, 400, 20])
+        self.assertEqual(buckets[(DAY, 'inbound', 'PLD', 'atendida', 'AGT-002')], [1, 1, 300, 20])
+
+    def test_missing_agent_and_zero_duration(self):
+        row = _row(status='no_contacto', dur=0, acw=0, agent=None)
+        del row['skill']
+        buckets = rollup.accumulate({}, [row])
+        self.assertEqual(buckets, {(DAY, 'inbound', '', 'no_contacto', ''): [1, 0, 0, 0]})
+
+    def test_adds_onto_existing_buckets(self):
+        buckets = rollup.accumulate({}, [_row()])
+        rollup.accumulate(buckets, [_row()])
+        self.assertEqual(list(buckets.values()), [[2, 2, 600, 40]])
+
+
+class TestApply(SimpleTestCase):
+
+    def test_empty_is_noop(self):
+        with patch.object(rollup, '_apply') as inner:
+            self.assertEqual(rollup.apply('acc', {}), 0)
+        inner.assert_not_called()
+
+    def test_retries_once_on_conflict(self):
+        with patch.object(rollup, '_apply', side_effect=[IntegrityError(), 3]) as inner:
+            self.assertEqual(rollup.apply('acc', {'k': [1, 1, 1, 1]}), 3)
+        self.assertEqual(inner.call_count, 2)
+
+    def test_second_conflict_raises(self):
+        with patch.object(rollup, '_apply', side_effect=IntegrityError()):
+            with self.assertRaises(IntegrityError):
+                rollup.apply('acc', {'k': [1, 1, 1, 1]})
+
+
+class TestAccountKpis(SimpleTestCase):
+
+    def _totals(self, rows):
+        return patch.object(rollup, 'totals', return_value=rows)
+
+    def test_from_rollup(self):
+        rows = [
+            {'canal': 'inbound', 'status': 'atendida',   'n': 8, 'n_duracion': 8, 'duracion_s_sum': 2400, 'acw_s_sum': 80},
+            {'canal': 'inbound', 'status': 'abandonada', 'n': 2, 'n_duracion': 2, 'duracion_s_sum': 40,   'acw_s_sum': 0},
+            {'canal': 'outbound', 'status': 'no_contacto', 'n': 5, 'n_duracion': 0, 'duracion_s_sum': 0, 'acw_s_sum': 0},
+            {'canal': 'outbound', 'status': 'venta',     'n': 1, 'n_duracion': 1, 'duracion_s_sum': 560,  'acw_s_sum': 30},
+        ]
+        with self._totals(rows):
+            kpis = get_account_kpis(object())
+        self.assertEqual(kpis['total'], 16)
+        self.assertEqual(kpis['by_canal'], {'inbound': 10, 'outbound': 6})
+        self.assertEqual(kpis['atendidas'], 9)
+        self.assertEqual(kpis['abandonadas'], 2)
+        self.assertEqual(kpis['no_contacto'], 5)
+        self.assertEqual(kpis['tmo_avg_s'], 273)          # 3000 / 11 (sin duraciones 0)
+        self.assertEqual(kpis['abandon_rate'], round(2 / 11, 4))
+
+    def test_empty_account(self):
+        with self._totals([]):
+            self.assertEqual(get_account_kpis(object()), {'total': 0})
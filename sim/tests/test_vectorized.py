@@ -0,0 +1,243 @@
+# sim/tests/test_vectorized.py
+"""
+Tests unitarios para el backend NumPy de los generadores (generators/vectorized.py).
+No requieren base de datos — usan SimpleTestCase.
+
+Cobertura:
+  Categorical        → misma regla que weighted_choice, distribución
+  gaussian_durations → truncado + clip por fila
+  compile_samplers   → canales pedidos, config por canal
+  InboundSampler     → formato de fila, abandono sin agente, volumen, seed
+  OutboundSampler    → domingo vacío, status por tipificación, no contacto sin agente
+  DigitalSampler     → tipificaciones por canal, TMO por tipificación
+  paridad            → proporciones equivalentes al generador original
+  HistoricalEngine   → selección de backend
+"""
+
+import uuid
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from sim.engine import HistoricalEngine
+from sim.generators import inbound as inb
+from sim.generators import outbound as out
+from sim.generators.vectorized import (
+    Categorical, DigitalSampler, InboundSampler, OutboundSampler,
+    compile_samplers, gaussian_durations,
+)
+
+MONDAY = datetime(2026, 3, 16)
+SUNDAY = datetime(2026, 3, 22)
+
+AGENT_POOL = [
+    {'codigo': f'AGT-{i:03d}', 'turno': 'MANANA', 'antiguedad': 'senior',
+     'sph_base': 0.128, 'adherencia_base': 0.95, 'tmo_factor': 1.0}
+    for i in range(1, 11)
+]
+
+REQUIRED_INTERACTION_FIELDS = {
+    'canal', 'skill', 'sub_canal', 'fecha', 'hora_inicio', 'hora_fin',
+    'duracion_s', 'acw_s', 'tipificacion', 'status',
+    'lead_id', 'agent_codigo', 'intento_num', 'is_simulated',
+}
+
+# Outbound reducido para que los tests sean rápidos
+SMALL_OUTBOUND = {'daily_marcaciones': 4000}
+
+
+def _rng(seed=7):
+    return np.random.default_rng(seed)
+
+
+class TestCategorical(SimpleTestCase):
+
+    def test_single_key(self):
+        self.assertTrue((Categorical({'X': 1.0}).sample(_rng(), 50) == 0).all())
+
+    def test_distribution(self):
+        cat = Categorical({'HIGH': 0.7, 'LOW': 0.3})
+        ratio = (cat.sample(_rng(), 20000) == 0).mean()
+        self.assertAlmostEqual(ratio, 0.7, delta=0.02)
+
+    def test_unnormalized_weights(self):
+        cat = Categorical({'A': 2, 'B': 6})
+        self.assertAlmostEqual((cat.sample(_rng(), 20000) == 1).mean(), 0.75, delta=0.02)
+
+    def test_empty_raises(self):
+        with self.assertRaises(ValueError):
+            Categorical({})
+
+
+class TestGaussianDurations(SimpleTestCase):
+
+    def test_clipped_ints(self):
+        vals = gaussian_durations(_rng(), 100, 2.0, 30, 150, 5000)
+        self.assertEqual(vals.dtype, np.int64)
+        self.assertGreaterEqual(vals.min(), 30)
+        self.assertLessEqual(vals.max(), 150)
+
+    def test_per_row_bounds(self):
+        mean = np.array([10.0, 1000.0])
+        vals = gaussian_durations(_rng(), mean, 0.0, np.array([20, 5]), np.array([30, 500]), 2)
+        self.assertEqual(vals.tolist(), [20, 500])
+
+
+class TestCompileSamplers(SimpleTestCase):
+
+    def test_only_requested_channels(self):
+        samplers = compile_samplers(['inbound', 'digital', 'otro'], {})
+        self.assertEqual(set(samplers), {'inbound', 'digital'})
+
+    def test_channel_section_is_used(self):
+        samplers = compile_samplers(['outbound'], {'outbound': {'contact_rate': 0.5}})
+        self.assertEqual(samplers['outbound'].cfg['contact_rate'], 0.5)
+
+
+class TestInboundSampler(SimpleTestCase):
+
+    def setUp(self):
+        self.sampler = InboundSampler({})
+
+    def test_row_format(self):
+        rows = self.sampler.generate_day(MONDAY, AGENT_POOL, 100, _rng())
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(set(rows[0]), REQUIRED_INTERACTION_FIELDS)
+        self.assertEqual(rows[0]['lead_id'], 'CLI-00000100')
+        self.assertEqual(rows[0]['fecha'], MONDAY.date())
+        self.assertIsInstance(rows[0]['duracion_s'], int)
+        self.assertIsInstance(rows[0]['hora_inicio'], datetime)
+
+    def test_hours_inside_intraday(self):
+        rows = self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        hours = {r['hora_inicio'].hour for r in rows}
+        self.assertTrue(hours <= set(inb.DEFAULT_CONFIG['intraday']))
+        self.assertTrue(all(r['hora_fin'] >= r['hora_inicio'] for r in rows))
+
+    def test_abandoned_have_no_agent(self):
+        rows = self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        for r in rows:
+            if r['status'] == 'abandonada':
+                self.assertIsNone(r['agent_codigo'])
+                self.assertEqual(r['acw_s'], 0)
+                self.assertLessEqual(r['duracion_s'], inb.DEFAULT_CONFIG['sl_s'] * 3)
+            else:
+                self.assertIsNotNone(r['agent_codigo'])
+                self.assertGreaterEqual(r['duracion_s'], 30)
+
+    def test_tipificacion_belongs_to_skill(self):
+        skills = inb.DEFAULT_CONFIG['skills']
+        for r in self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng()):
+            self.assertIn(r['tipificacion'], skills[r['skill']]['tipificaciones'])
+
+    def test_same_seed_same_rows(self):
+        a = self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng(3))
+        b = self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng(3))
+        self.assertEqual(a, b)
+
+    def test_no_agents(self):
+        rows = self.sampler.generate_day(MONDAY, [], 0, _rng())
+        self.assertTrue(all(r['agent_codigo'] is None for r in rows))
+
+
+class TestOutboundSampler(SimpleTestCase):
+
+    def setUp(self):
+        self.sampler = OutboundSampler(SMALL_OUTBOUND)
+
+    def test_sunday_empty(self):
+        self.assertEqual(self.sampler.generate_day(SUNDAY, AGENT_POOL, 0, _rng()), [])
+
+    def test_status_follows_tipificacion(self):
+        contact = out.DEFAULT_CONFIG['tipif_contacto']
+        for r in self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng()):
+            tipif = r['tipificacion']
+            if r['status'] == 'no_contacto':
+                self.assertIn(tipif, out.DEFAULT_CONFIG['tipif_no_contacto'])
+                self.assertIsNone(r['agent_codigo'])
+                self.assertEqual(r['acw_s'], 0)
+                continue
+            self.assertIn(tipif, contact)
+            self.assertIsNotNone(r['agent_codigo'])
+            if tipif == 'Venta':
+                self.assertEqual(r['status'], 'venta')
+            elif 'Agenda' in tipif:
+                self.assertEqual(r['status'], 'agenda')
+            elif 'corta' in tipif.lower():
+                self.assertEqual(r['status'], 'atendida')
+            else:
+                self.assertEqual(r['status'], 'rechazo')
+
+    def test_intento_range(self):
+        rows = self.sampler.generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        self.assertEqual({r['intento_num'] for r in rows}, {1, 2, 3, 4, 5})
+
+
+class TestDigitalSampler(SimpleTestCase):
+
+    def test_tipificaciones_by_channel(self):
+        rows = DigitalSampler({'daily_vol': 2000}).generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        self.assertTrue(rows)
+        for r in rows:
+            prefix = 'BXI_' if r['sub_canal'] == 'bxi' else 'APP_'
+            self.assertTrue(r['tipificacion'].startswith(prefix))
+            self.assertEqual(r['skill'], 'CANALES DIGITALES')
+
+    def test_tmo_by_tipificacion(self):
+        sampler = DigitalSampler({})
+        labels  = list(sampler.tipif_labels)
+        idx = labels.index('BXI_ACTIVACION USUARIO NUEVO')
+        self.assertEqual(sampler.tmo_mean[idx], 240)
+        idx = labels.index('APP_INCIDENCIA SIN SOLUCION')
+        self.assertEqual(sampler.tmo_mean[idx], 320)
+
+
+class TestParity(SimpleTestCase):
+    """El backend NumPy reproduce las proporciones del generador original."""
+
+    def _shares(self, rows, key):
+        counts = Counter(r[key] for r in rows)
+        return {k: v / len(rows) for k, v in counts.items()}
+
+    def test_outbound_status_shares(self):
+        legacy = out.generate_day(MONDAY, AGENT_POOL, SMALL_OUTBOUND)
+        vector = OutboundSampler(SMALL_OUTBOUND).generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        a, b = self._shares(legacy, 'status'), self._shares(vector, 'status')
+        for status in ('no_contacto', 'atendida', 'rechazo'):
+            self.assertAlmostEqual(a.get(status, 0), b.get(status, 0), delta=0.03)
+
+    def test_inbound_volume_and_tmo(self):
+        legacy = inb.generate_day(MONDAY, AGENT_POOL, {})
+        vector = InboundSampler({}).generate_day(MONDAY, AGENT_POOL, 0, _rng())
+        self.assertAlmostEqual(len(vector) / len(legacy), 1.0, delta=0.4)
+        mean_l = np.mean([r['duracion_s'] for r in legacy])
+        mean_v = np.mean([r['duracion_s'] for r in vector])
+        self.assertAlmostEqual(mean_v / mean_l, 1.0, delta=0.08)
+
+
+class TestEngineBackend(SimpleTestCase):
+
+    def _engine(self, backend, config=None, seed=None):
+        account = SimpleNamespace(id=uuid.uuid4(), config=config or {}, canal='mixed')
+        return HistoricalEngine(account, None, backend=backend, seed=seed)
+
+    def test_numpy_days_in_channel_order(self):
+        engine = self._engine('numpy', seed=5)
+        (day, rows), = engine._iter_days([MONDAY.date()], ['digital', 'inbound'], {}, AGENT_POOL, 0)
+        self.assertEqual(day, MONDAY.date())
+        canales = [r['canal'] for r in rows]
+        self.assertEqual(canales, sorted(canales, key=['inbound', 'digital'].index))
+
+    def test_seed_from_config(self):
+        self.assertEqual(self._engine('numpy', {'seed': 11}).seed, 11)
+
+    def test_python_backend(self):
+        (_, rows), = self._engine('python')._iter_days([MONDAY.date()], ['digital'], {}, AGENT_POOL, 0)
+        self.assertEqual(rows[0]['canal'], 'digital')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            list(self._engine('gpu')._iter_days([MONDAY.date()], ['inbound'], {}, AGENT_POOL, 0))
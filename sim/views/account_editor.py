@@ -14,6 +14,7 @@ from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_POST
 
+from sim import compiled_config
 from sim.models import SimAccount
 
 logger = logging.getLogger(__name__)
@@ -194,6 +195,7 @@ def account_config_save(request, account_id):
         acc.config = config
         acc.preset = ''   # al editar manualmente, preset deja de ser estándar
         acc.save(update_fields=['config', 'preset', 'updated_at'])
+        compiled_config.invalidate(acc.id)
 
         return JsonResponse({'success': True, 'message': 'Configuración guardada.'})
     except json.JSONDecodeError:
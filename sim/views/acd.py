@@ -40,7 +40,9 @@ from sim.models import (
     SimAccount, SimAgentProfile,
     ACDSession, ACDAgentSlot, ACDInteraction, ACDAgentAction,
 )
+from sim import clock
 from sim import gtr_engine as engine
+from sim.acd_router import RoutingBatch, SlotRouter
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -168,33 +170,61 @@ def slots_in_status(slots, status):
 
 
 # ─── Routing engine ───────────────────────────────────────────────────────────
+# Núcleo en sim/acd_router.py (SlotRouter + RoutingBatch); _do_routing orquesta.
+
+# Fallbacks por canal para que skill sea siempre coherente con la cuenta
+ACD_DEFAULT_SKILLS = {
+    'inbound':  {'GENERAL':  {'weight': 1.0}},
+    'outbound': {'OUTBOUND': {'weight': 1.0}},
+    'digital':  {'DIGITAL':  {'weight': 1.0}},
+}
+
+# (clave del TMO en la config, tmo_s, acw_s) por canal cuando la cuenta no los define — SIM-7e
+ACD_DEFAULT_TMO_ACW = {
+    'inbound':  ('tmo_s', 313, 18),
+    'outbound': ('tmo_s', 180, 12),
+    'digital':  ('duration_s', 240, 10),
+}
 
-def _route_interaction(session: ACDSession, interaction: ACDInteraction) -> ACDAgentSlot | None:
-    """
-    Encuentra el mejor slot disponible para una interacción.
-    Prioriza:
-      1. Mismo skill que la interacción
-      2. Agentes reales OJT primero (para que practiquen)
-      3. Menor carga acumulada
-    """
-    available = list(
-        session.slots.filter(status='available').select_related('user', 'profile')
-    )
-    if not available:
-        return None
 
-    # Filtrar por skill si hay match
-    skill_match = [s for s in available if s.skill == interaction.skill]
-    pool = skill_match if skill_match else available
+def _compile_acd(canal: str):
+    """Compilador de sim/compiled_config.py: tablas del routing para `canal`."""
+    from sim.generators.vectorized import Categorical
+
+    def build(config: dict) -> dict:
+        cfg = config.get(canal) or {}
+        skills_cfg = cfg.get('skills', ACD_DEFAULT_SKILLS.get(canal, ACD_DEFAULT_SKILLS['digital']))
+        tmo_key, tmo_s, acw_s = ACD_DEFAULT_TMO_ACW.get(canal, (None, 313, 18))
+
+        tipifs = {}
+        if canal == 'inbound':
+            for skill_data in cfg.get('skills', {}).values():
+                tipifs.update(skill_data.get('tipificaciones', {}))
+        elif canal == 'digital':
+            tipifs.update(cfg.get('tipificaciones_bxi', {}))
+            tipifs.update(cfg.get('tipificaciones_app', {}))
+            if not tipifs:
+                tipifs = cfg.get('tipificaciones', {})
+        no_contacto = cfg.get('tipif_no_contacto', {})
+        contacto    = cfg.get('tipif_contacto', {})
+
+        return {
+            'skills':       Categorical({k: v.get('weight', 1.0) for k, v in skills_cfg.items()}),
+            'tmo_s':        cfg.get(tmo_key, tmo_s) if tmo_key else tmo_s,
+            'acw_s':        cfg.get('acw_s', acw_s) if tmo_key else acw_s,
+            'tipifs':       Categorical(tipifs) if tipifs else None,
+            'contact_rate': cfg.get('contact_rate', 0.276),
+            'tipif_no_contacto': Categorical(no_contacto) if no_contacto else None,
+            'tipif_contacto':    Categorical(contacto) if contacto else None,
+        }
+    return build
 
-    # Preferir agentes reales para práctica
-    real_slots = [s for s in pool if s.agent_type == 'real']
-    if real_slots:
-        pool = real_slots
 
-    # Menor carga (atendidas acumuladas)
-    pool.sort(key=lambda s: s.stats.get('atendidas', 0))
-    return pool[0]
+def _acd_tables(session: ACDSession) -> dict:
+    """Tablas compiladas de la cuenta para el canal de la sesión (sin BD en régimen)."""
+    from sim import compiled_config
+    return compiled_config.get(session.account_id).table(
+        ('acd', session.canal), _compile_acd(session.canal))
 
 
 def _generate_acd_interactions(session: ACDSession, n: int = 5) -> list:
@@ -202,43 +232,29 @@ def _generate_acd_interactions(session: ACDSession, n: int = 5) -> list:
     Genera N interacciones sintéticas para encolar en la sesión ACD.
     Usa la configuración de la cuenta.
     """
-    from sim.generators.base import weighted_choice, synthetic_lead_id
+    from sim.generators.base import synthetic_lead_id
 
-    try:
-        account_config = session.account.config or {}
-        cfg = account_config.get(session.canal, {})
-    except Exception:
-        cfg = {}
-
-    # Fallbacks por canal para que skill sea siempre coherente con la cuenta
-    if session.canal == 'inbound':
-        default_skills = {'GENERAL': {'weight': 1.0}}
-    elif session.canal == 'outbound':
-        default_skills = {'OUTBOUND': {'weight': 1.0}}
-    else:  # digital
-        default_skills = {'DIGITAL': {'weight': 1.0}}
-
-    skills_cfg = cfg.get('skills', default_skills)
-    skill_weights = {k: v.get('weight', 1.0) for k, v in skills_cfg.items()}
-
-    interactions = []
-    for i in range(n):
-        skill  = weighted_choice(skill_weights)
-        lead   = synthetic_lead_id(session.canal, random.randint(1, 999999))
-        ix = ACDInteraction.objects.create(
+    skills = _acd_tables(session)['skills']
+    interactions = [
+        ACDInteraction(
             session      = session,
             canal        = session.canal,
-            skill        = skill,
-            lead_id      = lead,
+            skill        = skills.choice(),
+            lead_id      = synthetic_lead_id(session.canal, random.randint(1, 999999)),
             status       = 'queued',
             is_simulated = True,
         )
-        interactions.append(ix)
-    return interactions
+        for _ in range(n)
+    ]
+    return ACDInteraction.objects.bulk_create(interactions)
 
 
 # ─── SIM-7e helpers ───────────────────────────────────────────────────────────
 
+# Interacciones en cola que se leen por tick de routing: acota la consulta y
+# la pasada aunque la cola crezca (el resto espera al siguiente tick, en FIFO).
+ACD_ROUTE_BATCH = 20
+
 # Segundos simulados estimados por ciclo de routing (clock_speed × poll_real_s ≈ 60).
 # Usado en _tick_simulated_breaks para convertir break_freq [breaks/h] a P(break/tick).
 SIM_TICK_S = 60
@@ -249,17 +265,8 @@ def _get_account_tmo_acw(session: ACDSession) -> tuple:
     Retorna (tmo_s, acw_s) base desde la config de la cuenta según canal.
     SIM-7e — antes hardcodeados en _resolve_simulated_slot (313/18 inbound siempre).
     """
-    try:
-        cfg = (session.account.config or {}).get(session.canal, {})
-    except Exception:
-        cfg = {}
-    if session.canal == 'inbound':
-        return cfg.get('tmo_s', 313), cfg.get('acw_s', 18)
-    elif session.canal == 'outbound':
-        return cfg.get('tmo_s', 180), cfg.get('acw_s', 12)
-    elif session.canal == 'digital':
-        return cfg.get('duration_s', 240), cfg.get('acw_s', 10)
-    return 313, 18
+    t = _acd_tables(session)
+    return t['tmo_s'], t['acw_s']
 
 
 def _resolve_tipificacion(session: ACDSession, conv_rate: float, agenda_rate: float) -> str:
@@ -267,27 +274,18 @@ def _resolve_tipificacion(session: ACDSession, conv_rate: float, agenda_rate: fl
     Tipificación realista basada en la config de la cuenta y el canal.
     SIM-7e — antes solo retornaba 'Venta' o 'Atendida' ignorando la cuenta.
     """
-    from sim.generators.base import weighted_choice
-    try:
-        cfg = (session.account.config or {}).get(session.canal, {})
-    except Exception:
-        cfg = {}
+    t = _acd_tables(session)
 
-    if session.canal == 'inbound':
-        all_tipifs = {}
-        for skill_data in cfg.get('skills', {}).values():
-            all_tipifs.update(skill_data.get('tipificaciones', {}))
-        if all_tipifs:
-            return weighted_choice(all_tipifs)
+    if session.canal in ('inbound', 'digital'):
+        if t['tipifs']:
+            return t['tipifs'].choice()
 
     elif session.canal == 'outbound':
-        contact_rate = cfg.get('contact_rate', 0.276)
-        if random.random() > contact_rate:
-            no_contact = cfg.get('tipif_no_contacto', {})
-            return weighted_choice(no_contact) if no_contact else 'No contesta'
-        tipif_contacto = cfg.get('tipif_contacto', {})
-        if tipif_contacto:
-            return weighted_choice(tipif_contacto)
+        if random.random() > t['contact_rate']:
+            no_contact = t['tipif_no_contacto']
+            return no_contact.choice() if no_contact else 'No contesta'
+        if t['tipif_contacto']:
+            return t['tipif_contacto'].choice()
         r = random.random()
         if r < conv_rate:
             return 'Venta'
@@ -295,52 +293,47 @@ def _resolve_tipificacion(session: ACDSession, conv_rate: float, agenda_rate: fl
             return 'Agenda'
         return 'No interesado'
 
-    elif session.canal == 'digital':
-        tipifs = {}
-        tipifs.update(cfg.get('tipificaciones_bxi', {}))
-        tipifs.update(cfg.get('tipificaciones_app', {}))
-        if not tipifs:
-            tipifs = cfg.get('tipificaciones', {})
-        if tipifs:
-            return weighted_choice(tipifs)
-
     # fallback genérico
     if random.random() < conv_rate:
         return 'Venta'
     return 'Atendida'
 
 
-def _tick_simulated_breaks(session: ACDSession):
+def _tick_simulated_breaks(slots: list, batch: RoutingBatch):
     """
     Aplica breaks espontáneos y retornos a agentes simulados según su perfil.
     Llamado en cada ciclo de routing — diferencia tiers en sesiones largas.
+    Trabaja sobre los slots ya cargados; los cambios quedan en `batch`.
 
     SIM-7e — implementa break_freq y break_dur_s del SimAgentProfile que antes no se usaban.
 
     P(ir a break en este tick)  = break_freq [breaks/h] × SIM_TICK_S / 3600
     P(volver de break en tick)  = SIM_TICK_S / break_dur_s
     """
-    for slot in session.slots.filter(agent_type__in=('simulated', 'bot')).select_related('profile'):  # BOT-2
+    for slot in slots:
         profile = slot.profile
-        if not profile:
+        if slot.agent_type not in ('simulated', 'bot') or not profile:  # BOT-2
             continue
         if slot.status == 'available':
             p_break = profile.break_freq * SIM_TICK_S / 3600
             if random.random() < p_break:
                 slot.status = 'break'
-                slot.save(update_fields=['status'])
+                batch.slot(slot)
         elif slot.status == 'break':
             p_return = SIM_TICK_S / max(profile.break_dur_s, SIM_TICK_S)
             if random.random() < p_return:
                 slot.status = 'available'
-                slot.save(update_fields=['status'])
+                batch.slot(slot)
 
 
 def _resolve_simulated_slot(slot: ACDAgentSlot, interaction: ACDInteraction,
+                             batch: RoutingBatch, router: SlotRouter,
                              _from_transfer: bool = False):
     """
     Resuelve automáticamente una interacción para un agente simulado
     según su perfil conductual (SimAgentProfile).
+    No escribe en BD: los cambios quedan en `batch`; el destino de una
+    transferencia se toma de `router`.
 
     SIM-7e: usa TMO/ACW de la cuenta, tipificaciones reales por canal,
     transfer_rate activo y available_pct post-llamada.
@@ -368,9 +361,9 @@ def _resolve_simulated_slot(slot: ACDAgentSlot, interaction: ACDInteraction,
     if random.random() > answer_rate:
         interaction.status   = 'rejected'
         interaction.ended_at = now
-        interaction.save(update_fields=['status', 'ended_at'])
         slot.status = 'available'
-        slot.save(update_fields=['status'])
+        batch.interaction(interaction)
+        batch.slot(slot)
         return
 
     # Atiende
@@ -392,22 +385,22 @@ def _resolve_simulated_slot(slot: ACDAgentSlot, interaction: ACDInteraction,
 
     # Transferencia (SIM-7e — transfer_rate antes leído pero nunca aplicado)
     if not _from_transfer and random.random() < transfer_rate:
-        target = ACDAgentSlot.objects.filter(
-            session=session, status='available'
-        ).exclude(id=slot.id).first()
+        target = router.pick_any()
         if target:
             interaction.slot = target
-            interaction.save(update_fields=['slot'])
             target.status = 'ringing'
-            target.save(update_fields=['status'])
             stats = slot.stats or {}
             stats['transfer_count'] = stats.get('transfer_count', 0) + 1
             slot.stats  = stats
             slot.status = 'available'
-            slot.save(update_fields=['stats', 'status'])
+            batch.interaction(interaction)
+            batch.slot(target)
+            batch.slot(slot)
             # Resolver en el destino si también es simulado
             if target.agent_type in ('simulated', 'bot'):  # BOT-2
-                _resolve_simulated_slot(target, interaction, _from_transfer=True)
+                _resolve_simulated_slot(target, interaction, batch, router, _from_transfer=True)
+                if target.status == 'available':
+                    router.release(target)
             return
 
     # Tipificación rica por canal (SIM-7e — antes solo 'Venta' o 'Atendida')
@@ -419,9 +412,8 @@ def _resolve_simulated_slot(slot: ACDAgentSlot, interaction: ACDInteraction,
     interaction.tipificacion = tipif
     interaction.status       = 'completed'
     interaction.ended_at     = now + timedelta(seconds=dur_s + acw_s)
-    interaction.save()
-
-    _emit_completed(interaction, slot)   # BOT-3b
+    batch.interaction(interaction)
+    batch.completed.append((interaction, slot))   # BOT-3b — se emite tras el flush
 
     # Stats del slot
     stats = slot.stats or {}
@@ -435,7 +427,7 @@ def _resolve_simulated_slot(slot: ACDAgentSlot, interaction: ACDInteraction,
     slot.stats = stats
     # Post-llamada: vuelve a available o toma break según available_pct del perfil (SIM-7e)
     slot.status = 'available' if random.random() < available_pct else 'break'
-    slot.save(update_fields=['stats', 'status'])
+    batch.slot(slot)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -556,6 +548,24 @@ def acd_session_state(request, session_id):
     """Estado completo de la sesión: KPIs + grid agentes + cola."""
     session = get_object_or_404(ACDSession, id=session_id, created_by=request.user)
 
+    # Con el clock del servidor activo (ws/sim/<id>/) el poll sólo lee
+    if clock.is_running('acd', session.id):
+        return JsonResponse({'success': True, **acd_snapshot(session)})
+
+    return JsonResponse({'success': True, **acd_tick(session)})
+
+
+def acd_snapshot(session: ACDSession) -> dict:
+    """Estado de la sesión ACD sin avanzar la GTR ni rutear."""
+    gtr = engine.load_session(session.gtr_session_id) if session.gtr_session_id else None
+    return _acd_state(session, engine._state_response(gtr, [], []) if gtr else {})
+
+
+def acd_tick(session: ACDSession) -> dict:
+    """
+    Un paso de la sesión ACD: tick de la GTR subyacente + routing.
+    Lo usan el poll HTTP y el clock del servidor (sim/clock.py).
+    """
     gtr_state = {}
     if session.gtr_session_id:
         try:
@@ -573,7 +583,7 @@ def acd_session_state(request, session_id):
         except Exception as e:
             logger.warning("ACD routing error: %s", e)
 
-    return JsonResponse({'success': True, **state})
+    return state
 
 
 def _do_routing(session: ACDSession, gtr_state: dict):
@@ -581,40 +591,52 @@ def _do_routing(session: ACDSession, gtr_state: dict):
     Motor de enrutamiento: asigna interacciones en cola a slots disponibles.
     Modo predictivo/progresivo: automático.
     Modo manual: solo outbound, el agente decide.
+
+    Una consulta de slots y una de cola (las ACD_ROUTE_BATCH más antiguas)
+    por tick; se asignan en una pasada con SlotRouter y los cambios se
+    escriben juntos (RoutingBatch).
     """
     if session.dialing_mode == 'manual' and session.canal == 'outbound':
         return  # el agente controla el marcado
 
+    slots = list(session.slots.select_related('user', 'profile'))
+    batch = RoutingBatch()
+
     # SIM-7e — breaks espontáneos en agentes simulados antes del routing
-    _tick_simulated_breaks(session)
+    _tick_simulated_breaks(slots, batch)
 
+    router = SlotRouter(s for s in slots if s.status == 'available')
     queued = list(ACDInteraction.objects.filter(
         session=session, status='queued'
-    ).select_related('slot')[:20])
+    ).order_by('queued_at')[:ACD_ROUTE_BATCH]) if router else []
 
     if not queued:
+        batch.flush()
         # Generar más interacciones si la cola está vacía
-        available_count = session.slots.filter(status='available').count()
-        if available_count > 0:
-            _generate_acd_interactions(session, n=available_count + 2)
+        if router:
+            _generate_acd_interactions(session, n=len(router) + 2)
         return
 
+    now = timezone.now()
     for ix in queued:
-        slot = _route_interaction(session, ix)
+        slot = router.pick(ix.skill)
         if not slot:
             break
 
         ix.slot        = slot
-        ix.assigned_at = timezone.now()
+        ix.assigned_at = now
         ix.status      = 'ringing'
-        ix.save(update_fields=['slot', 'assigned_at', 'status'])
-
-        slot.status = 'ringing'
-        slot.save(update_fields=['status'])
+        slot.status    = 'ringing'
+        batch.interaction(ix)
+        batch.slot(slot)
 
         # Simulated agents: resolve immediately
         if slot.agent_type in ('simulated', 'bot'):  # BOT-2
-            _resolve_simulated_slot(slot, ix)
+            _resolve_simulated_slot(slot, ix, batch, router)
+            if slot.status == 'available':
+                router.release(slot)   # puede tomar otra en este mismo tick
+
+    batch.flush(on_completed=_emit_completed)
 
 
 @login_required
@@ -1134,9 +1156,9 @@ def _emit_completed(interaction: ACDInteraction, slot: ACDAgentSlot):
 
 def _get_tipificaciones(session: ACDSession) -> list:
     """Retorna lista de tipificaciones configuradas en la cuenta."""
+    from sim import compiled_config
     try:
-        account_config = session.account.config or {}
-        cfg = account_config.get(session.canal, {})
+        cfg = compiled_config.get(session.account_id).section(session.canal)
         if session.canal == 'inbound':
             skills = cfg.get('skills', {})
             tipifs = set()
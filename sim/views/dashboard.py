@@ -1,16 +1,16 @@
 """
 sim/views/dashboard.py
-Dashboard KPI — consulta sim.Interaction y sirve widgets al frontend.
+Dashboard KPI — lee el rollup diario (sim.InteractionDaily) y sirve widgets al frontend.
 """
 
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Avg, Q
 from datetime import timedelta, date
 
-from ..models import SimAccount, Interaction, SimRun
+from .. import rollup
+from ..models import SimAccount, SimRun
 
 
 # ---------------------------------------------------------------------------
@@ -51,12 +51,11 @@ def dashboard_api(request):
     except SimAccount.DoesNotExist:
         return JsonResponse({'error': 'cuenta no encontrada'}, status=404)
 
-    qs = Interaction.objects.filter(account=account)
-    if days > 0:
-        since = date.today() - timedelta(days=days)
-        qs = qs.filter(fecha__gte=since)
+    since = date.today() - timedelta(days=days) if days > 0 else None
 
-    total = qs.count()
+    # Una sola consulta al rollup diario; el resto se pliega en memoria
+    rows  = rollup.totals(account, by=('fecha', 'canal', 'status'), since=since)
+    total = sum(r['n'] for r in rows)
     if total == 0:
         return JsonResponse({
             'account': account.name,
@@ -70,26 +69,42 @@ def dashboard_api(request):
             'recent_runs': [],
         })
 
+    # (canal, status) → [n, duracion_s_sum]   ·   fecha → {status: n}
+    by_cs, by_day = {}, {}
+    for r in rows:
+        acc = by_cs.setdefault((r['canal'], r['status']), [0, 0])
+        acc[0] += r['n']
+        acc[1] += r['duracion_s_sum']
+        day = by_day.setdefault(r['fecha'], {})
+        day[r['status']] = day.get(r['status'], 0) + r['n']
+
+    def count(canales, statuses=None):
+        return sum(v[0] for (c, s), v in by_cs.items()
+                   if c in canales and (statuses is None or s in statuses))
+
+    def avg_dur(canales, statuses=None):
+        n = dur = 0
+        for (c, s), (cn, cd) in by_cs.items():
+            if c in canales and (statuses is None or s in statuses):
+                n, dur = n + cn, dur + cd
+        return dur / n if n else 0
+
     # ------------------------------------------------------------------
     # Distribución por canal
     # ------------------------------------------------------------------
-    canal_counts = dict(
-        qs.values_list('canal').annotate(n=Count('id')).values_list('canal', 'n')
-    )
+    canal_counts = {}
+    for (c, _), (n, _) in by_cs.items():
+        canal_counts[c] = canal_counts.get(c, 0) + n
 
     # ------------------------------------------------------------------
     # KPIs Inbound
     # ------------------------------------------------------------------
-    inbound_qs = qs.filter(canal='inbound')
-    inbound_total = inbound_qs.count()
+    inbound_total = count({'inbound'})
     inbound = None
     if inbound_total:
-        atendidas  = inbound_qs.filter(status='atendida').count()
-        abandonadas = inbound_qs.filter(status='abandonada').count()
-        aht_avg    = (
-            inbound_qs.filter(status='atendida')
-            .aggregate(a=Avg('duracion_s'))['a'] or 0
-        )
+        atendidas   = count({'inbound'}, {'atendida'})
+        abandonadas = count({'inbound'}, {'abandonada'})
+        aht_avg     = avg_dur({'inbound'}, {'atendida'})
         inbound = {
             'total':      inbound_total,
             'atendidas':  atendidas,
@@ -103,17 +118,13 @@ def dashboard_api(request):
     # ------------------------------------------------------------------
     # KPIs Outbound
     # ------------------------------------------------------------------
-    outbound_qs = qs.filter(canal='outbound')
-    outbound_total = outbound_qs.count()
+    outbound_total = count({'outbound'})
     outbound = None
     if outbound_total:
-        contactados = outbound_qs.exclude(status='no_contacto').count()
-        ventas   = outbound_qs.filter(status='venta').count()
-        agendas  = outbound_qs.filter(status='agenda').count()
-        aht_out  = (
-            outbound_qs.filter(status__in=['venta', 'agenda', 'rechazo'])
-            .aggregate(a=Avg('duracion_s'))['a'] or 0
-        )
+        contactados = outbound_total - count({'outbound'}, {'no_contacto'})
+        ventas   = count({'outbound'}, {'venta'})
+        agendas  = count({'outbound'}, {'agenda'})
+        aht_out  = avg_dur({'outbound'}, {'venta', 'agenda', 'rechazo'})
         outbound = {
             'total':         outbound_total,
             'contactados':   contactados,
@@ -128,11 +139,11 @@ def dashboard_api(request):
     # ------------------------------------------------------------------
     # KPIs Digital
     # ------------------------------------------------------------------
-    digital_qs = qs.filter(canal__in=['chat', 'digital', 'mail'])
-    digital_total = digital_qs.count()
+    digital_canales = {'chat', 'digital', 'mail'}
+    digital_total = count(digital_canales)
     digital = None
     if digital_total:
-        aht_dig = digital_qs.aggregate(a=Avg('duracion_s'))['a'] or 0
+        aht_dig = avg_dur(digital_canales)
         digital = {
             'total':   digital_total,
             'aht_s':   round(aht_dig),
@@ -142,35 +153,31 @@ def dashboard_api(request):
     # ------------------------------------------------------------------
     # Tendencia diaria (para bar chart)
     # ------------------------------------------------------------------
-    trend_qs = (
-        qs.values('fecha')
-        .annotate(
-            total=Count('id'),
-            atendidas=Count('id', filter=Q(status='atendida')),
-            ventas=Count('id', filter=Q(status='venta')),
-        )
-        .order_by('fecha')
-    )
     daily_trend = [
         {
-            'fecha':     str(r['fecha']),
-            'total':     r['total'],
-            'atendidas': r['atendidas'],
-            'ventas':    r['ventas'],
+            'fecha':     str(fecha),
+            'total':     sum(st.values()),
+            'atendidas': st.get('atendida', 0),
+            'ventas':    st.get('venta', 0),
         }
-        for r in trend_qs
+        for fecha, st in sorted(by_day.items())
     ]
 
     # ------------------------------------------------------------------
     # Runs recientes
     # ------------------------------------------------------------------
-    recent_runs = list(
-        SimRun.objects.filter(account=account)
-        .order_by('-created_at')[:6]
-        .values('id', 'canal', 'dias', 'total_interactions', 'created_at', 'duration_s')
-    )
-    for r in recent_runs:
-        r['created_at'] = str(r['created_at'])[:16]
+    recent_runs = []
+    for r in (SimRun.objects.filter(account=account).order_by('-started_at')[:6]
+              .values('id', 'canales', 'date_from', 'date_to',
+                      'interactions_generated', 'started_at', 'duration_s')):
+        recent_runs.append({
+            'id':                 str(r['id']),
+            'canal':              r['canales'][0] if r['canales'] else '',
+            'dias':               (r['date_to'] - r['date_from']).days + 1,
+            'total_interactions': r['interactions_generated'],
+            'created_at':         str(r['started_at'])[:16],
+            'duration_s':         r['duration_s'],
+        })
 
     return JsonResponse({
         'account':     account.name,
@@ -23,6 +23,7 @@ from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_GET, require_POST
 
 from sim.models import SimAccount
+from sim import clock
 from sim import gtr_engine as engine
 
 logger = logging.getLogger(__name__)
@@ -84,8 +85,15 @@ def gtr_start(request):
 def gtr_tick(request, session_id):
     """
     Poll endpoint — avanza el clock y devuelve el nuevo estado.
-    Llamado cada ~3-5 segundos por el cliente.
+    Para clientes HTTP (las pantallas usan ws/sim/<sid>/). Si la sesión ya tiene clock
+    del servidor (viewers en ws/sim/<sid>/), sólo devuelve el estado actual.
     """
+    if clock.is_running('gtr', session_id):
+        session = engine.load_session(session_id)
+        if not session:
+            return JsonResponse({'success': False, 'error': 'session_not_found'}, status=404)
+        return JsonResponse({'success': True, **engine._state_response(session, [], [])})
+
     state = engine.tick(session_id)
     if 'error' in state:
         return JsonResponse({'success': False, **state}, status=404)
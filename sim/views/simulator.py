@@ -1,17 +1,21 @@
 # sim/views/simulator.py
+import base64
+import binascii
+import csv
 import json
 import logging
 import math
 import uuid as _uuid
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_GET, require_POST
 
-from sim.models import SimAccount, SimAgent, Interaction, SimRun
-from sim.engine import HistoricalEngine, get_account_kpis
+from sim.models import SimAccount, SimAgent, Interaction, InteractionDaily, SimRun
+from sim.engine import get_account_kpis
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +112,10 @@ def _run_row(r: SimRun) -> dict:
         'status_label': r.get_status_display(),
         'interactions': r.interactions_generated,
         'agents':       r.agents_generated,
+        'days_total':   r.days_total,
+        'days_done':    r.days_done,
+        'progress':     round(r.days_done / r.days_total, 3) if r.days_total else None,
+        'seed':         r.seed,
         'duration_s':   round(r.duration_s, 1),
         'error_msg':    r.error_msg,
         'started_at':   r.started_at.isoformat(),
@@ -198,14 +206,26 @@ def account_generate(request, account_id):
         if (date_to - date_from).days > 365:
             return JsonResponse({'success': False, 'error': 'Rango máximo 365 días.'}, status=400)
 
-        engine = HistoricalEngine(acc, request.user)
-        run    = engine.generate(date_from, date_to, canales)
+        # La generación corre en la cola de trabajos de analyst (manage.py run_jobs)
+        from analyst.services.job_queue import dispatch
+        run = SimRun.objects.create(
+            account      = acc,
+            date_from    = date_from,
+            date_to      = date_to,
+            canales      = canales or [],
+            status       = 'queued',
+            triggered_by = request.user,
+        )
+        bg = dispatch('sim_generate', {'run_id': str(run.id)},
+                      user=request.user, ref_id=run.id)
+        run.refresh_from_db()
 
         return JsonResponse({
             'success': True,
+            'queued':  bg.status == 'queued',
             'run':     _run_row(run),
             'account': _account_row(acc),
-        })
+        }, status=202 if bg.status == 'queued' else 200)
     except Exception as e:
         logger.error("account_generate %s: %s", account_id, e, exc_info=True)
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -217,6 +237,7 @@ def account_clear(request, account_id):
     """Elimina todas las interacciones de la cuenta sin borrar la cuenta."""
     acc = get_object_or_404(SimAccount, id=account_id, created_by=request.user)
     deleted, _ = Interaction.objects.filter(account=acc).delete()
+    InteractionDaily.objects.filter(account=acc).delete()
     SimAgent.objects.filter(account=acc).delete()
     return JsonResponse({'success': True, 'deleted': deleted})
 
@@ -238,16 +259,146 @@ def account_kpis(request, account_id):
 
 
 # ── API export → analyst ETL ──────────────────────────────────────────────────
+# Columna exportada → campo de values(). Los datos del agente llegan por JOIN
+# (agent__*); None = columna calculada en _export_row.
+EXPORT_COLUMNS = {
+    'id':           'id',
+    'cuenta':       None,
+    'canal':        'canal',
+    'skill':        'skill',
+    'sub_canal':    'sub_canal',
+    'agente':       'agent__codigo',
+    'turno':        'agent__turno',
+    'antiguedad':   'agent__antiguedad',
+    'fecha':        'fecha',
+    'hora_inicio':  'hora_inicio',
+    'hora_fin':     'hora_fin',
+    'duracion_s':   'duracion_s',
+    'acw_s':        'acw_s',
+    'tmo_total_s':  None,
+    'tipificacion': 'tipificacion',
+    'status':       'status',
+    'lead_id':      'lead_id',
+    'intento_num':  'intento_num',
+}
+EXPORT_FORMATS = ('json', 'ndjson', 'csv')
+EXPORT_CHUNK   = 2000      # filas por consulta keyset en los formatos streaming
+
+
+def _encode_cursor(hora_inicio, pk) -> str:
+    raw = f"{hora_inicio.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Inverso de _encode_cursor. ValueError si el cursor no es válido."""
+    try:
+        ts, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(ts), _uuid.UUID(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"cursor inválido: {cursor}") from e
+
+
+def _export_columns(fields: str) -> list:
+    """Proyección pedida en ?fields=a,b,c (todas si viene vacío)."""
+    if not fields:
+        return list(EXPORT_COLUMNS)
+    cols    = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [c for c in cols if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+    return cols
+
+
+def _export_values(cols: list) -> list:
+    """Campos de values() necesarios para `cols` + las claves del keyset."""
+    needed = {'id', 'hora_inicio'}
+    for c in cols:
+        if c == 'tmo_total_s':
+            needed |= {'duracion_s', 'acw_s'}
+        elif EXPORT_COLUMNS[c]:
+            needed.add(EXPORT_COLUMNS[c])
+    return sorted(needed)
+
+
+def _export_row(v: dict, cols: list, account_name: str) -> dict:
+    row = {}
+    for c in cols:
+        if c == 'cuenta':
+            row[c] = account_name
+        elif c == 'tmo_total_s':
+            row[c] = v['duracion_s'] + v['acw_s']
+        elif c in ('hora_inicio', 'hora_fin'):
+            row[c] = v[EXPORT_COLUMNS[c]].strftime('%Y-%m-%d %H:%M:%S')
+        elif c in ('id', 'fecha'):
+            row[c] = str(v[EXPORT_COLUMNS[c]])
+        else:
+            val = v[EXPORT_COLUMNS[c]]
+            row[c] = '' if val is None else val     # agente/turno/antiguedad sin agente
+    return row
+
+
+def _keyset_page(qs, after, limit: int) -> list:
+    """Hasta `limit` filas posteriores a `after` = (hora_inicio, id) en orden keyset."""
+    if after:
+        ts, pk = after
+        qs = qs.filter(Q(hora_inicio__gt=ts) | Q(hora_inicio=ts, id__gt=pk))
+    return list(qs[:limit])
+
+
+def _keyset_iter(qs, after, chunk: int = EXPORT_CHUNK):
+    """Todas las filas desde `after`, en consultas de `chunk` filas (sin OFFSET)."""
+    while True:
+        rows = _keyset_page(qs, after, chunk)
+        yield from rows
+        if len(rows) < chunk:
+            return
+        after = (rows[-1]['hora_inicio'], rows[-1]['id'])
+
+
+def _stream_export(rows, cols: list, account_name: str, fmt: str):
+    if fmt == 'ndjson':
+        for v in rows:
+            yield json.dumps(_export_row(v, cols, account_name), ensure_ascii=False) + '\n'
+        return
+
+    class EchoWriter:
+        def write(self, value): return value
+
+    writer = csv.writer(EchoWriter())
+    yield writer.writerow(cols)
+    for v in rows:
+        row = _export_row(v, cols, account_name)
+        yield writer.writerow([row[c] for c in cols])
+
+
 @login_required
 @require_GET
 def export_interactions(request, account_id):
     """
-    Devuelve las interacciones como JSON paginado para consumo del ETL de analyst.
-    Query params: page, page_size, date_from, date_to, canal
+    Exporta las interacciones para consumo del ETL de analyst, paginando por
+    cursor (keyset sobre hora_inicio, id) en lugar de OFFSET.
+
+    Query params:
+      date_from, date_to, canal  filtros
+      fields     columnas separadas por coma (default: todas)
+      cursor     next_cursor de la respuesta anterior
+      format     json (default) → una página + next_cursor
+                 ndjson | csv   → streaming de todo el resultado desde `cursor`
+      page_size  filas por página en json (máx. 5000)
     """
     acc = get_object_or_404(SimAccount, id=account_id, created_by=request.user)
 
-    qs = Interaction.objects.filter(account=acc).order_by('hora_inicio')
+    fmt = request.GET.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': f"format debe ser uno de {EXPORT_FORMATS}"}, status=400)
+    try:
+        cols  = _export_columns(request.GET.get('fields', ''))
+        after = _decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    qs = Interaction.objects.filter(account=acc).order_by('hora_inicio', 'id')
 
     # Filters
     date_from = request.GET.get('date_from')
@@ -257,41 +408,31 @@ def export_interactions(request, account_id):
     if date_to:   qs = qs.filter(fecha__lte=date_to)
     if canal:     qs = qs.filter(canal=canal)
 
-    page      = max(1, int(request.GET.get('page', 1)))
-    page_size = min(5000, int(request.GET.get('page_size', 1000)))
-    total     = qs.count()
-    offset    = (page - 1) * page_size
-    rows      = qs[offset:offset + page_size]
-
-    data = []
-    for r in rows:
-        data.append({
-            'id':           str(r.id),
-            'cuenta':       acc.name,
-            'canal':        r.canal,
-            'skill':        r.skill,
-            'sub_canal':    r.sub_canal,
-            'agente':       r.agent.codigo if r.agent else '',
-            'turno':        r.agent.turno  if r.agent else '',
-            'antiguedad':   r.agent.antiguedad if r.agent else '',
-            'fecha':        str(r.fecha),
-            'hora_inicio':  r.hora_inicio.strftime('%Y-%m-%d %H:%M:%S'),
-            'hora_fin':     r.hora_fin.strftime('%Y-%m-%d %H:%M:%S'),
-            'duracion_s':   r.duracion_s,
-            'acw_s':        r.acw_s,
-            'tmo_total_s':  r.duracion_s + r.acw_s,
-            'tipificacion': r.tipificacion,
-            'status':       r.status,
-            'lead_id':      r.lead_id,
-            'intento_num':  r.intento_num,
-        })
+    values_qs = qs.values(*_export_values(cols))
+
+    if fmt != 'json':
+        rows     = _keyset_iter(values_qs, after)
+        response = StreamingHttpResponse(
+            _stream_export(rows, cols, acc.name, fmt),
+            content_type='application/x-ndjson' if fmt == 'ndjson' else 'text/csv; charset=utf-8',
+        )
+        if fmt == 'csv':
+            response['Content-Disposition'] = f'attachment; filename="sim_{acc.id}.csv"'
+        return response
+
+    page_size = max(1, min(5000, int(request.GET.get('page_size', 1000))))
+    rows      = _keyset_page(values_qs, after, page_size + 1)
+    has_more  = len(rows) > page_size
+    rows      = rows[:page_size]
+    last      = rows[-1] if rows else None
 
     return JsonResponse({
-        'success':   True,
-        'account':   acc.name,
-        'total':     total,
-        'page':      page,
-        'pages':     math.ceil(total / page_size),
-        'page_size': page_size,
-        'data':      data,
+        'success':     True,
+        'account':     acc.name,
+        # COUNT sólo en la primera página
+        'total':       qs.count() if after is None else None,
+        'page_size':   page_size,
+        'has_more':    has_more,
+        'next_cursor': _encode_cursor(last['hora_inicio'], last['id']) if has_more else None,
+        'data':        [_export_row(v, cols, acc.name) for v in rows],
     })
@@ -191,10 +191,7 @@ def add_money(request, game_id):
 @login_required
 @require_POST
 def export_to_analyst(request, game_id):
-    import uuid as _uuid
-    import pickle, base64
     import pandas as pd
-    from analyst.models import StoredDataset
 
     game = get_object_or_404(Game, pk=game_id, created_by=request.user)
 
@@ -241,19 +238,13 @@ def export_to_analyst(request, game_id):
     if not rows:
         return JsonResponse({'success': False, 'error': 'El mapa está vacío'}, status=400)
 
-    import pandas as pd
     df = pd.DataFrame(rows)
-    blob = base64.b64encode(pickle.dumps(df)).decode('utf-8')
-    dataset_id = _uuid.uuid4()
-    cache_key  = f'stored_dataset_{dataset_id}'
 
-    from analyst.models import StoredDataset
-    ds = StoredDataset.objects.create(
-        id=dataset_id, name=f'SimCity — {game.name}',
+    from analyst.services.dataset_store import create_dataset
+    ds = create_dataset(
+        df, name=f'SimCity — {game.name}',
         description=f'Exportado desde SimCity · partida #{game.id} · {len(rows)} tiles · ${game.money} fondos',
-        cache_key=cache_key, rows=len(df), col_count=len(df.columns),
-        columns=list(df.columns), dtype_map={c: str(df[c].dtype) for c in df.columns},
-        source_file=f'simcity/game/{game.id}', data_blob=blob, created_by=request.user,
+        source_file=f'simcity/game/{game.id}', user=request.user,
     )
     return JsonResponse({
         'success': True, 'dataset_id': str(ds.id),